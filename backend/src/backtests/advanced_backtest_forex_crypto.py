@@ -16,6 +16,8 @@ import requests
 import time
 import yfinance as yf
 
+from perf_metrics import performance
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -540,8 +542,7 @@ class AdvancedBacktest:
             
             # Risk metrics
             returns = trades_df['pnl_pct'].values
-            sharpe_ratio = self.calculate_sharpe(returns)
-            sortino_ratio = self.calculate_sortino(returns)
+            sharpe_ratio, sortino_ratio = self.risk_ratios(returns)
             max_drawdown = self.calculate_max_drawdown(trades_df)
             
             # Trade statistics
@@ -659,21 +660,25 @@ class AdvancedBacktest:
         
         return df
     
+    def risk_ratios(self, returns, risk_free_rate=0.02):
+        """Annualised (Sharpe, Sortino) of percentage trade returns, from one metrics pass"""
+        if len(returns) < 2:
+            return 0, 0
+        excess = risk_free_rate / 252 * 100  # Convert to percentage
+        stats = performance(returns, risk_free=excess, periods_per_year=252)
+        sortino = stats['sortino']
+        if not stats['downside']:
+            # No return below the risk-free rate: downside std is taken as 1
+            sortino = np.mean(returns - excess) * np.sqrt(252)
+        return stats['sharpe'], sortino
+    
     def calculate_sharpe(self, returns, risk_free_rate=0.02):
         """Calculate Sharpe ratio"""
-        if len(returns) < 2:
-            return 0
-        excess_returns = returns - (risk_free_rate / 252 * 100)  # Convert to percentage
-        return np.mean(excess_returns) / np.std(excess_returns) * np.sqrt(252) if np.std(excess_returns) > 0 else 0
+        return self.risk_ratios(returns, risk_free_rate)[0]
     
     def calculate_sortino(self, returns, risk_free_rate=0.02):
         """Calculate Sortino ratio (downside risk only)"""
-        if len(returns) < 2:
-            return 0
-        excess_returns = returns - (risk_free_rate / 252 * 100)
-        downside_returns = excess_returns[excess_returns < 0]
-        downside_std = np.std(downside_returns) if len(downside_returns) > 0 else 1
-        return np.mean(excess_returns) / downside_std * np.sqrt(252) if downside_std > 0 else 0
+        return self.risk_ratios(returns, risk_free_rate)[1]
     
     def calculate_max_drawdown(self, trades_df):
         """Calculate maximum drawdown"""
@@ -1,14 +1,18 @@
-﻿import heapq
-import time
-from collections import defaultdict
+﻿from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 
-import ccxt
 import numpy as np
 import pandas as pd
 
 import multi_strategy_paper_trading as mst
+from bulk_downloader import bulk_download
+from indicators import bollinger, cci, macd, rsi
+from mtf import MTFEngine
+from order_ladder import OrderLadder, blend
+from ohlcv_store import OHLCVStore
+from replay_exchange import create_exchange
 
 BASE_TIMEFRAME = "5m"
 DAYS_TO_FETCH = 365
@@ -24,6 +28,16 @@ PAIRS = [
     "PEPE/USDT:USDT",
 ]
 
+# "incremental": strategy types with a builder in SIGNAL_ARRAYS (or mst.SIGNAL_ARRAYS) are evaluated
+# once per pair over the whole timeline; a builder that disagrees with SIGNAL_FUNCTIONS on the
+# SIGNAL_CHECKS sampled bars is dropped. The other types, and every type in "prefix" mode, call
+# SIGNAL_FUNCTIONS on each bar with the full history up to it.
+SIGNAL_MODE = "incremental"
+SIGNAL_CHECKS = 32
+# Opt-in cap on the rows of every timeframe a signal function sees (500 is the live bots' fetch
+# window). Truncating changes the numbers of long-warmup indicators, so None keeps the full prefix.
+SIGNAL_HISTORY_BARS: Optional[int] = None
+
 mst.STARTING_BALANCE = 100.0
 mst.ORDER_SIZE_USD = 5.0
 mst.LEVERAGE = 4
@@ -154,75 +168,95 @@ def pair_to_filename(pair: str) -> str:
 
 
 def fetch_pair_dataframe(exchange, pair: str, timeframe: str, days: int, cache_dir: Path) -> pd.DataFrame:
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    cache_file = cache_dir / f"{pair_to_filename(pair)}_{timeframe}_{days}d.csv"
-    if cache_file.exists():
-        cached = pd.read_csv(cache_file, parse_dates=["timestamp"], index_col="timestamp")
+    store = OHLCVStore(cache_dir)
+    if store.exists(exchange.id, pair, timeframe):
+        cached = store.read_frame(exchange.id, pair, timeframe)
         if not cached.empty and (cached.index[-1] - cached.index[0]).days >= days - 5:
-            return cached
+            return cached[cached.index >= cached.index[-1] - pd.Timedelta(days=days)]
     since = int((datetime.utcnow() - timedelta(days=days + 7)).timestamp() * 1000)
-    end = exchange.milliseconds()
-    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
-    all_rows = []
-    while since < end:
-        try:
-            batch = exchange.fetch_ohlcv(pair, timeframe, since=since, limit=1000)
-        except Exception as exc:
-            print(f"[warn] fetch error for {pair}: {exc}")
-            break
-        if not batch:
-            break
-        all_rows.extend(batch)
-        last_ts = batch[-1][0]
-        since = last_ts + timeframe_ms
-        if last_ts >= end - timeframe_ms:
-            break
-        time.sleep(exchange.rateLimit / 1000)
-    if not all_rows:
-        print(f"[warn] no data pulled for {pair}")
-        return pd.DataFrame()
-    df = pd.DataFrame(all_rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
-    df.drop_duplicates(subset="timestamp", keep="last", inplace=True)
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df.set_index("timestamp", inplace=True)
-    df.sort_index(inplace=True)
-    df = df[~df.index.duplicated(keep="last")]
-    df = df.tz_localize(None)
+    try:
+        # Only closed candles are stored; whatever arrived before an error is kept
+        store.sync(exchange, pair, timeframe, since, pause=exchange.rateLimit / 1000)
+    except Exception as exc:
+        print(f"[warn] fetch error for {pair}: {exc}")
+    df = store.read_frame(exchange.id, pair, timeframe)
     if df.empty:
+        print(f"[warn] no data pulled for {pair}")
         return df
     cutoff = df.index[-1] - pd.Timedelta(days=days)
-    df = df[df.index >= cutoff]
-    df.to_csv(cache_file)
-    return df
+    return df[df.index >= cutoff]
 
 
 class PairDataView:
-    def __init__(self, cache: "PairDataCache", timestamp: pd.Timestamp):
+    def __init__(self, cache: "PairDataCache", timestamp: pd.Timestamp, history: Optional[int] = None,
+                 position: Optional[int] = None):
         self.cache = cache
         self.timestamp = timestamp
+        self.history = history
+        self.position = cache.engine.position(timestamp) if position is None else position
 
     def get(self, timeframe: str) -> pd.DataFrame:
+        # Higher timeframes only expose buckets that had closed by this bar
         frame = self.cache.ensure(timeframe)
-        if frame.empty:
-            return frame
-        return frame.loc[: self.timestamp]
+        if frame.empty or self.position < 0:
+            return frame.iloc[:0]
+        end = self.cache.engine.index_map(timeframe)[self.position] + 1
+        start = 0 if self.history is None else max(0, end - self.history)
+        return frame.iloc[start:end]
+
+    def indicator(self, timeframe: str, key, compute) -> float:
+        """Value of ``compute(frame)`` on the last closed ``timeframe`` bar (computed once per series)"""
+        if self.position < 0:
+            return np.nan
+        return float(self.cache.engine.indicator(timeframe, key, compute)[self.position])
 
 
 class PairDataCache:
     def __init__(self, base_df: pd.DataFrame, base_timeframe: str):
         self.base_timeframe = base_timeframe
+        base_df = base_df.sort_index()
+        self.engine = MTFEngine(base_df, base_timeframe)
         self.frames = {base_timeframe: base_df}
 
     def ensure(self, timeframe: str) -> pd.DataFrame:
         if timeframe not in self.frames:
-            if timeframe == self.base_timeframe:
-                self.frames[timeframe] = self.frames[self.base_timeframe]
-            else:
-                self.frames[timeframe] = mst.resample_dataframe(self.frames[self.base_timeframe], timeframe)
+            self.frames[timeframe] = self.engine.frame(timeframe)
         return self.frames[timeframe]
 
-    def view(self, timestamp: pd.Timestamp) -> PairDataView:
-        return PairDataView(self, timestamp)
+    def view(self, timestamp: pd.Timestamp, history: Optional[int] = None,
+             position: Optional[int] = None) -> PairDataView:
+        return PairDataView(self, timestamp, history, position)
+
+
+BAR_DTYPE = np.dtype([("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8"), ("volume", "f8")])
+
+
+class MergedTimeline:
+    """Union timeline of all pairs with (T x pairs) bar and base-position matrices"""
+
+    def __init__(self, market_data: dict[str, pd.DataFrame]):
+        # Pairs sharing a timestamp are processed in name order, as the old heap merge did
+        frames = {pair: df.sort_index() for pair, df in sorted(market_data.items()) if not df.empty}
+        self.pairs = list(frames)
+        stamps = {pair: df.index.as_unit("ns").asi8 for pair, df in frames.items()}
+        self.times = np.unique(np.concatenate(list(stamps.values()))) if frames else np.empty(0, dtype=np.int64)
+        self.timestamps = pd.to_datetime(self.times)
+        self.bars = np.zeros((len(self.times), len(self.pairs)), dtype=BAR_DTYPE)
+        self.positions = np.full((len(self.times), len(self.pairs)), -1, dtype=np.int64)
+        for column, (pair, df) in enumerate(frames.items()):
+            rows = np.searchsorted(self.times, stamps[pair])
+            self.positions[rows, column] = np.arange(len(df))
+            for field in BAR_DTYPE.names:
+                self.bars[field][rows, column] = df[field].to_numpy(dtype=np.float64)
+        self.present = self.positions >= 0
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def active_columns(self) -> list[list[int]]:
+        """Per timeline row, the columns of the pairs with a bar there"""
+        everyone = list(range(len(self.pairs)))
+        return [everyone if row.all() else np.flatnonzero(row).tolist() for row in self.present]
 
 
 def compute_max_drawdown(equity_series: pd.Series) -> float:
@@ -233,11 +267,87 @@ def compute_max_drawdown(equity_series: pd.Series) -> float:
     return float(drawdowns.min())
 
 
+# ───────────────────────  signal builders  ───────────────────────
+# builder(cache, params) -> bool per base bar; entry i may only use buckets closed by base bar i,
+# which MTFEngine.indicator guarantees for causal indicators
+def _multi_rsi_signals(cache: PairDataCache, params: dict) -> np.ndarray:
+    """RSI below ``threshold`` on at least ``min_confirmations`` of ``timeframes``"""
+    length = params.get("length", 14)
+    timeframes = params.get("timeframes", [])
+    votes = np.zeros(len(cache.engine.timestamps), dtype=np.int64)
+    for timeframe in timeframes:
+        values = cache.engine.indicator(timeframe, ("rsi", length), lambda frame: rsi(frame["close"], length))
+        votes += values < params.get("threshold", 30)
+    return votes >= params.get("min_confirmations", len(timeframes))
+
+
+def _rating_signals(cache: PairDataCache, params: dict, oscillators: str) -> np.ndarray:
+    """3RSI / 3MACD rating: every enabled, warmed-up indicator on ``timeframe`` is under its long threshold"""
+    engine = cache.engine
+    timeframe = params.get("timeframe", cache.base_timeframe)
+    rating = np.zeros(len(engine.timestamps), dtype=np.int64)
+    counted = np.zeros(len(engine.timestamps), dtype=np.int64)
+
+    def vote(values: np.ndarray, passed: np.ndarray) -> None:
+        valid = ~np.isnan(values)
+        counted[:] += valid
+        rating[:] += valid & passed
+
+    for cfg in params.get(oscillators, {}).values():
+        if not cfg.get("enabled"):
+            continue
+        if oscillators == "rsi_params":
+            period = cfg["long_period"]
+            values = engine.indicator(timeframe, ("rsi", period), lambda frame: rsi(frame["close"], period))
+        else:
+            periods = (cfg["fast_period"], cfg["slow_period"], cfg["signal_period"])
+            values = engine.indicator(timeframe, ("macd",) + periods, lambda frame: macd(frame["close"], *periods)[0])
+        vote(values, values < cfg["long_threshold"])
+    for cfg in params.get("cci_params", {}).values():
+        if not cfg.get("enabled"):
+            continue
+        period = cfg["long_period"]
+        values = engine.indicator(timeframe, ("cci", period),
+                                  lambda frame: cci(frame["high"], frame["low"], frame["close"], period))
+        vote(values, values < cfg["long_threshold"])
+    bb = params.get("bb_params", {})
+    if bb.get("enabled"):
+        period, deviation = bb["period"], bb["deviation"]
+        lower = engine.indicator(timeframe, ("bb_lower", period, deviation),
+                                 lambda frame: bollinger(frame["close"], period, deviation)[2])
+        close = engine.indicator(timeframe, "close", lambda frame: frame["close"])
+        vote(lower, close < lower)
+    return (counted > 0) & (rating == counted)
+
+
+def _triple_rsi_signals(cache: PairDataCache, params: dict) -> np.ndarray:
+    return _rating_signals(cache, params, "rsi_params")
+
+
+def _triple_macd_signals(cache: PairDataCache, params: dict) -> np.ndarray:
+    return _rating_signals(cache, params, "macd_params")
+
+
+SIGNAL_ARRAYS = {
+    "multi_rsi": _multi_rsi_signals,
+    "triple_rsi": _triple_rsi_signals,
+    "triple_macd": _triple_macd_signals,
+}
+
+
 class BacktestEngine:
-    def __init__(self, pairs: list[str], strategy_configs: list[mst.StrategyConfig], base_timeframe: str):
+    def __init__(self, pairs: list[str], strategy_configs: list[mst.StrategyConfig], base_timeframe: str,
+                 signal_mode: str = SIGNAL_MODE, history_bars: Optional[int] = SIGNAL_HISTORY_BARS):
+        if signal_mode not in ("incremental", "prefix"):
+            raise ValueError(f"Unknown signal mode {signal_mode!r}: expected 'incremental' or 'prefix'")
+        if history_bars is not None and history_bars < 1:
+            raise ValueError(f"history_bars must be a positive number of rows or None, got {history_bars!r}")
         self.pairs = pairs
         self.strategy_configs = strategy_configs
         self.base_timeframe = base_timeframe
+        self.signal_mode = signal_mode
+        self.history_bars = history_bars
+        self.signal_arrays: dict[tuple[str, str], np.ndarray] = {}
         self.required_timeframes = self._collect_required_timeframes()
         self.strategies: dict[str, mst.StrategyState] = {}
         self.latest_prices = {pair: np.nan for pair in pairs}
@@ -255,6 +365,8 @@ class BacktestEngine:
             )
             for pair in pairs:
                 state.ensure_pair(pair)
+                # Pending entries sit in a price-sorted ladder instead of a list of OrderState
+                state.open_orders[pair] = OrderLadder("buy")
                 state.last_signals[pair] = pd.Timestamp("1970-01-01")
             self.strategies[cfg.name] = state
             self.equity_history[cfg.name] = []
@@ -301,42 +413,36 @@ class BacktestEngine:
                     position.unrealized_pnl = 0.0
             state.equity = state.balance + total_unrealized
 
-    def check_order_fills(self, state: mst.StrategyState, pair: str, row: dict, timestamp: pd.Timestamp) -> None:
-        orders = state.open_orders.get(pair, [])
-        if not orders:
+    def check_order_fills(self, state: mst.StrategyState, pair: str, row: np.void, timestamp: pd.Timestamp) -> None:
+        ladder = state.open_orders.get(pair)
+        if not ladder:
             return
-        low_price = row["low"]
-        filled_orders = []
-        for order in orders:
-            if order.filled:
-                continue
-            if low_price <= order.price:
-                if self.calculate_available_collateral(state) < order.collateral:
-                    continue
-                state.total_collateral_used += order.collateral
-                position = state.positions[pair]
-                total_cost = position.entry_price * position.size + order.price * order.quantity
-                total_size = position.size + order.quantity
-                position.entry_price = total_cost / total_size if total_size > 0 else order.price
-                position.size = total_size
-                position.collateral_used += order.collateral
-                order.filled = True
-                filled_orders.append(order)
-                state.trade_history.append(
-                    {
-                        "timestamp": timestamp.to_pydatetime(),
-                        "pair": pair,
-                        "strategy": state.config.name,
-                        "side": "buy",
-                        "quantity": order.quantity,
-                        "price": order.price,
-                        "collateral": order.collateral,
-                        "leverage": mst.LEVERAGE,
-                        "type": "entry",
-                    }
-                )
-        if filled_orders:
-            state.open_orders[pair] = [order for order in orders if not order.filled]
+        # Every rung the low crossed, capped by the collateral still free (same rule as calculate_available_collateral)
+        max_collateral = mst.STARTING_BALANCE * mst.MAX_TOTAL_EXPOSURE
+        filled = ladder.fill(row["low"], max_collateral, state.total_collateral_used)
+        if filled.stop == filled.start:
+            return
+        collateral = float(ladder.collateral[filled].sum())
+        state.total_collateral_used += collateral
+        position = state.positions[pair]
+        position.size, position.entry_price = blend(position.size, position.entry_price,
+                                                    ladder.price[filled], ladder.quantity[filled])
+        position.collateral_used += collateral
+        for order in ladder.tags[filled]:
+            order.filled = True
+            state.trade_history.append(
+                {
+                    "timestamp": timestamp.to_pydatetime(),
+                    "pair": pair,
+                    "strategy": state.config.name,
+                    "side": "buy",
+                    "quantity": order.quantity,
+                    "price": order.price,
+                    "collateral": order.collateral,
+                    "leverage": mst.LEVERAGE,
+                    "type": "entry",
+                }
+            )
 
     def close_position(self, state: mst.StrategyState, pair: str, size: float, exit_price: float, reason: str, timestamp: pd.Timestamp) -> None:
         position = state.positions[pair]
@@ -364,9 +470,9 @@ class BacktestEngine:
                     }
         )
         state.positions[pair] = mst.PositionState()
-        state.open_orders[pair] = []
+        state.open_orders[pair].cancel()
 
-    def check_take_profit(self, state: mst.StrategyState, pair: str, row: dict, timestamp: pd.Timestamp) -> None:
+    def check_take_profit(self, state: mst.StrategyState, pair: str, row: np.void, timestamp: pd.Timestamp) -> None:
         position = state.positions[pair]
         if position.size <= 0 or position.entry_price <= 0:
             return
@@ -408,6 +514,7 @@ class BacktestEngine:
         orders_to_place = min(state.config.max_orders, max_by_collateral, max_by_power)
         if orders_to_place <= 0:
             return
+        orders = []
         for i in range(orders_to_place):
             limit_price = current_price * (1 - state.config.step_perc * i)
             if limit_price <= 0:
@@ -425,7 +532,14 @@ class BacktestEngine:
                 timestamp=timestamp.to_pydatetime(),
                 filled=False,
             )
-            state.open_orders[pair].append(order)
+            orders.append(order)
+        if orders:
+            state.open_orders[pair].place(
+                [order.price for order in orders],
+                [order.quantity for order in orders],
+                [order.collateral for order in orders],
+                tags=orders,
+            )
 
     def _ready_for_entry(self, state: mst.StrategyState, pair: str, timestamp: pd.Timestamp) -> bool:
         position = state.positions[pair]
@@ -439,7 +553,9 @@ class BacktestEngine:
         elapsed = (timestamp.to_pydatetime() - last_time).total_seconds()
         return elapsed >= state.config.cooldown
 
-    def process_timestamp(self, timestamp: pd.Timestamp, snapshot: dict[str, dict], pair_caches: dict[str, PairDataCache]) -> None:
+    def process_timestamp(self, timestamp: pd.Timestamp, snapshot: dict[str, np.void], pair_caches: dict[str, PairDataCache],
+                          positions: Optional[dict[str, int]] = None) -> None:
+        """One timeline step; ``snapshot`` rows are BAR_DTYPE records (open, high, low, close, volume)"""
         for pair, row in snapshot.items():
             self.latest_prices[pair] = row["close"]
         for state in self.strategies.values():
@@ -454,12 +570,19 @@ class BacktestEngine:
             for pair, row in snapshot.items():
                 if not self._ready_for_entry(state, pair, timestamp):
                     continue
-                pair_data = pair_caches[pair].view(timestamp)
-                base_df = pair_data.get(self.base_timeframe)
-                if base_df is None or base_df.empty or len(base_df) < 50:
-                    continue
-                signal_result = signal_func(pair, pair_data, state.config.params)
-                if signal_result.get("signal"):
+                position = positions.get(pair) if positions is not None else None
+                pair_data = pair_caches[pair].view(timestamp, self.history_bars, position)
+                signals = self.signal_arrays.get((state.config.name, pair))
+                if signals is not None:
+                    if pair_data.position < 49:
+                        continue
+                    fired = bool(signals[pair_data.position])
+                else:
+                    base_df = pair_data.get(self.base_timeframe)
+                    if base_df is None or base_df.empty or len(base_df) < 50:
+                        continue
+                    fired = bool(signal_func(pair, pair_data, state.config.params).get("signal"))
+                if fired:
                     state.last_signals[pair] = timestamp
                     self.place_limit_orders(state, pair, row["close"], timestamp)
         self.update_unrealized_pnl()
@@ -467,51 +590,60 @@ class BacktestEngine:
             self.equity_history[name].append((timestamp, state.equity))
             self.max_collateral[name] = max(self.max_collateral[name], state.total_collateral_used)
 
+    def precompute_signals(self, pair_caches: dict[str, PairDataCache]) -> dict[tuple[str, str], np.ndarray]:
+        """Whole-timeline signal arrays for strategy types with a vectorised builder (incremental mode)"""
+        if self.signal_mode != "incremental":
+            return {}
+        builders = {**SIGNAL_ARRAYS, **getattr(mst, "SIGNAL_ARRAYS", {})}
+        arrays = {}
+        for cfg in self.strategy_configs:
+            builder = builders.get(cfg.strategy_type)
+            signal_func = mst.SIGNAL_FUNCTIONS.get(cfg.strategy_type)
+            if builder is None or signal_func is None:
+                continue
+            for pair, cache in pair_caches.items():
+                signals = np.asarray(builder(cache, cfg.params), dtype=bool)
+                mismatch = self._first_mismatch(signal_func, pair, cache, cfg.params, signals)
+                if mismatch is not None:
+                    print(f"[warn] {cfg.name} {pair}: {cfg.strategy_type} builder disagrees with SIGNAL_FUNCTIONS "
+                          f"at {cache.engine.base.index[mismatch]}, calling it per bar")
+                    continue
+                arrays[(cfg.name, pair)] = signals
+        return arrays
+
+    def _first_mismatch(self, signal_func, pair: str, cache: PairDataCache, params: dict,
+                        signals: np.ndarray) -> Optional[int]:
+        """First sampled bar where ``signals`` differs from the per-bar call (fired bars and an even spread)"""
+        eligible = np.arange(49, len(signals))
+        fired = eligible[signals[49:]]
+        picks = []
+        for bars in (fired, eligible):
+            if len(bars):
+                picks.append(bars[np.linspace(0, len(bars) - 1, min(len(bars), SIGNAL_CHECKS)).astype(np.int64)])
+        for position in np.unique(np.concatenate(picks)) if picks else ():
+            view = cache.view(cache.engine.base.index[position], self.history_bars, int(position))
+            # The per-bar path skips views shorter than 50 base rows (only possible with history_bars)
+            expected = len(view.get(self.base_timeframe)) >= 50 and bool(signal_func(pair, view, params).get("signal"))
+            if expected != signals[position]:
+                return int(position)
+        return None
+
     def run(self, market_data: dict[str, pd.DataFrame]) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         pair_caches = {pair: PairDataCache(df, self.base_timeframe) for pair, df in market_data.items()}
         for cache in pair_caches.values():
             for tf in self.required_timeframes:
                 cache.ensure(tf)
-        heap: list[tuple[int, str]] = []
-        iterators = {}
-        for pair, df in market_data.items():
-            df_sorted = df.sort_index()
-            iterator = df_sorted.itertuples()
-            try:
-                first = next(iterator)
-            except StopIteration:
-                continue
-            iterators[pair] = {"iterator": iterator, "current": first}
-            heapq.heappush(heap, (int(first.Index.value), pair))
-        if not heap:
+        self.signal_arrays = self.precompute_signals(pair_caches)
+        timeline = MergedTimeline(market_data)
+        if not len(timeline):
             raise RuntimeError("No market data available for backtest.")
-        while heap:
-            ts_value, pair = heapq.heappop(heap)
-            timestamp = pd.to_datetime(ts_value).tz_localize(None)
-            snapshot_rows = {pair: iterators[pair]["current"]}
-            ready_pairs = [pair]
-            while heap and heap[0][0] == ts_value:
-                _, other_pair = heapq.heappop(heap)
-                snapshot_rows[other_pair] = iterators[other_pair]["current"]
-                ready_pairs.append(other_pair)
-            snapshot = {}
-            for pr, row in snapshot_rows.items():
-                snapshot[pr] = {
-                    "open": float(row.open),
-                    "high": float(row.high),
-                    "low": float(row.low),
-                    "close": float(row.close),
-                    "volume": float(row.volume),
-                }
-            self.process_timestamp(timestamp, snapshot, pair_caches)
-            for pr in ready_pairs:
-                iterator_info = iterators[pr]
-                try:
-                    nxt = next(iterator_info["iterator"])
-                    iterator_info["current"] = nxt
-                    heapq.heappush(heap, (int(nxt.Index.value), pr))
-                except StopIteration:
-                    iterator_info["current"] = None
+        pairs = timeline.pairs
+        # Snapshot rows are record views into the bar matrix, not fresh dicts
+        for t, columns in enumerate(timeline.active_columns()):
+            bars = timeline.bars[t]
+            snapshot = {pairs[j]: bars[j] for j in columns}
+            positions = {pairs[j]: int(timeline.positions[t, j]) for j in columns}
+            self.process_timestamp(timeline.timestamps[t], snapshot, pair_caches, positions)
         summary = self.build_metrics()
         trades = self.build_trades_dataframe()
         equity = self.build_equity_dataframe()
@@ -613,12 +745,18 @@ def export_to_excel(path: Path, summary: pd.DataFrame, trades: pd.DataFrame, equ
 
 
 def main() -> None:
-    exchange = ccxt.bitget({"enableRateLimit": True, "options": {"defaultType": "swap"}})
+    exchange = create_exchange("bitget", {"enableRateLimit": True, "options": {"defaultType": "swap"}})
     try:
         exchange.load_markets()
     except Exception as exc:
         print(f"[error] failed to load markets: {exc}")
         return
+    since = int((datetime.utcnow() - timedelta(days=DAYS_TO_FETCH + 7)).timestamp() * 1000)
+    try:
+        bulk_download(exchange.id, [(pair, BASE_TIMEFRAME, since) for pair in PAIRS], DATA_DIR,
+                      config={"options": {"defaultType": "swap"}})
+    except Exception as exc:
+        print(f"[warn] bulk download failed, fetching pairs one by one: {exc}")
     market_data: dict[str, pd.DataFrame] = {}
     for pair in PAIRS:
         print(f"[info] downloading {pair} {BASE_TIMEFRAME} data...")
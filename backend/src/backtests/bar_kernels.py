@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BAR-LOOP KERNELS
+=====================================
+Path-dependent strategy state machines over plain NumPy arrays.
+
+The entry / exit conditions that do not depend on position state are
+computed vectorised by the caller; the kernel only walks the bars to
+apply them.  Numba compiles the kernel when it is installed, otherwise
+the same function runs as plain Python over lists (still far cheaper
+than per-bar pandas ``.iloc`` access).
+=====================================
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pure-NumPy fallback
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Exit reason codes written by the kernels
+EXIT_NONE = 0
+EXIT_STOP_LOSS = 1
+EXIT_TP3 = 2
+EXIT_TP2 = 3
+EXIT_TP1 = 4
+EXIT_MA_CROSS = 5
+EXIT_END_OF_DATA = 6
+
+EXIT_REASONS = {
+    EXIT_STOP_LOSS: "Stop Loss",
+    EXIT_TP3: "Take Profit 3",
+    EXIT_TP2: "Take Profit 2",
+    EXIT_TP1: "Take Profit 1",
+    EXIT_MA_CROSS: "MA Cross Exit",
+    EXIT_END_OF_DATA: "End of Data",
+}
+
+
+@njit(cache=True)
+def _multi_tp_kernel(close, valid, entry, cross_exit, start_idx, initial_capital,
+                     risk_fraction, stop_loss, tp1, tp2, tp3,
+                     equity_curve, trade_entry_idx, trade_exit_idx, trade_reason):
+    """
+    Long-only state machine: signal entry, SL / 3-level TP / MA-cross exit.
+    Fills the preallocated output arrays and returns
+    (n_trades, equity, days_in_market, max_consecutive_wins,
+     max_consecutive_losses, open_entry_idx, open_quantity, open_cost).
+    """
+    n = len(close)
+    equity = initial_capital
+    equity_curve[0] = equity
+    pos = 1
+
+    in_position = False
+    entry_idx = -1
+    entry_price = 0.0
+    quantity = 0.0
+    cost = 0.0
+
+    n_trades = 0
+    days_in_market = 0
+    consecutive_wins = 0
+    consecutive_losses = 0
+    max_consecutive_wins = 0
+    max_consecutive_losses = 0
+
+    for i in range(start_idx, n):
+        price = close[i]
+
+        if not valid[i]:
+            equity_curve[pos] = equity
+            pos += 1
+            continue
+
+        if in_position:
+            days_in_market += 1
+            position_value = quantity * price
+            equity_curve[pos] = equity + position_value - cost
+            pos += 1
+
+            pnl_pct = (price - entry_price) / entry_price
+            reason = EXIT_NONE
+            if pnl_pct <= -stop_loss:
+                reason = EXIT_STOP_LOSS
+            elif pnl_pct >= tp3:
+                reason = EXIT_TP3
+            elif pnl_pct >= tp2:
+                reason = EXIT_TP2
+            elif pnl_pct >= tp1:
+                reason = EXIT_TP1
+            elif cross_exit[i]:
+                reason = EXIT_MA_CROSS
+
+            if reason != EXIT_NONE:
+                equity += position_value - cost
+
+                trade_entry_idx[n_trades] = entry_idx
+                trade_exit_idx[n_trades] = i
+                trade_reason[n_trades] = reason
+                n_trades += 1
+
+                if pnl_pct > 0:
+                    consecutive_wins += 1
+                    consecutive_losses = 0
+                    if consecutive_wins > max_consecutive_wins:
+                        max_consecutive_wins = consecutive_wins
+                else:
+                    consecutive_losses += 1
+                    consecutive_wins = 0
+                    if consecutive_losses > max_consecutive_losses:
+                        max_consecutive_losses = consecutive_losses
+
+                in_position = False
+                equity_curve[pos - 1] = equity
+        else:
+            equity_curve[pos] = equity
+            pos += 1
+
+            if entry[i]:
+                qty = equity * risk_fraction / price
+                position_cost = qty * price
+                if position_cost <= equity:
+                    in_position = True
+                    entry_idx = i
+                    entry_price = price
+                    quantity = qty
+                    cost = position_cost
+
+    if not in_position:
+        entry_idx = -1
+
+    return (n_trades, equity, days_in_market, max_consecutive_wins,
+            max_consecutive_losses, entry_idx, quantity, cost)
+
+
+def run_multi_tp_long(close: np.ndarray, valid: np.ndarray, entry: np.ndarray,
+                      cross_exit: np.ndarray, start_idx: int, initial_capital: float,
+                      stop_loss: float, tp1: float, tp2: float, tp3: float,
+                      risk_fraction: float = 0.02) -> Dict:
+    """
+    Run the multi-TP long state machine and return its raw outputs:
+    equity curve (without the end-of-data close-out), trade entry/exit bar
+    indices and exit reason codes, plus the still-open position if any.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    n = len(close)
+    start_idx = min(max(int(start_idx), 0), n)
+
+    equity_curve = np.empty(n - start_idx + 1, dtype=np.float64)
+    trade_entry_idx = np.empty(n, dtype=np.int64)
+    trade_exit_idx = np.empty(n, dtype=np.int64)
+    trade_reason = np.empty(n, dtype=np.int64)
+
+    if NUMBA_AVAILABLE:
+        inputs = (close, np.ascontiguousarray(valid, dtype=np.bool_),
+                  np.ascontiguousarray(entry, dtype=np.bool_),
+                  np.ascontiguousarray(cross_exit, dtype=np.bool_))
+    else:
+        # Python lists index much faster than ndarrays in an interpreted loop
+        inputs = (close.tolist(), np.asarray(valid, dtype=bool).tolist(),
+                  np.asarray(entry, dtype=bool).tolist(),
+                  np.asarray(cross_exit, dtype=bool).tolist())
+
+    (n_trades, equity, days_in_market, max_wins, max_losses,
+     open_idx, open_quantity, open_cost) = _multi_tp_kernel(
+        *inputs, start_idx, float(initial_capital), float(risk_fraction),
+        float(stop_loss), float(tp1), float(tp2), float(tp3),
+        equity_curve, trade_entry_idx, trade_exit_idx, trade_reason)
+
+    return {
+        'equity': equity,
+        'equity_curve': equity_curve,
+        'entry_idx': trade_entry_idx[:n_trades],
+        'exit_idx': trade_exit_idx[:n_trades],
+        'exit_reason': trade_reason[:n_trades],
+        'days_in_market': days_in_market,
+        'max_consecutive_wins': max_wins,
+        'max_consecutive_losses': max_losses,
+        'open_entry_idx': open_idx,
+        'open_quantity': open_quantity,
+        'open_cost': open_cost,
+    }
+
+
+def cross_above(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    """fast[i] > slow[i] and fast[i-1] <= slow[i-1] (False on bar 0 and on NaN)"""
+    out = np.zeros(len(fast), dtype=bool)
+    out[1:] = (fast[1:] > slow[1:]) & (fast[:-1] <= slow[:-1])
+    return out
+
+
+def cross_below(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    """fast[i] < slow[i] and fast[i-1] >= slow[i-1] (False on bar 0 and on NaN)"""
+    out = np.zeros(len(fast), dtype=bool)
+    out[1:] = (fast[1:] < slow[1:]) & (fast[:-1] >= slow[:-1])
+    return out
+
+
+def build_trades(index, close: np.ndarray, entry_idx: np.ndarray, exit_idx: np.ndarray,
+                 exit_reason: np.ndarray, initial_capital: float,
+                 risk_fraction: float = 0.02) -> List[Dict]:
+    """Expand kernel trade indices into the trade dicts the result builders expect"""
+    entry_dates = index[entry_idx].tolist()
+    exit_dates = index[exit_idx].tolist()
+    durations = np.maximum(1, (index[exit_idx] - index[entry_idx]).days).tolist()
+
+    trades = []
+    equity = initial_capital
+    for k, (e_idx, x_idx, reason) in enumerate(zip(entry_idx.tolist(), exit_idx.tolist(),
+                                                   exit_reason.tolist())):
+        entry_price = close[e_idx]
+        exit_price = close[x_idx]
+        quantity = equity * risk_fraction / entry_price
+        cost = quantity * entry_price
+        trade_pnl = quantity * exit_price - cost
+        equity += trade_pnl
+
+        trades.append({
+            'entry_date': entry_dates[k],
+            'exit_date': exit_dates[k],
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'pnl_pct': (exit_price - entry_price) / entry_price * 100,
+            'pnl_amount': trade_pnl,
+            'duration_days': durations[k],
+            'exit_reason': EXIT_REASONS[reason]
+        })
+    return trades
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BATCHED PARAMETER EVALUATION
+=====================================
+Evaluate many parameter sets of one strategy on one DataFrame in a single
+pass:
+
+- every distinct indicator (e.g. SMA(20)) is computed once per DataFrame
+- signal logic is broadcast over a 2-D (combos x bars) array, with combos
+  that share the same indicator periods collapsed onto one signal row
+- only the path-dependent position walk runs per combination
+=====================================
+"""
+
+from dataclasses import asdict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bar_kernels import run_multi_tp_long
+
+# Strategies with a batched implementation
+BATCHED_STRATEGIES = ('template_trailing',)
+
+# Parameters that are integers in the grid but travel through the float matrix
+INTEGER_PARAMS = {
+    'template_trailing': ('fast_ma_period', 'slow_ma_period', 'ema_period'),
+}
+
+# Max combos broadcast at once; bounds the (combos x bars) working set
+CHUNK_SIZE = 256
+
+
+class IndicatorBank:
+    """Per-DataFrame store that computes each (indicator, params) only once"""
+
+    def __init__(self, df: pd.DataFrame, indicators):
+        self.df = df
+        self.indicators = indicators
+        self._arrays: Dict[Tuple, np.ndarray] = {}
+
+    def _get(self, key: Tuple, compute: Callable[[], pd.Series]) -> np.ndarray:
+        if key not in self._arrays:
+            self._arrays[key] = np.asarray(compute(), dtype=np.float64)
+        return self._arrays[key]
+
+    def sma(self, period: int, column: str = 'close') -> np.ndarray:
+        return self._get(('sma', column, period), lambda: self.indicators.sma(self.df[column], period))
+
+    def ema(self, period: int, column: str = 'close') -> np.ndarray:
+        return self._get(('ema', column, period), lambda: self.indicators.ema(self.df[column], period))
+
+    def stack(self, name: str, periods: Sequence[int]) -> np.ndarray:
+        """(len(periods) x bars) matrix of one indicator over several periods"""
+        func = getattr(self, name)
+        return np.vstack([func(int(p)) for p in periods])
+
+
+def matrix_params(strategy: str, param_keys: Sequence[str], row: np.ndarray) -> Dict:
+    """Turn one row of a parameter matrix back into the dict form used everywhere else"""
+    int_keys = INTEGER_PARAMS.get(strategy, ())
+    params = {}
+    for key, value in zip(param_keys, row.tolist()):
+        params[key] = int(value) if key in int_keys else value
+    return params
+
+
+def template_trailing_batch(df: pd.DataFrame, param_keys: Sequence[str], param_matrix: np.ndarray,
+                            initial_capital: float, indicators) -> List[Dict]:
+    """
+    Run the template trailing state machine for every row of ``param_matrix``.
+    Returns one ``run_multi_tp_long`` output per row, with the row's
+    ``start_idx`` added.
+    """
+    param_matrix = np.asarray(param_matrix, dtype=np.float64)
+    col = {key: j for j, key in enumerate(param_keys)}
+    bank = IndicatorBank(df, indicators)
+
+    close = df['close'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+    volume_ma = np.asarray(df['volume'].rolling(20).mean(), dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ok = np.where(volume_ma > 0, volume / volume_ma, 1.0) > 1.2
+
+    # Entry / exit masks depend only on the three MA periods
+    periods = param_matrix[:, [col['fast_ma_period'], col['slow_ma_period'], col['ema_period']]].astype(np.int64)
+    unique_periods, signal_row = np.unique(periods, axis=0, return_inverse=True)
+    signal_row = signal_row.reshape(-1)
+    # Matrix rows of each signal row, grouped once (ascending within a group)
+    order = np.argsort(signal_row, kind='stable')
+    combos_by_signal = np.split(order, np.flatnonzero(np.diff(signal_row[order])) + 1)
+
+    fast_ids = np.unique(unique_periods[:, 0], return_inverse=True)
+    slow_ids = np.unique(unique_periods[:, 1], return_inverse=True)
+    ema_ids = np.unique(unique_periods[:, 2], return_inverse=True)
+    fast_all = bank.stack('sma', fast_ids[0])
+    slow_all = bank.stack('sma', slow_ids[0])
+    ema_all = bank.stack('ema', ema_ids[0])
+
+    runs: List[Dict] = [None] * len(param_matrix)
+    for chunk_start in range(0, len(unique_periods), CHUNK_SIZE):
+        rows = slice(chunk_start, chunk_start + CHUNK_SIZE)
+        fast = fast_all[fast_ids[1].reshape(-1)[rows]]
+        slow = slow_all[slow_ids[1].reshape(-1)[rows]]
+        ema = ema_all[ema_ids[1].reshape(-1)[rows]]
+
+        # (signals x bars) broadcasts
+        valid = ~(np.isnan(fast) | np.isnan(slow) | np.isnan(ema))
+        entry = np.zeros_like(valid)
+        entry[:, 1:] = ((fast[:, 1:] > slow[:, 1:]) & (fast[:, :-1] <= slow[:, :-1])
+                        & (close[1:] > ema[:, 1:]) & volume_ok[1:])
+        cross_exit = np.zeros_like(valid)
+        cross_exit[:, 1:] = (fast[:, 1:] < slow[:, 1:]) & (fast[:, :-1] >= slow[:, :-1])
+
+        for local, sig in enumerate(range(chunk_start, min(chunk_start + CHUNK_SIZE, len(unique_periods)))):
+            start_idx = int(unique_periods[sig].max()) + 10
+            for combo in combos_by_signal[sig]:
+                row = param_matrix[combo]
+                run = run_multi_tp_long(
+                    close, valid[local], entry[local], cross_exit[local], start_idx, initial_capital,
+                    row[col['stop_loss_pct']] / 100, row[col['take_profit_1']] / 100,
+                    row[col['take_profit_2']] / 100, row[col['take_profit_3']] / 100
+                )
+                run['start_idx'] = start_idx
+                runs[combo] = run
+
+    return runs
+
+
+def results_table(results: Sequence) -> pd.DataFrame:
+    """One row per combination (rows without a result are dropped), indexed by matrix row"""
+    rows = {i: asdict(r) for i, r in enumerate(results) if r is not None}
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    table.index.name = 'combo'
+    return table
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASYNC BULK OHLCV DOWNLOADER
+=====================================
+Fills the OHLCV store for many (symbol, timeframe) series at once.
+
+- every series is split into page-sized time ranges up front, and all
+  pages of all series are fetched concurrently through ``ccxt.async_support``
+- one shared token bucket paces every request, so a cold start runs at
+  the exchange rate limit instead of one round trip after another
+- pages are merged and written into the store as soon as a series is
+  complete; series that are already current cost no request at all
+- any object with async ``fetch_ohlcv`` plus ``parse_timeframe`` /
+  ``milliseconds`` / ``id`` works, e.g. the fake exchange in
+  ``tests/test_bulk_downloader.py``
+=====================================
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ohlcv_store import OHLCVStore, drop_forming, last_closed_ms
+from replay_exchange import create_exchange
+
+logger = logging.getLogger(__name__)
+
+SeriesKey = Tuple[str, str]
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursts of up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        # The lock makes waiters queue up in order instead of racing for refills
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class BulkDownloader:
+    """Concurrent page fetcher writing into an ``OHLCVStore``"""
+
+    def __init__(self, exchange, store: OHLCVStore, rate: Optional[float] = None,
+                 burst: float = 5, concurrency: int = 32, limit: int = 1000, retries: int = 3):
+        self.exchange = exchange
+        self.store = store
+        # ccxt's rateLimit is the minimum delay between requests in ms
+        self.rate = rate or 1000.0 / max(1, getattr(exchange, 'rateLimit', 100) or 100)
+        self.burst = burst
+        self.concurrency = concurrency
+        self.limit = limit
+        self.retries = retries
+
+        self.requests = 0
+        self.failures: List[Tuple[SeriesKey, str]] = []
+
+    def _plan(self, symbol: str, timeframe: str, since_ms: int) -> Optional[Dict]:
+        """Page ranges still missing for one series (same rules as ``OHLCVStore.sync``)"""
+        timeframe_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        last_closed = last_closed_ms(self.exchange, timeframe)
+        meta = self.store.meta(self.exchange.id, symbol, timeframe)
+
+        full = not (meta and meta['rows']) or since_ms < meta['covered_from_ms']
+        start = since_ms if full else meta['last_ts']
+        if not full and start + timeframe_ms > last_closed:
+            return None
+
+        page_span = self.limit * timeframe_ms
+        end = last_closed + timeframe_ms
+        pages = [(s, min(s + page_span, end)) for s in range(start, end, page_span)]
+        return {'full': full, 'since_ms': since_ms, 'timeframe_ms': timeframe_ms,
+                'last_closed': last_closed, 'pages': pages,
+                'stored': meta['rows'] if meta else 0}
+
+    async def _fetch_range(self, bucket: TokenBucket, gate: asyncio.Semaphore,
+                           symbol: str, timeframe: str, start: int, end: int,
+                           timeframe_ms: int, stats: Dict) -> List[List[float]]:
+        """All candles in [start, end); follows up when the exchange returns short pages"""
+        rows: List[List[float]] = []
+        while start < end:
+            for attempt in range(self.retries + 1):
+                await bucket.acquire()
+                try:
+                    async with gate:
+                        self.requests += 1
+                        stats['requests'] += 1
+                        batch = await self.exchange.fetch_ohlcv(symbol, timeframe, since=start,
+                                                                limit=self.limit)
+                    break
+                except Exception:
+                    if attempt == self.retries:
+                        raise
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+
+            batch = [c for c in batch if start <= c[0] < end]
+            if not batch:
+                break
+            rows.extend(batch)
+            start = batch[-1][0] + timeframe_ms
+        return rows
+
+    async def _download_series(self, bucket: TokenBucket, gate: asyncio.Semaphore,
+                               symbol: str, timeframe: str, since_ms: int) -> Dict:
+        stats = {'requests': 0, 'new_rows': 0, 'rows': 0}
+        plan = self._plan(symbol, timeframe, since_ms)
+        if plan is None:
+            stats['rows'] = self.store.meta(self.exchange.id, symbol, timeframe)['rows']
+            return stats
+
+        pages = await asyncio.gather(*(
+            self._fetch_range(bucket, gate, symbol, timeframe, start, end, plan['timeframe_ms'], stats)
+            for start, end in plan['pages']
+        ))
+
+        fetched = [candle for page in pages for candle in page]
+        rows = drop_forming(np.asarray(fetched, dtype=np.float64).reshape(-1, 6), plan['last_closed'])
+        if plan['full']:
+            if len(rows):
+                stats['rows'] = self.store.write(self.exchange.id, symbol, timeframe, rows,
+                                                 covered_from_ms=plan['since_ms'])
+            stats['new_rows'] = stats['rows']
+        else:
+            stats['rows'] = self.store.append(self.exchange.id, symbol, timeframe, rows)
+            stats['new_rows'] = stats['rows'] - plan['stored']
+        return stats
+
+    async def download(self, jobs: Iterable[Tuple[str, str, int]]) -> Dict[SeriesKey, Dict]:
+        """
+        Bring every ``(symbol, timeframe, since_ms)`` series up to its last
+        closed candle.  Returns per-series ``requests`` / ``new_rows`` / ``rows``;
+        failed series are listed in ``self.failures`` instead.
+        """
+        bucket = TokenBucket(self.rate, self.burst)
+        gate = asyncio.Semaphore(self.concurrency)
+        jobs = list(dict.fromkeys(jobs))
+        started = time.time()
+
+        outcomes = await asyncio.gather(*(
+            self._download_series(bucket, gate, symbol, timeframe, since_ms)
+            for symbol, timeframe, since_ms in jobs
+        ), return_exceptions=True)
+
+        results: Dict[SeriesKey, Dict] = {}
+        for (symbol, timeframe, _), outcome in zip(jobs, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning(f"Download failed for {symbol} {timeframe}: {outcome}")
+                self.failures.append(((symbol, timeframe), repr(outcome)))
+            else:
+                results[(symbol, timeframe)] = outcome
+
+        elapsed = time.time() - started
+        logger.info(f"Downloaded {len(results)}/{len(jobs)} series with {self.requests} requests "
+                    f"in {elapsed:.1f}s ({self.requests / max(elapsed, 1e-9):.1f} req/s)")
+        return results
+
+
+def bulk_download(exchange_id: str, jobs: Iterable[Tuple[str, str, int]],
+                  store_root: Union[str, Path] = "ohlcv_store", config: Optional[Dict] = None,
+                  **kwargs) -> Dict[SeriesKey, Dict]:
+    """
+    Blocking helper for the synchronous backtesters: download ``jobs`` from
+    ``exchange_id`` with ccxt.async_support into ``OHLCVStore(store_root)``.
+    Extra keyword arguments go to ``BulkDownloader``.
+    """
+    async def run():
+        # The downloader paces requests itself; ccxt's own throttle would serialise them
+        exchange = create_exchange(exchange_id, {**(config or {}), 'enableRateLimit': False},
+                                   async_support=True)
+        try:
+            downloader = BulkDownloader(exchange, OHLCVStore(store_root), **kwargs)
+            return await downloader.download(jobs)
+        finally:
+            await exchange.close()
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async bulk OHLCV downloader")
+    parser.add_argument('--exchange', default='binance')
+    parser.add_argument('--symbols', nargs='*', default=['BTC/USDT', 'ETH/USDT'])
+    parser.add_argument('--timeframes', nargs='*', default=['1h'])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--store', default='ohlcv_store')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    since = int(time.time() * 1000) - args.days * 86400000
+    jobs = [(s, tf, since) for s in args.symbols for tf in args.timeframes]
+    results = bulk_download(args.exchange, jobs, args.store)
+    for (symbol, timeframe), stats in results.items():
+        print(f"{symbol:<15} {timeframe:<4} +{stats['new_rows']:>6} candles "
+              f"({stats['rows']} cached, {stats['requests']} requests)")
+
+
+if __name__ == "__main__":
+    main()
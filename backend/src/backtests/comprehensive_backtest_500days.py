@@ -16,6 +16,8 @@ from typing import Dict, List, Tuple
 import requests
 import time
 
+from position_sim import EXIT_REASONS, simulate
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -255,64 +257,32 @@ class ComprehensiveBacktest:
         # Apply strategy
         df = self.apply_strategy(data, strategy)
         
-        # Simulate trading
+        # Simulate trading (a position still open at the end is left out)
+        sim = simulate(
+            df['close'].to_numpy(), df['signal'].to_numpy(), 'sl_tp_long',
+            initial_capital=self.initial_capital, position_size=self.position_size,
+            commission=self.commission, slippage=self.slippage,
+            stop_loss=self.default_stop_loss, take_profit=self.default_take_profit
+        )
+        capital = sim.cash
+        closed = sim.closed
         trades = []
-        position = None
-        capital = self.initial_capital
-        
-        for i in range(len(df)):
-            if df['signal'].iloc[i] == 1 and position is None:
-                # Buy signal
-                entry_price = df['close'].iloc[i] * (1 + self.slippage)
-                size = (capital * self.position_size) / entry_price
-                fee = size * entry_price * self.commission
-                
-                position = {
-                    'entry_time': df.index[i],
-                    'entry_price': entry_price,
-                    'size': size,
-                    'fee_in': fee,
-                    'stop_loss': entry_price * (1 - self.default_stop_loss),
-                    'take_profit': entry_price * (1 + self.default_take_profit)
-                }
-                capital -= (size * entry_price + fee)
-                
-            elif position is not None:
-                current_price = df['close'].iloc[i]
-                
-                # Check exit conditions
-                exit_signal = False
-                exit_reason = ''
-                
-                if df['signal'].iloc[i] == -1:
-                    exit_signal = True
-                    exit_reason = 'Signal'
-                elif current_price <= position['stop_loss']:
-                    exit_signal = True
-                    exit_reason = 'Stop Loss'
-                elif current_price >= position['take_profit']:
-                    exit_signal = True
-                    exit_reason = 'Take Profit'
-                
-                if exit_signal:
-                    exit_price = current_price * (1 - self.slippage)
-                    fee_out = position['size'] * exit_price * self.commission
-                    pnl = (exit_price - position['entry_price']) * position['size'] - position['fee_in'] - fee_out
-                    
-                    trades.append({
-                        'entry_time': position['entry_time'],
-                        'exit_time': df.index[i],
-                        'entry_price': position['entry_price'],
-                        'exit_price': exit_price,
-                        'size': position['size'],
-                        'pnl': pnl,
-                        'pnl_pct': (pnl / (position['size'] * position['entry_price'])) * 100,
-                        'exit_reason': exit_reason,
-                        'duration': (df.index[i] - position['entry_time']).total_seconds() / 3600
-                    })
-                    
-                    capital += position['size'] * exit_price - fee_out
-                    position = None
+        for entry_time, exit_time, entry_price, exit_price, size, pnl, reason in zip(
+                df.index[sim.entry_idx[closed]], df.index[sim.exit_idx[closed]],
+                sim.entry_price[closed].tolist(), sim.exit_price[closed].tolist(),
+                sim.quantity[closed].tolist(), sim.pnl[closed].tolist(),
+                sim.exit_reason[closed].tolist()):
+            trades.append({
+                'entry_time': entry_time,
+                'exit_time': exit_time,
+                'entry_price': entry_price,
+                'exit_price': exit_price,
+                'size': size,
+                'pnl': pnl,
+                'pnl_pct': (pnl / (size * entry_price)) * 100,
+                'exit_reason': EXIT_REASONS[reason],
+                'duration': (exit_time - entry_time).total_seconds() / 3600
+            })
         
         # Calculate metrics
         if len(trades) > 0:
@@ -4,7 +4,6 @@ Comprehensive Backtest System
 Top 100 strategies on Top 50 crypto pairs using CCXT
 """
 
-import ccxt
 import pandas as pd
 import numpy as np
 import json
@@ -12,12 +11,14 @@ import os
 from datetime import datetime, timedelta
 import time
 import warnings
+from perf_metrics import performance
+from replay_exchange import create_exchange
 warnings.filterwarnings('ignore')
 
 class ComprehensiveBacktester:
     def __init__(self):
         """Initialize the backtester with CCXT"""
-        self.exchange = ccxt.binance({
+        self.exchange = create_exchange('binance', {
             'enableRateLimit': True,
             'options': {'defaultType': 'spot'}
         })
@@ -263,42 +264,24 @@ class ComprehensiveBacktester:
         # Monthly return (approximate)
         monthly_return = ((1 + total_return) ** (30 * 24 / n_hours) - 1) * 100
         
-        # Sharpe Ratio
-        if combined['strategy_returns'].std() != 0:
-            sharpe_ratio = np.sqrt(hours_per_year) * (combined['strategy_returns'].mean() / combined['strategy_returns'].std())
-        else:
-            sharpe_ratio = 0
-        
-        # Sortino Ratio
-        downside_returns = combined['strategy_returns'][combined['strategy_returns'] < 0]
-        if len(downside_returns) > 0 and downside_returns.std() != 0:
-            sortino_ratio = np.sqrt(hours_per_year) * (combined['strategy_returns'].mean() / downside_returns.std())
-        else:
-            sortino_ratio = 0
+        # Sharpe / Sortino (sample std, hourly), drawdown, bar win rate and profit factor in one pass
+        strategy_returns = combined['strategy_returns'].to_numpy(dtype=np.float64)
+        stats = performance(strategy_returns, np.cumprod(1 + strategy_returns),
+                            periods_per_year=hours_per_year, ddof=1)
+        sharpe_ratio = stats['sharpe']
+        sortino_ratio = stats['sortino']
+        max_drawdown = stats['max_drawdown']
         
-        # Maximum Drawdown
-        cumulative_returns = (1 + combined['strategy_returns']).cumprod()
-        running_max = cumulative_returns.cummax()
-        drawdown = (cumulative_returns - running_max) / running_max
-        max_drawdown = drawdown.min() * 100
-        
-        # Win Rate
-        winning_trades = combined['strategy_returns'][combined['strategy_returns'] > 0]
-        losing_trades = combined['strategy_returns'][combined['strategy_returns'] < 0]
-        
-        if len(winning_trades) + len(losing_trades) > 0:
-            win_rate = len(winning_trades) / (len(winning_trades) + len(losing_trades)) * 100
-        else:
-            win_rate = 0
+        # Win Rate (flat bars count as neither)
+        decided = stats['winning'] + stats['negative']
+        win_rate = stats['winning'] / decided * 100 if decided > 0 else 0
         
         # Number of trades
         num_trades = len(combined[combined['position'] != 0])
         
         # Profit Factor
-        if len(losing_trades) > 0:
-            total_wins = winning_trades.sum()
-            total_losses = abs(losing_trades.sum())
-            profit_factor = total_wins / total_losses if total_losses > 0 else 0
+        if stats['negative'] > 0:
+            profit_factor = stats['profit_factor']
         else:
             profit_factor = 0
         
@@ -8,7 +8,6 @@
 =====================================
 """
 
-import ccxt
 import pandas as pd
 import numpy as np
 import talib
@@ -21,6 +20,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 from dataclasses import dataclass
 from collections import defaultdict
+from replay_exchange import create_exchange
 
 warnings.filterwarnings('ignore')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -51,7 +51,7 @@ class ComprehensiveBacktester:
     """Comprehensive backtester for all strategies"""
     
     def __init__(self):
-        self.exchange = ccxt.binance({
+        self.exchange = create_exchange('binance', {
             'enableRateLimit': True,
             'timeout': 30000,
             'sandbox': False
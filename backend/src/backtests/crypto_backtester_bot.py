@@ -16,19 +16,18 @@ Author: AI Trading Bot Developer
 Version: 1.0
 """
 
-import ccxt
 import pandas as pd
 import numpy as np
-import talib
 import warnings
 import time
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Optional
 from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor
 import asyncio
+from indicators import IndicatorSet
+from replay_exchange import create_exchange
 
 warnings.filterwarnings('ignore')
 
@@ -49,60 +48,13 @@ class TradeResult:
     pnl_percent: float
     strategy: str
 
-class TechnicalIndicators:
-    """Technical analysis indicators for trading strategies"""
-    
-    @staticmethod
-    def sma(data: pd.Series, period: int) -> pd.Series:
-        """Simple Moving Average"""
-        return data.rolling(window=period).mean()
-    
-    @staticmethod
-    def ema(data: pd.Series, period: int) -> pd.Series:
-        """Exponential Moving Average"""
-        return data.ewm(span=period).mean()
-    
-    @staticmethod
-    def rsi(data: pd.Series, period: int = 14) -> pd.Series:
-        """Relative Strength Index"""
-        delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
-    
-    @staticmethod
-    def bollinger_bands(data: pd.Series, period: int = 20, std_dev: float = 2) -> Tuple[pd.Series, pd.Series, pd.Series]:
-        """Bollinger Bands (Upper, Middle, Lower)"""
-        middle = data.rolling(window=period).mean()
-        std = data.rolling(window=period).std()
-        upper = middle + (std * std_dev)
-        lower = middle - (std * std_dev)
-        return upper, middle, lower
-    
-    @staticmethod
-    def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-        """Average True Range"""
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        return tr.rolling(window=period).mean()
-    
-    @staticmethod
-    def donchian_channels(high: pd.Series, low: pd.Series, period: int = 20) -> Tuple[pd.Series, pd.Series]:
-        """Donchian Channels (Upper, Lower)"""
-        upper = high.rolling(window=period).max()
-        lower = low.rolling(window=period).min()
-        return upper, lower
-    
-    @staticmethod
-    def adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-        """Average Directional Index"""
-        try:
-            return pd.Series(talib.ADX(high.values, low.values, close.values, timeperiod=period), index=close.index)
-        except:
-            return pd.Series(np.nan, index=close.index)
+class TechnicalIndicators(IndicatorSet):
+    """Technical analysis indicators for trading strategies (pandas rolling / ewm flavour)"""
+
+    ema_seed = 'adjust'
+    rsi_method = 'sma'
+    atr_method = 'sma'
+    bb_ddof = 1
 
 class Strategy1_TemplateTrailing:
     """Template Trailing Strategy with Multiple TP/SL"""
@@ -414,11 +366,21 @@ class RiskManager:
             'final_capital': self.current_capital
         }
 
+def _signal_column(df: pd.DataFrame, name: str) -> List[bool]:
+    """Per-bar truth values of a signal column (all False when the strategy has none)"""
+    if name not in df.columns:
+        return [False] * len(df)
+    values = df[name].to_numpy()
+    if values.dtype == bool:
+        return values.tolist()
+    # Same truthiness as the old per-row check: NaN counts as True
+    return [bool(v) for v in values]
+
 class BacktestEngine:
     """Main backtesting engine for all strategies"""
     
     def __init__(self, initial_capital: float = 10000):
-        self.exchange = ccxt.binance()  # Use Binance for data
+        self.exchange = create_exchange('binance')  # Use Binance for data
         self.initial_capital = initial_capital
         self.strategies = {}
         self.results = {}
@@ -462,35 +424,40 @@ class BacktestEngine:
         position = None
         risk_manager = RiskManager(self.initial_capital)
         
-        # Generate signals
+        # Generate signals, then walk plain arrays instead of one .iloc Series per bar
         df_with_signals = strategy.generate_signals(df)
+        index = df_with_signals.index
+        close = df_with_signals['close'].to_numpy(dtype=np.float64).tolist()
+        long_signal, short_signal, long_exit, short_exit = (
+            _signal_column(df_with_signals, name)
+            for name in ('long_signal', 'short_signal', 'long_exit', 'short_exit')
+        )
         
-        for i in range(1, len(df_with_signals)):
-            current_row = df_with_signals.iloc[i]
-            current_time = df_with_signals.index[i]
+        for i in range(1, len(close)):
+            price = close[i]
             
             # Check for exit signals first
             if position is not None:
                 exit_signal = False
-                exit_price = current_row['close']
+                exit_price = price
                 
                 if position['side'] == 'long':
-                    if hasattr(current_row, 'long_exit') and current_row['long_exit']:
+                    if long_exit[i]:
                         exit_signal = True
-                    elif current_row['close'] <= position['stop_loss']:
+                    elif price <= position['stop_loss']:
                         exit_signal = True
                         exit_price = position['stop_loss']
-                    elif current_row['close'] >= position['take_profit']:
+                    elif price >= position['take_profit']:
                         exit_signal = True
                         exit_price = position['take_profit']
                         
                 elif position['side'] == 'short':
-                    if hasattr(current_row, 'short_exit') and current_row['short_exit']:
+                    if short_exit[i]:
                         exit_signal = True
-                    elif current_row['close'] >= position['stop_loss']:
+                    elif price >= position['stop_loss']:
                         exit_signal = True
                         exit_price = position['stop_loss']
-                    elif current_row['close'] <= position['take_profit']:
+                    elif price <= position['take_profit']:
                         exit_signal = True
                         exit_price = position['take_profit']
                 
@@ -509,7 +476,7 @@ class BacktestEngine:
                         quantity=position['quantity'],
                         side=position['side'],
                         entry_time=position['entry_time'],
-                        exit_time=current_time,
+                        exit_time=index[i],
                         pnl=pnl,
                         pnl_percent=pnl_percent,
                         strategy=strategy.name
@@ -522,10 +489,10 @@ class BacktestEngine:
             
             # Check for new entry signals
             if position is None:
-                entry_price = current_row['close']
+                entry_price = price
                 
                 # Long signal
-                if hasattr(current_row, 'long_signal') and current_row['long_signal']:
+                if long_signal[i]:
                     stop_loss = entry_price * 0.97  # 3% stop loss
                     take_profit = entry_price * 1.06  # 6% take profit
                     quantity = risk_manager.calculate_position_size(entry_price, stop_loss)
@@ -536,11 +503,11 @@ class BacktestEngine:
                         'quantity': quantity,
                         'stop_loss': stop_loss,
                         'take_profit': take_profit,
-                        'entry_time': current_time
+                        'entry_time': index[i]
                     }
                 
                 # Short signal
-                elif hasattr(current_row, 'short_signal') and current_row['short_signal']:
+                elif short_signal[i]:
                     stop_loss = entry_price * 1.03  # 3% stop loss
                     take_profit = entry_price * 0.94  # 6% take profit
                     quantity = risk_manager.calculate_position_size(entry_price, stop_loss)
@@ -551,11 +518,19 @@ class BacktestEngine:
                         'quantity': quantity,
                         'stop_loss': stop_loss,
                         'take_profit': take_profit,
-                        'entry_time': current_time
+                        'entry_time': index[i]
                     }
         
         return trades
     
+    def _run_strategy_on_symbol(self, strategy_name: str, df: pd.DataFrame, symbol: str) -> List[TradeResult]:
+        """One strategy on one already-fetched symbol; errors are logged, not raised"""
+        try:
+            return self.simulate_strategy(df, self.strategies[strategy_name], symbol)
+        except Exception as e:
+            logger.error(f"Error processing {symbol} for {strategy_name}: {e}")
+            return []
+    
     def run_backtest(self, symbols: List[str] = None, timeframe: str = '1h') -> Dict:
         """Run backtest for all strategies on given symbols"""
         if symbols is None:
@@ -563,38 +538,36 @@ class BacktestEngine:
             
         logger.info(f"Starting backtest on {len(symbols)} symbols with {len(self.strategies)} strategies")
         
+        strategy_results = {name: {} for name in self.strategies}
+        strategy_trades = {name: [] for name in self.strategies}
+        
+        # Symbol-major: every symbol is fetched once and shared by all strategies.
+        # The strategies are pure pandas/Python work, so they run in turn: a thread
+        # pool would only contend for the GIL
+        for symbol in symbols:
+            df = self.fetch_ohlcv_data(symbol, timeframe)
+            if df.empty:
+                continue
+            # Add small delay to avoid rate limits
+            time.sleep(0.1)
+            
+            # Strategies only read the frame (generate_signals works on a copy)
+            for strategy_name in self.strategies:
+                trades = self._run_strategy_on_symbol(strategy_name, df, symbol)
+                strategy_trades[strategy_name].extend(trades)
+                
+                if trades:
+                    symbol_pnl = sum([t.pnl for t in trades])
+                    strategy_results[strategy_name][symbol] = {
+                        'trades': len(trades),
+                        'pnl': symbol_pnl,
+                        'return_pct': (symbol_pnl / self.initial_capital) * 100
+                    }
+        
         all_results = {}
         
-        for strategy_name, strategy in self.strategies.items():
-            logger.info(f"Testing strategy: {strategy_name}")
-            strategy_results = {}
-            all_trades = []
-            
-            for symbol in symbols:
-                try:
-                    # Fetch data
-                    df = self.fetch_ohlcv_data(symbol, timeframe)
-                    if df.empty:
-                        continue
-                    
-                    # Run strategy simulation
-                    trades = self.simulate_strategy(df, strategy, symbol)
-                    all_trades.extend(trades)
-                    
-                    if trades:
-                        symbol_pnl = sum([t.pnl for t in trades])
-                        strategy_results[symbol] = {
-                            'trades': len(trades),
-                            'pnl': symbol_pnl,
-                            'return_pct': (symbol_pnl / self.initial_capital) * 100
-                        }
-                    
-                    # Add small delay to avoid rate limits
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing {symbol} for {strategy_name}: {e}")
-                    continue
+        for strategy_name in self.strategies:
+            all_trades = strategy_trades[strategy_name]
             
             # Calculate overall strategy performance
             if all_trades:
@@ -609,7 +582,7 @@ class BacktestEngine:
                     'win_rate': win_rate,
                     'total_pnl': total_pnl,
                     'return_pct': (total_pnl / self.initial_capital) * 100,
-                    'symbol_results': strategy_results,
+                    'symbol_results': strategy_results[strategy_name],
                     'trades': all_trades
                 }
             else:
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+INDICATOR MEMO CACHE
+=====================================
+Memoises indicator outputs during parameter sweeps.
+
+- inputs are fingerprinted by content (shape, dtype and a 128-bit
+  BLAKE2b digest of the raw bytes), so identical series share entries
+  whichever DataFrame or temporary they come from
+- entries are keyed by (input fingerprints, indicator, params) and the
+  least recently used ones are evicted once the byte budget is exceeded
+- ``stats()`` exposes hit / miss / eviction counters and the compute
+  time the hits saved
+- ``with cache.active():`` routes every ``indicators.IndicatorSet`` call
+  made in the current thread through the cache
+=====================================
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Output = Union[np.ndarray, Tuple[np.ndarray, ...]]
+
+_ACTIVE: ContextVar[Optional['IndicatorCache']] = ContextVar('indicator_cache', default=None)
+
+
+def fingerprint(values: np.ndarray) -> Tuple[Tuple[int, ...], str, bytes]:
+    """(shape, dtype, 128-bit BLAKE2b digest of the bytes) of an array"""
+    values = np.ascontiguousarray(values)
+    return values.shape, values.dtype.str, hashlib.blake2b(values, digest_size=16).digest()
+
+
+def _nbytes(output: Output) -> int:
+    if isinstance(output, tuple):
+        return sum(part.nbytes for part in output)
+    return output.nbytes
+
+
+def _freeze(output: Output) -> Output:
+    # Cached arrays are handed out again, so nobody may write into them
+    for part in (output if isinstance(output, tuple) else (output,)):
+        part.flags.writeable = False
+    return output
+
+
+def active_cache() -> Optional['IndicatorCache']:
+    """Cache activated in the current context, if any"""
+    return _ACTIVE.get()
+
+
+class IndicatorCache:
+    """LRU memo of indicator outputs under a byte budget"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._entries: 'OrderedDict[Hashable, Tuple[Output, int, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compute_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def get(self, name: str, inputs: Sequence[np.ndarray], params: Tuple,
+            compute: Callable[[], Output]) -> Output:
+        """Cached ``compute()`` for indicator ``name`` over ``inputs`` with ``params``"""
+        key = (name, tuple(fingerprint(x) for x in inputs), params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry[2]
+                return entry[0]
+
+        started = time.perf_counter()
+        output = _freeze(compute())
+        elapsed = time.perf_counter() - started
+        size = _nbytes(output)
+
+        with self._lock:
+            self.misses += 1
+            self.compute_seconds += elapsed
+            if size > self.max_bytes or key in self._entries:
+                return output
+            self._entries[key] = (output, size, elapsed)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return output
+
+    @contextmanager
+    def active(self):
+        """Route ``IndicatorSet`` calls in this context through the cache"""
+        token = _ACTIVE.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE.reset(token)
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'compute_seconds': self.compute_seconds,
+            'saved_seconds': self.saved_seconds,
+        }
+
+    def summary(self) -> str:
+        """One-line account of the recomputation the cache saved"""
+        s = self.stats()
+        return (f"Indicator cache: {s['hits']:,} hits / {s['misses']:,} misses "
+                f"({s['hit_rate']:.1%}), saved {s['saved_seconds']:.2f}s of "
+                f"{s['compute_seconds'] + s['saved_seconds']:.2f}s compute, "
+                f"{s['entries']} entries / {s['bytes'] / 1e6:.1f} MB, {s['evictions']} evictions")
@@ -0,0 +1,1039 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SHARED INDICATOR LIBRARY
+=====================================
+One implementation of every indicator used by the backtesters, the Pine
+tester tools and the paper trading bots.
+
+- kernels take plain ``ndarray``s (a pandas Series is accepted too) and
+  return float64 arrays aligned with the input, so hot paths never pay
+  for pandas
+- warmup: bars before the first complete lookback window are NaN; the
+  first valid bar is noted on every kernel.  Leading NaNs in the input
+  only delay the warmup (TA-Lib behaviour)
+- kernels are single O(n) passes (compensated running sums, monotonic
+  queues, Wilder recursions), except CCI: its mean deviation is
+  re-summed over every window, O(n * period) as in TA-Lib; all are
+  compiled by numba when it is installed, and the fallback runs the
+  same code as plain Python over lists
+- the flavours of the old per-module copies are explicit parameters
+  (``seed='adjust'`` for pandas ``ewm(span)``, ``method='sma'`` for the
+  rolling-mean RSI / ATR, ``ddof=1`` for pandas ``std``), so every caller
+  keeps the numbers it has always produced
+- ``IndicatorSet`` is the Series-in / Series-out facade the strategy
+  classes call; subclasses pick the flavour, and an active
+  ``indicator_cache.IndicatorCache`` memoises its calls
+- ``python indicators.py --bench`` times every kernel,
+  ``--bench-pivots`` the pivot engine against the per-bar scan,
+  ``--bench-supertrend`` the SuperTrend kernel and its
+  (period, multiplier) batch against the per-bar pandas loop
+=====================================
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from bar_kernels import NUMBA_AVAILABLE, njit
+from indicator_cache import active_cache
+
+ArrayLike = Union[np.ndarray, pd.Series]
+
+
+# ─────────────────────  helpers  ─────────────────────
+def _as_array(x: ArrayLike) -> np.ndarray:
+    """Contiguous float64 view / copy of a Series or array"""
+    if isinstance(x, pd.Series):
+        x = x.to_numpy(dtype=np.float64)
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+def _loop_input(x: np.ndarray):
+    """Kernel input: the array under numba, a list for the interpreted fallback"""
+    return x if NUMBA_AVAILABLE else x.tolist()
+
+
+def _first_valid(*arrays: np.ndarray) -> int:
+    """Index of the first bar where every array is non-NaN (len if none)"""
+    valid = ~np.isnan(arrays[0])
+    for a in arrays[1:]:
+        valid &= ~np.isnan(a)
+    hits = np.flatnonzero(valid)
+    return int(hits[0]) if len(hits) else len(arrays[0])
+
+
+@njit(cache=True)
+def _rolling_extreme(x, period, sign, skip_nan, out):
+    """
+    Max (``sign`` 1) or min (``sign`` -1) of every ``period``-bar window with
+    a monotonic index queue, O(n).  A NaN makes the window NaN unless
+    ``skip_nan``, then it is ignored (pandas ``rolling.max`` vs ``Series.max``).
+    """
+    queue = np.empty(len(x), dtype=np.int64)
+    head = 0
+    tail = 0
+    last_nan = -1
+    for i in range(len(x)):
+        val = x[i]
+        if val != val:
+            last_nan = i
+        else:
+            while tail > head and sign * x[queue[tail - 1]] <= sign * val:
+                tail -= 1
+            queue[tail] = i
+            tail += 1
+        while tail > head and queue[head] <= i - period:
+            head += 1
+        if i >= period - 1 and tail > head and (skip_nan or last_nan <= i - period):
+            out[i] = x[queue[head]]
+
+
+def _extreme(x: ArrayLike, period: int, sign: int, skip_nan: bool = False) -> np.ndarray:
+    x = _as_array(x)
+    out = np.full(len(x), np.nan)
+    if period >= 1:
+        _rolling_extreme(_loop_input(x), period, sign, skip_nan, out)
+    return out
+
+
+def _wrap(values: np.ndarray, like: ArrayLike) -> ArrayLike:
+    """Give kernel output the index of a Series input"""
+    if isinstance(like, pd.Series):
+        return pd.Series(values, index=like.index)
+    return values
+
+
+# ─────────────────────  moving averages  ─────────────────────
+@njit(cache=True)
+def _rolling_mean(x, period, out):
+    """
+    pandas ``rolling(period).mean()``: compensated add / remove, exact on
+    flat windows, NaN unless the window is complete
+    """
+    nobs = 0
+    neg_ct = 0
+    same_run = 0
+    prev_value = np.nan
+    total = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    for i in range(len(x)):
+        if i >= period:
+            val = x[i - period]
+            if val == val:
+                nobs -= 1
+                y = -val - comp_remove
+                t = total + y
+                comp_remove = t - total - y
+                total = t
+                if val < 0:
+                    neg_ct -= 1
+        val = x[i]
+        if val == val:
+            nobs += 1
+            y = val - comp_add
+            t = total + y
+            comp_add = t - total - y
+            total = t
+            if val < 0:
+                neg_ct += 1
+            same_run = same_run + 1 if val == prev_value else 1
+            prev_value = val
+
+        if nobs == period:
+            result = total / nobs
+            if same_run >= nobs:
+                result = prev_value
+            elif neg_ct == 0 and result < 0:
+                result = 0.0
+            elif neg_ct == nobs and result > 0:
+                result = 0.0
+            out[i] = result
+
+
+def sma(x: ArrayLike, period: int) -> np.ndarray:
+    """Simple moving average; first value at bar ``period - 1``, NaN if the window holds a NaN"""
+    x = _as_array(x)
+    out = np.full(len(x), np.nan)
+    if period >= 1:
+        _rolling_mean(_loop_input(x), period, out)
+    return out
+
+
+@njit(cache=True)
+def _ewm_seeded(x, alpha, period, start, out):
+    """TA-Lib / TradingView recursion seeded with the SMA of the first ``period`` values"""
+    total = 0.0
+    for i in range(start, start + period):
+        total += x[i]
+    prev = total / period
+    out[start + period - 1] = prev
+    for i in range(start + period, len(x)):
+        prev = (x[i] - prev) * alpha + prev
+        out[i] = prev
+
+
+@njit(cache=True)
+def _ewm_pandas(x, com, adjust, out):
+    """Exactly ``Series.ewm(com=com, adjust=adjust).mean()`` (min_periods=0)"""
+    alpha = 1.0 / (1.0 + com)
+    old_wt_factor = 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+
+    weighted = x[0]
+    out[0] = weighted
+    old_wt = 1.0
+    for i in range(1, len(x)):
+        cur = x[i]
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if cur == cur:
+                if weighted != cur:
+                    weighted = old_wt * weighted + new_wt * cur
+                    weighted /= (old_wt + new_wt)
+                if adjust:
+                    old_wt += new_wt
+                else:
+                    old_wt = 1.0
+        elif cur == cur:
+            weighted = cur
+        out[i] = weighted
+
+
+def _ewm(x: ArrayLike, period: int, com: float, seed: str) -> np.ndarray:
+    x = _as_array(x)
+    out = np.full(len(x), np.nan)
+    if seed == 'sma':
+        start = _first_valid(x)
+        if period >= 1 and start + period <= len(x):
+            _ewm_seeded(_loop_input(x), 1.0 / (1.0 + com), period, start, out)
+    elif seed in ('first', 'adjust'):
+        if len(x):
+            _ewm_pandas(_loop_input(x), com, seed == 'adjust', out)
+    else:
+        raise ValueError(f"Unknown seed {seed!r}: expected 'sma', 'first' or 'adjust'")
+    return out
+
+
+def ema(x: ArrayLike, period: int, seed: str = 'sma') -> np.ndarray:
+    """
+    Exponential moving average, alpha = 2 / (period + 1).
+
+    ``seed='sma'``: TA-Lib / TradingView, first value at bar ``period - 1``
+    ``seed='first'``: pandas ``ewm(span, adjust=False)``, starts at bar 0
+    ``seed='adjust'``: pandas ``ewm(span)`` (adjust=True), starts at bar 0
+    """
+    return _ewm(x, period, (period - 1) / 2.0, seed)
+
+
+def smma(x: ArrayLike, period: int, seed: str = 'sma') -> np.ndarray:
+    """Smoothed / running moving average (Wilder RMA), alpha = 1 / period; seeds as in ``ema``"""
+    return _ewm(x, period, 1.0 / (1.0 / period) - 1.0, seed)
+
+
+rma = smma
+
+
+# ─────────────────────  oscillators  ─────────────────────
+@njit(cache=True)
+def _rsi_wilder(x, period, start, out):
+    """TA-Lib RSI recursion (Wilder smoothing of gains and losses)"""
+    gain = 0.0
+    loss = 0.0
+    prev = x[start]
+    for i in range(start + 1, start + period + 1):
+        diff = x[i] - prev
+        prev = x[i]
+        if diff < 0:
+            loss -= diff
+        else:
+            gain += diff
+    loss /= period
+    gain /= period
+    total = gain + loss
+    out[start + period] = 100.0 * (gain / total) if abs(total) >= 1e-8 else 0.0
+
+    for i in range(start + period + 1, len(x)):
+        diff = x[i] - prev
+        prev = x[i]
+        loss *= (period - 1)
+        gain *= (period - 1)
+        if diff < 0:
+            loss -= diff
+        else:
+            gain += diff
+        loss /= period
+        gain /= period
+        total = gain + loss
+        out[i] = 100.0 * (gain / total) if abs(total) >= 1e-8 else 0.0
+
+
+def rsi(close: ArrayLike, period: int = 14, method: str = 'rma') -> np.ndarray:
+    """
+    Relative Strength Index.
+
+    ``method='rma'``: Wilder / TA-Lib, first value at bar ``period``
+    ``method='sma'``: rolling means of gains and losses (bar 0 counts as a
+    zero change), first value at bar ``period - 1``
+    """
+    close = _as_array(close)
+    if method == 'rma':
+        out = np.full(len(close), np.nan)
+        start = _first_valid(close)
+        if period >= 1 and start + period < len(close):
+            _rsi_wilder(_loop_input(close), period, start, out)
+        return out
+    if method != 'sma':
+        raise ValueError(f"Unknown RSI method {method!r}: expected 'rma' or 'sma'")
+
+    delta = np.empty_like(close)
+    delta[0] = np.nan
+    np.subtract(close[1:], close[:-1], out=delta[1:])
+    gain = sma(np.where(delta > 0, delta, 0.0), period)
+    loss = sma(-np.where(delta < 0, delta, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+
+@njit(cache=True)
+def _cci_kernel(typical, period, out):
+    """TA-Lib CCI: mean deviation re-summed over each window (O(n * period)), 0 on a flat window"""
+    for i in range(period - 1, len(typical)):
+        mean = 0.0
+        for j in range(i - period + 1, i + 1):
+            mean += typical[j]
+        mean /= period
+        deviation = 0.0
+        for j in range(i - period + 1, i + 1):
+            deviation += abs(typical[j] - mean)
+        diff = typical[i] - mean
+        if diff != 0.0 and deviation != 0.0:
+            out[i] = diff / (0.015 * (deviation / period))
+        else:
+            out[i] = 0.0
+
+
+def cci(high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 20) -> np.ndarray:
+    """Commodity Channel Index; first value at bar ``period - 1``"""
+    typical = (_as_array(high) + _as_array(low) + _as_array(close)) / 3.0
+    out = np.full(len(typical), np.nan)
+    if period >= 1:
+        _cci_kernel(_loop_input(typical), period, out)
+    return out
+
+
+def macd(x: ArrayLike, fast: int = 12, slow: int = 26, signal: int = 9,
+         seed: str = 'sma') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (macd, signal, histogram).
+
+    ``seed='sma'``: TA-Lib ``MACD`` (and ``streaming.StreamingMACD``): both
+    EMAs are seeded on bar ``slow - 1``, the fast one from the mean of its
+    last ``fast`` values; all three outputs start at bar ``slow + signal - 2``
+    other seeds: the difference of two ``ema(seed)`` lines, from bar 0
+    """
+    if seed != 'sma':
+        line = ema(x, fast, seed) - ema(x, slow, seed)
+        signal_line = ema(line, signal, seed)
+        return line, signal_line, line - signal_line
+
+    x = _as_array(x)
+    if slow < fast:
+        fast, slow = slow, fast
+    fast_line = np.full(len(x), np.nan)
+    start = _first_valid(x)
+    if fast >= 1 and start + slow <= len(x):
+        _ewm_seeded(_loop_input(x), 1.0 / (1.0 + (fast - 1) / 2.0), fast, start + slow - fast, fast_line)
+    line = fast_line - ema(x, slow)
+    signal_line = ema(line, signal)
+    line[np.isnan(signal_line)] = np.nan
+    return line, signal_line, line - signal_line
+
+
+# ─────────────────────  volatility / bands  ─────────────────────
+def true_range(high: ArrayLike, low: ArrayLike, close: ArrayLike) -> np.ndarray:
+    """max(high - low, |high - prev close|, |low - prev close|); bar 0 is high - low"""
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    prev_close = np.empty_like(close)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+@njit(cache=True)
+def _wilder(tr, period, start, out):
+    """TA-Lib ATR recursion: SMA seed over tr[start + 1 .. start + period]"""
+    total = 0.0
+    for i in range(start + 1, start + period + 1):
+        total += tr[i]
+    prev = total / period
+    out[start + period] = prev
+    for i in range(start + period + 1, len(tr)):
+        prev *= (period - 1)
+        prev += tr[i]
+        prev /= period
+        out[i] = prev
+
+
+def atr(high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 14,
+        method: str = 'rma') -> np.ndarray:
+    """
+    Average True Range.
+
+    ``method='rma'``: Wilder / TA-Lib, first value at bar ``period``
+    ``method='sma'``: rolling mean of the true range (bar 0 = high - low),
+    first value at bar ``period - 1``
+    """
+    tr = true_range(high, low, close)
+    if method == 'sma':
+        return sma(tr, period)
+    if method != 'rma':
+        raise ValueError(f"Unknown ATR method {method!r}: expected 'rma' or 'sma'")
+
+    out = np.full(len(tr), np.nan)
+    start = _first_valid(_as_array(high), _as_array(low), _as_array(close))
+    if period >= 1 and start + period < len(tr):
+        _wilder(_loop_input(tr), period, start, out)
+    return out
+
+
+@njit(cache=True)
+def _rolling_var(x, period, ddof, out):
+    """pandas ``rolling(period).var(ddof)``: compensated Welford add / remove"""
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    same_run = 0
+    prev_value = np.nan
+    for i in range(len(x)):
+        if i >= period:
+            val = x[i - period]
+            if val == val:
+                nobs -= 1
+                if nobs:
+                    prev_mean = mean - comp_remove
+                    y = val - comp_remove
+                    t = y - mean
+                    comp_remove = t + mean - y
+                    mean -= t / nobs
+                    ssqdm -= (val - prev_mean) * (val - mean)
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
+
+        val = x[i]
+        if val == val:
+            nobs += 1
+            prev_mean = mean - comp_add
+            y = val - comp_add
+            t = y - mean
+            comp_add = t + mean - y
+            mean += t / nobs
+            ssqdm += (val - prev_mean) * (val - mean)
+            same_run = same_run + 1 if val == prev_value else 1
+            prev_value = val
+
+        if nobs == period and nobs > ddof:
+            if nobs == 1 or same_run >= nobs:
+                out[i] = 0.0
+            else:
+                out[i] = max(ssqdm / (nobs - ddof), 0.0)
+
+
+def rolling_std(x: ArrayLike, period: int, ddof: int = 0) -> np.ndarray:
+    """Window standard deviation; first value at bar ``period - 1``"""
+    x = _as_array(x)
+    out = np.full(len(x), np.nan)
+    if period >= 1:
+        _rolling_var(_loop_input(x), period, ddof, out)
+    return np.sqrt(out)
+
+
+def bollinger(x: ArrayLike, period: int = 20, std_dev: float = 2.0,
+              ddof: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(upper, middle, lower); ``ddof=0`` as TA-Lib, ``ddof=1`` as pandas ``rolling.std``"""
+    middle = sma(x, period)
+    width = rolling_std(x, period, ddof) * std_dev
+    return middle + width, middle, middle - width
+
+
+def rolling_max(x: ArrayLike, period: int) -> np.ndarray:
+    """Highest value of the last ``period`` bars (NaN if the window holds a NaN)"""
+    return _extreme(x, period, 1)
+
+
+def rolling_min(x: ArrayLike, period: int) -> np.ndarray:
+    """Lowest value of the last ``period`` bars (NaN if the window holds a NaN)"""
+    return _extreme(x, period, -1)
+
+
+def donchian(high: ArrayLike, low: ArrayLike, period: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """(upper, lower) channel; first value at bar ``period - 1``"""
+    return rolling_max(high, period), rolling_min(low, period)
+
+
+# ─────────────────────  trend  ─────────────────────
+@njit(cache=True)
+def _adx_kernel(high, low, close, period, start, out):
+    """TA-Lib ADX: Wilder-smoothed +DM / -DM / TR, DX averaged over ``period`` bars"""
+    prev_high = high[start]
+    prev_low = low[start]
+    prev_close = close[start]
+    plus_dm = 0.0
+    minus_dm = 0.0
+    tr_sum = 0.0
+    today = start
+    sum_dx = 0.0
+    adx_value = 0.0
+
+    for step in range(len(high) - start - 1):
+        today += 1
+        diff_plus = high[today] - prev_high
+        prev_high = high[today]
+        diff_minus = prev_low - low[today]
+        prev_low = low[today]
+
+        smoothing = step >= period - 1
+        if smoothing:
+            minus_dm -= minus_dm / period
+            plus_dm -= plus_dm / period
+        if diff_minus > 0 and diff_plus < diff_minus:
+            minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            plus_dm += diff_plus
+
+        tr = prev_high - prev_low
+        gap = abs(prev_high - prev_close)
+        if gap > tr:
+            tr = gap
+        gap = abs(prev_low - prev_close)
+        if gap > tr:
+            tr = gap
+        tr_sum = tr_sum - tr_sum / period + tr if smoothing else tr_sum + tr
+        prev_close = close[today]
+
+        if not smoothing:
+            continue
+        dx = -1.0
+        if abs(tr_sum) >= 1e-8:
+            minus_di = 100.0 * (minus_dm / tr_sum)
+            plus_di = 100.0 * (plus_dm / tr_sum)
+            total = minus_di + plus_di
+            if abs(total) >= 1e-8:
+                dx = 100.0 * (abs(minus_di - plus_di) / total)
+
+        if step < 2 * period - 1:
+            if dx >= 0:
+                sum_dx += dx
+            if step == 2 * period - 2:
+                adx_value = sum_dx / period
+                out[today] = adx_value
+        else:
+            if dx >= 0:
+                adx_value = ((adx_value * (period - 1)) + dx) / period
+            out[today] = adx_value
+
+
+def adx(high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 14) -> np.ndarray:
+    """Average Directional Index (TA-Lib); first value at bar ``2 * period - 1``"""
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    out = np.full(len(close), np.nan)
+    start = _first_valid(high, low, close)
+    if period >= 2 and start + 2 * period - 1 < len(close):
+        _adx_kernel(_loop_input(high), _loop_input(low), _loop_input(close), period, start, out)
+    return out
+
+
+@njit(cache=True)
+def _supertrend_kernel(close, upper, lower, follow_line, line, direction):
+    """
+    Band flip (``follow_line`` False): go long when close breaks the previous
+    upper band, short below the previous lower band, otherwise hold.
+    Line follow (``follow_line`` True): long while close is above the previous
+    SuperTrend value.  NaN comparisons are False, as in the pandas loops.
+    """
+    direction[0] = 1
+    line[0] = lower[0]
+    for i in range(1, len(close)):
+        if follow_line:
+            direction[i] = 1 if close[i] > line[i - 1] else -1
+        elif close[i] > upper[i - 1]:
+            direction[i] = 1
+        elif close[i] < lower[i - 1]:
+            direction[i] = -1
+        else:
+            direction[i] = direction[i - 1]
+        line[i] = lower[i] if direction[i] == 1 else upper[i]
+
+
+def supertrend(high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 10,
+               multiplier: float = 3.0, atr_method: str = 'rma',
+               mode: str = 'band') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (line, direction) with bands ``hl2 -/+ multiplier * ATR``; direction is
+    +1 / -1 from bar 0, the line is NaN until the ATR is warm.
+    ``mode='band'`` flips on a close beyond the previous band (Pine tester),
+    ``mode='line'`` follows close vs the previous line (Comet paper bot).
+    """
+    if mode not in ('band', 'line'):
+        raise ValueError(f"Unknown SuperTrend mode {mode!r}: expected 'band' or 'line'")
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    width = multiplier * atr(high, low, close, period, atr_method)
+    hl2 = (high + low) / 2
+    upper, lower = hl2 + width, hl2 - width
+
+    line = np.full(len(close), np.nan)
+    direction = np.zeros(len(close), dtype=np.int64)
+    if len(close):
+        _supertrend_kernel(_loop_input(close), _loop_input(upper), _loop_input(lower),
+                           mode == 'line', line, direction)
+    return line, direction
+
+
+@njit(cache=True)
+def _supertrend_batch_kernel(close, upper, lower, follow_line, line, direction):
+    for row in range(len(upper)):
+        _supertrend_kernel(close, upper[row], lower[row], follow_line, line[row], direction[row])
+
+
+def supertrend_batch(high: ArrayLike, low: ArrayLike, close: ArrayLike,
+                     params: Sequence[Tuple[int, float]], atr_method: str = 'rma',
+                     mode: str = 'band') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ``supertrend`` for every ``(period, multiplier)`` in ``params`` at once:
+    (lines, directions) of shape ``(len(params), bars)``, row k equal to
+    ``supertrend(..., *params[k])``.  The ATR is computed once per distinct
+    period and all rows run in a single kernel call.
+    """
+    if mode not in ('band', 'line'):
+        raise ValueError(f"Unknown SuperTrend mode {mode!r}: expected 'band' or 'line'")
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    n, k = len(close), len(params)
+    hl2 = (high + low) / 2
+    atrs = {period: atr(high, low, close, period, atr_method) for period in dict.fromkeys(p for p, _ in params)}
+
+    upper = np.empty((k, n))
+    lower = np.empty((k, n))
+    for row, (period, multiplier) in enumerate(params):
+        width = multiplier * atrs[period]
+        upper[row] = hl2 + width
+        lower[row] = hl2 - width
+
+    lines = np.full((k, n), np.nan)
+    directions = np.zeros((k, n), dtype=np.int64)
+    if n and k:
+        _supertrend_batch_kernel(_loop_input(close), _loop_input(upper), _loop_input(lower),
+                                 mode == 'line', lines, directions)
+    return lines, directions
+
+
+# ─────────────────────  volume / structure  ─────────────────────
+def vwap(high: ArrayLike, low: ArrayLike, close: ArrayLike, volume: ArrayLike) -> np.ndarray:
+    """Cumulative VWAP from bar 0; NaN while no volume has traded"""
+    high, low, close, volume = _as_array(high), _as_array(low), _as_array(close), _as_array(volume)
+    typical = (high + low + close) / 3
+    pv = typical * volume
+    # Like pandas cumsum: NaN bars stay NaN but do not break the running sums
+    cum_pv = np.nancumsum(pv)
+    cum_v = np.nancumsum(volume)
+    cum_pv[np.isnan(pv)] = np.nan
+    cum_v[np.isnan(volume)] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(cum_v != 0, cum_pv / cum_v, np.nan)
+
+
+def pivot_mask(x: ArrayLike, left: int, right: int, high: bool = True,
+               skip_nan: bool = True) -> np.ndarray:
+    """
+    Bars equal to the max (``high``) / min of bars [i - left, i + right],
+    ties included, found with one O(n) monotonic-queue pass.  With
+    ``skip_nan`` NaN neighbours are ignored (pandas ``Series.max``);
+    otherwise any NaN in the window vetoes the pivot (``np.all(x[i] >= w)``).
+    Bars without a full window on both sides are False.
+    """
+    x = _as_array(x)
+    n = len(x)
+    mask = np.zeros(n, dtype=bool)
+    if left < 0 or right < 0 or n < left + right + 1:
+        return mask
+    # The window centred on bar i is the one ending at bar i + right
+    extreme = _extreme(x, left + right + 1, 1 if high else -1, skip_nan)[left + right:]
+    mask[left:n - right] = x[left:n - right] == extreme
+    return mask
+
+
+def pivot_high(x: ArrayLike, left: int = 12, right: int = 12) -> np.ndarray:
+    """Value at ``pivot_mask`` highs (NaN neighbours ignored), NaN elsewhere"""
+    x = _as_array(x)
+    return np.where(pivot_mask(x, left, right, high=True), x, np.nan)
+
+
+def pivot_low(x: ArrayLike, left: int = 12, right: int = 12) -> np.ndarray:
+    """Value at ``pivot_mask`` lows (NaN neighbours ignored), NaN elsewhere"""
+    x = _as_array(x)
+    return np.where(pivot_mask(x, left, right, high=False), x, np.nan)
+
+
+def last_true_index(mask: np.ndarray) -> np.ndarray:
+    """Index of the most recent True at or before each bar (-1 before the first)"""
+    mask = np.asarray(mask, dtype=bool)
+    return np.maximum.accumulate(np.where(mask, np.arange(len(mask)), -1))
+
+
+def _regular_divergence(osc: np.ndarray, price: np.ndarray, pivots: np.ndarray, right: int,
+                        range_lower: int, range_upper: int, bullish: bool) -> np.ndarray:
+    n = len(osc)
+    signal = np.zeros(n, dtype=bool)
+    if n <= right:
+        return signal
+    last = last_true_index(pivots)
+    bar = np.arange(right, n)            # confirmation bar
+    pivot = bar - right                  # pivot being confirmed
+    # Latest pivot strictly before the confirmation bar / before the pivot
+    recent = np.where(bar > 0, last[np.maximum(bar - 1, 0)], -1)
+    prev = np.where(pivot > 0, last[np.maximum(pivot - 1, 0)], -1)
+
+    since = bar - recent
+    ok = pivots[pivot] & (recent >= 0) & (since >= range_lower) & (since <= range_upper) & (prev >= 0)
+    safe_prev = np.maximum(prev, 0)
+    if bullish:   # oscillator higher low, price lower low
+        ok &= (osc[pivot] > osc[safe_prev]) & (price[pivot] < price[safe_prev])
+    else:         # oscillator lower high, price higher high
+        ok &= (osc[pivot] < osc[safe_prev]) & (price[pivot] > price[safe_prev])
+    signal[right:] = ok
+    return signal
+
+
+def divergence(osc: ArrayLike, low: ArrayLike, high: ArrayLike, pivot_lows: np.ndarray,
+               pivot_highs: np.ndarray, right: int, range_lower: int = 5,
+               range_upper: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pine-style regular (bull, bear) divergence, flagged on the bar that
+    confirms a pivot ``right`` bars back.  A pivot counts when the latest
+    pivot before the confirmation bar is ``range_lower``..``range_upper``
+    bars old (Pine ``_inRange``) and it is compared with the previous pivot
+    of the same kind.  One vectorised pass over last-pivot indices.
+    """
+    osc, low, high = _as_array(osc), _as_array(low), _as_array(high)
+    bull = _regular_divergence(osc, low, np.asarray(pivot_lows, dtype=bool), right,
+                               range_lower, range_upper, bullish=True)
+    bear = _regular_divergence(osc, high, np.asarray(pivot_highs, dtype=bool), right,
+                               range_lower, range_upper, bullish=False)
+    return bull, bear
+
+
+# ─────────────────────  Series facade  ─────────────────────
+def _memo(kernel: Callable, inputs: Tuple[ArrayLike, ...], params: Tuple):
+    """Run ``kernel(*inputs, *params)``, through the active ``IndicatorCache`` if any"""
+    arrays = tuple(_as_array(x) for x in inputs)
+    cache = active_cache()
+    if cache is None:
+        return kernel(*arrays, *params)
+    return cache.get(kernel.__name__, arrays, params, lambda: kernel(*arrays, *params))
+
+
+class IndicatorSet:
+    """
+    Series-in / Series-out wrappers over the kernels (arrays pass through
+    as arrays).  Class attributes select the flavour; a module subclasses
+    this to keep its historical numbers.  Calls are memoised while an
+    ``IndicatorCache`` is active.
+    """
+
+    ema_seed = 'sma'
+    smma_seed = 'sma'
+    rsi_method = 'rma'
+    atr_method = 'rma'
+    bb_ddof = 0
+    supertrend_mode = 'band'
+
+    @classmethod
+    def sma(cls, data: ArrayLike, period: int) -> ArrayLike:
+        """Simple Moving Average"""
+        return _wrap(_memo(sma, (data,), (period,)), data)
+
+    @classmethod
+    def ema(cls, data: ArrayLike, period: int) -> ArrayLike:
+        """Exponential Moving Average"""
+        return _wrap(_memo(ema, (data,), (period, cls.ema_seed)), data)
+
+    @classmethod
+    def smma(cls, data: ArrayLike, period: int) -> ArrayLike:
+        """Smoothed Moving Average"""
+        return _wrap(_memo(smma, (data,), (period, cls.smma_seed)), data)
+
+    @classmethod
+    def rsi(cls, data: ArrayLike, period: int = 14) -> ArrayLike:
+        """Relative Strength Index"""
+        return _wrap(_memo(rsi, (data,), (period, cls.rsi_method)), data)
+
+    @classmethod
+    def atr(cls, high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 14) -> ArrayLike:
+        """Average True Range"""
+        return _wrap(_memo(atr, (high, low, close), (period, cls.atr_method)), close)
+
+    @classmethod
+    def bollinger_bands(cls, data: ArrayLike, period: int = 20,
+                        std_dev: float = 2) -> Tuple[ArrayLike, ArrayLike, ArrayLike]:
+        """Bollinger Bands (Upper, Middle, Lower)"""
+        return tuple(_wrap(band, data) for band in _memo(bollinger, (data,), (period, std_dev, cls.bb_ddof)))
+
+    @classmethod
+    def donchian_channels(cls, high: ArrayLike, low: ArrayLike,
+                          period: int = 20) -> Tuple[ArrayLike, ArrayLike]:
+        """Donchian Channels (Upper, Lower)"""
+        upper, lower = _memo(donchian, (high, low), (period,))
+        return _wrap(upper, high), _wrap(lower, low)
+
+    @classmethod
+    def adx(cls, high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 14) -> ArrayLike:
+        """Average Directional Index"""
+        return _wrap(_memo(adx, (high, low, close), (period,)), close)
+
+    @classmethod
+    def cci(cls, high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 20) -> ArrayLike:
+        """Commodity Channel Index"""
+        return _wrap(_memo(cci, (high, low, close), (period,)), close)
+
+    @classmethod
+    def macd(cls, data: ArrayLike, fast: int = 12, slow: int = 26,
+             signal: int = 9) -> Tuple[ArrayLike, ArrayLike, ArrayLike]:
+        """MACD (Line, Signal, Histogram)"""
+        return tuple(_wrap(part, data) for part in _memo(macd, (data,), (fast, slow, signal, cls.ema_seed)))
+
+    @classmethod
+    def supertrend(cls, high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 10,
+                   multiplier: float = 3.0) -> Tuple[ArrayLike, ArrayLike]:
+        """SuperTrend (Line, Direction)"""
+        line, direction = _memo(supertrend, (high, low, close),
+                                (period, multiplier, cls.atr_method, cls.supertrend_mode))
+        return _wrap(line, close), _wrap(direction, close)
+
+    @classmethod
+    def supertrend_batch(cls, high: ArrayLike, low: ArrayLike, close: ArrayLike,
+                         params: Sequence[Tuple[int, float]]) -> Tuple[ArrayLike, ArrayLike]:
+        """SuperTrend (Lines, Directions) for several (period, multiplier) pairs, one column each"""
+        params = tuple((int(p), float(m)) for p, m in params)
+        lines, directions = _memo(supertrend_batch, (high, low, close),
+                                  (params, cls.atr_method, cls.supertrend_mode))
+        if not isinstance(close, pd.Series):
+            return lines, directions
+        columns = pd.MultiIndex.from_tuples(params, names=['period', 'multiplier'])
+        return (pd.DataFrame(lines.T, index=close.index, columns=columns),
+                pd.DataFrame(directions.T, index=close.index, columns=columns))
+
+    @classmethod
+    def vwap(cls, high: ArrayLike, low: ArrayLike, close: ArrayLike, volume: ArrayLike) -> ArrayLike:
+        """Volume Weighted Average Price"""
+        return _wrap(_memo(vwap, (high, low, close, volume), ()), close)
+
+    @classmethod
+    def pivot_high(cls, high: ArrayLike, left_bars: int = 12, right_bars: int = 12) -> ArrayLike:
+        """Pivot High (value at the pivot bar, NaN elsewhere)"""
+        return _wrap(_memo(pivot_high, (high,), (left_bars, right_bars)), high)
+
+    @classmethod
+    def pivot_low(cls, low: ArrayLike, left_bars: int = 12, right_bars: int = 12) -> ArrayLike:
+        """Pivot Low (value at the pivot bar, NaN elsewhere)"""
+        return _wrap(_memo(pivot_low, (low,), (left_bars, right_bars)), low)
+
+
+# ─────────────────────  micro-benchmark  ─────────────────────
+def _bench_data(bars: int, seed: int = 7) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.004, bars)))
+    spread = close * rng.uniform(0.001, 0.01, bars)
+    return {
+        'high': close + spread * rng.uniform(0, 1, bars),
+        'low': close - spread * rng.uniform(0, 1, bars),
+        'close': close,
+        'volume': rng.uniform(1, 100, bars),
+    }
+
+
+def _best_ms(func: Callable, repeat: int) -> float:
+    func()  # compile / warm caches
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def benchmark(bars: int = 100_000, repeat: int = 5):
+    """Time every kernel on ``bars`` synthetic candles (pandas reference where one exists)"""
+    d = _bench_data(bars)
+    h, l, c, v = d['high'], d['low'], d['close'], d['volume']
+    s = pd.Series(c)
+
+    # MACD must be the one the streaming bots update bar by bar (and TA-Lib's, when installed)
+    from streaming import StreamingMACD
+    streamed = StreamingMACD(12, 26, 9)
+    expected = np.array([streamed.update(x) for x in c.tolist()], dtype=float)
+    assert np.allclose(np.column_stack(macd(c)), expected, rtol=1e-12, atol=1e-12, equal_nan=True), 'macd'
+    try:
+        import talib
+        assert np.allclose(np.column_stack(macd(c)), np.column_stack(talib.MACD(c, 12, 26, 9)),
+                           rtol=1e-12, atol=1e-12, equal_nan=True), 'talib macd'
+    except ImportError:
+        pass
+
+    cases = [
+        ('sma(20)', lambda: sma(c, 20), lambda: s.rolling(20).mean()),
+        ('ema(200)', lambda: ema(c, 200), None),
+        ('ema(200, adjust)', lambda: ema(c, 200, 'adjust'), lambda: s.ewm(span=200).mean()),
+        ('smma(13, first)', lambda: smma(c, 13, 'first'), lambda: s.ewm(alpha=1 / 13, adjust=False).mean()),
+        ('rsi(14)', lambda: rsi(c, 14), None),
+        ('rsi(14, sma)', lambda: rsi(c, 14, 'sma'), None),
+        ('atr(14)', lambda: atr(h, l, c, 14), None),
+        ('atr(14, sma)', lambda: atr(h, l, c, 14, 'sma'), None),
+        ('bollinger(20)', lambda: bollinger(c, 20, 2.0, 1), lambda: s.rolling(20).std()),
+        ('donchian(20)', lambda: donchian(h, l, 20), lambda: pd.Series(h).rolling(20).max()),
+        ('adx(14)', lambda: adx(h, l, c, 14), None),
+        ('cci(20)', lambda: cci(h, l, c, 20), None),
+        ('macd(12,26,9)', lambda: macd(c), None),
+        ('supertrend(10,3)', lambda: supertrend(h, l, c, 10, 3.0), None),
+        ('vwap', lambda: vwap(h, l, c, v), None),
+        ('pivot_high(12,12)', lambda: pivot_high(h, 12, 12), None),
+    ]
+
+    print(f"Indicator kernels on {bars:,} bars (numba: {'on' if NUMBA_AVAILABLE else 'off'}, "
+          f"best of {repeat})")
+    print(f"{'kernel':<20} {'ms':>9} {'pandas ms':>10}")
+    for name, kernel, reference in cases:
+        line = f"{name:<20} {_best_ms(kernel, repeat):>9.3f}"
+        if reference is not None:
+            line += f" {_best_ms(reference, repeat):>10.3f}"
+        print(line)
+
+
+def _pivot_mask_reference(x: np.ndarray, left: int, right: int, high: bool, skip_nan: bool) -> np.ndarray:
+    """The per-bar window scan ``pivot_mask`` replaces (kept for the benchmark check)"""
+    mask = np.zeros(len(x), dtype=bool)
+    for i in range(left, len(x) - right):
+        window = x[i - left:i + right + 1]
+        if skip_nan:
+            window = window[~np.isnan(window)]
+            mask[i] = len(window) > 0 and x[i] == (window.max() if high else window.min())
+        else:
+            mask[i] = not np.isnan(x[i]) and bool(np.all(x[i] >= window if high else x[i] <= window))
+    return mask
+
+
+def benchmark_pivots(pairs: int = 100, bars: int = 24 * 365, left: int = 12, right: int = 12):
+    """One year of 1h bars for ``pairs`` pairs: pivot engine vs the per-bar scan"""
+    series = []
+    for k in range(pairs):
+        close = _bench_data(bars, seed=k)['close']
+        series.append(np.round(rsi(close, 14), 1))  # rounded RSI: plenty of ties
+
+    started = time.perf_counter()
+    masks = [(pivot_mask(x, left, right, True, skip), pivot_mask(x, left, right, False, skip))
+             for x in series for skip in (True, False)]
+    engine = time.perf_counter() - started
+
+    sample = series[:max(1, pairs // 20)]
+    started = time.perf_counter()
+    for k, x in enumerate(sample):
+        for j, skip in enumerate((True, False)):
+            expected = (_pivot_mask_reference(x, left, right, True, skip),
+                        _pivot_mask_reference(x, left, right, False, skip))
+            got = masks[2 * k + j]
+            assert all(np.array_equal(a, b) for a, b in zip(expected, got)), f"pair {k} skip_nan={skip}"
+    reference = (time.perf_counter() - started) * pairs / len(sample)
+
+    print(f"Pivots ({left}/{right}) on {pairs} pairs x {bars:,} bars, highs + lows, both NaN modes")
+    print(f"  monotonic queue: {engine * 1000:9.1f} ms")
+    print(f"  per-bar scan:    {reference * 1000:9.1f} ms (extrapolated from {len(sample)} pairs, "
+          f"identical masks) -> {reference / engine:.0f}x")
+
+
+def _supertrend_reference(high: pd.Series, low: pd.Series, close: pd.Series, period: int,
+                          multiplier: float, mode: str) -> Tuple[pd.Series, pd.Series]:
+    """The per-bar ``.iloc`` loop the SuperTrend kernel replaced (kept for the benchmark check)"""
+    width = multiplier * pd.Series(atr(high, low, close, period), index=close.index)
+    hl2 = (high + low) / 2
+    upper_band, lower_band = hl2 + width, hl2 - width
+    prev_upper, prev_lower = upper_band.shift(1), lower_band.shift(1)
+    line = pd.Series(index=close.index, dtype=float)
+    direction = pd.Series(0, index=close.index, dtype=int)
+    direction.iloc[0] = 1
+    line.iloc[0] = lower_band.iloc[0]
+    for i in range(1, len(close)):
+        if mode == 'line':
+            direction.iloc[i] = 1 if close.iloc[i] > line.iloc[i - 1] else -1
+        elif close.iloc[i] > prev_upper.iloc[i]:
+            direction.iloc[i] = 1
+        elif close.iloc[i] < prev_lower.iloc[i]:
+            direction.iloc[i] = -1
+        else:
+            direction.iloc[i] = direction.iloc[i - 1]
+        line.iloc[i] = lower_band.iloc[i] if direction.iloc[i] == 1 else upper_band.iloc[i]
+    return line, direction
+
+
+def benchmark_supertrend(sizes: Sequence[int] = (500, 100_000), repeat: int = 5, sample_bars: int = 2000):
+    """SuperTrend kernel and (period, multiplier) batch vs the per-bar pandas loop"""
+    grid = [(period, multiplier) for period in (7, 10, 14, 21) for multiplier in (2.0, 3.0, 4.0)]
+    print(f"SuperTrend (numba: {'on' if NUMBA_AVAILABLE else 'off'}, best of {repeat}, "
+          f"batch = {len(grid)} (period, multiplier) pairs)")
+    print(f"{'bars':>8} {'mode':<5} {'pandas loop ms':>15} {'kernel ms':>10} {'speedup':>8} "
+          f"{'batch ms':>9} {'vs single calls':>16}")
+    warm = _bench_data(50)
+    _supertrend_reference(*(pd.Series(warm[key]) for key in ('high', 'low', 'close')), 10, 3.0, 'band')
+    for bars in sizes:
+        d = _bench_data(bars)
+        h, l, c = d['high'], d['low'], d['close']
+        for mode in ('band', 'line'):
+            # The pandas loop is linear in bars, so long inputs are timed on a prefix and scaled
+            m = min(bars, sample_bars)
+            frame = pd.DataFrame({'high': h[:m], 'low': l[:m], 'close': c[:m]})
+            started = time.perf_counter()
+            ref_line, ref_dir = _supertrend_reference(frame['high'], frame['low'], frame['close'], 10, 3.0, mode)
+            loop = (time.perf_counter() - started) * 1000 * bars / m
+
+            line, direction = supertrend(h[:m], l[:m], c[:m], 10, 3.0, mode=mode)
+            assert np.array_equal(line, ref_line.to_numpy(), equal_nan=True), mode
+            assert np.array_equal(direction, ref_dir.to_numpy()), mode
+            lines, directions = supertrend_batch(h, l, c, grid, mode=mode)
+            for row, (period, multiplier) in enumerate(grid):
+                single = supertrend(h, l, c, period, multiplier, mode=mode)
+                assert np.array_equal(lines[row], single[0], equal_nan=True), (period, multiplier)
+                assert np.array_equal(directions[row], single[1]), (period, multiplier)
+
+            kernel = _best_ms(lambda: supertrend(h, l, c, 10, 3.0, mode=mode), repeat)
+            batch = _best_ms(lambda: supertrend_batch(h, l, c, grid, mode=mode), repeat)
+            singles = _best_ms(lambda: [supertrend(h, l, c, p, k, mode=mode) for p, k in grid], repeat)
+            print(f"{bars:>8,} {mode:<5} {loop:>15.1f} {kernel:>10.3f} {loop / kernel:>7.0f}x "
+                  f"{batch:>9.3f} {singles / batch:>15.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared indicator kernels")
+    parser.add_argument('--bench', action='store_true', help="time every kernel")
+    parser.add_argument('--bench-pivots', action='store_true',
+                        help="pivot engine vs per-bar scan on a year of 1h bars for 100 pairs")
+    parser.add_argument('--bench-supertrend', action='store_true',
+                        help="SuperTrend kernel / batch vs the per-bar pandas loop on 500 and 100k bars")
+    parser.add_argument('--bars', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bars, args.repeat)
+    elif args.bench_pivots:
+        benchmark_pivots()
+    elif args.bench_supertrend:
+        benchmark_supertrend(repeat=args.repeat)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
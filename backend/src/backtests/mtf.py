@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MULTI-TIMEFRAME ALIGNMENT
+=====================================
+Higher-timeframe views of one base series, without lookahead.
+
+- every higher timeframe is aggregated from the base bars once, in
+  epoch-aligned buckets (pandas ``resample(label='left', closed='left')``
+  plus ``dropna()``): open first, high max, low min, close last, volume sum
+- ``index_map(tf)[i]`` is the last higher-timeframe bar that had closed
+  when base bar ``i`` closed (-1 before the first one), so a bucket's
+  values only reach the base bars from the bar that completes it; the old
+  ``reindex(method='ffill')`` handed every bar of a bucket its final close
+- ``align`` / ``indicator`` turn per-bucket values into base-aligned
+  arrays with one gather; indicator results are computed once per
+  (timeframe, key)
+=====================================
+"""
+
+import re
+from typing import Callable, Dict, Hashable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Aggregation per column name (ccxt-style names and the short ones of the 7RSI backtesters)
+AGGREGATIONS = {
+    'open': 'first', 'o': 'first',
+    'high': 'max', 'h': 'max',
+    'low': 'min', 'l': 'min',
+    'close': 'last', 'c': 'last',
+    'volume': 'sum', 'v': 'sum',
+}
+
+_UNIT_MS = {
+    's': 1000, 'S': 1000,
+    'm': 60000, 'T': 60000, 'min': 60000,
+    'h': 3600000, 'H': 3600000,
+    'd': 86400000, 'D': 86400000,
+    'w': 604800000, 'W': 604800000,
+}
+# Epoch day 0 is a Thursday; weekly buckets start on Monday like ccxt '1w'
+_WEEK_ORIGIN_MS = 4 * 86400000
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """Bucket length of a ccxt ('15m', '1h') or pandas ('15T', '1H', '15min') timeframe"""
+    match = re.fullmatch(r'\s*(\d*)\s*([A-Za-z]+)\s*', timeframe)
+    if not match or match.group(2) not in _UNIT_MS:
+        raise ValueError(f"Unsupported timeframe {timeframe!r}")
+    return int(match.group(1) or 1) * _UNIT_MS[match.group(2)]
+
+
+def _index_ms(index: pd.DatetimeIndex) -> np.ndarray:
+    return np.asarray(index.as_unit('ms').asi8, dtype=np.int64)
+
+
+class MTFEngine:
+    """Higher-timeframe frames, base → completed-bucket index maps and aligned indicators"""
+
+    def __init__(self, base: pd.DataFrame, base_timeframe: str):
+        self.base = base
+        self.base_timeframe = base_timeframe
+        self.base_ms = timeframe_ms(base_timeframe)
+        self.timestamps = _index_ms(base.index)
+        self._buckets: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._maps: Dict[str, np.ndarray] = {}
+        self._aligned: Dict[Tuple[str, Hashable], np.ndarray] = {}
+
+    def _bucketize(self, timeframe: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(first base row of every non-empty bucket, bucket start ms)"""
+        if timeframe not in self._buckets:
+            step = timeframe_ms(timeframe)
+            origin = _WEEK_ORIGIN_MS if step % _UNIT_MS['w'] == 0 else 0
+            bucket = (self.timestamps - origin) // step
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]]) if len(bucket) else np.empty(0, np.int64)
+            self._buckets[timeframe] = (starts, bucket[starts] * step + origin)
+        return self._buckets[timeframe]
+
+    def frame(self, timeframe: str) -> pd.DataFrame:
+        """All buckets of ``timeframe`` (the last may still be forming); the base frame for the base timeframe"""
+        if timeframe == self.base_timeframe:
+            return self.base
+        if timeframe not in self._frames:
+            starts, bucket_ms = self._bucketize(timeframe)
+            ends = np.r_[starts[1:], len(self.timestamps)] if len(starts) else starts
+            columns = {}
+            for name in self.base.columns:
+                how = AGGREGATIONS.get(name)
+                if how is None:
+                    continue
+                values = self.base[name].to_numpy(dtype=np.float64)
+                if not len(starts):
+                    columns[name] = values[:0]
+                elif how == 'first':
+                    columns[name] = values[starts]
+                elif how == 'last':
+                    columns[name] = values[ends - 1]
+                elif how == 'max':
+                    columns[name] = np.maximum.reduceat(values, starts)
+                elif how == 'min':
+                    columns[name] = np.minimum.reduceat(values, starts)
+                else:
+                    columns[name] = np.add.reduceat(values, starts)
+            index = pd.to_datetime(bucket_ms, unit='ms')
+            if self.base.index.tz is not None:
+                index = index.tz_localize('UTC').tz_convert(self.base.index.tz)
+            self._frames[timeframe] = pd.DataFrame(columns, index=index.rename(self.base.index.name))
+        return self._frames[timeframe]
+
+    def index_map(self, timeframe: str) -> np.ndarray:
+        """Per base bar: row of the last ``timeframe`` bucket closed by then (-1 if none)"""
+        if timeframe not in self._maps:
+            if timeframe == self.base_timeframe:
+                mapping = np.arange(len(self.timestamps))
+            else:
+                _, bucket_ms = self._bucketize(timeframe)
+                # A bucket is complete once a base bar closing at or after its end is in
+                bucket_end = bucket_ms + timeframe_ms(timeframe)
+                mapping = np.searchsorted(bucket_end, self.timestamps + self.base_ms, side='right') - 1
+            self._maps[timeframe] = mapping
+        return self._maps[timeframe]
+
+    def position(self, timestamp: pd.Timestamp) -> int:
+        """Row of the base bar at or before ``timestamp`` (-1 if none)"""
+        ts = pd.Timestamp(timestamp)
+        if ts.tzinfo is None and self.base.index.tz is not None:
+            ts = ts.tz_localize(self.base.index.tz)
+        return int(np.searchsorted(self.timestamps, ts.value // 1_000_000, side='right')) - 1
+
+    def completed(self, timeframe: str, timestamp: pd.Timestamp) -> pd.DataFrame:
+        """Buckets of ``timeframe`` that had closed by the base bar at ``timestamp``"""
+        i = self.position(timestamp)
+        last = self.index_map(timeframe)[i] if i >= 0 else -1
+        return self.frame(timeframe).iloc[:last + 1]
+
+    def align(self, timeframe: str, values) -> np.ndarray:
+        """Per-bucket ``values`` gathered onto the base bars (NaN before the first closed bucket)"""
+        values = np.asarray(values, dtype=np.float64)
+        mapping = self.index_map(timeframe)
+        out = values[np.maximum(mapping, 0)] if len(values) else np.full(len(mapping), np.nan)
+        out[mapping < 0] = np.nan
+        return out
+
+    def indicator(self, timeframe: str, key: Hashable,
+                  compute: Callable[[pd.DataFrame], np.ndarray]) -> np.ndarray:
+        """``compute(frame(timeframe))`` aligned onto the base bars, computed once per (timeframe, key)"""
+        cache_key = (timeframe, key)
+        if cache_key not in self._aligned:
+            self._aligned[cache_key] = self.align(timeframe, compute(self.frame(timeframe)))
+        return self._aligned[cache_key]
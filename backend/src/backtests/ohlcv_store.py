@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+COLUMNAR OHLCV STORE
+=====================================
+One file per (exchange, symbol, timeframe), shared by every fetcher:
+
+    <root>/<exchange>/<SYMBOL>/<timeframe>.ohlcv
+
+File layout (all little-endian 64-bit):
+    header   : 8 x int64  (magic, version, rows, capacity, updated_ms,
+                           covered_from_ms, 2 reserved)
+    timestamp: int64[capacity]   candle open time, ms since epoch
+    open/high/low/close/volume: float64[capacity] each, back to back
+
+Columns are read through copy-on-write ``np.memmap`` views, so loading
+is near-instant and zero-copy (no CSV date parsing or unpickling) while
+callers may still modify frames in place without touching the file.  Spare capacity after
+``rows`` lets new candles be appended in place.
+
+Only closed candles are kept, so the last stored timestamp is the last
+closed candle and ``sync`` refreshes a series by fetching just the tail
+after it instead of re-downloading the whole history.
+=====================================
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+MAGIC = int.from_bytes(b"OHLCV1\0\0", "little")
+VERSION = 1
+HEADER_WORDS = 8
+HEADER_BYTES = HEADER_WORDS * 8
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+COLUMNS = ('timestamp',) + PRICE_COLUMNS
+
+# Header word positions
+_H_MAGIC, _H_VERSION, _H_ROWS, _H_CAPACITY, _H_UPDATED, _H_COVERED_FROM = range(6)
+
+
+def _normalize(ohlcv: Union[pd.DataFrame, np.ndarray, Sequence[Sequence[float]]]) -> np.ndarray:
+    """Any OHLCV input -> (n x 6) float64 rows sorted by timestamp, duplicates keep last"""
+    if isinstance(ohlcv, pd.DataFrame):
+        frame = ohlcv
+        if 'timestamp' in frame.columns:
+            ts = frame['timestamp']
+            ts = ts.to_numpy() if not np.issubdtype(ts.dtype, np.datetime64) else \
+                ts.to_numpy().astype('datetime64[ms]').view(np.int64)
+        else:
+            ts = frame.index.values.astype('datetime64[ms]').view(np.int64)
+        rows = np.column_stack([np.asarray(ts, dtype=np.float64)] +
+                               [frame[c].to_numpy(dtype=np.float64) for c in PRICE_COLUMNS])
+    else:
+        rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+
+    if len(rows) == 0:
+        return rows
+    # Stable sort so that for duplicate timestamps the last occurrence wins
+    rows = rows[np.argsort(rows[:, 0], kind='stable')]
+    keep = np.ones(len(rows), dtype=bool)
+    keep[:-1] = rows[1:, 0] != rows[:-1, 0]
+    return rows[keep]
+
+
+def drop_forming(rows: np.ndarray, last_closed_ms: int) -> np.ndarray:
+    """Drop candles opened after ``last_closed_ms`` (i.e. the still-forming bar)"""
+    if len(rows) == 0:
+        return rows
+    return rows[rows[:, 0] <= last_closed_ms]
+
+
+def last_closed_ms(exchange, timeframe: str) -> int:
+    """Open time of the most recent fully closed candle on a ccxt exchange"""
+    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+    now = exchange.milliseconds()
+    return now - now % timeframe_ms - timeframe_ms
+
+
+class OHLCVStore:
+    """Memory-mapped columnar candle store"""
+
+    def __init__(self, root: Union[str, Path] = "ohlcv_store"):
+        self.root = Path(root)
+
+    # ───────────────  paths / metadata  ────────────────
+    def path(self, exchange_id: str, symbol: str, timeframe: str) -> Path:
+        clean_symbol = symbol.replace('/', '_').replace(':', '-')
+        return self.root / exchange_id / clean_symbol / f"{timeframe}.ohlcv"
+
+    def exists(self, exchange_id: str, symbol: str, timeframe: str) -> bool:
+        return self.path(exchange_id, symbol, timeframe).exists()
+
+    def _header(self, path: Path) -> np.ndarray:
+        header = np.fromfile(path, dtype='<i8', count=HEADER_WORDS)
+        if len(header) < HEADER_WORDS or header[_H_MAGIC] != MAGIC:
+            raise ValueError(f"{path} is not an OHLCV store file")
+        return header
+
+    def meta(self, exchange_id: str, symbol: str, timeframe: str) -> Optional[Dict]:
+        """rows / capacity / updated_ms / covered_from_ms / first_ts / last_ts, or None when missing"""
+        path = self.path(exchange_id, symbol, timeframe)
+        if not path.exists():
+            return None
+        header = self._header(path)
+        rows = int(header[_H_ROWS])
+        ts = self._column(path, header, 0, rows) if rows else np.empty(0, dtype=np.int64)
+        return {
+            'rows': rows,
+            'capacity': int(header[_H_CAPACITY]),
+            'updated_ms': int(header[_H_UPDATED]),
+            # Earliest time history was requested from (files without it: first candle)
+            'covered_from_ms': int(header[_H_COVERED_FROM]) or (int(ts[0]) if rows else 0),
+            'first_ts': int(ts[0]) if rows else None,
+            'last_ts': int(ts[-1]) if rows else None,
+        }
+
+    def age_seconds(self, exchange_id: str, symbol: str, timeframe: str) -> float:
+        """Seconds since the file was last written (inf when missing)"""
+        meta = self.meta(exchange_id, symbol, timeframe)
+        if meta is None:
+            return float('inf')
+        return time.time() - meta['updated_ms'] / 1000
+
+    # ───────────────  reading  ────────────────
+    def _column(self, path: Path, header: np.ndarray, col: int, rows: int) -> np.ndarray:
+        capacity = int(header[_H_CAPACITY])
+        dtype = '<i8' if col == 0 else '<f8'
+        return np.memmap(path, dtype=dtype, mode='c', offset=HEADER_BYTES + col * capacity * 8,
+                         shape=(rows,))
+
+    def _read(self, exchange_id: str, symbol: str, timeframe: str, since_ms: Optional[int]):
+        """(timestamps, (5 x rows) float block) as memmap views"""
+        path = self.path(exchange_id, symbol, timeframe)
+        header = self._header(path)
+        rows = int(header[_H_ROWS])
+        if rows == 0:
+            return np.empty(0, dtype=np.int64), np.empty((len(PRICE_COLUMNS), 0))
+
+        capacity = int(header[_H_CAPACITY])
+        ts = self._column(path, header, 0, rows)
+        start = int(np.searchsorted(ts, since_ms)) if since_ms is not None else 0
+
+        # The five float columns sit back to back: map them as one (5 x capacity) block
+        block = np.memmap(path, dtype='<f8', mode='c', offset=HEADER_BYTES + capacity * 8,
+                          shape=(len(PRICE_COLUMNS), capacity))
+        return ts[start:], block[:, start:rows]
+
+    def read_arrays(self, exchange_id: str, symbol: str, timeframe: str,
+                    since_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Copy-on-write memmapped columns (``timestamp`` in ms plus OHLCV floats)"""
+        ts, block = self._read(exchange_id, symbol, timeframe, since_ms)
+        arrays = {'timestamp': ts}
+        for j, name in enumerate(PRICE_COLUMNS):
+            arrays[name] = block[j]
+        return arrays
+
+    def read_frame(self, exchange_id: str, symbol: str, timeframe: str,
+                   since_ms: Optional[int] = None) -> pd.DataFrame:
+        """DataFrame indexed by ``timestamp`` (naive UTC) whose columns are the memmaps themselves"""
+        if not self.exists(exchange_id, symbol, timeframe):
+            return pd.DataFrame()
+        arrays = self.read_arrays(exchange_id, symbol, timeframe, since_ms)
+        index = pd.DatetimeIndex(np.asarray(arrays.pop('timestamp')).view('datetime64[ms]'),
+                                 name='timestamp', copy=False)
+        # dict + copy=False keeps one block per column, i.e. no consolidation copy
+        return pd.DataFrame({c: np.asarray(arrays[c]) for c in PRICE_COLUMNS}, index=index, copy=False)
+
+    # ───────────────  writing  ────────────────
+    def _write_file(self, path: Path, rows: np.ndarray, capacity: int, covered_from_ms: int = 0):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        n = len(rows)
+        header = np.zeros(HEADER_WORDS, dtype='<i8')
+        header[_H_MAGIC] = MAGIC
+        header[_H_VERSION] = VERSION
+        header[_H_ROWS] = n
+        header[_H_CAPACITY] = capacity
+        header[_H_UPDATED] = int(time.time() * 1000)
+        header[_H_COVERED_FROM] = covered_from_ms
+
+        body = np.zeros((len(COLUMNS), capacity), dtype='<f8')
+        body[1:, :n] = rows[:, 1:].T
+        ts_block = np.zeros(capacity, dtype='<i8')
+        ts_block[:n] = rows[:, 0].astype(np.int64)
+
+        # Write-then-rename so readers never see a half-written file
+        tmp = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+        with open(tmp, 'wb') as f:
+            header.tofile(f)
+            ts_block.tofile(f)
+            body[1:].tofile(f)
+        os.replace(tmp, path)
+
+    def write(self, exchange_id: str, symbol: str, timeframe: str,
+              ohlcv: Union[pd.DataFrame, np.ndarray, Sequence[Sequence[float]]],
+              headroom: float = 0.25, covered_from_ms: Optional[int] = None) -> int:
+        """Replace the stored series with ``ohlcv`` (ccxt rows, (n x 6) array or DataFrame)"""
+        rows = _normalize(ohlcv)
+        capacity = max(len(rows) + 1, int(len(rows) * (1 + headroom)))
+        if covered_from_ms is None:
+            covered_from_ms = int(rows[0, 0]) if len(rows) else 0
+        self._write_file(self.path(exchange_id, symbol, timeframe), rows, capacity, covered_from_ms)
+        return len(rows)
+
+    def append(self, exchange_id: str, symbol: str, timeframe: str,
+               ohlcv: Union[pd.DataFrame, np.ndarray, Sequence[Sequence[float]]],
+               headroom: float = 0.25) -> int:
+        """
+        Merge newer candles into the stored series; on equal timestamps the
+        new candle wins.  Written in place while the spare capacity lasts,
+        otherwise the file is rewritten with fresh headroom.  Returns the row count.
+        """
+        path = self.path(exchange_id, symbol, timeframe)
+        if not path.exists():
+            return self.write(exchange_id, symbol, timeframe, ohlcv, headroom)
+
+        new = _normalize(ohlcv)
+        header = self._header(path)
+        rows, capacity = int(header[_H_ROWS]), int(header[_H_CAPACITY])
+        if len(new) == 0:
+            return rows
+
+        # Everything stored from the first new timestamp on is merged with the new rows
+        ts = self._column(path, header, 0, rows)
+        pos = int(np.searchsorted(ts, new[0, 0]))
+        if pos < rows:
+            arrays = self.read_arrays(exchange_id, symbol, timeframe, since_ms=int(new[0, 0]))
+            old_tail = np.column_stack([np.asarray(arrays[c], dtype=np.float64) for c in COLUMNS])
+            new = _normalize(np.vstack([old_tail, new]))
+        total = pos + len(new)
+
+        if total > capacity:
+            head = self.read_arrays(exchange_id, symbol, timeframe)
+            kept = np.column_stack([np.asarray(head[c][:pos], dtype=np.float64) for c in COLUMNS])
+            merged = np.vstack([kept, new])
+            self._write_file(path, merged, max(total + 1, int(total * (1 + headroom))),
+                             int(header[_H_COVERED_FROM]))
+            return total
+
+        # In place: data first, then the row count, so readers never see unwritten rows
+        ts_out = np.memmap(path, dtype='<i8', mode='r+', offset=HEADER_BYTES, shape=(capacity,))
+        ts_out[pos:total] = new[:, 0].astype(np.int64)
+        ts_out.flush()
+        block = np.memmap(path, dtype='<f8', mode='r+', offset=HEADER_BYTES + capacity * 8,
+                          shape=(len(PRICE_COLUMNS), capacity))
+        block[:, pos:total] = new[:, 1:].T
+        block.flush()
+        head_out = np.memmap(path, dtype='<i8', mode='r+', shape=(HEADER_WORDS,))
+        head_out[_H_ROWS] = total
+        head_out[_H_UPDATED] = int(time.time() * 1000)
+        head_out.flush()
+        del ts_out, block, head_out
+        return total
+
+    # ───────────────  refreshing  ────────────────
+    def sync(self, exchange, symbol: str, timeframe: str, since_ms: int,
+             limit: int = 1000, pause: float = 0.05) -> Dict[str, Any]:
+        """
+        Bring the stored series up to the last closed candle via ``exchange.fetch_ohlcv``.
+
+        A series that already covers ``since_ms`` is only topped up from its
+        last stored candle (re-fetched once in case it was written while still
+        forming); otherwise the whole window is downloaded.  The forming
+        candle is never stored.  Returns ``requests`` / ``new_rows`` / ``rows``.
+        """
+        timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+        last_closed = last_closed_ms(exchange, timeframe)
+        meta = self.meta(exchange.id, symbol, timeframe)
+        stored = meta['rows'] if meta else 0
+
+        full = not stored or since_ms < meta['covered_from_ms']
+        start = since_ms if full else meta['last_ts']
+        stats = {'requests': 0, 'new_rows': 0, 'rows': stored}
+        if not full and start + timeframe_ms > last_closed:
+            return stats  # nothing has closed since the last refresh
+
+        fetched: List[List[float]] = []
+        try:
+            while start <= last_closed:
+                batch = exchange.fetch_ohlcv(symbol, timeframe, since=start, limit=limit)
+                stats['requests'] += 1
+                if not batch or batch[-1][0] < start:
+                    break
+                fetched.extend(batch)
+                if batch[-1][0] >= last_closed:
+                    break
+                start = batch[-1][0] + timeframe_ms
+                if pause:
+                    time.sleep(pause)
+        finally:
+            # Whatever arrived before an error is still merged in
+            rows = drop_forming(_normalize(fetched), last_closed)
+            if len(rows):
+                if full:
+                    stats['rows'] = self.write(exchange.id, symbol, timeframe, rows,
+                                               covered_from_ms=since_ms)
+                    stats['new_rows'] = stats['rows']
+                else:
+                    stats['rows'] = self.append(exchange.id, symbol, timeframe, rows)
+                    stats['new_rows'] = stats['rows'] - stored
+        return stats
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LIMIT-ORDER LADDER
+=====================================
+Pending grid / DCA limit orders of one side as sorted NumPy columns.
+
+- rungs are kept in fill order (buys by descending price, sells by
+  ascending price) behind a fill pointer; everything before ``head`` has
+  filled, everything from ``head`` on is still pending
+- ``fill(extreme)`` finds every rung the bar's low (buys) or high (sells)
+  crossed with one binary search, then caps the run at what the budget
+  affords; rungs fill in price order and stop at the first unaffordable one
+- ``blend`` folds a run of fills into a position's size and average entry
+  in one step instead of one rung at a time
+- ``tags`` carries whatever the caller keeps per order (ids, dicts)
+=====================================
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_EMPTY = slice(0, 0)
+
+
+class OrderLadder:
+    """Sorted pending limit orders of one side with a fill pointer"""
+
+    def __init__(self, side: str = 'buy'):
+        if side not in ('buy', 'sell'):
+            raise ValueError(f"Unknown ladder side {side!r}")
+        self.side = side
+        # Sort key: ascending key is fill order, and a rung fills once key <= sign * extreme
+        self._sign = -1.0 if side == 'buy' else 1.0
+        self._key = np.empty(0)
+        self.price = np.empty(0)
+        self.quantity = np.empty(0)
+        self.collateral = np.empty(0)
+        self.tags: List[Any] = []
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.price) - self.head
+
+    def __iter__(self):
+        """Tags of the pending rungs, next to fill first"""
+        return iter(self.tags[self.head:])
+
+    @property
+    def next_price(self) -> float:
+        """Price of the next rung to fill (NaN when nothing is pending)"""
+        return float(self.price[self.head]) if len(self) else float('nan')
+
+    def place(self, prices: Sequence[float], quantities: Sequence[float],
+              collateral: Optional[Sequence[float]] = None, tags: Optional[Sequence[Any]] = None):
+        """Add rungs; filled rungs are dropped and pending ones keep precedence on equal prices"""
+        prices = np.asarray(prices, dtype=np.float64)
+        quantities = np.broadcast_to(np.asarray(quantities, dtype=np.float64), prices.shape)
+        collateral = (prices * quantities if collateral is None
+                      else np.broadcast_to(np.asarray(collateral, dtype=np.float64), prices.shape))
+        tags = list(tags) if tags is not None else [None] * len(prices)
+
+        live = slice(self.head, None)
+        key = np.concatenate([self._key[live], self._sign * prices])
+        order = np.argsort(key, kind='stable')
+        self._key = key[order]
+        self.price = np.concatenate([self.price[live], prices])[order]
+        self.quantity = np.concatenate([self.quantity[live], quantities])[order]
+        self.collateral = np.concatenate([self.collateral[live], collateral])[order]
+        pending = self.tags[self.head:] + tags
+        self.tags = [pending[i] for i in order]
+        self.head = 0
+
+    def fill(self, extreme: float, available: float = np.inf, spent: float = 0.0) -> slice:
+        """
+        Fill the rungs crossed by ``extreme`` (bar low for buys, high for sells)
+        and return their slice.  With a finite ``available``, rung k only fills
+        while ``available - (spent + collateral of earlier fills) >= collateral[k]``.
+        """
+        head = self.head
+        threshold = self._sign * extreme
+        # Cheap scalar test first: on most bars not even the nearest rung is touched
+        if head >= len(self._key) or not self._key[head] <= threshold:
+            return _EMPTY
+        stop = head + int(np.searchsorted(self._key[head:], threshold, side='right'))
+        if np.isfinite(available):
+            cost = self.collateral[head:stop]
+            used = np.cumsum(np.concatenate(([spent], cost[:-1])))
+            fits = available - used >= cost
+            if not fits.all():
+                stop = head + int(np.argmin(fits))
+        self.head = stop
+        return slice(head, stop)
+
+    def cancel(self) -> int:
+        """Drop every pending rung, returning how many there were"""
+        pending = len(self)
+        self._key = self._key[:0]
+        self.price = self.price[:0]
+        self.quantity = self.quantity[:0]
+        self.collateral = self.collateral[:0]
+        self.tags = []
+        self.head = 0
+        return pending
+
+    clear = cancel
+
+
+def blend(size: float, entry: float, prices: np.ndarray, quantities: np.ndarray) -> Tuple[float, float]:
+    """(size, average entry) after adding fills at ``prices`` x ``quantities``"""
+    added = float(quantities.sum())
+    total = size + added
+    if total <= 0:
+        return size, entry
+    return total, (entry * size + float(np.dot(prices, quantities))) / total
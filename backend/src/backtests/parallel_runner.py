@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PARALLEL WORK-UNIT RUNNER
+=====================================
+Fans (symbol, timeframe) work units out over worker processes.
+
+- each OHLCV DataFrame is published once into ``multiprocessing.shared_memory``;
+  workers attach to it zero-copy instead of unpickling a copy
+- results stream back through a bounded queue with live progress / ETA
+- a failing unit (exception or dead worker) is isolated, reported and
+  does not stop the run
+=====================================
+"""
+
+import logging
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def publish_frame(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, Dict]:
+    """
+    Copy a DatetimeIndex'd numeric DataFrame into one shared memory block.
+    Layout: int64 ns timestamps followed by a (rows x columns) float64 block.
+    Returns the block (keep it alive, unlink when done) and a small picklable spec.
+    """
+    rows, cols = df.shape
+    timestamps = df.index.values.astype('datetime64[ns]').view(np.int64)
+    nbytes = max(1, rows * 8 * (cols + 1))
+
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    np.ndarray(rows, dtype=np.int64, buffer=shm.buf)[:] = timestamps
+    np.ndarray((rows, cols), dtype=np.float64, buffer=shm.buf, offset=rows * 8)[:] = \
+        df.to_numpy(dtype=np.float64)
+
+    spec = {
+        'name': shm.name,
+        'rows': rows,
+        'columns': list(df.columns),
+        'index_name': df.index.name,
+    }
+    return shm, spec
+
+
+def attach_frame(spec: Dict) -> Tuple[pd.DataFrame, shared_memory.SharedMemory]:
+    """Rebuild a published DataFrame as a view over the shared block"""
+    try:
+        shm = shared_memory.SharedMemory(name=spec['name'], track=False)
+    except TypeError:  # Python < 3.13 has no track argument
+        shm = shared_memory.SharedMemory(name=spec['name'])
+
+    rows, cols = spec['rows'], len(spec['columns'])
+    timestamps = np.ndarray(rows, dtype=np.int64, buffer=shm.buf)
+    values = np.ndarray((rows, cols), dtype=np.float64, buffer=shm.buf, offset=rows * 8)
+    values.flags.writeable = False
+
+    index = pd.DatetimeIndex(timestamps.view('datetime64[ns]'), name=spec['index_name'])
+    df = pd.DataFrame(values, index=index, columns=spec['columns'], copy=False)
+    return df, shm
+
+
+def _release(shm: shared_memory.SharedMemory):
+    try:
+        shm.close()
+    except BufferError:
+        # A view is still referenced somewhere; the mapping goes with the process
+        pass
+
+
+def _worker_main(worker_id: int, task_queue, result_queue,
+                 initializer: Optional[Callable], initargs: Tuple, func: Callable):
+    """Worker loop: attach, run ``func(key, df)``, report, detach (one task at a time)"""
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        key, spec = task
+        started = time.time()
+        try:
+            df, shm = attach_frame(spec)
+            try:
+                output = func(key, df)
+            finally:
+                del df
+                _release(shm)
+            result_queue.put(('done', worker_id, key, (output, time.time() - started)))
+        except Exception:
+            result_queue.put(('error', worker_id, key, traceback.format_exc()))
+
+
+class SharedFrameRunner:
+    """Process pool over shared-memory DataFrames with a bounded result queue"""
+
+    def __init__(self, func: Callable[[Hashable, pd.DataFrame], Any], workers: int,
+                 initializer: Optional[Callable] = None, initargs: Tuple = (),
+                 result_queue_size: Optional[int] = None):
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.initializer = initializer
+        self.initargs = initargs
+        self.result_queue_size = result_queue_size or 2 * self.workers
+
+        self.failures: List[Tuple[Hashable, str]] = []
+        self.unit_times: Dict[Hashable, float] = {}
+
+    def _spawn(self, ctx, worker_id: int, result_queue):
+        task_queue = ctx.Queue()
+        proc = ctx.Process(
+            target=_worker_main,
+            args=(worker_id, task_queue, result_queue, self.initializer, self.initargs, self.func),
+            daemon=True,
+        )
+        proc.start()
+        return proc, task_queue
+
+    def run(self, units: Iterable[Tuple[Hashable, pd.DataFrame]]) -> List[Tuple[Hashable, Any]]:
+        """
+        Consume ``(key, DataFrame)`` units (may be a lazy generator, e.g. a
+        fetcher) and return ``[(key, output), ...]`` in completion order.
+        Failed units are collected in ``self.failures``.
+        """
+        ctx = mp.get_context()
+        # Workers must share the parent's tracker, otherwise the first one to
+        # exit unlinks every block it attached to as "leaked"
+        resource_tracker.ensure_running()
+        result_queue = ctx.Queue(maxsize=self.result_queue_size)
+
+        # The parent assigns every task itself, so it always knows which unit
+        # a worker was running when it died
+        workers: Dict[int, Tuple[Any, Any]] = {}
+        for wid in range(self.workers):
+            workers[wid] = self._spawn(ctx, wid, result_queue)
+        next_worker_id = self.workers
+        idle: List[int] = list(workers)
+        assigned: Dict[int, Hashable] = {}
+        pending: Deque[Tuple[Hashable, Dict]] = deque()
+        published: Dict[Hashable, shared_memory.SharedMemory] = {}
+        outputs: List[Tuple[Hashable, Any]] = []
+
+        start_time = time.time()
+        state = {'total': 0, 'finished': 0, 'producing': True}
+
+        def dispatch():
+            while idle and pending:
+                wid = idle.pop()
+                key, spec = pending.popleft()
+                assigned[wid] = key
+                workers[wid][1].put((key, spec))
+
+        def finish(key):
+            state['finished'] += 1
+            shm = published.pop(key, None)
+            if shm is not None:
+                _release(shm)
+                shm.unlink()
+
+            elapsed = time.time() - start_time
+            total = state['total']
+            eta = elapsed / state['finished'] * (total - state['finished'])
+            logger.info(f"  [{state['finished']}/{total}{'+' if state['producing'] else ''}] "
+                        f"{key} | Elapsed: {elapsed/60:.1f}min | ETA: {eta/60:.1f}min")
+
+        def handle(message):
+            kind, worker_id, key, payload = message
+            assigned.pop(worker_id, None)
+            if worker_id in workers:
+                idle.append(worker_id)
+            if kind == 'done':
+                output, unit_time = payload
+                self.unit_times[key] = unit_time
+                outputs.append((key, output))
+            else:
+                logger.error(f"Work unit {key} failed:\n{payload}")
+                self.failures.append((key, payload))
+            finish(key)
+
+        def reap_dead_workers():
+            nonlocal next_worker_id
+            for wid, (proc, _) in list(workers.items()):
+                if proc.is_alive():
+                    continue
+                del workers[wid]
+                if wid in idle:
+                    idle.remove(wid)
+                key = assigned.pop(wid, None)
+                if key is not None:
+                    message = f"worker exited with code {proc.exitcode}"
+                    logger.error(f"Work unit {key} failed: {message}")
+                    self.failures.append((key, message))
+                    finish(key)
+                workers[next_worker_id] = self._spawn(ctx, next_worker_id, result_queue)
+                idle.append(next_worker_id)
+                next_worker_id += 1
+
+        def drain(timeout: Optional[float]):
+            try:
+                handle(result_queue.get(timeout=timeout) if timeout else result_queue.get_nowait())
+                return True
+            except queue.Empty:
+                return False
+
+        try:
+            for key, df in units:
+                shm, spec = publish_frame(df)
+                published[key] = shm
+                pending.append((key, spec))
+                state['total'] += 1
+
+                # Keep results flowing while the producer is still fetching
+                while drain(None):
+                    pass
+                dispatch()
+            state['producing'] = False
+
+            while state['finished'] < state['total']:
+                dispatch()
+                if not drain(1.0):
+                    reap_dead_workers()
+        finally:
+            for proc, task_queue in workers.values():
+                task_queue.put(None)
+            for proc, _ in workers.values():
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.terminate()
+            for shm in published.values():
+                _release(shm)
+                shm.unlink()
+
+        return outputs
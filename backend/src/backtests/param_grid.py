@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LAZY PARAMETER GRID
+=====================================
+Streaming access to the cartesian product of a strategy's parameter ranges
+without ever materialising it.
+
+Every combination has a flat index in ``[0, size)``.  The index is decoded
+as a mixed-radix number (last key varies fastest, exactly like
+``itertools.product``), so systematic-stride and random samples are computed
+straight from integers and memory stays flat however large the grid grows.
+=====================================
+"""
+
+import random
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class ParameterGrid:
+    """Mixed-radix view over ``itertools.product(*param_ranges.values())``"""
+
+    def __init__(self, param_ranges: Dict[str, Sequence[Any]]):
+        self.keys: List[str] = list(param_ranges.keys())
+        self.values: List[Sequence[Any]] = [list(param_ranges[key]) for key in self.keys]
+        self.radices: List[int] = [len(v) for v in self.values]
+
+        # Place value of each digit; the last key varies fastest
+        self.strides: List[int] = [1] * len(self.radices)
+        for pos in range(len(self.radices) - 2, -1, -1):
+            self.strides[pos] = self.strides[pos + 1] * self.radices[pos + 1]
+
+        self.size: int = 1
+        for radix in self.radices:
+            self.size *= radix
+        if not self.keys:
+            self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def combo_at(self, index: int) -> Tuple[Any, ...]:
+        """Decode a flat index into its value tuple"""
+        if index < 0 or index >= self.size:
+            raise IndexError(f"grid index {index} out of range for size {self.size}")
+
+        combo = []
+        for values, stride, radix in zip(self.values, self.strides, self.radices):
+            combo.append(values[(index // stride) % radix])
+        return tuple(combo)
+
+    def params_at(self, index: int) -> Dict[str, Any]:
+        """Decode a flat index into a ``{key: value}`` parameter dict"""
+        return dict(zip(self.keys, self.combo_at(index)))
+
+    def digits_at(self, index: int) -> Tuple[int, ...]:
+        """Per-key positions of a flat index (useful for compact storage)"""
+        return tuple((index // stride) % radix for stride, radix in zip(self.strides, self.radices))
+
+    def iter_params(self, indices: Sequence[int]) -> Iterator[Dict[str, Any]]:
+        """Lazily yield parameter dicts for the given indices"""
+        for index in indices:
+            yield self.params_at(index)
+
+    def sample_indices(self, max_full: int = 80, systematic: int = 60, random_count: int = 20,
+                       seed: Optional[int] = None) -> List[int]:
+        """
+        Pick combination indices the way the optimiser always has:
+        the whole grid when it has at most ``max_full`` entries, otherwise
+        every ``size // systematic``-th combination plus up to
+        ``random_count`` distinct random ones that are not already on the stride.
+        """
+        if self.size <= max_full:
+            return list(range(self.size))
+
+        step = max(1, self.size // systematic)
+        indices = list(range(0, self.size, step))
+
+        # Indices not on the stride: everything except multiples of step
+        remaining = self.size - len(indices)
+        wanted = min(random_count, remaining)
+        if wanted <= 0:
+            return indices
+
+        rng = random.Random(seed)
+        picked = set()
+        while len(picked) < wanted:
+            candidate = rng.randrange(self.size)
+            if candidate % step == 0 or candidate in picked:
+                continue
+            picked.add(candidate)
+
+        return indices + sorted(picked)
+
+    def sample(self, max_full: int = 80, systematic: int = 60, random_count: int = 20,
+               seed: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Lazily yield sampled parameter dicts (see ``sample_indices``)"""
+        return self.iter_params(self.sample_indices(max_full, systematic, random_count, seed))
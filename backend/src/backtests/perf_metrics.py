@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PERFORMANCE METRICS
+=====================================
+One vectorised pass from a returns array (per trade or per bar) and an
+equity curve to the metric set every backtester reports.
+
+- ``performance(returns, equity)`` rates one run and returns plain floats
+- ``performance_batch(returns, equity)`` rates many runs stacked as rows
+  of 2-D arrays; rows of different length are padded with NaN at the end
+- returns feed the distribution metrics (win rate, averages, profit
+  factor, Sharpe / Sortino, VaR, streaks), the equity curve the path
+  metrics (total return, drawdowns, ulcer index, Calmar)
+- conventions follow the engines: wins are ``> 0`` and losses ``<= 0``,
+  Sortino divides by the std of the negative excess returns, Sharpe and
+  Sortino use ``ddof`` and ``sqrt(periods_per_year)``; anything undefined
+  (no trades, zero std, flat curve) comes back as 0
+=====================================
+"""
+
+from typing import Dict
+
+import numpy as np
+
+METRICS = (
+    'trades', 'winning', 'losing', 'negative', 'win_rate', 'mean', 'std',
+    'avg_win', 'avg_loss', 'largest_win', 'largest_loss', 'gross_profit',
+    'gross_loss', 'profit_factor', 'sharpe', 'sortino', 'downside', 'downside_std', 'var',
+    'max_consecutive_wins', 'max_consecutive_losses', 'total_return',
+    'annual_return', 'max_drawdown', 'current_drawdown', 'ulcer_index',
+    'calmar', 'exposure',
+)
+
+_COUNTS = ('trades', 'winning', 'losing', 'negative', 'downside', 'max_consecutive_wins',
+           'max_consecutive_losses')
+
+
+def period_returns(equity) -> np.ndarray:
+    """Bar-to-bar simple returns of one curve or of each row of a 2-D stack"""
+    equity = np.asarray(equity, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return equity[..., 1:] / equity[..., :-1] - 1
+
+
+def _defined(values: np.ndarray, ok: np.ndarray) -> np.ndarray:
+    return np.where(ok, values, 0.0)
+
+
+def _masked_mean_std(x: np.ndarray, mask: np.ndarray, count: np.ndarray, ddof: int):
+    """Row means and stds over ``mask``; on unpadded rows this is np.mean / np.std exactly"""
+    mean = np.where(mask, x, 0.0).sum(axis=1) / count
+    deviation = np.where(mask, x - mean[:, None], 0.0)
+    std = np.sqrt((deviation * deviation).sum(axis=1) / (count - ddof))
+    return _defined(mean, count > 0), _defined(std, count > ddof)
+
+
+def _row_percentile(x: np.ndarray, valid: np.ndarray, count: np.ndarray, q: float) -> np.ndarray:
+    """np.percentile of each row's valid values (0 for empty rows), one call per distinct row length"""
+    if valid.all():
+        return np.percentile(x, q, axis=1)
+    out = np.zeros(len(x))
+    ordered = np.sort(x, axis=1)  # NaN padding sorts last
+    for length in np.unique(count[count > 0]):
+        rows = count == length
+        out[rows] = np.percentile(ordered[rows, :length], q, axis=1)
+    return out
+
+
+def _longest_run(mask: np.ndarray) -> np.ndarray:
+    """Longest run of True per row"""
+    if not mask.shape[1]:
+        return np.zeros(len(mask), dtype=np.int64)
+    running = np.cumsum(mask, axis=1)
+    reset = np.maximum.accumulate(np.where(mask, 0, running), axis=1)
+    return (running - reset).max(axis=1)
+
+
+def performance_batch(returns, equity=None, periods_per_year: float = 1.0, risk_free: float = 0.0,
+                      ddof: int = 0, var_percentile: float = 5.0,
+                      in_market=None) -> Dict[str, np.ndarray]:
+    """
+    Metrics per row of ``returns`` (runs x values) and ``equity`` (runs x bars).
+    ``risk_free`` is per period and subtracted before Sharpe / Sortino;
+    ``in_market`` (runs x bars, bool) gives the exposure percentage.
+    """
+    r = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+    rows = len(r)
+    valid = ~np.isnan(r)
+    trades = valid.sum(axis=1)
+    win = r > 0
+    loss = valid & ~win
+    negative = r < 0
+    winning = win.sum(axis=1)
+    losing = loss.sum(axis=1)
+
+    out: Dict[str, np.ndarray] = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean, std = _masked_mean_std(r, valid, trades, ddof)
+
+        gross_profit = np.where(win, r, 0.0).sum(axis=1)
+        loss_sum = np.where(loss, r, 0.0).sum(axis=1)
+        gross_loss = -loss_sum
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss,
+                                 np.where(gross_profit > 0, np.inf, 0.0))
+
+        # Excess returns drive Sharpe / Sortino; with no risk-free rate they are the returns
+        if risk_free:
+            excess = r - risk_free
+            excess_mean, excess_std = _masked_mean_std(excess, valid, trades, ddof)
+        else:
+            excess, excess_mean, excess_std = r, mean, std
+        below = excess < 0
+        downside = below.sum(axis=1)
+        _, downside_std = _masked_mean_std(excess, below, downside, ddof)
+        scale = np.sqrt(periods_per_year)
+
+        var = _row_percentile(r, valid, trades, var_percentile) if r.shape[1] else np.zeros(rows)
+
+        out.update(
+            trades=trades,
+            winning=winning,
+            losing=losing,
+            negative=negative.sum(axis=1),
+            win_rate=_defined(winning / trades * 100, trades > 0),
+            mean=mean,
+            std=std,
+            avg_win=_defined(gross_profit / winning, winning > 0),
+            avg_loss=_defined(loss_sum / losing, losing > 0),
+            largest_win=_defined(np.where(win, r, -np.inf).max(axis=1, initial=-np.inf), winning > 0),
+            largest_loss=_defined(np.where(loss, r, np.inf).min(axis=1, initial=np.inf), losing > 0),
+            gross_profit=gross_profit,
+            gross_loss=gross_loss,
+            profit_factor=profit_factor,
+            sharpe=_defined(excess_mean / excess_std * scale, excess_std > 0),
+            sortino=_defined(excess_mean / downside_std * scale, downside_std > 0),
+            downside=downside,
+            downside_std=downside_std,
+            var=var,
+            max_consecutive_wins=_longest_run(win),
+            max_consecutive_losses=_longest_run(loss),
+        )
+
+        zeros = np.zeros(rows)
+        if equity is None:
+            out.update(total_return=zeros, annual_return=zeros, max_drawdown=zeros,
+                       current_drawdown=zeros, ulcer_index=zeros, calmar=zeros)
+        else:
+            e = np.atleast_2d(np.asarray(equity, dtype=np.float64))
+            filled = ~np.isnan(e)
+            bars = filled.sum(axis=1)
+            last = np.maximum(bars - 1, 0)
+            at_last = (np.arange(len(e)), last)
+
+            peak = np.fmax.accumulate(e, axis=1)
+            drawdown = (peak - e) / peak * 100
+            max_drawdown = _defined(np.fmax.reduce(drawdown, axis=1), bars > 0)
+            growth = e[at_last] / e[:, 0]
+            annual_return = _defined((growth ** (periods_per_year / np.maximum(last, 1)) - 1) * 100, bars > 1)
+
+            out.update(
+                total_return=_defined((growth - 1) * 100, bars > 0),
+                annual_return=annual_return,
+                max_drawdown=max_drawdown,
+                current_drawdown=_defined(drawdown[at_last], bars > 0),
+                ulcer_index=_defined(np.sqrt(np.where(filled, drawdown ** 2, 0.0).sum(axis=1) / bars), bars > 0),
+                calmar=_defined(annual_return / max_drawdown, max_drawdown > 0),
+            )
+
+        if in_market is None:
+            out['exposure'] = zeros
+        else:
+            out['exposure'] = np.atleast_2d(np.asarray(in_market, dtype=bool)).mean(axis=1) * 100
+
+    return out
+
+
+def performance(returns, equity=None, **options) -> Dict[str, float]:
+    """``performance_batch`` for a single run, as plain Python numbers"""
+    batch = performance_batch(np.asarray(returns, dtype=np.float64)[None, :],
+                              None if equity is None else np.asarray(equity, dtype=np.float64)[None, :],
+                              **options)
+    return {name: (int(values[0]) if name in _COUNTS else float(values[0])) for name, values in batch.items()}
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+POSITION-STATE SIMULATOR
+=====================================
+Signal series (+1 / 0 / -1) and close prices → trades and equity, for the
+engines that used to walk ``df['signal'].iloc[i]`` bar by bar.
+
+- ``simulate(close, signal, mode, **params)`` runs one named mode and
+  returns a ``Simulation``: one row per trade in NumPy columns plus the
+  mark-to-market equity curve
+- ``pine``        CryptoPineBacktester._run_signal_engine (v2pinetester)
+- ``all_in_long`` Ultimate29StrategiesBacktester.backtest_strategy
+- ``sl_tp_long``  ComprehensiveBacktest.backtest_strategy
+- every mode reproduces its engine's current rules bit for bit, quirks
+  included (see each mode's docstring)
+- ``pine`` and ``all_in_long`` derive position state from forward-filled
+  signal events, cumulative sums and binary searches; ``sl_tp_long``,
+  whose exits depend on each entry price, walks the bars in a compiled
+  kernel (bar_kernels.njit)
+=====================================
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from bar_kernels import NUMBA_AVAILABLE, njit
+
+# Exit reason codes
+EXIT_NONE = 0  # still open (or, in ``pine``, superseded by a re-entry)
+EXIT_SIGNAL = 1
+EXIT_STOP_LOSS = 2
+EXIT_TAKE_PROFIT = 3
+EXIT_END_OF_DATA = 4
+
+EXIT_REASONS = {
+    EXIT_SIGNAL: "Signal",
+    EXIT_STOP_LOSS: "Stop Loss",
+    EXIT_TAKE_PROFIT: "Take Profit",
+    EXIT_END_OF_DATA: "End of Data",
+}
+
+
+@dataclass
+class Simulation:
+    """Trade columns (one row per entry) and the equity curve of one run"""
+    entry_idx: np.ndarray
+    exit_idx: np.ndarray      # -1 while open
+    side: np.ndarray          # +1 long, -1 short
+    quantity: np.ndarray      # unsigned
+    entry_price: np.ndarray
+    exit_price: np.ndarray    # NaN while open
+    fee_in: np.ndarray
+    fee_out: np.ndarray
+    pnl: np.ndarray           # 0.0 while open
+    exit_reason: np.ndarray
+    equity: np.ndarray
+    cash: float
+
+    def __len__(self) -> int:
+        return len(self.entry_idx)
+
+    @property
+    def closed(self) -> np.ndarray:
+        return self.exit_idx >= 0
+
+
+def _trades(entry_idx, exit_idx, side, quantity, entry_price, exit_price,
+            fee_in, fee_out, pnl, exit_reason, equity, cash) -> Simulation:
+    return Simulation(
+        np.asarray(entry_idx, dtype=np.int64), np.asarray(exit_idx, dtype=np.int64),
+        np.asarray(side, dtype=np.int8), np.asarray(quantity, dtype=np.float64),
+        np.asarray(entry_price, dtype=np.float64), np.asarray(exit_price, dtype=np.float64),
+        np.asarray(fee_in, dtype=np.float64), np.asarray(fee_out, dtype=np.float64),
+        np.asarray(pnl, dtype=np.float64), np.asarray(exit_reason, dtype=np.int64),
+        np.asarray(equity, dtype=np.float64), float(cash))
+
+
+def _no_trades(n: int, cash: float) -> Simulation:
+    empty = np.empty(0)
+    return _trades(empty, empty, empty, empty, empty, empty, empty, empty, empty, empty,
+                   np.full(n, cash, dtype=np.float64), cash)
+
+
+# ─────────────────────────────  pine  ──────────────────────────────
+
+def simulate_pine(close: np.ndarray, signal: np.ndarray, initial_capital: float,
+                  order_size: float, fee_rate: float) -> Simulation:
+    """
+    Fixed-notional entries on every bar whose signal matches the current side.
+
+    The engine only acts on ``+1`` while flat or long and on ``-1`` while
+    flat or short, so its close-then-reverse branches never run: the first
+    signal fixes the side for the whole series, each later signal of that
+    side re-enters (fee charged, previous trade left open with zero P&L)
+    and only the last trade is closed, at the final close.  Equity is
+    marked before each bar's action, plus the cash after the close-out.
+    """
+    n = len(close)
+    acting = np.flatnonzero((signal == 1) | (signal == -1))
+    if not len(acting):
+        return _no_trades(n, initial_capital)
+
+    direction = int(signal[acting[0]])
+    entries = np.flatnonzero(signal == direction)
+    entry_price = close[entries]
+    quantity = order_size / entry_price
+    fee_in = quantity * entry_price * fee_rate
+    signed = quantity * direction
+    # cash[k] = cash after the first k entries, subtracted in the engine's order
+    cash = np.cumsum(np.concatenate(([initial_capital], -fee_in)))
+
+    # Entries strictly before each bar: the position marked on that bar
+    held = np.searchsorted(entries, np.arange(n), side='left')
+    last = np.maximum(held - 1, 0)
+    equity = np.where(held > 0, cash[held] + (close - entry_price[last]) * signed[last], initial_capital)
+
+    exit_idx = np.full(len(entries), -1, dtype=np.int64)
+    exit_price = np.full(len(entries), np.nan)
+    fee_out = np.zeros(len(entries))
+    pnl = np.zeros(len(entries))
+    reason = np.full(len(entries), EXIT_NONE, dtype=np.int64)
+
+    px = close[-1]
+    q = quantity[-1]
+    fee_out[-1] = (order_size + q * px) * fee_rate
+    gross = (px - entry_price[-1]) * q if direction > 0 else (entry_price[-1] - px) * q
+    pnl[-1] = gross - fee_out[-1]
+    exit_idx[-1] = n - 1
+    exit_price[-1] = px
+    reason[-1] = EXIT_END_OF_DATA
+    final_cash = cash[-1] + pnl[-1]
+
+    return _trades(entries, exit_idx, np.full(len(entries), direction), quantity, entry_price,
+                   exit_price, fee_in, fee_out, pnl, reason, np.append(equity, final_cash), final_cash)
+
+
+# ──────────────────────────  all_in_long  ──────────────────────────
+
+def simulate_all_in_long(close: np.ndarray, signal: np.ndarray, initial_capital: float) -> Simulation:
+    """
+    Long-only, whole capital per trade, no fees: ``+1`` buys when flat,
+    ``-1`` sells when long, an open position is sold at the final close.
+    The position after a bar is simply "the last +/-1 so far was +1".
+    """
+    n = len(close)
+    event = np.where(signal == 1, 1, np.where(signal == -1, -1, 0))
+    last_event = np.maximum.accumulate(np.where(event != 0, np.arange(n), -1))
+    holding = (last_event >= 0) & (event[np.maximum(last_event, 0)] == 1)
+    was_holding = np.concatenate(([False], holding[:-1]))
+    entries = np.flatnonzero(holding & ~was_holding)
+    if not len(entries):
+        return _no_trades(n, initial_capital)
+
+    exits = np.flatnonzero(was_holding & ~holding)
+    reason = np.full(len(entries), EXIT_SIGNAL, dtype=np.int64)
+    if len(exits) < len(entries):
+        exits = np.append(exits, n - 1)
+        reason[-1] = EXIT_END_OF_DATA
+    entry_price = close[entries]
+    exit_price = close[exits]
+
+    # Compounding is sequential; one step per trade keeps the engine's rounding
+    quantity = np.empty(len(entries))
+    after = np.empty(len(entries))
+    capital = initial_capital
+    for k, (buy, sell) in enumerate(zip(entry_price.tolist(), exit_price.tolist())):
+        quantity[k] = capital / buy
+        capital = quantity[k] * sell
+        after[k] = capital
+    before = np.concatenate(([initial_capital], after[:-1]))
+
+    # Flat bars show the cash of the last exit, held bars the position at market
+    trade = np.searchsorted(entries, np.arange(n), side='right') - 1
+    settled = np.concatenate(([initial_capital], after))[trade + 1]
+    equity = np.where(holding, quantity[np.maximum(trade, 0)] * close, settled)
+
+    zeros = np.zeros(len(entries))
+    return _trades(entries, exits, np.ones(len(entries)), quantity, entry_price, exit_price,
+                   zeros, zeros, after - before, reason, equity, capital)
+
+
+# ───────────────────────────  sl_tp_long  ──────────────────────────
+
+@njit(cache=True)
+def _sl_tp_long_kernel(close, signal, capital, position_size, commission, slippage,
+                       stop_loss, take_profit, entry_idx, exit_idx, entry_price,
+                       exit_price, quantity, fee_in, fee_out, pnl, reason, equity):
+    """Walk the bars; fills the preallocated trade columns, returns (n_trades, cash, open)"""
+    n = len(close)
+    k = 0
+    holding = False
+    stop = 0.0
+    target = 0.0
+    for i in range(n):
+        px = close[i]
+        if signal[i] == 1 and not holding:
+            price = px * (1 + slippage)
+            size = (capital * position_size) / price
+            fee = size * price * commission
+            stop = price * (1 - stop_loss)
+            target = price * (1 + take_profit)
+            capital -= (size * price + fee)
+            entry_idx[k] = i
+            entry_price[k] = price
+            quantity[k] = size
+            fee_in[k] = fee
+            holding = True
+        elif holding:
+            code = 0
+            if signal[i] == -1:
+                code = 1  # EXIT_SIGNAL
+            elif px <= stop:
+                code = 2  # EXIT_STOP_LOSS
+            elif px >= target:
+                code = 3  # EXIT_TAKE_PROFIT
+            if code != 0:
+                price = px * (1 - slippage)
+                fee = quantity[k] * price * commission
+                pnl[k] = (price - entry_price[k]) * quantity[k] - fee_in[k] - fee
+                exit_idx[k] = i
+                exit_price[k] = price
+                fee_out[k] = fee
+                reason[k] = code
+                capital += quantity[k] * price - fee
+                k += 1
+                holding = False
+        if holding:
+            equity[i] = capital + quantity[k] * px
+        else:
+            equity[i] = capital
+    if holding:
+        k += 1
+    return k, capital, holding
+
+
+def simulate_sl_tp_long(close: np.ndarray, signal: np.ndarray, initial_capital: float,
+                        position_size: float, commission: float, slippage: float,
+                        stop_loss: float, take_profit: float) -> Simulation:
+    """
+    Long-only, a fraction of current capital per trade, slippage and
+    commission on both legs.  Exits, checked from the bar after entry:
+    ``-1`` signal, then close <= stop, then close >= target.  A position
+    still open at the end stays open (no trade row is closed for it, and
+    its cost is left out of ``cash``).
+    """
+    n = len(close)
+    columns = [np.empty(n, dtype=np.int64), np.full(n, -1, dtype=np.int64)]
+    columns += [np.full(n, np.nan), np.full(n, np.nan)]
+    columns += [np.zeros(n) for _ in range(4)]
+    reason = np.zeros(n, dtype=np.int64)
+    equity = np.empty(n)
+    signal = np.ascontiguousarray(signal, dtype=np.int64)
+    if not NUMBA_AVAILABLE:
+        close, signal = close.tolist(), signal.tolist()
+
+    count, cash, _ = _sl_tp_long_kernel(
+        close, signal, float(initial_capital), float(position_size), float(commission),
+        float(slippage), float(stop_loss), float(take_profit), *columns, reason, equity)
+
+    entry_idx, exit_idx, entry_price, exit_price, quantity, fee_in, fee_out, pnl = (c[:count] for c in columns)
+    return _trades(entry_idx, exit_idx, np.ones(count), quantity, entry_price, exit_price,
+                   fee_in, fee_out, pnl, reason[:count], equity, cash)
+
+
+# ─────────────────────────────  entry  ─────────────────────────────
+
+MODES = {
+    'pine': simulate_pine,
+    'all_in_long': simulate_all_in_long,
+    'sl_tp_long': simulate_sl_tp_long,
+}
+
+
+def simulate(close, signal, mode: str, **params) -> Simulation:
+    """Run ``mode`` over aligned close / signal sequences (see MODES for the parameters)"""
+    if mode not in MODES:
+        raise ValueError(f"Unknown simulation mode {mode!r}; expected one of {sorted(MODES)}")
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    signal = np.asarray(signal)
+    if len(close) != len(signal):
+        raise ValueError(f"close has {len(close)} bars but signal has {len(signal)}")
+    if not len(close):
+        return _no_trades(0, float(params.get('initial_capital', 0.0)))
+    return MODES[mode](close, signal, **params)
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OFFLINE REPLAY EXCHANGE
+=====================================
+A ccxt-compatible stand-in for the market data part of an exchange, so
+backtesters and paper bots run without network and can be benchmarked
+reproducibly.
+
+- candles come from an ``OHLCVStore`` (resampled from a finer stored
+  timeframe when needed) or, for symbols with no data, from a
+  deterministic synthetic series
+- ``fetch_ohlcv`` / ``fetch_ticker`` / ``fetch_tickers`` / ``load_markets`` /
+  ``milliseconds`` / ``parse_timeframe`` behave like their ccxt namesakes
+- a replay clock (start time and speed) bounds what is visible, so no
+  candle from the future is ever returned
+- per-request latency and a ccxt-style rate limit can be emulated
+
+Every module builds its exchange through ``create_exchange``; setting the
+single environment variable ``EXCHANGE_REPLAY`` switches all of them to
+the replay exchange:
+
+    EXCHANGE_REPLAY=ultimate_data_cache   replay that store (synthetic fallback)
+    EXCHANGE_REPLAY=synthetic             synthetic data only
+
+Optional tuning: ``EXCHANGE_REPLAY_LATENCY_MS``, ``EXCHANGE_REPLAY_RATE_LIMIT_MS``,
+``EXCHANGE_REPLAY_START`` (ISO date or ms) and ``EXCHANGE_REPLAY_SPEED``
+(replay seconds per wall second, 0 freezes the clock).
+=====================================
+"""
+
+import asyncio
+import os
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ohlcv_store import COLUMNS, OHLCVStore
+
+ENV_VAR = 'EXCHANGE_REPLAY'
+SYNTHETIC = 'synthetic'
+
+# Synthetic universe offered by load_markets when the store has no symbols
+DEFAULT_BASES = (
+    'BTC', 'ETH', 'BNB', 'XRP', 'ADA', 'DOGE', 'SOL', 'DOT', 'MATIC', 'SHIB',
+    'TRX', 'AVAX', 'UNI', 'ATOM', 'LINK', 'ETC', 'XLM', 'NEAR', 'ALGO', 'FIL',
+    'APE', 'SAND', 'MANA', 'AXS', 'GALA', 'CHZ', 'GRT', 'OP', 'ARB', 'SUI',
+    'PEPE', 'FLOKI', 'BCH', 'LTC', 'AAVE', 'INJ', 'TIA', 'SEI', 'WLD', 'ORDI',
+)
+
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000, 'y': 31536000}
+
+
+class NotSupported(Exception):
+    """Raised for exchange calls the replay exchange does not emulate (e.g. orders)"""
+
+
+def _symbol_from_dir(name: str) -> str:
+    """Invert ``OHLCVStore.path`` symbol mangling: BTC_USDT-USDT -> BTC/USDT:USDT"""
+    return name.replace('-', ':').replace('_', '/', 1)
+
+
+def _hash_uniform(k: np.ndarray, seed: int) -> np.ndarray:
+    """Deterministic uniforms in [0, 1) per integer index (splitmix64)"""
+    with np.errstate(over='ignore'):
+        x = k.astype(np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def _synthetic_price(symbol_seed: int, base_price: float, minute: np.ndarray) -> np.ndarray:
+    """Price at the start of each minute index: two slow waves plus hashed noise, in log space"""
+    phase = (symbol_seed % 1000) / 1000 * 2 * np.pi
+    hours = minute / 60
+    log_price = (0.15 * np.sin(hours / 240 + phase) + 0.05 * np.sin(hours / 17 + 2 * phase)
+                 + 0.01 * (_hash_uniform(minute, symbol_seed) - 0.5))
+    return base_price * np.exp(log_price)
+
+
+def synthetic_ohlcv(symbol: str, timeframe_ms: int, start_ms: int, count: int) -> np.ndarray:
+    """
+    ``count`` synthetic candles from ``start_ms`` (aligned), as (n x 6) rows.
+    Prices are a pure function of (symbol, time), so any window of any
+    timeframe is reproducible and consistent with the others, without
+    generating history from the epoch.
+    """
+    seed = zlib.crc32(symbol.encode())
+    base_price = 10 ** (seed % 7 - 2) * (1 + (seed >> 8) % 9)
+    first = -(-start_ms // timeframe_ms)
+    opens_ms = (first + np.arange(count, dtype=np.int64)) * timeframe_ms
+
+    opens = _synthetic_price(seed, base_price, opens_ms // 60000)
+    closes = _synthetic_price(seed, base_price, (opens_ms + timeframe_ms) // 60000)
+    candle_seed = seed ^ timeframe_ms
+    rows = np.empty((count, 6), dtype=np.float64)
+    rows[:, 0] = opens_ms
+    rows[:, 1] = opens
+    rows[:, 2] = np.maximum(opens, closes) * (1 + 0.004 * _hash_uniform(opens_ms, candle_seed + 1))
+    rows[:, 3] = np.minimum(opens, closes) * (1 - 0.004 * _hash_uniform(opens_ms, candle_seed + 2))
+    rows[:, 4] = closes
+    rows[:, 5] = (1000 * timeframe_ms / 60000 * (1 + 4 * _hash_uniform(opens_ms, candle_seed + 3))
+                  / base_price)
+    return rows
+
+
+def _resample_rows(rows: np.ndarray, timeframe_ms: int) -> np.ndarray:
+    """Aggregate finer (n x 6) rows into ``timeframe_ms`` candles"""
+    if len(rows) == 0:
+        return rows
+    buckets = rows[:, 0].astype(np.int64) // timeframe_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(rows)] - 1
+    out = np.empty((len(starts), 6), dtype=np.float64)
+    out[:, 0] = buckets[starts] * timeframe_ms
+    out[:, 1] = rows[starts, 1]
+    out[:, 2] = np.maximum.reduceat(rows[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(rows[:, 3], starts)
+    out[:, 4] = rows[ends, 4]
+    out[:, 5] = np.add.reduceat(rows[:, 5], starts)
+    return out
+
+
+class ReplayExchange:
+    """Synchronous ccxt-style exchange serving stored or synthetic candles"""
+
+    rateLimit = 0
+    has = {'fetchOHLCV': True, 'fetchTicker': True, 'fetchTickers': True}
+
+    def __init__(self, source: str = 'binance', store_root: Optional[Union[str, Path]] = None,
+                 start_ms: Optional[int] = None, speed: float = 1.0, latency: float = 0.0,
+                 rate_limit_ms: float = 0.0, symbols: Optional[Sequence[str]] = None,
+                 config: Optional[Dict] = None):
+        self.id = 'replay'
+        self.name = f"Replay ({source})"
+        self.source = source
+        self.store = OHLCVStore(store_root) if store_root else None
+        self.options = dict((config or {}).get('options', {}))
+        self.latency = latency
+        self.rateLimit = rate_limit_ms
+        self.enableRateLimit = rate_limit_ms > 0
+        self.timeframes = {tf: tf for tf in ('1m', '3m', '5m', '15m', '30m', '1h', '2h',
+                                            '4h', '6h', '12h', '1d', '1w')}
+
+        self._start_ms = int(start_ms if start_ms is not None else time.time() * 1000)
+        self._started = time.monotonic()
+        self._speed = speed
+        self._last_request = 0.0
+        self._extra_symbols = list(symbols or [])
+        self._stored_tf: Dict[Tuple[str, int], Optional[Tuple[str, int]]] = {}
+
+        self.markets: Dict[str, Dict] = {}
+        self.symbols: List[str] = []
+        self.calls = 0
+
+    # ───────────────  clock / parsing  ────────────────
+    def milliseconds(self) -> int:
+        return self._start_ms + int((time.monotonic() - self._started) * self._speed * 1000)
+
+    def advance(self, ms: int):
+        """Move the replay clock forward (the only way time passes at speed 0)"""
+        self._start_ms += int(ms)
+
+    @staticmethod
+    def parse_timeframe(timeframe: str) -> int:
+        """Timeframe string -> seconds (ccxt semantics)"""
+        return int(timeframe[:-1]) * _UNIT_SECONDS[timeframe[-1]]
+
+    @staticmethod
+    def parse8601(value: str) -> Optional[int]:
+        try:
+            dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (TypeError, ValueError):
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp() * 1000)
+
+    @staticmethod
+    def iso8601(timestamp: int) -> str:
+        return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).isoformat(timespec='milliseconds')
+
+    # ───────────────  request emulation  ────────────────
+    def _delay(self) -> float:
+        """Seconds to wait before the next request (rate limit + latency)"""
+        self.calls += 1
+        wait = self.latency
+        if self.enableRateLimit:
+            now = time.monotonic()
+            ready = self._last_request + self.rateLimit / 1000
+            self._last_request = max(now, ready)
+            wait += max(0.0, ready - now)
+        return wait
+
+    def _throttle(self):
+        wait = self._delay()
+        if wait > 0:
+            time.sleep(wait)
+
+    # ───────────────  data  ────────────────
+    def _stored_timeframe(self, symbol: str, timeframe_ms: int) -> Optional[Tuple[str, int]]:
+        """Coarsest stored timeframe that divides ``timeframe_ms`` (cached per request shape)"""
+        key = (symbol, timeframe_ms)
+        if key not in self._stored_tf:
+            best = None
+            folder = self.store.path(self.source, symbol, '1m').parent if self.store else None
+            if folder is not None and folder.exists():
+                for path in folder.glob('*.ohlcv'):
+                    try:
+                        tf_ms = self.parse_timeframe(path.stem) * 1000
+                    except (KeyError, ValueError):
+                        continue
+                    if timeframe_ms % tf_ms == 0 and (best is None or tf_ms > best[1]):
+                        best = (path.stem, tf_ms)
+            self._stored_tf[key] = best
+        return self._stored_tf[key]
+
+    def _stored_rows(self, symbol: str, timeframe_ms: int, since: Optional[int],
+                     limit: int) -> Optional[np.ndarray]:
+        """Requested window from the store (resampled when only a finer timeframe is stored)"""
+        best = self._stored_timeframe(symbol, timeframe_ms)
+        if best is None:
+            return None
+        stored_tf, stored_ms = best
+
+        arrays = self.store.read_arrays(self.source, symbol, stored_tf)
+        ts = arrays['timestamp']
+        end = int(np.searchsorted(ts, self.milliseconds(), side='right'))
+        if end == 0:
+            return np.empty((0, 6))
+        if since is not None:
+            lo = -(-since // timeframe_ms) * timeframe_ms
+        else:
+            lo = (int(ts[end - 1]) // timeframe_ms - limit + 1) * timeframe_ms
+        start = int(np.searchsorted(ts, lo))
+        stop = min(end, int(np.searchsorted(ts, lo + limit * timeframe_ms)))
+
+        rows = np.column_stack([np.asarray(arrays[c][start:stop], dtype=np.float64) for c in COLUMNS])
+        if stored_ms != timeframe_ms:
+            rows = _resample_rows(rows, timeframe_ms)
+        return rows[:limit] if since is not None else rows[-limit:]
+
+    def _ohlcv_rows(self, symbol: str, timeframe: str, since: Optional[int],
+                    limit: Optional[int]) -> np.ndarray:
+        timeframe_ms = self.parse_timeframe(timeframe) * 1000
+        limit = limit or 500
+
+        rows = self._stored_rows(symbol, timeframe_ms, since, limit)
+        if rows is not None:
+            return rows
+
+        # Synthetic: candles up to and including the one forming now
+        now = self.milliseconds()
+        last_open = now - now % timeframe_ms
+        if since is None:
+            since = last_open - (limit - 1) * timeframe_ms
+        first_open = -(-since // timeframe_ms) * timeframe_ms
+        count = min(limit, max(0, (last_open - first_open) // timeframe_ms + 1))
+        return synthetic_ohlcv(symbol, timeframe_ms, first_open, count)
+
+    def _ticker(self, symbol: str) -> Dict[str, Any]:
+        minute = self._ohlcv_rows(symbol, '1m', None, 1)
+        day = self._ohlcv_rows(symbol, '1h', None, 24)
+        if len(minute) == 0 and len(day) == 0:
+            raise KeyError(f"no replay data for {symbol}")
+        last_row = minute[-1] if len(minute) else day[-1]
+        last = float(last_row[4])
+        base_volume = float(day[:, 5].sum()) if len(day) else float(last_row[5])
+        open_24h = float(day[0, 1]) if len(day) else last
+        timestamp = self.milliseconds()
+        return {
+            'symbol': symbol,
+            'timestamp': timestamp,
+            'datetime': self.iso8601(timestamp),
+            'high': float(day[:, 2].max()) if len(day) else last,
+            'low': float(day[:, 3].min()) if len(day) else last,
+            'bid': last * 0.9999,
+            'ask': last * 1.0001,
+            'open': open_24h,
+            'close': last,
+            'last': last,
+            'change': last - open_24h,
+            'percentage': (last / open_24h - 1) * 100 if open_24h else 0.0,
+            'baseVolume': base_volume,
+            'quoteVolume': base_volume * last,
+        }
+
+    def _market(self, symbol: str) -> Dict[str, Any]:
+        base, _, rest = symbol.partition('/')
+        quote, _, settle = rest.partition(':')
+        swap = bool(settle)
+        return {
+            'id': f"{base}{quote}", 'symbol': symbol, 'base': base, 'quote': quote,
+            'settle': settle or None, 'type': 'swap' if swap else 'spot',
+            'spot': not swap, 'swap': swap, 'future': False, 'linear': swap or None,
+            'contract': swap, 'active': True,
+            'precision': {'amount': 1e-8, 'price': 1e-8},
+            'limits': {'amount': {'min': 0.0, 'max': None}, 'cost': {'min': 0.0, 'max': None}},
+        }
+
+    # ───────────────  ccxt API  ────────────────
+    def load_markets(self, reload: bool = False, params: Optional[Dict] = None) -> Dict[str, Dict]:
+        if self.markets and not reload:
+            return self.markets
+        symbols = list(self._extra_symbols)
+        if self.store is not None and (self.store.root / self.source).exists():
+            symbols += sorted(_symbol_from_dir(p.name) for p in (self.store.root / self.source).iterdir()
+                              if p.is_dir())
+        if not symbols:
+            swap = self.options.get('defaultType') in ('swap', 'future')
+            symbols = [f"{b}/USDT:USDT" if swap else f"{b}/USDT" for b in DEFAULT_BASES]
+        self.markets = {s: self._market(s) for s in dict.fromkeys(symbols)}
+        self.symbols = list(self.markets)
+        return self.markets
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[Dict] = None) -> List[List[float]]:
+        self._throttle()
+        rows = self._ohlcv_rows(symbol, timeframe, since, limit)
+        out = rows.tolist()
+        for row in out:
+            row[0] = int(row[0])
+        return out
+
+    def fetch_ticker(self, symbol: str, params: Optional[Dict] = None) -> Dict[str, Any]:
+        self._throttle()
+        return self._ticker(symbol)
+
+    def fetch_tickers(self, symbols: Optional[Sequence[str]] = None,
+                      params: Optional[Dict] = None) -> Dict[str, Dict[str, Any]]:
+        self._throttle()
+        return {s: self._ticker(s) for s in (symbols or self.load_markets())}
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name: str):
+        if name.startswith(('create_', 'cancel_', 'fetch_balance', 'fetch_positions',
+                            'fetch_order', 'fetch_open_orders', 'set_')):
+            def unsupported(*args, **kwargs):
+                raise NotSupported(f"{name} is not available on the replay exchange")
+            return unsupported
+        raise AttributeError(name)
+
+
+class AsyncReplayExchange(ReplayExchange):
+    """``ccxt.async_support`` flavour: the same data behind awaitable methods"""
+
+    async def _athrottle(self):
+        wait = self._delay()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def load_markets(self, reload: bool = False, params: Optional[Dict] = None):
+        return ReplayExchange.load_markets(self, reload, params)
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                          limit: Optional[int] = None, params: Optional[Dict] = None):
+        await self._athrottle()
+        out = self._ohlcv_rows(symbol, timeframe, since, limit).tolist()
+        for row in out:
+            row[0] = int(row[0])
+        return out
+
+    async def fetch_ticker(self, symbol: str, params: Optional[Dict] = None):
+        await self._athrottle()
+        return self._ticker(symbol)
+
+    async def fetch_tickers(self, symbols: Optional[Sequence[str]] = None, params: Optional[Dict] = None):
+        await self._athrottle()
+        return {s: self._ticker(s) for s in (symbols or ReplayExchange.load_markets(self))}
+
+    async def close(self):
+        pass
+
+
+def _replay_from_env(exchange_id: str, config: Optional[Dict], async_support: bool) -> ReplayExchange:
+    setting = os.environ[ENV_VAR]
+    start = os.environ.get('EXCHANGE_REPLAY_START')
+    if start:
+        start_ms = int(start) if start.isdigit() else ReplayExchange.parse8601(start)
+    else:
+        start_ms = None
+    cls = AsyncReplayExchange if async_support else ReplayExchange
+    return cls(
+        source=exchange_id,
+        store_root=None if setting == SYNTHETIC else setting,
+        start_ms=start_ms,
+        speed=float(os.environ.get('EXCHANGE_REPLAY_SPEED', 1.0)),
+        latency=float(os.environ.get('EXCHANGE_REPLAY_LATENCY_MS', 0)) / 1000,
+        rate_limit_ms=float(os.environ.get('EXCHANGE_REPLAY_RATE_LIMIT_MS', 0)),
+        config=config,
+    )
+
+
+def create_exchange(exchange_id: str, config: Optional[Dict] = None, async_support: bool = False):
+    """
+    ``ccxt.<exchange_id>(config)`` (or its ``ccxt.async_support`` twin), unless
+    ``EXCHANGE_REPLAY`` is set, in which case the offline replay exchange is returned
+    """
+    if os.environ.get(ENV_VAR):
+        return _replay_from_env(exchange_id, config, async_support)
+
+    if async_support:
+        import ccxt.async_support as ccxt_module
+    else:
+        import ccxt as ccxt_module
+    return getattr(ccxt_module, exchange_id)(config or {})
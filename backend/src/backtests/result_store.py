@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+COLUMNAR RESULT STORE
+=====================================
+Optimiser results as typed NumPy columns instead of one dataclass per
+parameter combination.
+
+- the column set comes from a result dataclass: ``float`` → float64,
+  ``int`` → int32, ``bool`` → bool, ``datetime`` → datetime64[ns] and
+  ``str`` → int32 codes into an interned label list
+- the parameters dict is kept as (grid code, flat index) into the
+  strategy's ``ParameterGrid`` and decoded only for rows that are shown
+- ``store['field']`` is a column view, so filters, counts and means are
+  plain array expressions; ``take`` / ``filter`` / ``rank_by`` reorder
+  every column at once
+- ``record(i)`` / ``head(n)`` rebuild dataclass rows for reports
+- stores from worker processes merge with ``extend`` (codes are remapped)
+=====================================
+"""
+
+from dataclasses import fields
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from param_grid import ParameterGrid
+
+_DTYPES = {
+    float: np.dtype(np.float64),
+    int: np.dtype(np.int32),
+    bool: np.dtype(np.bool_),
+    datetime: np.dtype('datetime64[ns]'),
+}
+_TEXT = np.dtype(np.int32)
+
+
+class ResultStore:
+    """Growable columnar table of ``record_type`` rows"""
+
+    def __init__(self, record_type, params_field: str = 'parameters', capacity: int = 1024):
+        self.record_type = record_type
+        self.params_field = params_field
+        self.field_names: List[str] = [f.name for f in fields(record_type)]
+        self.dtypes: Dict[str, np.dtype] = {}
+        self.labels: Dict[str, List[str]] = {}
+        self._codes: Dict[str, Dict[str, int]] = {}
+        for f in fields(record_type):
+            if f.name == params_field:
+                continue
+            if f.type is str:
+                self.dtypes[f.name] = _TEXT
+                self.labels[f.name] = []
+                self._codes[f.name] = {}
+            elif f.type in _DTYPES:
+                self.dtypes[f.name] = _DTYPES[f.type]
+            else:
+                raise TypeError(f"No column type for {record_type.__name__}.{f.name}: {f.type!r}")
+        self.dtypes['param_grid'] = _TEXT
+        self.dtypes['param_index'] = np.dtype(np.int64)
+
+        # Parameter grids by name; param_grid holds the position in these lists
+        self.grid_names: List[str] = []
+        self.grids: List[ParameterGrid] = []
+        self._grid_codes: Dict[str, int] = {}
+
+        self._size = 0
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in self.dtypes.items()}
+
+    # ─────────────────────────────  access  ─────────────────────────────
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Column view (codes for text columns)"""
+        return self._columns[name][:self._size]
+
+    def code(self, name: str, label: str) -> int:
+        """Code of ``label`` in text column ``name`` (-1 if it never occurs)"""
+        return self._codes[name].get(label, -1)
+
+    def isin(self, name: str, labels: Sequence[str]) -> np.ndarray:
+        """Row mask: text column ``name`` is one of ``labels``"""
+        codes = [self._codes[name][label] for label in labels if label in self._codes[name]]
+        return np.isin(self[name], codes)
+
+    def decode(self, name: str) -> np.ndarray:
+        """Text column as an object array of labels"""
+        return np.asarray(self.labels[name], dtype=object)[self[name]]
+
+    def distinct(self, name: str) -> int:
+        """Number of distinct labels used by the stored rows"""
+        return len(np.unique(self[name]))
+
+    def parameters(self, i: int) -> Dict:
+        return self.grids[self['param_grid'][i]].params_at(int(self['param_index'][i]))
+
+    def record(self, i: int):
+        """Row ``i`` rebuilt as a ``record_type`` instance"""
+        values = {}
+        for name in self.field_names:
+            if name == self.params_field:
+                values[name] = self.parameters(i)
+                continue
+            value = self._columns[name][i]
+            if name in self.labels:
+                values[name] = self.labels[name][value]
+            elif value.dtype.kind == 'M':
+                values[name] = pd.Timestamp(value)
+            else:
+                values[name] = value.item()
+        return self.record_type(**values)
+
+    def head(self, n: int) -> List:
+        return [self.record(i) for i in range(min(n, self._size))]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self[name].nbytes for name in self._columns)
+
+    # ─────────────────────────────  writing  ────────────────────────────
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        capacity = len(next(iter(self._columns.values())))
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def _intern(self, name: str, label: str) -> int:
+        codes = self._codes[name]
+        if label not in codes:
+            codes[label] = len(self.labels[name])
+            self.labels[name].append(label)
+        return codes[label]
+
+    def _grid_code(self, grid_name: str, grid: ParameterGrid) -> int:
+        if grid_name not in self._grid_codes:
+            self._grid_codes[grid_name] = len(self.grids)
+            self.grid_names.append(grid_name)
+            self.grids.append(grid)
+        return self._grid_codes[grid_name]
+
+    def append(self, record, grid_name: str, grid: ParameterGrid, index: int):
+        """Store ``record``, whose parameters are combination ``index`` of ``grid``"""
+        self._reserve(1)
+        row = self._size
+        for name in self.field_names:
+            if name == self.params_field:
+                continue
+            value = getattr(record, name)
+            if name in self.labels:
+                value = self._intern(name, value)
+            elif self.dtypes[name].kind == 'M':
+                value = pd.Timestamp(value).to_datetime64()
+            self._columns[name][row] = value
+        self._columns['param_grid'][row] = self._grid_code(grid_name, grid)
+        self._columns['param_index'][row] = index
+        self._size += 1
+
+    def extend(self, other: 'ResultStore'):
+        """Append every row of ``other``, translating its label and grid codes"""
+        if not len(other):
+            return
+        remap = {name: np.array([self._intern(name, label) for label in other.labels[name]] or [0], dtype=_TEXT)
+                 for name in self.labels}
+        grid_map = np.array([self._grid_code(name, grid) for name, grid in zip(other.grid_names, other.grids)],
+                            dtype=_TEXT)
+        self._reserve(len(other))
+        rows = slice(self._size, self._size + len(other))
+        for name in self._columns:
+            values = other[name]
+            if name in remap:
+                values = remap[name][values]
+            elif name == 'param_grid':
+                values = grid_map[values]
+            self._columns[name][rows] = values
+        self._size += len(other)
+
+    # ─────────────────────────  reordering  ─────────────────────────────
+
+    def take(self, indices) -> 'ResultStore':
+        """New store holding rows ``indices`` in that order (labels and grids are shared)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        subset = ResultStore.__new__(ResultStore)
+        subset.__dict__.update(self.__dict__)
+        subset.labels = {name: list(labels) for name, labels in self.labels.items()}
+        subset._codes = {name: dict(codes) for name, codes in self._codes.items()}
+        subset.grid_names, subset.grids = list(self.grid_names), list(self.grids)
+        subset._grid_codes = dict(self._grid_codes)
+        subset._columns = {name: self[name][indices] for name in self._columns}
+        subset._size = len(indices)
+        return subset
+
+    def filter(self, mask: np.ndarray) -> 'ResultStore':
+        return self.take(np.flatnonzero(mask))
+
+    def rank_by(self, name: str, descending: bool = True) -> 'ResultStore':
+        """Reorder rows by ``name`` (stable, like ``sorted``) and number them in ``rank``"""
+        values = self[name]
+        order = np.argsort(-values if descending else values, kind='stable')
+        for column, data in self._columns.items():
+            self._columns[column] = data[:self._size][order]
+        if 'rank' in self._columns:
+            self._columns['rank'][:] = np.arange(1, self._size + 1)
+        return self
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_columns'] = {name: self[name].copy() for name in self._columns}
+        return state
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PIPELINE STAGE TIMER
+=====================================
+Wall-clock totals per pipeline stage, safe to share between worker threads.
+
+- ``with timer.stage('load'):`` adds the block's time and one call to the stage
+- ``timer.reused('load', n)`` records ``n`` calls a shared result made
+  unnecessary; the saving is estimated at the stage's mean time per call
+- ``summary()`` renders one line per stage in first-use order
+=====================================
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageTimer:
+    """Per-stage seconds, call counts and skipped calls"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+                self.calls[name] = self.calls.get(name, 0) + 1
+
+    def reused(self, name: str, count: int = 1):
+        """Count ``count`` calls of ``name`` avoided by sharing an earlier result"""
+        with self._lock:
+            self.skipped[name] = self.skipped.get(name, 0) + count
+
+    def saved_seconds(self, name: str) -> float:
+        calls = self.calls.get(name, 0)
+        if not calls:
+            return 0.0
+        return self.seconds[name] / calls * self.skipped.get(name, 0)
+
+    def summary(self) -> str:
+        lines = []
+        for name, seconds in self.seconds.items():
+            line = f"{name:<12} {seconds:8.2f}s over {self.calls[name]:>5} calls"
+            if self.skipped.get(name):
+                line += f"  ({self.skipped[name]} avoided, ~{self.saved_seconds(name):.2f}s saved)"
+            lines.append(line)
+        return "\n".join(lines)
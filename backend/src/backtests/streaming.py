@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+STREAMING INDICATORS
+=====================================
+Incremental indicator state for the live bots.
+
+- ``update(...)`` commits one closed candle and returns the new value;
+  ``peek(...)`` evaluates the still-forming candle without committing it,
+  so a bot can poll every few seconds and only pay for bars that closed
+- the recursive indicators (SMA, EMA, RMA, RSI, MACD, ATR, ADX,
+  Bollinger) keep a handful of scalars and cost O(1) per bar; CCI keeps
+  its ``period`` window (the mean deviation needs it) and Donchian keeps
+  monotonic queues (amortised O(1))
+- every class replays the recursion of the matching batch kernel in
+  ``indicators`` / TA-Lib in the same floating-point order, so feeding a
+  series bar by bar reproduces the batch values (the same warmup bars
+  are NaN)
+- NaN inputs are skipped (nothing is committed)
+- ``ResampledStream`` rolls base candles into a higher timeframe, so one
+  1m feed can drive indicators on several timeframes
+- ``StreamRegistry`` keeps per-series state for bots that poll a fixed
+  window of candles and commits only the candles closed since last poll
+=====================================
+"""
+
+import abc
+import math
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+NAN = float('nan')
+
+
+class StreamingIndicator(abc.ABC):
+    """
+    Base class: ``update`` commits a closed bar, ``peek`` evaluates a forming
+    one.  Both run ``_step`` on ``_state``; window indicators override
+    ``update`` to also maintain the window ``_step`` reads.
+    """
+
+    nan_value = NAN
+
+    def __init__(self):
+        self.bars = 0
+        self.value = self.nan_value
+
+    @property
+    def ready(self) -> bool:
+        """True once the warmup is over"""
+        first = self.value[0] if isinstance(self.value, tuple) else self.value
+        return not math.isnan(first)
+
+    def update(self, *bar):
+        """Commit one closed bar; returns the new value"""
+        if any(math.isnan(x) for x in bar):
+            return self.value
+        self._state, self.value = self._step(self._state, *bar)
+        self.bars += 1
+        return self.value
+
+    def peek(self, *bar):
+        """Value the indicator would have if the forming bar closed now"""
+        if any(math.isnan(x) for x in bar):
+            return self.value
+        return self._step(self._state, *bar)[1]
+
+    @abc.abstractmethod
+    def _step(self, state, *bar):
+        """(next state, value) after ``bar``; must not mutate ``state``"""
+
+
+# ─────────────────────  moving averages  ─────────────────────
+class StreamingSMA(StreamingIndicator):
+    """TA-Lib SMA (running total); first value after ``period`` bars"""
+
+    def __init__(self, period: int):
+        super().__init__()
+        self.period = period
+        self._window: Deque[float] = deque()
+        self._state = 0.0
+
+    def update(self, x: float) -> float:
+        if math.isnan(x):
+            return self.value
+        self._state, self.value = self._step(self._state, x)
+        self._window.append(x)
+        if len(self._window) >= self.period:
+            self._window.popleft()
+        self.bars += 1
+        return self.value
+
+    def _step(self, total: float, x: float) -> Tuple[float, float]:
+        # The total holds the last period - 1 values between bars
+        total += x
+        if len(self._window) < self.period - 1:
+            return total, NAN
+        trailing = self._window[0] if self._window else x
+        return total - trailing, total / self.period
+
+
+class _StreamingEWM(StreamingIndicator):
+    """
+    Exponential recursion with smoothing ``alpha``.  ``seed='sma'`` starts
+    from the mean of the first ``period`` values (TA-Lib / TradingView),
+    ``seed='first'`` from the first value (pandas ``ewm(adjust=False)``).
+    """
+
+    def __init__(self, period: int, alpha: float, seed: str = 'sma'):
+        if seed not in ('sma', 'first'):
+            raise ValueError(f"Unknown seed {seed!r}: expected 'sma' or 'first'")
+        super().__init__()
+        self.period = period
+        self.alpha = alpha
+        self.seed = seed
+        self._state = (0, 0.0)  # (bars seen, running total or last value)
+
+    def _step(self, state, x):
+        count, prev = state
+        if self.seed == 'first':
+            if count == 0:
+                return (1, x), x
+            if prev != x:
+                prev = ((1.0 - self.alpha) * prev + self.alpha * x) / ((1.0 - self.alpha) + self.alpha)
+            return (count + 1, prev), prev
+        if count < self.period:
+            total = prev + x
+            if count + 1 < self.period:
+                return (count + 1, total), NAN
+            value = total / self.period
+            return (count + 1, value), value
+        value = (x - prev) * self.alpha + prev
+        return (count + 1, value), value
+
+
+class StreamingEMA(_StreamingEWM):
+    """EMA, alpha = 2 / (period + 1)"""
+
+    def __init__(self, period: int, seed: str = 'sma'):
+        super().__init__(period, 1.0 / (1.0 + (period - 1) / 2.0), seed)
+
+
+class StreamingRMA(_StreamingEWM):
+    """Wilder RMA / SMMA, alpha = 1 / period"""
+
+    def __init__(self, period: int, seed: str = 'sma'):
+        super().__init__(period, 1.0 / (1.0 + (1.0 / (1.0 / period) - 1.0)), seed)
+
+
+# ─────────────────────  oscillators  ─────────────────────
+class StreamingRSI(StreamingIndicator):
+    """Wilder / TA-Lib RSI; first value on the ``period + 1``-th close"""
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+        self._state = (0, NAN, 0.0, 0.0)  # (closes seen, previous close, avg gain, avg loss)
+
+    def _step(self, state, close):
+        count, prev, gain, loss = state
+        if count == 0:
+            return (1, close, 0.0, 0.0), NAN
+        diff = close - prev
+        period = self.period
+        if count > period:
+            loss *= (period - 1)
+            gain *= (period - 1)
+        if diff < 0:
+            loss -= diff
+        else:
+            gain += diff
+        if count < period:
+            return (count + 1, close, gain, loss), NAN
+        loss /= period
+        gain /= period
+        total = gain + loss
+        value = 100.0 * (gain / total) if abs(total) >= 1e-8 else 0.0
+        return (count + 1, close, gain, loss), value
+
+
+class StreamingMACD(StreamingIndicator):
+    """
+    TA-Lib MACD: (line, signal, histogram).  Both EMAs are seeded on the
+    ``slow``-th bar (the fast one from the mean of its last ``fast`` values)
+    and the signal EMA from the mean of the first ``signal`` lines.
+    """
+
+    nan_value = (NAN, NAN, NAN)
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        super().__init__()
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast, self.slow, self.signal = fast, slow, signal
+        self._fast_k = 2.0 / (fast + 1)
+        self._slow_k = 2.0 / (slow + 1)
+        self._signal_ema = StreamingEMA(signal)
+        self._state = ((), NAN, NAN, self._signal_ema._state)
+
+    def _step(self, state, x):
+        warmup, fast, slow, signal_state = state
+        if len(warmup) < self.slow:
+            warmup = warmup + (x,)
+            if len(warmup) < self.slow:
+                return (warmup, fast, slow, signal_state), self.nan_value
+            fast = sum(warmup[self.slow - self.fast:], 0.0) / self.fast
+            slow = sum(warmup, 0.0) / self.slow
+        else:
+            fast = (x - fast) * self._fast_k + fast
+            slow = (x - slow) * self._slow_k + slow
+        line = fast - slow
+        signal_state, signal = self._signal_ema._step(signal_state, line)
+        value = self.nan_value if math.isnan(signal) else (line, signal, line - signal)
+        return (warmup, fast, slow, signal_state), value
+
+
+class StreamingCCI(StreamingIndicator):
+    """TA-Lib CCI over the last ``period`` typical prices (O(period) per bar)"""
+
+    def __init__(self, period: int = 20):
+        super().__init__()
+        self.period = period
+        self._state: Tuple[float, ...] = ()  # the last ``period`` typical prices
+
+    def _step(self, window, high, low, close):
+        window = window[1 - self.period:] if self.period > 1 else ()
+        window += ((high + low + close) / 3.0,)
+        if len(window) < self.period:
+            return window, NAN
+        mean = 0.0
+        for x in window:
+            mean += x
+        mean /= self.period
+        deviation = 0.0
+        for x in window:
+            deviation += abs(x - mean)
+        diff = window[-1] - mean
+        if diff != 0.0 and deviation != 0.0:
+            return window, diff / (0.015 * (deviation / self.period))
+        return window, 0.0
+
+
+# ─────────────────────  volatility / bands  ─────────────────────
+class StreamingATR(StreamingIndicator):
+    """Wilder / TA-Lib ATR; first value on the ``period + 1``-th bar"""
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+        self._state = (0, NAN, 0.0)  # (bars seen, previous close, running total or ATR)
+
+    def _step(self, state, high, low, close):
+        count, prev_close, prev = state
+        if count == 0:
+            return (1, close, 0.0), NAN
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        period = self.period
+        if count < period:
+            return (count + 1, close, prev + tr), NAN
+        if count == period:
+            value = (prev + tr) / period
+        else:
+            value = prev * (period - 1)
+            value += tr
+            value /= period
+        return (count + 1, close, value), value
+
+
+class StreamingBollinger(StreamingIndicator):
+    """
+    TA-Lib Bollinger Bands (upper, middle, lower) from running sums of x and
+    x²; ``ddof=1`` rescales to the sample deviation used by pandas ``std``.
+    """
+
+    nan_value = (NAN, NAN, NAN)
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0, ddof: int = 0):
+        super().__init__()
+        self.period = period
+        self.std_dev = std_dev
+        self.ddof = ddof
+        self._window: Deque[float] = deque()
+        self._state = (0.0, 0.0)  # running sums of x and x² over the last period - 1 values
+
+    def update(self, x: float):
+        if math.isnan(x):
+            return self.value
+        self._state, self.value = self._step(self._state, x)
+        self._window.append(x)
+        if len(self._window) >= self.period:
+            self._window.popleft()
+        self.bars += 1
+        return self.value
+
+    def _step(self, state, x):
+        total, total2 = state
+        total += x
+        total2 += x * x
+        if len(self._window) < self.period - 1:
+            return (total, total2), self.nan_value
+        mean = total / self.period
+        variance = total2 / self.period - mean * mean
+        if self.ddof:
+            variance *= self.period / (self.period - self.ddof)
+        deviation = math.sqrt(variance) if variance >= 1e-8 else 0.0
+        width = self.std_dev * deviation
+        trailing = self._window[0] if self._window else x
+        return ((total - trailing, total2 - trailing * trailing),
+                (mean + width, mean, mean - width))
+
+
+class StreamingDonchian(StreamingIndicator):
+    """(upper, lower) channel over the last ``period`` bars via monotonic queues"""
+
+    nan_value = (NAN, NAN)
+
+    def __init__(self, period: int = 20):
+        super().__init__()
+        self.period = period
+        self._highs: Deque[Tuple[int, float]] = deque()
+        self._lows: Deque[Tuple[int, float]] = deque()
+        self._state = None  # the queues are the state; only ``update`` touches them
+
+    def update(self, high: float, low: float):
+        if math.isnan(high) or math.isnan(low):
+            return self.value
+        self.value = self._step(self._state, high, low)[1]
+        i = self.bars
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._highs.append((i, high))
+        self._lows.append((i, low))
+        while self._highs[0][0] <= i - self.period:
+            self._highs.popleft()
+        while self._lows[0][0] <= i - self.period:
+            self._lows.popleft()
+        self.bars += 1
+        return self.value
+
+    def _step(self, state, high, low):
+        if self.bars + 1 < self.period:
+            return state, self.nan_value
+        oldest = self.bars + 1 - self.period
+        upper = next((v for j, v in self._highs if j >= oldest), high)
+        lower = next((v for j, v in self._lows if j >= oldest), low)
+        return state, (max(upper, high), min(lower, low))
+
+
+# ─────────────────────  trend  ─────────────────────
+class StreamingADX(StreamingIndicator):
+    """TA-Lib ADX; first value on the ``2 * period``-th bar"""
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+        # (step, prev high, prev low, prev close, +DM, -DM, TR sum, DX sum, ADX)
+        self._state = (-1, NAN, NAN, NAN, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    def _step(self, state, high, low, close):
+        step, prev_high, prev_low, prev_close, plus_dm, minus_dm, tr_sum, sum_dx, adx_value = state
+        if step < 0:
+            return (0, high, low, close, 0.0, 0.0, 0.0, 0.0, 0.0), NAN
+        period = self.period
+        diff_plus = high - prev_high
+        diff_minus = prev_low - low
+        smoothing = step >= period - 1
+        if smoothing:
+            minus_dm -= minus_dm / period
+            plus_dm -= plus_dm / period
+        if diff_minus > 0 and diff_plus < diff_minus:
+            minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            plus_dm += diff_plus
+
+        tr = high - low
+        gap = abs(high - prev_close)
+        if gap > tr:
+            tr = gap
+        gap = abs(low - prev_close)
+        if gap > tr:
+            tr = gap
+        tr_sum = tr_sum - tr_sum / period + tr if smoothing else tr_sum + tr
+
+        value = NAN
+        if smoothing:
+            dx = -1.0
+            if abs(tr_sum) >= 1e-8:
+                minus_di = 100.0 * (minus_dm / tr_sum)
+                plus_di = 100.0 * (plus_dm / tr_sum)
+                total = minus_di + plus_di
+                if abs(total) >= 1e-8:
+                    dx = 100.0 * (abs(minus_di - plus_di) / total)
+            if step < 2 * period - 1:
+                if dx >= 0:
+                    sum_dx += dx
+                if step == 2 * period - 2:
+                    adx_value = sum_dx / period
+                    value = adx_value
+            else:
+                if dx >= 0:
+                    adx_value = ((adx_value * (period - 1)) + dx) / period
+                value = adx_value
+        return (step + 1, high, low, close, plus_dm, minus_dm, tr_sum, sum_dx, adx_value), value
+
+
+# ─────────────────────  higher timeframes  ─────────────────────
+class ResampledStream:
+    """
+    Drives ``indicator`` with the closes of ``bucket_ms`` candles built from
+    base-timeframe candles (epoch-aligned, like pandas ``resample``).  The
+    last bucket is the forming one: it is committed once a candle of a later
+    bucket arrives, and ``peek()`` evaluates it as it stands.  Re-adding
+    the latest base candle (a forming candle polled again) just replaces
+    its close.
+    """
+
+    def __init__(self, indicator: StreamingIndicator, bucket_ms: int):
+        self.indicator = indicator
+        self.bucket_ms = int(bucket_ms)
+        self.bucket = None
+        self.close = NAN
+
+    def add(self, timestamp_ms: int, close: float):
+        bucket = int(timestamp_ms) // self.bucket_ms
+        if self.bucket is not None and bucket < self.bucket:
+            return
+        if self.bucket is not None and bucket > self.bucket:
+            self.indicator.update(self.close)
+        self.bucket = bucket
+        self.close = close
+
+    def peek(self):
+        """Indicator value including the forming bucket"""
+        return self.indicator.peek(self.close) if self.bucket is not None else self.indicator.value
+
+
+# ─────────────────────  polled windows  ─────────────────────
+class StreamRegistry:
+    """
+    Streaming indicators for bots that poll a fixed window of candles.
+    Each ``latest`` call commits the candles that closed since the previous
+    call and peeks the forming (last) one.  A new key, or a window that no
+    longer overlaps what was committed, is rebuilt from the window itself,
+    which is exactly what recomputing over the window used to return.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[StreamingIndicator, Optional[int]]] = {}
+
+    def latest(self, key: Hashable, factory: Callable[[], StreamingIndicator],
+               timestamps: np.ndarray, *columns: np.ndarray):
+        """Value for the window ending at the forming candle (``timestamps`` ascending, ms)"""
+        n = len(timestamps)
+        entry = self._entries.get(key)
+        if entry is None or n == 0 or entry[1] is None or timestamps[0] > entry[1]:
+            indicator, last = factory(), None
+        else:
+            indicator, last = entry
+        if n == 0:
+            return indicator.value
+
+        start = 0 if last is None else int(np.searchsorted(timestamps, last, side='right'))
+        for i in range(start, n - 1):
+            indicator.update(*(float(c[i]) for c in columns))
+        if n > 1 and start < n - 1:
+            last = int(timestamps[n - 2])
+        self._entries[key] = (indicator, last)
+        return indicator.peek(*(float(c[n - 1]) for c in columns))
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# The backtest modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def make_series(bars: int, seed: int = 0, runs=None, drift: float = 0.0, vol: float = 0.01,
+                start: float = 100.0) -> SimpleNamespace:
+    """
+    Seeded random-walk candles; ``runs`` stacks independent walks as rows.
+    ``returns`` are the per-bar log increments behind ``close``, and ``rng``
+    is left positioned for any further draws the test needs.
+    """
+    rng = np.random.default_rng(seed)
+    shape = bars if runs is None else (runs, bars)
+    returns = rng.normal(drift, vol, shape)
+    close = start * np.exp(np.cumsum(returns, axis=-1))
+    high = close * (1 + rng.uniform(0, 0.01, shape))
+    low = close * (1 - rng.uniform(0, 0.01, shape))
+    volume = rng.uniform(1, 100, shape)
+    return SimpleNamespace(returns=returns, close=close, high=high, low=low, volume=volume, rng=rng)
+
+
+@pytest.fixture
+def series():
+    """``series(bars, seed=0, runs=None, drift=0.0, vol=0.01)`` → synthetic candles (see ``make_series``)"""
+    return make_series
@@ -0,0 +1,283 @@
+import importlib
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import ModuleType
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators as ind
+
+RSI_TRIPLE = {
+    "timeframe": "15m",
+    "rsi_params": {
+        "rsi1": {"enabled": True, "long_threshold": 55, "long_period": 33},
+        "rsi2": {"enabled": False, "long_threshold": 90, "long_period": 38},
+        "rsi3": {"enabled": True, "long_threshold": 40, "long_period": 14},
+    },
+    "cci_params": {
+        "cci1": {"enabled": False, "long_threshold": 257, "long_period": 21},
+        "cci2": {"enabled": True, "long_threshold": 105, "long_period": 4},
+        "cci3": {"enabled": True, "long_threshold": 350, "long_period": 34},
+    },
+    "bb_params": {"enabled": False, "period": 103, "deviation": 2.2},
+}
+MACD_TRIPLE = {
+    "timeframe": "15m",
+    "macd_params": {
+        "macd1": {"enabled": True, "fast_period": 8, "slow_period": 21, "signal_period": 5, "long_threshold": 0.0},
+        "macd2": {"enabled": False, "fast_period": 12, "slow_period": 26, "signal_period": 9, "long_threshold": -0.08},
+        "macd3": {"enabled": True, "fast_period": 5, "slow_period": 13, "signal_period": 3, "long_threshold": 0.0},
+    },
+    "cci_params": {"cci2": {"enabled": True, "long_threshold": 0, "long_period": 4}},
+    "bb_params": {"enabled": True, "period": 20, "deviation": 0.5},
+}
+
+
+# ───────────────  stand-in for multi_strategy_paper_trading  ───────────────
+@dataclass
+class StrategyConfig:
+    name: str
+    strategy_type: str
+    params: Dict[str, Any]
+    take_profit: float
+    step_perc: float
+    max_orders: int
+    order_size: float
+    stop_loss: float
+    cooldown: int
+
+
+@dataclass
+class PositionState:
+    size: float = 0.0
+    entry_price: float = 0.0
+    collateral_used: float = 0.0
+    unrealized_pnl: float = 0.0
+
+
+@dataclass
+class OrderState:
+    id: str
+    pair: str
+    side: str
+    type: str
+    quantity: float
+    price: float
+    collateral: float
+    position_value: float
+    timestamp: datetime
+    filled: bool = False
+
+
+@dataclass
+class StrategyState:
+    config: StrategyConfig
+    balance: float
+    equity: float
+    total_pnl: float
+    total_collateral_used: float
+    max_buying_power: float
+    positions: Dict[str, PositionState] = field(default_factory=dict)
+    open_orders: Dict[str, Any] = field(default_factory=dict)
+    last_signals: Dict[str, Any] = field(default_factory=dict)
+    trade_history: List[dict] = field(default_factory=list)
+
+    def ensure_pair(self, pair: str) -> None:
+        self.positions.setdefault(pair, PositionState())
+
+
+def _last(values) -> float:
+    values = np.asarray(values, dtype=np.float64)
+    return float(values[-1]) if len(values) else np.nan
+
+
+def _multi_rsi(pair, data, params):
+    votes = 0
+    for timeframe in params["timeframes"]:
+        votes += _last(ind.rsi(data.get(timeframe)["close"], params["length"])) < params["threshold"]
+    return {"signal": votes >= params["min_confirmations"]}
+
+
+def _triple(oscillators):
+    def signal(pair, data, params):
+        frame = data.get(params["timeframe"])
+        checks = []
+        for cfg in params.get(oscillators, {}).values():
+            if cfg["enabled"]:
+                if oscillators == "rsi_params":
+                    value = _last(ind.rsi(frame["close"], cfg["long_period"]))
+                else:
+                    value = _last(ind.macd(frame["close"], cfg["fast_period"], cfg["slow_period"],
+                                           cfg["signal_period"])[0])
+                checks.append((value, value < cfg["long_threshold"]))
+        for cfg in params["cci_params"].values():
+            if cfg["enabled"]:
+                value = _last(ind.cci(frame["high"], frame["low"], frame["close"], cfg["long_period"]))
+                checks.append((value, value < cfg["long_threshold"]))
+        bb = params["bb_params"]
+        if bb["enabled"]:
+            lower = _last(ind.bollinger(frame["close"], bb["period"], bb["deviation"])[2])
+            checks.append((lower, _last(frame["close"]) < lower))
+        passed = [ok for value, ok in checks if not np.isnan(value)]
+        return {"signal": bool(passed) and all(passed)}
+    return signal
+
+
+def _trend(pair, data, params):
+    # No builder for this type: always evaluated per bar
+    frame = data.get(params["timeframe"])
+    return {"signal": _last(frame["close"]) > _last(ind.sma(frame["close"], 10)) * 1.01}
+
+
+def _stub_module() -> ModuleType:
+    mst = ModuleType("multi_strategy_paper_trading")
+    mst.StrategyConfig, mst.StrategyState = StrategyConfig, StrategyState
+    mst.PositionState, mst.OrderState = PositionState, OrderState
+    mst.SIGNAL_FUNCTIONS = {
+        "multi_rsi": _multi_rsi,
+        "triple_rsi": _triple("rsi_params"),
+        "triple_macd": _triple("macd_params"),
+        "trend_tsunami": _trend,
+    }
+    return mst
+
+
+@pytest.fixture
+def bms(monkeypatch):
+    monkeypatch.setitem(sys.modules, "multi_strategy_paper_trading", _stub_module())
+    monkeypatch.delitem(sys.modules, "backtest_multi_strategy", raising=False)
+    module = importlib.import_module("backtest_multi_strategy")
+    yield module
+    sys.modules.pop("backtest_multi_strategy", None)
+
+
+def _strategies(mst) -> list:
+    def config(name, strategy_type, params):
+        return mst.StrategyConfig(name=name, strategy_type=strategy_type, params=params, take_profit=0.01,
+                                  step_perc=0.005, max_orders=3, order_size=5.0, stop_loss=0.02, cooldown=300)
+    return [
+        config("RSI", "multi_rsi", {"timeframes": ["5m", "15m", "1h"], "threshold": 45, "min_confirmations": 2,
+                                    "length": 14}),
+        config("3RSI", "triple_rsi", RSI_TRIPLE),
+        config("3MACD", "triple_macd", MACD_TRIPLE),
+        config("Trend", "trend_tsunami", {"timeframe": "1h"}),
+    ]
+
+
+@pytest.fixture
+def market_data(series):
+    """Two 5m pairs with different starts and a gap, so the merged timeline is ragged"""
+    data = {}
+    for seed, (pair, start, bars) in enumerate([("ETH/USDT:USDT", "2024-01-01 00:00", 1500),
+                                                ("BTC/USDT:USDT", "2024-01-01 03:10", 1300)]):
+        walk = series(bars, seed=seed + 20, vol=0.004)
+        df = pd.DataFrame({"open": np.r_[walk.close[0], walk.close[:-1]], "high": walk.high, "low": walk.low,
+                           "close": walk.close, "volume": walk.volume},
+                          index=pd.date_range(start, periods=bars, freq="5min"))
+        data[pair] = df.drop(df.index[600:660]) if seed else df
+    return data
+
+
+def _run(bms, market_data, mode):
+    engine = bms.BacktestEngine(sorted(market_data), _strategies(bms.mst), "5m", signal_mode=mode)
+    return engine, engine.run(market_data)
+
+
+def test_incremental_matches_prefix(bms, market_data):
+    engine, (summary, trades, equity, per_pair) = _run(bms, market_data, "incremental")
+    _, expected = _run(bms, market_data, "prefix")
+    # Every builder type was precomputed, the builder-less one stayed per bar
+    assert {name for name, _ in engine.signal_arrays} == {"RSI", "3RSI", "3MACD"}
+    assert set(trades["strategy"]) == {"RSI", "3RSI", "3MACD", "Trend"}
+    for got, want in zip((summary, trades, equity, per_pair), expected):
+        pd.testing.assert_frame_equal(got, want)
+
+
+def test_disagreeing_builder_falls_back_to_signal_function(bms, market_data, monkeypatch):
+    monkeypatch.setattr(bms.mst, "SIGNAL_ARRAYS",
+                        {"multi_rsi": lambda cache, params: np.ones(len(cache.engine.timestamps), dtype=bool)},
+                        raising=False)
+    engine, (_, trades, equity, _) = _run(bms, market_data, "incremental")
+    assert not any(name == "RSI" for name, _ in engine.signal_arrays)
+    _, (_, want_trades, want_equity, _) = _run(bms, market_data, "prefix")
+    pd.testing.assert_frame_equal(trades, want_trades)
+    pd.testing.assert_frame_equal(equity, want_equity)
+
+
+def test_merged_timeline_matrices(bms, market_data):
+    timeline = bms.MergedTimeline(market_data)
+    # Columns in pair-name order, so pairs tied on a timestamp are processed alphabetically
+    assert timeline.pairs == ["BTC/USDT:USDT", "ETH/USDT:USDT"]
+    union = market_data["BTC/USDT:USDT"].index.union(market_data["ETH/USDT:USDT"].index)
+    assert timeline.timestamps.equals(pd.DatetimeIndex(union, freq=None))
+    assert len(timeline) == len(union)
+    for column, pair in enumerate(timeline.pairs):
+        df = market_data[pair]
+        rows = np.flatnonzero(timeline.present[:, column])
+        assert timeline.timestamps[rows].equals(pd.DatetimeIndex(df.index, freq=None))
+        assert timeline.positions[rows, column].tolist() == list(range(len(df)))
+        assert (timeline.positions[~timeline.present[:, column], column] == -1).all()
+        for name in bms.BAR_DTYPE.names:
+            assert np.array_equal(timeline.bars[name][rows, column], df[name].to_numpy())
+    active = timeline.active_columns()
+    assert active == [np.flatnonzero(row).tolist() for row in timeline.present]
+    assert [0, 1] in active and [1] in active
+
+
+def test_process_timestamp_takes_bar_records(bms, market_data):
+    timeline = bms.MergedTimeline(market_data)
+    engine = bms.BacktestEngine(timeline.pairs, _strategies(bms.mst), "5m")
+    caches = {pair: bms.PairDataCache(df, "5m") for pair, df in market_data.items()}
+    t = int(np.flatnonzero(timeline.present.all(axis=1))[0])
+    snapshot = {pair: timeline.bars[t][j] for j, pair in enumerate(timeline.pairs)}
+    assert all(isinstance(row, np.void) for row in snapshot.values())
+    engine.process_timestamp(timeline.timestamps[t], snapshot, caches)
+    assert engine.latest_prices == {pair: row["close"] for pair, row in snapshot.items()}
+
+
+def test_pair_data_view_get_agrees_with_index_map(bms, market_data):
+    base = market_data["BTC/USDT:USDT"]
+    cache = bms.PairDataCache(base, "5m")
+    for timeframe in ("5m", "1h", "4h"):
+        mapping = cache.engine.index_map(timeframe)
+        for i in range(0, len(base), 53):
+            got = cache.view(base.index[i]).get(timeframe)
+            assert got.index.equals(cache.engine.frame(timeframe).index[:mapping[i] + 1])
+            assert cache.view(base.index[i], history=3, position=i).get(timeframe).index.equals(got.index[-3:])
+
+
+def test_fetch_pair_dataframe_keeps_only_closed_candles(bms, tmp_path):
+    class Exchange:
+        id, rateLimit = "fake", 0
+
+        def __init__(self):
+            self.now = int(pd.Timestamp.now("UTC").floor("5min").value // 1_000_000) + 60_000
+
+        def milliseconds(self):
+            return self.now
+
+        def parse_timeframe(self, timeframe):
+            return 300
+
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+            # Candles up to and including the one still forming at ``now``
+            first = -(-since // 300_000) * 300_000
+            return [[t, 1.0, 2.0, 0.5, 1.5, 3.0] for t in range(first, self.now + 1, 300_000)][:limit]
+
+    exchange = Exchange()
+    df = bms.fetch_pair_dataframe(exchange, "BTC/USDT:USDT", "5m", 2, tmp_path)
+    forming = exchange.now - exchange.now % 300_000
+    assert df.index[-1] == pd.Timestamp(forming - 300_000, unit="ms")
+    assert (df.index.to_series().diff().dropna() == pd.Timedelta("5min")).all()
+    assert df.index[-1] - df.index[0] == pd.Timedelta(days=2)
+
+
+def test_invalid_signal_settings_raise(bms):
+    with pytest.raises(ValueError):
+        bms.BacktestEngine([], [], "5m", signal_mode="lazy")
+    with pytest.raises(ValueError):
+        bms.BacktestEngine([], [], "5m", history_bars=0)
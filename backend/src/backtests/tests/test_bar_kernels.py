@@ -0,0 +1,126 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bar_kernels
+import indicators as ind
+from bar_kernels import (EXIT_REASONS, build_trades, cross_above, cross_below, run_multi_tp_long)
+
+TP = dict(stop_loss=0.02, tp1=0.01, tp2=0.02, tp3=0.04)
+
+
+def _reference(close, fast, slow, ema, volume, volume_ma, start_idx, capital, stop_loss, tp1, tp2, tp3):
+    """The per-bar template trailing loop the kernel replaces (before the end-of-data close-out)"""
+    position, trades, equity, curve = None, [], capital, [capital]
+    days, wins, losses, max_wins, max_losses = 0, 0, 0, 0, 0
+    for i in range(start_idx, len(close)):
+        price = close[i]
+        if any(math.isnan(v) for v in (fast[i], slow[i], ema[i])):
+            curve.append(equity)
+            continue
+        if position is not None:
+            days += 1
+            value = position['quantity'] * price
+            curve.append(equity + value - position['cost'])
+            pnl_pct = (price - position['entry_price']) / position['entry_price']
+            reason = None
+            if pnl_pct <= -stop_loss:
+                reason = "Stop Loss"
+            elif pnl_pct >= tp3:
+                reason = "Take Profit 3"
+            elif pnl_pct >= tp2:
+                reason = "Take Profit 2"
+            elif pnl_pct >= tp1:
+                reason = "Take Profit 1"
+            elif fast[i] < slow[i] and fast[i - 1] >= slow[i - 1]:
+                reason = "MA Cross Exit"
+            if reason:
+                equity += value - position['cost']
+                trades.append((position['idx'], i, reason))
+                if pnl_pct > 0:
+                    wins, losses = wins + 1, 0
+                    max_wins = max(max_wins, wins)
+                else:
+                    wins, losses = 0, losses + 1
+                    max_losses = max(max_losses, losses)
+                position = None
+                curve[-1] = equity
+        else:
+            curve.append(equity)
+            surge = volume[i] / volume_ma[i] if volume_ma[i] > 0 else 1
+            if fast[i] > slow[i] and fast[i - 1] <= slow[i - 1] and price > ema[i] and surge > 1.2:
+                quantity = equity * 0.02 / price
+                if quantity * price <= equity:
+                    position = {'idx': i, 'entry_price': price, 'quantity': quantity, 'cost': quantity * price}
+    return trades, curve, equity, days, max_wins, max_losses, position
+
+
+def _inputs(series, seed, fast_period=8, slow_period=21, ema_period=30):
+    walk = series(3000, seed=seed, vol=0.012)
+    close, volume = walk.close, walk.volume
+    return (close, ind.sma(close, fast_period), ind.sma(close, slow_period), ind.ema(close, ema_period),
+            volume, ind.sma(volume, 20), max(fast_period, slow_period, ema_period) + 10)
+
+
+def _run(close, fast, slow, ema, volume, volume_ma, start_idx):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        surge = np.where(volume_ma > 0, volume / volume_ma, 1.0)
+    valid = ~(np.isnan(fast) | np.isnan(slow) | np.isnan(ema))
+    entry = cross_above(fast, slow) & (close > ema) & (surge > 1.2)
+    return run_multi_tp_long(close, valid, entry, cross_below(fast, slow), start_idx, 10_000.0, **TP)
+
+
+@pytest.fixture(params=['numba', 'python'])
+def kernel_mode(request, monkeypatch):
+    if request.param == 'python':
+        if not bar_kernels.NUMBA_AVAILABLE:
+            pytest.skip('the plain-Python kernel already runs in every test')
+        monkeypatch.setattr(bar_kernels, 'NUMBA_AVAILABLE', False)
+        monkeypatch.setattr(bar_kernels, '_multi_tp_kernel', bar_kernels._multi_tp_kernel.py_func)
+    return request.param
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_kernel_matches_bar_loop(series, kernel_mode, seed):
+    inputs = _inputs(series, seed)
+    run = _run(*inputs)
+    trades, curve, equity, days, max_wins, max_losses, position = _reference(*(
+        [a.tolist() if isinstance(a, np.ndarray) else a for a in inputs] + [10_000.0] + list(TP.values())))
+    assert trades, 'no trades: the comparison would be vacuous'
+    got = [(e, x, EXIT_REASONS[r]) for e, x, r in zip(run['entry_idx'].tolist(), run['exit_idx'].tolist(),
+                                                       run['exit_reason'].tolist())]
+    assert got == trades
+    assert run['equity_curve'].tolist() == curve and run['equity'] == equity
+    assert (run['days_in_market'], run['max_consecutive_wins'], run['max_consecutive_losses']) == \
+        (days, max_wins, max_losses)
+    if position is None:
+        assert run['open_entry_idx'] == -1
+    else:
+        assert (run['open_entry_idx'], run['open_quantity'], run['open_cost']) == \
+            (position['idx'], position['quantity'], position['cost'])
+
+
+def test_build_trades_replays_equity(series):
+    close, *rest = _inputs(series, 3)
+    run = _run(close, *rest)
+    index = pd.date_range('2023-01-01', periods=len(close), freq='4h')
+    trades = build_trades(index, close, run['entry_idx'], run['exit_idx'], run['exit_reason'], 10_000.0)
+    assert len(trades) == len(run['entry_idx'])
+    assert 10_000.0 + sum(t['pnl_amount'] for t in trades) == pytest.approx(run['equity'], rel=1e-12)
+    first = trades[0]
+    assert first['entry_date'] == index[run['entry_idx'][0]] and first['exit_price'] == close[run['exit_idx'][0]]
+    assert first['duration_days'] >= 1
+
+
+def test_crosses_ignore_first_bar_and_nan():
+    fast = np.array([np.nan, 1.0, 3.0, 2.0, 1.0, 2.0])
+    slow = np.array([0.0, 2.0, 2.0, 2.0, 2.0, np.nan])
+    assert cross_above(fast, slow).tolist() == [False, False, True, False, False, False]
+    assert cross_below(fast, slow).tolist() == [False, False, False, False, True, False]
+
+
+def test_start_beyond_data_gives_flat_run():
+    run = run_multi_tp_long(np.ones(5), np.ones(5, bool), np.ones(5, bool), np.zeros(5, bool), 50, 100.0, **TP)
+    assert run['equity_curve'].tolist() == [100.0] and len(run['entry_idx']) == 0
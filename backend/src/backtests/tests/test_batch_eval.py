@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch_eval
+from bar_kernels import cross_above, cross_below, run_multi_tp_long
+from batch_eval import IndicatorBank, matrix_params, template_trailing_batch
+from indicators import IndicatorSet
+from param_grid import ParameterGrid
+
+KEYS = ['fast_ma_period', 'slow_ma_period', 'ema_period', 'stop_loss_pct',
+        'take_profit_1', 'take_profit_2', 'take_profit_3']
+
+
+@pytest.fixture
+def df(series):
+    walk = series(1500, seed=9, vol=0.012)
+    return pd.DataFrame({'close': walk.close, 'high': walk.high, 'low': walk.low, 'volume': walk.volume},
+                        index=pd.date_range('2023-01-01', periods=1500, freq='4h'))
+
+
+@pytest.fixture
+def matrix():
+    # Several combos per MA triple, so signal rows are shared
+    grid = ParameterGrid({'fast_ma_period': [5, 8], 'slow_ma_period': [21, 34], 'ema_period': [20, 50],
+                          'stop_loss_pct': [1.5, 3.0], 'take_profit_1': [1.0], 'take_profit_2': [2.0, 3.0],
+                          'take_profit_3': [5.0]})
+    rows = [[grid.params_at(i)[k] for k in KEYS] for i in range(grid.size)]
+    return np.random.default_rng(4).permutation(np.asarray(rows, dtype=np.float64))
+
+
+def _scalar(df, params):
+    """One combination at a time, the way backtest_strategy_comprehensive runs it"""
+    close = df['close'].to_numpy()
+    fast = IndicatorSet.sma(df['close'], params['fast_ma_period']).to_numpy()
+    slow = IndicatorSet.sma(df['close'], params['slow_ma_period']).to_numpy()
+    ema = IndicatorSet.ema(df['close'], params['ema_period']).to_numpy()
+    volume_ma = df['volume'].rolling(20).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        surge = np.where(volume_ma > 0, df['volume'].to_numpy() / volume_ma, 1.0)
+    valid = ~(np.isnan(fast) | np.isnan(slow) | np.isnan(ema))
+    entry = cross_above(fast, slow) & (close > ema) & (surge > 1.2)
+    start_idx = max(params['fast_ma_period'], params['slow_ma_period'], params['ema_period']) + 10
+    return run_multi_tp_long(close, valid, entry, cross_below(fast, slow), start_idx, 10_000.0,
+                             params['stop_loss_pct'] / 100, params['take_profit_1'] / 100,
+                             params['take_profit_2'] / 100, params['take_profit_3'] / 100), start_idx
+
+
+@pytest.mark.parametrize('chunk', [1, 3, batch_eval.CHUNK_SIZE])
+def test_batch_matches_scalar_loop(df, matrix, chunk, monkeypatch):
+    monkeypatch.setattr(batch_eval, 'CHUNK_SIZE', chunk)
+    runs = template_trailing_batch(df, KEYS, matrix, 10_000.0, IndicatorSet)
+    assert len(runs) == len(matrix)
+    traded = 0
+    for row, run in zip(matrix, runs):
+        expected, start_idx = _scalar(df, matrix_params('template_trailing', KEYS, row))
+        assert run['start_idx'] == start_idx
+        for key, value in expected.items():
+            assert np.array_equal(run[key], value), key
+        traded += len(run['entry_idx']) > 0
+    assert traded == len(matrix)
+
+
+def test_matrix_params_restores_integer_periods(matrix):
+    params = matrix_params('template_trailing', KEYS, matrix[0])
+    assert all(type(params[k]) is int for k in batch_eval.INTEGER_PARAMS['template_trailing'])
+    assert type(params['stop_loss_pct']) is float
+
+
+def test_indicator_bank_computes_each_period_once(df):
+    calls = []
+
+    class Counting(IndicatorSet):
+        @classmethod
+        def sma(cls, data, period):
+            calls.append(period)
+            return super().sma(data, period)
+
+    bank = IndicatorBank(df, Counting)
+    stacked = bank.stack('sma', [5, 8, 5])
+    assert calls == [5, 8]
+    assert np.array_equal(stacked[0], stacked[2], equal_nan=True)
+
+
+def test_results_table_drops_missing_rows():
+    @dataclass
+    class Result:
+        pnl: float
+
+    table = batch_eval.results_table([Result(1.0), None, Result(-2.0)])
+    assert table.index.tolist() == [0, 2] and table['pnl'].tolist() == [1.0, -2.0]
@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import numpy as np
+
+from bulk_downloader import BulkDownloader
+from ohlcv_store import OHLCVStore, last_closed_ms
+
+
+class FakeExchange:
+    """Deterministic in-process exchange with per-request latency"""
+
+    id = 'fake'
+    rateLimit = 10
+    timeframes = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '4h': 14400, '1d': 86400}
+
+    def __init__(self, latency: float = 0.0, page_cap: int = 1000):
+        self.latency = latency
+        self.page_cap = page_cap
+        self.calls = 0
+        self._now = int(time.time() * 1000)
+
+    def milliseconds(self) -> int:
+        return self._now
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return self.timeframes[timeframe]
+
+    async def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=1000):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        step = self.parse_timeframe(timeframe) * 1000
+        first = -(-since // step) * step
+        seed = sum(map(ord, symbol))
+        rows = []
+        for t in range(first, min(first + min(limit, self.page_cap) * step, self._now + 1), step):
+            price = 100 + (t // step + seed) % 50
+            rows.append([t, price, price + 1, price - 1, price + 0.5, 10.0])
+        return rows
+
+
+def test_cold_start_fills_contiguous_series_and_warm_start_is_free(tmp_path):
+    exchange = FakeExchange(page_cap=500)
+    jobs = [(f"C{i}/USDT", '1h', exchange.milliseconds() - 90 * 86400000) for i in range(10)]
+    results = asyncio.run(BulkDownloader(exchange, OHLCVStore(tmp_path), rate=1000, burst=50).download(jobs))
+    assert len(results) == len(jobs)
+
+    # Every series must equal a single contiguous download up to the last closed candle
+    store = OHLCVStore(tmp_path)
+    for symbol, timeframe, _ in jobs:
+        ts = np.asarray(store.read_arrays('fake', symbol, timeframe)['timestamp'])
+        assert len(ts) and (np.diff(ts) == 3600000).all(), symbol
+        assert ts[-1] == last_closed_ms(exchange, timeframe), symbol
+
+    calls = exchange.calls
+    asyncio.run(BulkDownloader(exchange, store, rate=1000).download(jobs))
+    assert exchange.calls == calls
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import indicators as ind
+from indicator_cache import IndicatorCache, fingerprint
+
+
+def _distinct(arrays):
+    seen, out = set(), []
+    for a in arrays:
+        if a.tobytes() not in seen:
+            seen.add(a.tobytes())
+            out.append(a)
+    return out
+
+
+@pytest.fixture(params=['mask', 'small_int'])
+def low_entropy(request):
+    """Thousands of distinct 0/1 or 0..4 arrays, the inputs a linear hash collides on"""
+    rng = np.random.default_rng(1)
+    if request.param == 'mask':
+        arrays = (rng.random((3000, 64)) < 0.5).astype(np.float64)
+    else:
+        arrays = rng.integers(0, 5, (3000, 64)).astype(np.float64)
+    return _distinct(arrays)
+
+
+def test_distinct_low_entropy_arrays_get_distinct_keys(low_entropy):
+    assert len({fingerprint(a) for a in low_entropy}) == len(low_entropy)
+
+
+def test_cached_sma_has_no_cross_hits(low_entropy):
+    cache = IndicatorCache()
+    with cache.active():
+        for a in low_entropy:
+            got = ind.IndicatorSet.sma(a.copy(), 5)
+            assert np.array_equal(got, ind.sma(a, 5), equal_nan=True)
+    assert cache.hits == 0 and cache.misses == len(low_entropy)
+
+
+def test_equal_content_hits_across_objects(series):
+    close = series(500, seed=2).close
+    cache = IndicatorCache()
+    with cache.active():
+        first = ind.IndicatorSet.ema(close, 20)
+        again = ind.IndicatorSet.ema(close.copy(), 20)
+        other = ind.IndicatorSet.ema(close, 21)
+    assert again is first and other is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_shape_and_dtype_are_part_of_the_key():
+    flat = np.zeros(8)
+    assert fingerprint(flat) != fingerprint(flat.reshape(2, 4))
+    assert fingerprint(flat) != fingerprint(flat.view(np.int64))
+    assert fingerprint(flat[::2]) == fingerprint(np.zeros(4))
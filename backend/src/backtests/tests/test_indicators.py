@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators as ind
+
+talib = pytest.importorskip('talib')
+
+BARS = 5000
+
+
+@pytest.fixture(params=['clean', 'leading_nan'])
+def candles(request, series):
+    walk = series(BARS, seed=13)
+    if request.param == 'leading_nan':
+        # Leading NaNs only delay the warmup, as in TA-Lib
+        for column in (walk.close, walk.high, walk.low):
+            column[:7] = np.nan
+    return walk
+
+
+def _same(got, expected, rtol=1e-9):
+    got, expected = np.asarray(got, dtype=float), np.asarray(expected, dtype=float)
+    assert np.array_equal(np.isnan(got), np.isnan(expected))
+    # Absolute floor for values that cancel to ~0 (MACD, flat windows)
+    assert np.allclose(got, expected, rtol=rtol, atol=1e-10, equal_nan=True)
+
+
+@pytest.mark.parametrize('period', [2, 14, 50])
+def test_moving_averages_match_talib(candles, period):
+    c = candles.close
+    _same(ind.sma(c, period), talib.SMA(c, period))
+    _same(ind.ema(c, period), talib.EMA(c, period))
+    _same(ind.rolling_max(c, period), talib.MAX(c, period))
+    _same(ind.rolling_min(c, period), talib.MIN(c, period))
+
+
+@pytest.mark.parametrize('period', [4, 14, 34])
+def test_oscillators_match_talib(candles, period):
+    h, l, c = candles.high, candles.low, candles.close
+    _same(ind.rsi(c, period), talib.RSI(c, period))
+    _same(ind.cci(h, l, c, period), talib.CCI(h, l, c, period))
+    _same(ind.atr(h, l, c, period), talib.ATR(h, l, c, period))
+    _same(ind.adx(h, l, c, period), talib.ADX(h, l, c, period))
+
+
+@pytest.mark.parametrize('fast, slow, signal', [(12, 26, 9), (8, 21, 5), (5, 13, 3), (26, 12, 9)])
+def test_macd_matches_talib(candles, fast, slow, signal):
+    for got, expected in zip(ind.macd(candles.close, fast, slow, signal),
+                             talib.MACD(candles.close, fast, slow, signal)):
+        _same(got, expected)
+
+
+@pytest.mark.parametrize('period, deviation', [(20, 2.0), (103, 2.2)])
+def test_bollinger_matches_talib(candles, period, deviation):
+    for got, expected in zip(ind.bollinger(candles.close, period, deviation),
+                             talib.BBANDS(candles.close, period, deviation, deviation)):
+        _same(got, expected)
+
+
+def test_pandas_flavours(series):
+    s = pd.Series(series(BARS, seed=14).close)
+    _same(ind.ema(s, 50, 'adjust'), s.ewm(span=50).mean())
+    _same(ind.ema(s, 50, 'first'), s.ewm(span=50, adjust=False).mean())
+    _same(ind.smma(s, 13, 'first'), s.ewm(alpha=1 / 13, adjust=False).mean())
+    _same(ind.bollinger(s, 20, 2.0, ddof=1)[0], s.rolling(20).mean() + 2.0 * s.rolling(20).std())
+    delta = s.diff()
+    gain, loss = delta.clip(lower=0).rolling(14).mean(), (-delta.clip(upper=0)).rolling(14).mean()
+    _same(ind.rsi(s, 14, 'sma')[14:], (100 - 100 / (1 + gain / loss))[14:])
+
+
+def test_indicator_set_wraps_series(series):
+    s = pd.Series(series(300, seed=15).close, index=pd.date_range('2024-01-01', periods=300, freq='h'))
+    out = ind.IndicatorSet.rsi(s, 14)
+    assert isinstance(out, pd.Series) and out.index.equals(s.index)
+    _same(out, talib.RSI(s.to_numpy(), 14))
+
+
+def test_empty_input_gives_empty_output():
+    empty = np.empty(0)
+    for values in (ind.sma(empty, 5), ind.ema(empty, 5), ind.rsi(empty, 5), ind.cci(empty, empty, empty, 5),
+                   ind.atr(empty, empty, empty, 5), ind.adx(empty, empty, empty, 5), *ind.macd(empty)):
+        assert values.shape == (0,)
+
+
+def test_unknown_flavours_raise():
+    with pytest.raises(ValueError):
+        ind.ema(np.ones(10), 3, seed='zero')
+    with pytest.raises(ValueError):
+        ind.rsi(np.ones(10), 3, method='ema')
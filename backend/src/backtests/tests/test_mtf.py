@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators as ind
+from mtf import MTFEngine, timeframe_ms
+
+
+@pytest.fixture
+def base(series):
+    """5m candles from an off-grid start, with a gap that empties whole higher-timeframe buckets"""
+    walk = series(3000, seed=5)
+    df = pd.DataFrame({'open': walk.close, 'high': walk.high, 'low': walk.low, 'close': walk.close,
+                       'volume': walk.volume},
+                      index=pd.date_range('2024-03-01 01:35', periods=3000, freq='5min'))
+    return df.drop(df.index[1000:1400])
+
+
+@pytest.mark.parametrize('timeframe, rule', [('15m', '15min'), ('1h', '1h'), ('4h', '4h'), ('1d', '1D')])
+def test_frame_matches_pandas_resample(base, timeframe, rule):
+    expected = base.resample(rule, label='left', closed='left').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).dropna()
+    got = MTFEngine(base, '5m').frame(timeframe)
+    pd.testing.assert_frame_equal(got, expected, check_freq=False, check_index_type=False, rtol=1e-12)
+
+
+@pytest.mark.parametrize('timeframe', ['15m', '1h', '4h', '1d'])
+def test_index_map_never_exposes_an_open_bucket(base, timeframe):
+    engine = MTFEngine(base, '5m')
+    frame = engine.frame(timeframe)
+    mapping = engine.index_map(timeframe)
+    bar_close = base.index + pd.Timedelta(minutes=5)
+    bucket_close = frame.index + pd.Timedelta(milliseconds=timeframe_ms(timeframe))
+    for i, row in enumerate(mapping):
+        # Row is the last bucket whose end the base bar has reached
+        closed = np.flatnonzero(bucket_close <= bar_close[i])
+        assert row == (closed[-1] if len(closed) else -1), i
+    assert (np.diff(mapping) >= 0).all()
+
+
+def test_view_and_indicator_agree_with_index_map(base):
+    engine = MTFEngine(base, '5m')
+    mapping = engine.index_map('1h')
+    rsi = engine.indicator('1h', 'rsi', lambda frame: ind.rsi(frame['close'], 14))
+    for i in range(0, len(base), 37):
+        ts = base.index[i]
+        completed = engine.completed('1h', ts)
+        assert len(completed) == mapping[i] + 1
+        assert engine.position(ts) == i
+        # The indicator on the completed prefix equals the aligned whole-series value
+        prefix = ind.rsi(completed['close'], 14)
+        assert np.array_equal(rsi[i], prefix[-1] if len(prefix) else np.nan, equal_nan=True)
+
+
+def test_timeframe_parsing():
+    assert timeframe_ms('15m') == timeframe_ms('15T') == timeframe_ms('15min') == 900_000
+    assert timeframe_ms('1w') == 7 * 86_400_000
+    with pytest.raises(ValueError):
+        timeframe_ms('3 fortnights')
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ohlcv_store import COLUMNS, OHLCVStore, drop_forming
+
+HOUR = 3_600_000
+
+
+def _rows(start: int, count: int, price: float = 100.0) -> np.ndarray:
+    ts = (start + np.arange(count)) * HOUR
+    close = price + np.arange(count, dtype=np.float64)
+    return np.column_stack([ts, close, close + 1, close - 1, close + 0.5, np.full(count, 10.0)])
+
+
+def _stored(store: OHLCVStore, symbol: str = 'BTC/USDT') -> np.ndarray:
+    arrays = store.read_arrays('ex', symbol, '1h')
+    return np.column_stack([np.asarray(arrays[c], dtype=np.float64) for c in COLUMNS])
+
+
+def test_write_round_trips_every_input_form(tmp_path):
+    store = OHLCVStore(tmp_path)
+    rows = _rows(1000, 50)
+    frame = pd.DataFrame(rows[:, 1:], columns=COLUMNS[1:],
+                         index=pd.to_datetime(rows[:, 0].astype(np.int64), unit='ms'))
+    for symbol, data in [('A/USDT', rows.tolist()), ('B/USDT', rows), ('C/USDT', frame),
+                         ('D/USDT', frame.reset_index(names='timestamp'))]:
+        assert store.write('ex', symbol, '1h', data) == 50
+        assert np.array_equal(_stored(store, symbol), rows), symbol
+    read = store.read_frame('ex', 'A/USDT', '1h')
+    pd.testing.assert_frame_equal(read, frame.rename_axis('timestamp'), check_freq=False)
+    assert store.read_frame('ex', 'missing', '1h').empty
+
+
+def test_write_sorts_and_keeps_last_duplicate(tmp_path):
+    store = OHLCVStore(tmp_path)
+    rows = _rows(0, 10)
+    replaced = rows[3].copy()
+    replaced[1:5] += 50
+    store.write('ex', 'BTC/USDT', '1h', np.vstack([rows[::-1], replaced]))
+    expected = rows.copy()
+    expected[3] = replaced
+    assert np.array_equal(_stored(store), expected)
+
+
+@pytest.mark.parametrize('headroom', [0.0, 0.25, 4.0])
+def test_append_matches_rewrite(tmp_path, headroom):
+    # In-place appends and capacity rewrites must both equal one write of the merged series
+    store = OHLCVStore(tmp_path)
+    store.write('ex', 'BTC/USDT', '1h', _rows(0, 40), headroom=headroom)
+    expected = _rows(0, 40)
+    for start, count, price in [(40, 5, 300.0), (43, 10, 500.0), (60, 3, 700.0), (10, 2, 900.0)]:
+        new = _rows(start, count, price)
+        total = store.append('ex', 'BTC/USDT', '1h', new, headroom=headroom)
+        merged = {int(r[0]): r for r in expected}
+        merged.update({int(r[0]): r for r in new})
+        expected = np.array([merged[t] for t in sorted(merged)])
+        assert total == len(expected)
+        assert np.array_equal(_stored(store), expected)
+    meta = store.meta('ex', 'BTC/USDT', '1h')
+    assert meta['rows'] == len(expected) and meta['capacity'] >= meta['rows']
+    assert (meta['first_ts'], meta['last_ts']) == (0, 62 * HOUR)
+
+
+def test_append_creates_missing_series_and_ignores_empty(tmp_path):
+    store = OHLCVStore(tmp_path)
+    assert store.append('ex', 'BTC/USDT', '1h', _rows(0, 5)) == 5
+    assert store.append('ex', 'BTC/USDT', '1h', []) == 5
+    assert np.array_equal(_stored(store), _rows(0, 5))
+
+
+def test_frames_are_copy_on_write(tmp_path):
+    store = OHLCVStore(tmp_path)
+    store.write('ex', 'BTC/USDT', '1h', _rows(0, 5))
+    frame = store.read_frame('ex', 'BTC/USDT', '1h')
+    frame['close'] *= 2
+    assert np.array_equal(_stored(store), _rows(0, 5))
+
+
+def test_drop_forming_and_bad_files(tmp_path):
+    rows = _rows(0, 5)
+    assert np.array_equal(drop_forming(rows, 3 * HOUR), rows[:4])
+    path = OHLCVStore(tmp_path).path('ex', 'BTC/USDT', '1h')
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'not a store')
+    with pytest.raises(ValueError):
+        OHLCVStore(tmp_path).meta('ex', 'BTC/USDT', '1h')
+
+
+class Exchange:
+    """Synchronous ccxt stand-in serving a fixed candle history up to the forming bar"""
+
+    id = 'ex'
+
+    def __init__(self, now: int, page: int = 100, fail_after: int = -1):
+        self.now = now
+        self.page = page
+        self.fail_after = fail_after
+        self.calls = []
+
+    def milliseconds(self) -> int:
+        return self.now
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return 3600
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+        if len(self.calls) == self.fail_after:
+            raise ConnectionError('dropped')
+        self.calls.append(since)
+        first = -(-since // HOUR)
+        count = min(limit, self.page, self.now // HOUR - first + 1)
+        # Prices follow the candle time, so every page agrees on a candle
+        return [[int(row[0])] + row[1:] for row in _rows(first, max(count, 0), float(first)).tolist()]
+
+
+def test_sync_downloads_window_then_only_the_tail(tmp_path):
+    store = OHLCVStore(tmp_path)
+    exchange = Exchange(now=500 * HOUR + 1234)
+    stats = store.sync(exchange, 'BTC/USDT', '1h', 100 * HOUR, pause=0)
+    # Bars 100..499 are closed; bar 500 is forming and never stored
+    assert stats == {'requests': 4, 'new_rows': 400, 'rows': 400}
+    assert np.array_equal(_stored(store), _rows(100, 400, 100.0))
+    assert store.meta('ex', 'BTC/USDT', '1h')['covered_from_ms'] == 100 * HOUR
+
+    assert store.sync(exchange, 'BTC/USDT', '1h', 100 * HOUR, pause=0)['requests'] == 0
+    exchange.now += 3 * HOUR
+    exchange.calls.clear()
+    stats = store.sync(exchange, 'BTC/USDT', '1h', 100 * HOUR, pause=0)
+    # The tail is fetched from the last stored candle on
+    assert exchange.calls == [499 * HOUR]
+    assert stats == {'requests': 1, 'new_rows': 3, 'rows': 403}
+    assert np.array_equal(_stored(store), _rows(100, 403, 100.0))
+
+
+def test_sync_refetches_a_window_starting_earlier(tmp_path):
+    store = OHLCVStore(tmp_path)
+    exchange = Exchange(now=300 * HOUR)
+    store.sync(exchange, 'BTC/USDT', '1h', 200 * HOUR, pause=0)
+    stats = store.sync(exchange, 'BTC/USDT', '1h', 150 * HOUR, pause=0)
+    assert stats['rows'] == 150 and exchange.calls[-2:] == [150 * HOUR, 250 * HOUR]
+    assert np.array_equal(_stored(store), _rows(150, 150, 150.0))
+
+
+def test_sync_keeps_rows_fetched_before_an_error(tmp_path):
+    store = OHLCVStore(tmp_path)
+    with pytest.raises(ConnectionError):
+        store.sync(Exchange(now=500 * HOUR, fail_after=2), 'BTC/USDT', '1h', 100 * HOUR, pause=0)
+    assert np.array_equal(_stored(store), _rows(100, 200, 100.0))
@@ -0,0 +1,70 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+from order_ladder import OrderLadder, blend
+
+
+def _reference_fill(orders: List[dict], low: float, available: float, spent: float) -> List[dict]:
+    """The list-of-dicts scan this ladder replaces (uniform collateral)"""
+    filled = []
+    for order in orders:
+        if order['filled'] or low > order['price']:
+            continue
+        if max(0.0, available - spent) < order['collateral']:
+            continue
+        spent += order['collateral']
+        order['filled'] = True
+        filled.append(order)
+    return filled
+
+
+@pytest.mark.parametrize('trial', range(40))
+def test_fills_match_dict_scan(series, trial):
+    # Random-walk lows against a buy ladder, with and without a budget cap
+    rungs = 20
+    walk = series(50, seed=trial)
+    rng = walk.rng
+    step = rng.uniform(0.002, 0.03)
+    prices = 100.0 * (1 - step * np.arange(rungs))
+    ladder = OrderLadder('buy')
+    ladder.place(prices, 5.0 / prices, 5.0, tags=range(rungs))
+    orders = [{'price': p, 'collateral': 5.0, 'filled': False, 'id': i} for i, p in enumerate(prices)]
+    available, spent = rng.choice([np.inf, 40.0]), 0.0
+    for low in walk.low:
+        expected = [o['id'] for o in _reference_fill(orders, low, available, spent)]
+        got = ladder.fill(low, available, spent)
+        assert ladder.tags[got] == expected, low
+        spent += ladder.collateral[got].sum()
+
+
+def test_pending_counts_match_dict_scan_across_pairs(series):
+    walks = series(300, seed=7, runs=40, vol=0.004)
+    prices = 100.0 * (1 - 0.01 * np.arange(20))
+    books = [[{'price': p, 'collateral': 5.0, 'filled': False} for p in prices] for _ in range(len(walks.low))]
+    ladders = []
+    for _ in books:
+        ladder = OrderLadder('buy')
+        ladder.place(prices, 5.0 / prices, 5.0)
+        ladders.append(ladder)
+    for j, lows in enumerate(walks.low):
+        for low in lows:
+            if _reference_fill(books[j], low, np.inf, 0.0):
+                books[j] = [o for o in books[j] if not o['filled']]
+            ladders[j].fill(low)
+    assert [len(b) for b in books] == [len(ladder) for ladder in ladders]
+
+
+def test_sell_ladder_fills_ascending_and_keeps_precedence():
+    ladder = OrderLadder('sell')
+    ladder.place([103.0, 101.0, 102.0], 1.0, tags=['c', 'a', 'b'])
+    ladder.place([102.0], 1.0, tags=['b2'])
+    assert list(ladder) == ['a', 'b', 'b2', 'c']
+    assert ladder.tags[ladder.fill(102.5)] == ['a', 'b', 'b2']
+    assert ladder.next_price == 103.0
+
+
+def test_blend_averages_entry():
+    size, entry = blend(2.0, 100.0, np.array([90.0, 80.0]), np.array([1.0, 1.0]))
+    assert size == 4.0 and entry == pytest.approx(92.5)
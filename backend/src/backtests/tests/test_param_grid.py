@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+from param_grid import ParameterGrid
+
+RANGES = {
+    'fast': [5, 8, 13],
+    'slow': range(20, 60, 10),
+    'mode': ['ema', 'sma'],
+    'stop': [0.01, 0.02, 0.03, 0.05, 0.08],
+}
+
+
+def test_size_and_order_match_itertools_product():
+    grid = ParameterGrid(RANGES)
+    expected = list(itertools.product(*(list(v) for v in RANGES.values())))
+    assert len(grid) == grid.size == len(expected) == 3 * 4 * 2 * 5
+    assert [grid.combo_at(i) for i in range(grid.size)] == expected
+    assert list(grid.iter_params([0, 7])) == [dict(zip(RANGES, expected[0])), dict(zip(RANGES, expected[7]))]
+    for i in (0, 1, 39, grid.size - 1):
+        digits = grid.digits_at(i)
+        assert tuple(grid.values[k][d] for k, d in enumerate(digits)) == expected[i]
+
+
+def test_out_of_range_and_empty_grids():
+    grid = ParameterGrid(RANGES)
+    for index in (-1, grid.size):
+        with pytest.raises(IndexError):
+            grid.combo_at(index)
+    assert ParameterGrid({}).size == 0
+    assert ParameterGrid({'a': [1, 2], 'b': []}).size == 0
+    assert ParameterGrid({}).sample_indices() == []
+
+
+def test_small_grid_is_sampled_whole():
+    grid = ParameterGrid({'a': range(8), 'b': range(10)})
+    assert grid.sample_indices() == list(range(80))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sample_is_stride_plus_distinct_off_stride_picks(seed):
+    # The optimiser's old rule: product[::size // 60] plus 20 distinct combinations off that stride
+    grid = ParameterGrid({'a': range(7), 'b': range(11), 'c': range(13)})
+    expected_stride = list(range(grid.size))[::grid.size // 60]
+    indices = grid.sample_indices(seed=seed)
+    assert indices[:len(expected_stride)] == expected_stride
+    extra = indices[len(expected_stride):]
+    assert len(extra) == len(set(extra)) == 20
+    assert not set(extra) & set(expected_stride)
+    assert indices == grid.sample_indices(seed=seed)
+    assert [p for p in grid.sample(seed=seed)] == [grid.params_at(i) for i in indices]
+
+
+def test_sample_when_stride_covers_everything():
+    # size // 60 == 1: the stride is the whole grid and no random picks are left
+    grid = ParameterGrid({'a': range(9), 'b': range(10)})
+    assert grid.sample_indices(seed=0) == list(range(90))
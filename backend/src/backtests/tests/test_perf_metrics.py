@@ -0,0 +1,61 @@
+from typing import Dict
+
+import numpy as np
+import pytest
+
+from perf_metrics import METRICS, performance, performance_batch
+
+
+def _reference(returns: np.ndarray, equity: np.ndarray) -> Dict[str, float]:
+    """The per-run list / pandas code the module replaces"""
+    wins = [x for x in returns if x > 0]
+    losses = [x for x in returns if x <= 0]
+    negatives = [x for x in returns if x < 0]
+    std = np.std(returns)
+    peak = np.maximum.accumulate(equity)
+    drawdown = (peak - equity) / peak * 100
+    streak = best = 0
+    for x in returns:
+        streak = streak + 1 if x > 0 else 0
+        best = max(best, streak)
+    return {
+        'win_rate': len(wins) / len(returns) * 100,
+        'avg_win': np.mean(wins),
+        'avg_loss': np.mean(losses),
+        'profit_factor': sum(wins) / abs(sum(losses)),
+        'sharpe': np.mean(returns) / std,
+        'sortino': np.mean(returns) / np.std(negatives),
+        'var': np.percentile(returns, 5),
+        'max_consecutive_wins': best,
+        'max_drawdown': drawdown.max(),
+        'ulcer_index': np.sqrt(np.mean(drawdown ** 2)),
+    }
+
+
+def test_batch_matches_per_run_loop(series):
+    returns = series(500, seed=5, runs=200, drift=0.0005).returns
+    equity = 10_000 * np.cumprod(1 + returns, axis=1)
+    batch = performance_batch(returns, equity)
+    for i in range(len(returns)):
+        for name, value in _reference(returns[i], equity[i]).items():
+            assert batch[name][i] == pytest.approx(value, rel=1e-12, abs=0), (i, name)
+
+
+def test_nan_padding_does_not_change_a_row(series):
+    bars = 400
+    returns = series(bars, seed=6, runs=3, drift=0.0005).returns
+    ragged = returns.copy()
+    ragged[1, bars // 2:] = np.nan
+    ragged[2, :] = np.nan
+    padded = performance_batch(ragged)
+    full, half = performance(returns[0]), performance(returns[1, :bars // 2])
+    for name in METRICS:
+        assert padded[name][0] == full[name], name
+        assert np.isclose(padded[name][1], half[name]), name
+        assert padded[name][2] == 0, name
+
+
+def test_undefined_metrics_are_zero():
+    flat = performance([0.0, 0.0, 0.0], [100.0, 100.0, 100.0, 100.0])
+    assert flat['sharpe'] == flat['sortino'] == flat['max_drawdown'] == flat['calmar'] == 0
+    assert performance([])['trades'] == 0
@@ -0,0 +1,109 @@
+from typing import Dict
+
+import numpy as np
+import pytest
+
+from position_sim import EXIT_END_OF_DATA, simulate
+
+PARAMS = {
+    'pine': dict(initial_capital=10_000.0, order_size=100.0, fee_rate=0.001),
+    'all_in_long': dict(initial_capital=10_000.0),
+    'sl_tp_long': dict(initial_capital=10_000.0, position_size=0.02, commission=0.001,
+                       slippage=0.0005, stop_loss=0.02, take_profit=0.03),
+}
+
+
+def _reference(mode: str, close, signal, p: Dict):
+    """The per-bar loops the modes replace: (closed trades as tuples, equity list, cash)"""
+    trades, equity = [], []
+    if mode == 'pine':
+        cash, qty, entry, rows = p['initial_capital'], 0.0, 0.0, []
+        for i, (px, sig) in enumerate(zip(close, signal)):
+            equity.append(cash + (px - entry) * qty if qty != 0 else cash)
+            if (sig == 1 and qty >= 0) or (sig == -1 and qty <= 0):
+                q = p['order_size'] / px
+                cash -= q * px * p['fee_rate']
+                qty, entry = (q if sig == 1 else -q), px
+                rows.append([i, -1, 0.0])
+        if qty != 0:
+            px = close[-1]
+            gross = (px - entry) * qty if qty > 0 else (entry - px) * abs(qty)
+            pnl = gross - (p['order_size'] + abs(qty) * px) * p['fee_rate']
+            cash += pnl
+            rows[-1][1:] = [len(close) - 1, pnl]
+            equity.append(cash)
+        return [tuple(r) for r in rows], equity, cash
+    if mode == 'all_in_long':
+        capital, position, entry = p['initial_capital'], 0, 0
+        for i, (px, sig) in enumerate(zip(close, signal)):
+            if sig == 1 and position == 0:
+                position, entry, capital, start = capital / px, px, 0, i
+            elif sig == -1 and position > 0:
+                capital = position * px
+                trades.append((start, i, entry, px))
+                position = 0
+        if position > 0:
+            capital = position * close[-1]
+            trades.append((start, len(close) - 1, entry, close[-1]))
+        return trades, equity, capital
+    capital, position = p['initial_capital'], None
+    for i, (px, sig) in enumerate(zip(close, signal)):
+        if sig == 1 and position is None:
+            price = px * (1 + p['slippage'])
+            size = (capital * p['position_size']) / price
+            fee = size * price * p['commission']
+            position = (i, price, size, fee, price * (1 - p['stop_loss']), price * (1 + p['take_profit']))
+            capital -= (size * price + fee)
+        elif position is not None:
+            start, price, size, fee, stop, target = position
+            hit = sig == -1 or px <= stop or px >= target
+            if hit:
+                out = px * (1 - p['slippage'])
+                fee_out = size * out * p['commission']
+                trades.append((start, i, (out - price) * size - fee - fee_out))
+                capital += size * out - fee_out
+                position = None
+    return trades, equity, capital
+
+
+@pytest.mark.parametrize('mode', list(PARAMS))
+@pytest.mark.parametrize('trial', range(20))
+def test_mode_matches_bar_loop(series, mode, trial):
+    walk = series(2000, seed=trial)
+    close = walk.close
+    signal = walk.rng.choice([-1, 0, 0, 0, 1], len(close))
+    p = PARAMS[mode]
+    sim = simulate(close, signal, mode, **p)
+    trades, equity, cash = _reference(mode, close.tolist(), signal.tolist(), p)
+    assert cash == sim.cash
+    if mode == 'pine':
+        got = list(zip(sim.entry_idx.tolist(), sim.exit_idx.tolist(), sim.pnl.tolist()))
+        assert got == trades and equity == sim.equity.tolist()
+    elif mode == 'all_in_long':
+        got = list(zip(sim.entry_idx.tolist(), sim.exit_idx.tolist(),
+                       sim.entry_price.tolist(), sim.exit_price.tolist()))
+        assert got == trades
+    else:
+        c = sim.closed
+        got = list(zip(sim.entry_idx[c].tolist(), sim.exit_idx[c].tolist(), sim.pnl[c].tolist()))
+        assert got == trades
+
+
+@pytest.mark.parametrize('mode', list(PARAMS))
+def test_no_bars_and_no_signals(mode):
+    p = PARAMS[mode]
+    empty = simulate(np.empty(0), np.empty(0), mode, **p)
+    assert len(empty.entry_idx) == 0 and empty.cash == p['initial_capital']
+    quiet = simulate(np.linspace(100, 110, 50), np.zeros(50), mode, **p)
+    assert len(quiet.entry_idx) == 0 and quiet.cash == p['initial_capital']
+
+
+def test_open_all_in_position_is_closed_at_end_of_data():
+    sim = simulate(np.array([10.0, 11.0, 12.0]), np.array([1, 0, 0]), 'all_in_long', initial_capital=100.0)
+    assert sim.exit_reason.tolist() == [EXIT_END_OF_DATA]
+    assert sim.cash == pytest.approx(120.0)
+
+
+def test_mismatched_lengths_raise():
+    with pytest.raises(ValueError):
+        simulate(np.ones(3), np.ones(2), 'pine', **PARAMS['pine'])
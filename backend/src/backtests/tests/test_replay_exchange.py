@@ -0,0 +1,98 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from ohlcv_store import OHLCVStore
+from replay_exchange import (ENV_VAR, AsyncReplayExchange, NotSupported, ReplayExchange, create_exchange,
+                             synthetic_ohlcv)
+
+MINUTE = 60_000
+NOW = 1_700_000_000_000 + 37 * MINUTE + 1234
+
+
+def _page_through(exchange, symbol, timeframe, since, limit):
+    """The since/limit loop every downloader in the tree runs"""
+    step = exchange.parse_timeframe(timeframe) * 1000
+    rows, calls = [], 0
+    while True:
+        batch = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+        calls += 1
+        if not batch:
+            break
+        assert len(batch) <= limit and all(isinstance(r[0], int) for r in batch)
+        rows.extend(batch)
+        since = batch[-1][0] + step
+    return np.asarray(rows), calls
+
+
+@pytest.mark.parametrize('timeframe, limit', [('1m', 1000), ('5m', 7), ('1h', 500)])
+def test_synthetic_paging_is_contiguous_and_stops_at_the_clock(timeframe, limit):
+    exchange = ReplayExchange(start_ms=NOW, speed=0)
+    step = exchange.parse_timeframe(timeframe) * 1000
+    since = NOW - 2000 * step - 123
+    rows, calls = _page_through(exchange, 'BTC/USDT', timeframe, since, limit)
+    assert (np.diff(rows[:, 0]) == step).all()
+    assert rows[0, 0] == -(-since // step) * step
+    # The last candle is the one forming at the replay clock, never a future one
+    assert rows[-1, 0] == NOW - NOW % step
+    # Full pages, then the empty request that ends the loop
+    assert calls == -(-len(rows) // limit) + 1
+    # One request for the whole window returns the same candles
+    again = np.asarray(exchange.fetch_ohlcv('BTC/USDT', timeframe, since=since, limit=len(rows)))
+    assert np.array_equal(again, rows)
+
+
+def test_synthetic_windows_agree_across_requests():
+    one = synthetic_ohlcv('ETH/USDT', 300_000, 10 * 300_000, 50)
+    two = synthetic_ohlcv('ETH/USDT', 300_000, 30 * 300_000, 50)
+    assert np.array_equal(one[20:], two[:30])
+    assert (one[:, 2] >= np.maximum(one[:, 1], one[:, 4])).all()
+    assert (one[:, 3] <= np.minimum(one[:, 1], one[:, 4])).all()
+
+
+def test_stored_paging_and_resampling(tmp_path):
+    store = OHLCVStore(tmp_path)
+    stored = synthetic_ohlcv('SOL/USDT', MINUTE, NOW - 5000 * MINUTE, 5000)
+    store.write('binance', 'SOL/USDT', '1m', stored)
+    exchange = ReplayExchange(store_root=tmp_path, start_ms=NOW - 600 * MINUTE, speed=0)
+
+    rows, _ = _page_through(exchange, 'SOL/USDT', '1m', NOW - 5000 * MINUTE, 333)
+    # Stored candles up to the replay clock, nothing later
+    visible = stored[stored[:, 0] <= exchange.milliseconds()]
+    assert np.array_equal(rows, visible)
+
+    hourly, _ = _page_through(exchange, 'SOL/USDT', '1h', NOW - 5000 * MINUTE, 10)
+    buckets = visible[:, 0] // 3_600_000
+    for row in hourly:
+        members = visible[buckets == row[0] // 3_600_000]
+        assert row[1] == members[0, 1] and row[4] == members[-1, 4]
+        assert row[2] == members[:, 2].max() and row[5] == pytest.approx(members[:, 5].sum())
+
+    latest = exchange.fetch_ohlcv('SOL/USDT', '1m', limit=5)
+    assert np.array_equal(np.asarray(latest), visible[-5:])
+    exchange.advance(60 * MINUTE)
+    assert exchange.fetch_ohlcv('SOL/USDT', '1m', limit=1)[0][0] == visible[-1, 0] + 60 * MINUTE
+
+
+def test_async_flavour_matches_sync():
+    sync = ReplayExchange(start_ms=NOW, speed=0)
+    aio = AsyncReplayExchange(start_ms=NOW, speed=0)
+    got = asyncio.run(aio.fetch_ohlcv('BTC/USDT', '15m', since=NOW - 10 ** 8, limit=100))
+    assert got == sync.fetch_ohlcv('BTC/USDT', '15m', since=NOW - 10 ** 8, limit=100)
+
+
+def test_markets_orders_and_env_switch(monkeypatch, tmp_path):
+    exchange = ReplayExchange(start_ms=NOW, speed=0, config={'options': {'defaultType': 'swap'}})
+    assert 'BTC/USDT:USDT' in exchange.load_markets()
+    assert exchange.markets['BTC/USDT:USDT']['swap']
+    with pytest.raises(NotSupported):
+        exchange.create_order('BTC/USDT:USDT', 'limit', 'buy', 1, 1)
+    ticker = exchange.fetch_ticker('BTC/USDT:USDT')
+    assert ticker['last'] == exchange.fetch_ohlcv('BTC/USDT:USDT', '1m', limit=1)[0][4]
+
+    monkeypatch.setenv(ENV_VAR, str(tmp_path))
+    monkeypatch.setenv('EXCHANGE_REPLAY_START', '2024-01-01T00:00:00Z')
+    replay = create_exchange('bybit', async_support=True)
+    assert isinstance(replay, AsyncReplayExchange) and replay.store.root == tmp_path
+    assert replay.source == 'bybit' and replay._start_ms == 1_704_067_200_000
@@ -0,0 +1,85 @@
+import pickle
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from param_grid import ParameterGrid
+from result_store import ResultStore
+
+STRATEGIES = ('ma_crossover', 'holy_grail', 'seven_rsi')
+
+
+@dataclass
+class Row:
+    rank: int
+    symbol: str
+    strategy: str
+    parameters: Dict
+    daily_return_pct: float
+    total_trades: int
+    meets_high_criteria: bool
+    backtest_start_date: datetime
+
+
+@pytest.fixture
+def rows(series):
+    """(records, grid keys, grids) for 3000 results; daily returns come from a synthetic series"""
+    walk = series(3000, seed=3, drift=0.05, vol=0.1)
+    rng = walk.rng
+    grids = {name: ParameterGrid({'fast': list(range(5, 40)), 'slow': list(range(40, 120)), 'stop': [1.0, 2.0, 3.0]})
+             for name in STRATEGIES}
+    start = pd.Timestamp('2024-01-01')
+    records, keys = [], []
+    for i, daily in enumerate(np.round(walk.returns, 3).tolist()):
+        name = STRATEGIES[i % 3]
+        index = int(rng.integers(grids[name].size))
+        records.append(Row(0, f"C{i % 30}/USDT", name, grids[name].params_at(index), daily,
+                           int(rng.integers(8, 80)), bool(rng.random() < 0.2), start))
+        keys.append((name, index))
+    return records, keys, grids
+
+
+def _build(records, keys, grids) -> ResultStore:
+    """Two worker stores, pickled across and merged"""
+    halves = [ResultStore(Row, capacity=16), ResultStore(Row, capacity=16)]
+    for i, (record, (name, index)) in enumerate(zip(records, keys)):
+        halves[i % 2].append(record, name, grids[name], index)
+    store = pickle.loads(pickle.dumps(halves[0]))
+    store.extend(pickle.loads(pickle.dumps(halves[1])))
+    return store
+
+
+def test_ranking_matches_sorted_dataclasses(rows):
+    records, keys, grids = rows
+    store = _build(records, keys, grids).rank_by('daily_return_pct')
+    # Ties are kept in insertion order, as sorted() does
+    expected = sorted(records[0::2] + records[1::2], key=lambda r: r.daily_return_pct, reverse=True)
+    for rank, r in enumerate(expected, 1):
+        r.rank = rank
+    assert [asdict(store.record(i)) for i in range(len(store))] == [asdict(r) for r in expected]
+    assert [asdict(r) for r in store.head(10)] == [asdict(r) for r in expected[:10]]
+
+
+def test_summary_columns_match_list_scans(rows):
+    records, keys, grids = rows
+    store = _build(records, keys, grids)
+    chosen = ('holy_grail', 'seven_rsi')
+    assert (store['daily_return_pct'] > 0).sum() == len([r for r in records if r.daily_return_pct > 0])
+    assert store['meets_high_criteria'].sum() == len([r for r in records if r.meets_high_criteria])
+    assert store['daily_return_pct'][store.isin('strategy', chosen)].mean() == pytest.approx(
+        np.mean([r.daily_return_pct for r in records if r.strategy in chosen]), rel=1e-12)
+    assert store.distinct('symbol') == len(set(r.symbol for r in records))
+    assert store.isin('strategy', ('unknown',)).sum() == 0
+
+
+def test_filter_and_decode(rows):
+    records, keys, grids = rows
+    store = _build(records, keys, grids)
+    subset = store.filter(store.isin('strategy', ('holy_grail',)))
+    assert set(subset.decode('strategy')) == {'holy_grail'}
+    assert len(subset) == len([r for r in records if r.strategy == 'holy_grail'])
+    assert subset.parameters(0) == subset.record(0).parameters
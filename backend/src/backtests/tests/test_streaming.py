@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+import indicators as ind
+from streaming import (ResampledStream, StreamingADX, StreamingATR, StreamingBollinger, StreamingCCI,
+                       StreamingDonchian, StreamingEMA, StreamingIndicator, StreamingMACD, StreamingRMA,
+                       StreamingRSI, StreamingSMA, StreamRegistry)
+
+BARS = 3000
+
+
+@pytest.fixture
+def candles(series):
+    return series(BARS, seed=11)
+
+
+def _replay(indicator: StreamingIndicator, *columns: np.ndarray) -> np.ndarray:
+    """Feed ``columns`` bar by bar; peeks must agree with the following update"""
+    values = []
+    for bar in zip(*(c.tolist() for c in columns)):
+        peeked = indicator.peek(*bar)
+        value = indicator.update(*bar)
+        assert np.array_equal(np.asarray(peeked, dtype=float), np.asarray(value, dtype=float),
+                              equal_nan=True), (type(indicator).__name__, indicator.bars)
+        values.append(value)
+    return np.asarray(values, dtype=float)
+
+
+@pytest.mark.parametrize('make, columns, batch, rtol', [
+    (lambda: StreamingSMA(20), 'c', lambda h, l, c: ind.sma(c, 20), 1e-9),
+    (lambda: StreamingEMA(21), 'c', lambda h, l, c: ind.ema(c, 21), 0),
+    (lambda: StreamingEMA(21, 'first'), 'c', lambda h, l, c: ind.ema(c, 21, 'first'), 0),
+    (lambda: StreamingRMA(14), 'c', lambda h, l, c: ind.smma(c, 14), 0),
+    (lambda: StreamingRSI(14), 'c', lambda h, l, c: ind.rsi(c, 14), 0),
+    (lambda: StreamingATR(14), 'hlc', lambda h, l, c: ind.atr(h, l, c, 14), 0),
+    (lambda: StreamingADX(14), 'hlc', lambda h, l, c: ind.adx(h, l, c, 14), 0),
+    (lambda: StreamingCCI(20), 'hlc', lambda h, l, c: ind.cci(h, l, c, 20), 0),
+    (lambda: StreamingMACD(12, 26, 9), 'c', lambda h, l, c: np.column_stack(ind.macd(c, 12, 26, 9)), 1e-12),
+    (lambda: StreamingMACD(5, 35, 5), 'c', lambda h, l, c: np.column_stack(ind.macd(c, 5, 35, 5)), 1e-12),
+    (lambda: StreamingBollinger(20, 2.0, ddof=1), 'c',
+     lambda h, l, c: np.column_stack(ind.bollinger(c, 20, 2.0, 1)), 1e-9),
+    (lambda: StreamingDonchian(20), 'hl', lambda h, l, c: np.column_stack(ind.donchian(h, l, 20)), 0),
+], ids=['sma', 'ema', 'ema-first', 'rma', 'rsi', 'atr', 'adx', 'cci', 'macd', 'macd-5-35-5', 'bollinger',
+        'donchian'])
+def test_replay_matches_batch_kernel(candles, make, columns, batch, rtol):
+    data = {'h': candles.high, 'l': candles.low, 'c': candles.close}
+    got = _replay(make(), *(data[k] for k in columns))
+    expected = batch(candles.high, candles.low, candles.close)
+    assert np.allclose(got, expected, rtol=rtol, atol=1e-12 if rtol else 0, equal_nan=True)
+
+
+def test_replay_matches_talib(candles):
+    talib = pytest.importorskip('talib')
+    close = candles.close
+    expected = np.column_stack(talib.MACD(close, 12, 26, 9))
+    assert np.allclose(_replay(StreamingMACD(12, 26, 9), close), expected, rtol=1e-12, equal_nan=True)
+    expected = np.column_stack(talib.BBANDS(close, 20, 2.0, 2.0))
+    assert np.allclose(_replay(StreamingBollinger(20, 2.0), close), expected, rtol=1e-9, equal_nan=True)
+    expected = talib.RSI(close, 14)
+    assert np.allclose(_replay(StreamingRSI(14), close), expected, rtol=1e-12, equal_nan=True)
+
+
+def test_resampled_stream_matches_bucket_closes(candles):
+    # 1m closes rolled into 15m buckets, each minute first added 0.1% off and then re-added
+    close = candles.close
+    stream = ResampledStream(StreamingRSI(14), 15 * 60000)
+    minutes = np.arange(BARS) * 60000
+    for ts, x in zip(minutes.tolist(), close.tolist()):
+        stream.add(ts, x * 1.001)
+        stream.add(ts, x)
+    bucket_closes = close[np.r_[np.flatnonzero(np.diff(minutes // (15 * 60000))), BARS - 1]]
+    assert stream.peek() == ind.rsi(bucket_closes, 14)[-1]
+
+
+def test_registry_polls_sliding_window(candles):
+    # Polling a 200-candle window whose last candle is still forming; after a gap
+    # longer than the window the state restarts from the window itself
+    close = candles.close
+    registry = StreamRegistry()
+    stamps = np.arange(BARS, dtype=np.int64) * 60000
+    for end in (200, 201, 205, 206, 600, 1200, BARS):
+        got = registry.latest('rsi', lambda: StreamingRSI(14), stamps[end - 200:end], close[end - 200:end])
+        expected = ind.rsi(close[:end], 14)[-1] if end < 300 else ind.rsi(close[end - 200:end], 14)[-1]
+        assert got == expected, end
+
+
+def test_subclasses_must_define_step():
+    class NoStep(StreamingIndicator):
+        pass
+
+    with pytest.raises(TypeError):
+        NoStep()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators as ind
+
+GRID = [(period, multiplier) for period in (7, 10, 14) for multiplier in (2.0, 3.0)] + [(10, 3.0)]
+
+
+@pytest.fixture
+def candles(series):
+    walk = series(1500, seed=17, vol=0.015)
+    index = pd.date_range('2024-01-01', periods=len(walk.close), freq='h')
+    return pd.Series(walk.high, index), pd.Series(walk.low, index), pd.Series(walk.close, index)
+
+
+@pytest.mark.parametrize('mode', ['band', 'line'])
+@pytest.mark.parametrize('period, multiplier', [(10, 3.0), (7, 1.5)])
+def test_kernel_matches_per_bar_loop(candles, mode, period, multiplier):
+    line, direction = ind.supertrend(*candles, period, multiplier, mode=mode)
+    expected_line, expected_direction = ind._supertrend_reference(*candles, period, multiplier, mode)
+    assert direction.tolist() == expected_direction.tolist()
+    assert np.array_equal(line, expected_line.to_numpy(), equal_nan=True)
+    assert len(set(direction.tolist())) == 2, 'no flips: the comparison would be vacuous'
+
+
+@pytest.mark.parametrize('mode', ['band', 'line'])
+@pytest.mark.parametrize('atr_method', ['rma', 'sma'])
+def test_batch_rows_equal_single_runs(candles, mode, atr_method):
+    lines, directions = ind.supertrend_batch(*candles, GRID, atr_method=atr_method, mode=mode)
+    assert lines.shape == directions.shape == (len(GRID), len(candles[2]))
+    for row, (period, multiplier) in enumerate(GRID):
+        line, direction = ind.supertrend(*candles, period, multiplier, atr_method=atr_method, mode=mode)
+        assert np.array_equal(lines[row], line, equal_nan=True), (period, multiplier)
+        assert np.array_equal(directions[row], direction), (period, multiplier)
+
+
+def test_batch_edge_cases(candles):
+    lines, directions = ind.supertrend_batch(*candles, [])
+    assert lines.shape == directions.shape == (0, len(candles[2]))
+    empty = pd.Series([], dtype=float)
+    lines, directions = ind.supertrend_batch(empty, empty, empty, GRID)
+    assert lines.shape == (len(GRID), 0)
+    with pytest.raises(ValueError):
+        ind.supertrend_batch(*candles, GRID, mode='flip')
@@ -38,13 +38,9 @@ Strategies Included:
 21. TurtleBC-V.Troussel
 """
 
-import ccxt
 import pandas as pd
 import numpy as np
-import talib
 import time
-import pickle
-import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Any
 import warnings
@@ -55,11 +51,23 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-import itertools
 import sys
 import io
+import argparse
 from pathlib import Path
 
+from bar_kernels import build_trades, cross_above, cross_below, run_multi_tp_long
+from batch_eval import BATCHED_STRATEGIES, matrix_params, template_trailing_batch
+from bulk_downloader import bulk_download
+from indicator_cache import IndicatorCache
+from indicators import IndicatorSet
+from ohlcv_store import OHLCVStore, last_closed_ms
+from parallel_runner import SharedFrameRunner
+from param_grid import ParameterGrid
+from perf_metrics import performance
+from replay_exchange import create_exchange
+from result_store import ResultStore
+
 # Force UTF-8 encoding for output
 if sys.stdout.encoding != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -68,6 +76,10 @@ warnings.filterwarnings('ignore')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Strategies carried over from the earlier backtesters; every other one is an "ultimate" strategy
+ORIGINAL_STRATEGIES = ('template_trailing', 'dca_bot_v2', 'dca_long_short',
+                       'turtle_donchian', 'bollinger_original', 'cryptosniper_long', 'ma_crossover')
+
 @dataclass
 class Ultimate21Result:
     """Ultimate result with all metrics for 21 strategies"""
@@ -109,60 +121,38 @@ class Ultimate21Result:
     meets_high_criteria: bool
     meets_medium_criteria: bool
 
-class TechnicalIndicators:
-    """Enhanced technical indicators for all strategies"""
-    
-    @staticmethod
-    def sma(data: pd.Series, period: int) -> pd.Series:
-        """Simple Moving Average"""
-        return data.rolling(window=period).mean()
-    
-    @staticmethod
-    def ema(data: pd.Series, period: int) -> pd.Series:
-        """Exponential Moving Average"""
-        return data.ewm(span=period).mean()
-    
-    @staticmethod
-    def rsi(data: pd.Series, period: int = 14) -> pd.Series:
-        """Relative Strength Index"""
-        delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
-    
-    @staticmethod
-    def bollinger_bands(data: pd.Series, period: int = 20, std_dev: float = 2) -> Tuple[pd.Series, pd.Series, pd.Series]:
-        """Bollinger Bands (Upper, Middle, Lower)"""
-        middle = data.rolling(window=period).mean()
-        std = data.rolling(window=period).std()
-        upper = middle + (std * std_dev)
-        lower = middle - (std * std_dev)
-        return upper, middle, lower
-    
-    @staticmethod
-    def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-        """Average True Range"""
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        return tr.rolling(window=period).mean()
-    
-    @staticmethod
-    def donchian_channels(high: pd.Series, low: pd.Series, period: int = 20) -> Tuple[pd.Series, pd.Series]:
-        """Donchian Channels (Upper, Lower)"""
-        upper = high.rolling(window=period).max()
-        lower = low.rolling(window=period).min()
-        return upper, lower
-    
-    @staticmethod
-    def adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-        """Average Directional Index"""
-        try:
-            return pd.Series(talib.ADX(high.values, low.values, close.values, timeperiod=period), index=close.index)
-        except:
-            return pd.Series(np.nan, index=close.index)
+def summarize_results(results: ResultStore) -> Dict[str, Any]:
+    """Counts and averages for the summary sheet and console report, as column operations"""
+    original = results.isin('strategy', ORIGINAL_STRATEGIES)
+    ultimate = ~original
+    profitable = results['total_return_pct'] > 0
+    daily = results['daily_return_pct']
+    drawdown = results['max_drawdown_pct']
+    return {
+        'total': len(results),
+        'original': int(original.sum()),
+        'ultimate': int(ultimate.sum()),
+        'profitable': int(profitable.sum()),
+        'high': int(results['meets_high_criteria'].sum()),
+        'medium': int(results['meets_medium_criteria'].sum()),
+        'symbols': results.distinct('symbol'),
+        'timeframes': results.distinct('timeframe'),
+        'original_daily': np.mean(daily[original]),
+        'ultimate_daily': np.mean(daily[ultimate]),
+        'original_dd': np.mean(drawdown[original]),
+        'ultimate_dd': np.mean(drawdown[ultimate]),
+        'original_success': np.mean(profitable[original]) * 100,
+        'ultimate_success': np.mean(profitable[ultimate]) * 100,
+        'best_daily': daily.max() if len(results) else np.nan,
+    }
+
+class TechnicalIndicators(IndicatorSet):
+    """Enhanced technical indicators for all strategies (pandas rolling / ewm flavour)"""
+
+    ema_seed = 'adjust'
+    rsi_method = 'sma'
+    atr_method = 'sma'
+    bb_ddof = 1
 
 class DataCacheSystem:
     """High-performance data caching system"""
@@ -170,94 +160,63 @@ class DataCacheSystem:
     def __init__(self, cache_dir: str = "ultimate_data_cache"):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
-        self.exchange = ccxt.binance({
+        self.store = OHLCVStore(self.cache_dir)
+        self.exchange = create_exchange('binance', {
             'enableRateLimit': True,
             'timeout': 30000,
             'sandbox': False
         })
     
-    def get_cache_filename(self, symbol: str, timeframe: str, days: int) -> Path:
-        """Generate cache filename"""
-        clean_symbol = symbol.replace('/', '_')
-        return self.cache_dir / f"{clean_symbol}_{timeframe}_{days}d.pkl"
+    def get_cache_filename(self, symbol: str, timeframe: str) -> Path:
+        """Store file holding every cached candle of a symbol/timeframe"""
+        return self.store.path(self.exchange.id, symbol, timeframe)
     
-    def is_cache_valid(self, cache_file: Path, max_age_hours: int = 6) -> bool:
-        """Check if cache is still valid (6 hours for comprehensive data)"""
-        if not cache_file.exists():
-            return False
+    def is_cache_valid(self, symbol: str, timeframe: str, since: int) -> bool:
+        """Check if the cache covers ``since`` and already holds the last closed candle"""
+        meta = self.store.meta(self.exchange.id, symbol, timeframe)
+        return bool(meta and meta['rows']) and meta['covered_from_ms'] <= since and \
+            meta['last_ts'] >= last_closed_ms(self.exchange, timeframe)
+    
+    def prefetch(self, symbols: List[str], timeframes: List[str], days: int = 500):
+        """Download every symbol/timeframe concurrently so the per-symbol loop reads from cache"""
+        since = self.exchange.milliseconds() - days * 24 * 60 * 60 * 1000
+        jobs = [(symbol, timeframe, since) for symbol in symbols for timeframe in timeframes
+                if not self.is_cache_valid(symbol, timeframe, since)]
+        if not jobs:
+            return
         
-        age = time.time() - cache_file.stat().st_mtime
-        return age < max_age_hours * 3600
+        logger.info(f"Bulk downloading {len(jobs)} symbol/timeframe series...")
+        try:
+            results = bulk_download(self.exchange.id, jobs, self.cache_dir, config={'timeout': 30000})
+            requests = sum(r['requests'] for r in results.values())
+            logger.info(f"Bulk download done: {len(results)}/{len(jobs)} series, {requests} requests")
+        except Exception as e:
+            logger.warning(f"Bulk download failed, fetching per symbol instead: {e}")
     
     def fetch_and_cache_data(self, symbol: str, timeframe: str, days: int = 500) -> pd.DataFrame:
-        """Fetch data with caching for speed"""
-        cache_file = self.get_cache_filename(symbol, timeframe, days)
+        """Fetch data with caching for speed (only candles missing from the cache are downloaded)"""
+        since = self.exchange.milliseconds() - days * 24 * 60 * 60 * 1000
         
-        # Try to load from cache first
-        if self.is_cache_valid(cache_file):
+        if self.is_cache_valid(symbol, timeframe, since):
+            logger.info(f"Loading {symbol} {timeframe} from cache...")
+        else:
             try:
-                logger.info(f"Loading {symbol} {timeframe} from cache...")
-                with open(cache_file, 'rb') as f:
-                    df = pickle.load(f)
-                    if len(df) > 200:  # Valid data
-                        return df
+                stats = self.store.sync(self.exchange, symbol, timeframe, since)
+                logger.info(f"Updated {symbol} {timeframe}: +{stats['new_rows']} candles "
+                            f"in {stats['requests']} requests ({stats['rows']} cached)")
             except Exception as e:
-                logger.warning(f"Cache load failed for {symbol}: {e}")
+                logger.warning(f"Error fetching data for {symbol} {timeframe}: {e}")
         
-        # Fetch fresh data
-        logger.info(f"Fetching fresh data for {symbol} {timeframe}...")
         try:
-            since = self.exchange.milliseconds() - days * 24 * 60 * 60 * 1000
-            all_ohlcv = []
-            current_since = since
-            
-            # Time increment based on timeframe
-            time_increment = {
-                '1h': 3600000,
-                '4h': 14400000, 
-                '1d': 86400000
-            }.get(timeframe, 86400000)
-            
-            while current_since < self.exchange.milliseconds():
-                try:
-                    ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=current_since, limit=1000)
-                    if not ohlcv:
-                        break
-                        
-                    all_ohlcv.extend(ohlcv)
-                    if len(ohlcv) < 1000:
-                        break
-                        
-                    current_since = ohlcv[-1][0] + time_increment
-                    time.sleep(0.05)  # Rate limiting
-                    
-                except Exception as e:
-                    logger.warning(f"Error fetching batch: {e}")
-                    break
-            
-            if len(all_ohlcv) < 200:
-                logger.warning(f"Insufficient data for {symbol} {timeframe}")
-                return pd.DataFrame()
-                
-            # Convert to DataFrame
-            df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            df = df[~df.index.duplicated()].sort_index()
-            
-            # Cache the data
-            try:
-                with open(cache_file, 'wb') as f:
-                    pickle.dump(df, f)
-                logger.info(f"Cached {len(df)} rows for {symbol} {timeframe}")
-            except Exception as e:
-                logger.warning(f"Failed to cache data: {e}")
-            
-            return df
-            
+            df = self.store.read_frame(self.exchange.id, symbol, timeframe, since_ms=since)
         except Exception as e:
-            logger.error(f"Error fetching data for {symbol} {timeframe}: {e}")
+            logger.error(f"Cache load failed for {symbol} {timeframe}: {e}")
             return pd.DataFrame()
+        
+        if len(df) < 200:
+            logger.warning(f"Insufficient data for {symbol} {timeframe}")
+            return pd.DataFrame()
+        return df
 
 class Ultimate21StrategiesBacktester:
     """Ultimate backtester with 21 strategies and comprehensive optimization"""
@@ -280,7 +239,14 @@ class Ultimate21StrategiesBacktester:
             'SUI/USDT', 'ENA/USDT', 'PEPE/USDT', 'ARB/USDT', 'OP/USDT', 'NEAR/USDT'
         ]
         
-        self.all_results = []
+        # Ranked results of the last run, one column per metric
+        self.all_results = ResultStore(Ultimate21Result)
+        
+        # Seed for the random part of parameter sampling (None = non-deterministic)
+        self.grid_seed: Optional[int] = None
+        
+        # Byte budget of the indicator cache shared by all combos of one DataFrame
+        self.indicator_cache_bytes = 256 * 1024 * 1024
         
         # COMPREHENSIVE PARAMETER RANGES FOR ALL 21 STRATEGIES
         self.parameter_ranges = {
@@ -477,13 +443,10 @@ class Ultimate21StrategiesBacktester:
         if len(equity_curve) < 2:
             return 0.0, 0.0, 0.0
         
-        equity = np.array(equity_curve)
-        running_max = np.maximum.accumulate(equity)
-        drawdown = (running_max - equity) / running_max * 100
-        
-        max_drawdown = np.max(drawdown)
-        current_drawdown = drawdown[-1]
-        ulcer_index = np.sqrt(np.mean(drawdown ** 2))
+        stats = performance(np.empty(0), equity_curve)
+        max_drawdown = stats['max_drawdown']
+        current_drawdown = stats['current_drawdown']
+        ulcer_index = stats['ulcer_index']
         
         return max_drawdown, current_drawdown, ulcer_index
     
@@ -505,6 +468,38 @@ class Ultimate21StrategiesBacktester:
             logger.error(f"Error in {strategy} backtest: {e}")
             return None
     
+    def backtest_strategy_batch(self, df: pd.DataFrame, symbol: str, timeframe: str, strategy: str,
+                                param_keys: List[str], param_matrix: np.ndarray) -> List[Optional[Ultimate21Result]]:
+        """
+        Backtest a (combos x params) matrix of one strategy in a single pass.
+        Indicators are computed once per distinct period and signals are
+        broadcast across combos; result i belongs to matrix row i.
+        Use ``batch_eval.results_table`` to get the results as a DataFrame.
+        """
+        param_matrix = np.asarray(param_matrix, dtype=np.float64)
+        if len(df) < 150 or len(param_matrix) == 0:
+            return [None] * len(param_matrix)
+        
+        if strategy not in BATCHED_STRATEGIES:
+            return [self.backtest_strategy_comprehensive(df, symbol, timeframe, strategy,
+                                                         matrix_params(strategy, param_keys, row))
+                    for row in param_matrix]
+        
+        try:
+            runs = template_trailing_batch(df, param_keys, param_matrix,
+                                           self.initial_capital, TechnicalIndicators)
+            close = df['close'].to_numpy(dtype=np.float64)
+            
+            results = []
+            for row, run in zip(param_matrix, runs):
+                params = matrix_params(strategy, param_keys, row)
+                results.append(self._template_trailing_result(df, symbol, timeframe, params, close, run))
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in {strategy} batch backtest: {e}")
+            return [None] * len(param_matrix)
+    
     def backtest_original_strategy(self, df: pd.DataFrame, symbol: str, timeframe: str, 
                                   strategy: str, params: Dict) -> Ultimate21Result:
         """Backtest original 7 strategies with enhanced logic"""
@@ -539,134 +534,64 @@ class Ultimate21StrategiesBacktester:
         tp3 = params['take_profit_3'] / 100
         
         # Calculate indicators
-        fast_ma = TechnicalIndicators.sma(df['close'], fast_ma_period)
-        slow_ma = TechnicalIndicators.sma(df['close'], slow_ma_period)
-        ema_filter = TechnicalIndicators.ema(df['close'], ema_period)
-        atr = TechnicalIndicators.atr(df['high'], df['low'], df['close'], 14)
-        volume_ma = df['volume'].rolling(20).mean()
+        close = df['close'].to_numpy(dtype=np.float64)
+        fast_ma = TechnicalIndicators.sma(df['close'], fast_ma_period).to_numpy()
+        slow_ma = TechnicalIndicators.sma(df['close'], slow_ma_period).to_numpy()
+        ema_filter = TechnicalIndicators.ema(df['close'], ema_period).to_numpy()
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        volume_ma = TechnicalIndicators.sma(df['volume'], 20).to_numpy()
         
-        position = None
-        trades = []
-        equity = self.initial_capital
-        equity_curve = [equity]
-        days_in_market = 0
-        consecutive_wins = 0
-        consecutive_losses = 0
-        max_consecutive_wins = 0
-        max_consecutive_losses = 0
+        # Bar-independent conditions, evaluated once for the whole series
+        valid = ~(np.isnan(fast_ma) | np.isnan(slow_ma) | np.isnan(ema_filter))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volume_surge = np.where(volume_ma > 0, volume / volume_ma, 1.0)
+        entry_signal = (
+            cross_above(fast_ma, slow_ma) &
+            (close > ema_filter) &
+            (volume_surge > 1.2)
+        )
+        cross_exit = cross_below(fast_ma, slow_ma)
         
         start_idx = max(fast_ma_period, slow_ma_period, ema_period) + 10
         
-        for i in range(start_idx, len(df)):
-            current_price = df['close'].iloc[i]
-            current_date = df.index[i]
-            current_volume = df['volume'].iloc[i]
-            
-            # Skip if indicators are NaN
-            if any(pd.isna(val) for val in [fast_ma.iloc[i], slow_ma.iloc[i], ema_filter.iloc[i]]):
-                equity_curve.append(equity)
-                continue
-            
-            if position is not None:
-                days_in_market += 1
-                position_value = position['quantity'] * current_price
-                current_equity = equity + position_value - position['cost']
-                equity_curve.append(current_equity)
-                
-                # Multiple TP levels
-                pnl_pct = (current_price - position['entry_price']) / position['entry_price']
-                exit_triggered = False
-                exit_reason = ""
-                
-                if pnl_pct <= -stop_loss_pct:
-                    exit_triggered = True
-                    exit_reason = "Stop Loss"
-                elif pnl_pct >= tp3:
-                    exit_triggered = True
-                    exit_reason = "Take Profit 3"
-                elif pnl_pct >= tp2:
-                    exit_triggered = True
-                    exit_reason = "Take Profit 2"
-                elif pnl_pct >= tp1:
-                    exit_triggered = True
-                    exit_reason = "Take Profit 1"
-                elif fast_ma.iloc[i] < slow_ma.iloc[i] and fast_ma.iloc[i-1] >= slow_ma.iloc[i-1]:
-                    exit_triggered = True
-                    exit_reason = "MA Cross Exit"
-                
-                if exit_triggered:
-                    trade_pnl = position_value - position['cost']
-                    equity += trade_pnl
-                    duration = max(1, (current_date - position['entry_date']).days)
-                    
-                    trades.append({
-                        'entry_date': position['entry_date'],
-                        'exit_date': current_date,
-                        'entry_price': position['entry_price'],
-                        'exit_price': current_price,
-                        'pnl_pct': pnl_pct * 100,
-                        'pnl_amount': trade_pnl,
-                        'duration_days': duration,
-                        'exit_reason': exit_reason
-                    })
-                    
-                    # Update consecutive tracking
-                    if pnl_pct > 0:
-                        consecutive_wins += 1
-                        consecutive_losses = 0
-                        max_consecutive_wins = max(max_consecutive_wins, consecutive_wins)
-                    else:
-                        consecutive_losses += 1
-                        consecutive_wins = 0
-                        max_consecutive_losses = max(max_consecutive_losses, consecutive_losses)
-                    
-                    position = None
-                    equity_curve[-1] = equity
-            else:
-                equity_curve.append(equity)
-                
-                # Entry signal - enhanced
-                volume_surge = current_volume / volume_ma.iloc[i] if volume_ma.iloc[i] > 0 else 1
-                
-                entry_signal = (
-                    fast_ma.iloc[i] > slow_ma.iloc[i] and 
-                    fast_ma.iloc[i-1] <= slow_ma.iloc[i-1] and
-                    current_price > ema_filter.iloc[i] and
-                    volume_surge > 1.2
-                )
-                
-                if entry_signal:
-                    # Position sizing
-                    risk_amount = equity * 0.02
-                    quantity = risk_amount / current_price
-                    cost = quantity * current_price
-                    
-                    if cost <= equity:
-                        position = {
-                            'entry_price': current_price,
-                            'entry_date': current_date,
-                            'quantity': quantity,
-                            'cost': cost
-                        }
+        # Path-dependent part: entry, SL / multi-TP / MA-cross exit, streaks
+        run = run_multi_tp_long(
+            close, valid, entry_signal, cross_exit, start_idx, self.initial_capital,
+            stop_loss_pct, tp1, tp2, tp3
+        )
+        return self._template_trailing_result(df, symbol, timeframe, params, close, run)
+    
+    def _template_trailing_result(self, df: pd.DataFrame, symbol: str, timeframe: str,
+                                  params: Dict, close: np.ndarray, run: Dict) -> Ultimate21Result:
+        """Close out a template trailing kernel run and build its result"""
+        trades = build_trades(df.index, close, run['entry_idx'], run['exit_idx'],
+                              run['exit_reason'], self.initial_capital)
+        equity = run['equity']
+        equity_curve = run['equity_curve']
+        days_in_market = run['days_in_market']
+        max_consecutive_wins = run['max_consecutive_wins']
+        max_consecutive_losses = run['max_consecutive_losses']
         
         # Handle final position
         open_pnl_pct = 0.0
-        if position is not None:
-            final_price = df['close'].iloc[-1]
-            position_value = position['quantity'] * final_price
-            final_pnl = position_value - position['cost']
+        if run['open_entry_idx'] >= 0:
+            entry_idx = run['open_entry_idx']
+            entry_price = close[entry_idx]
+            final_price = close[-1]
+            position_value = run['open_quantity'] * final_price
+            final_pnl = position_value - run['open_cost']
             equity += final_pnl
             
-            open_pnl_pct = (final_price - position['entry_price']) / position['entry_price'] * 100
+            open_pnl_pct = (final_price - entry_price) / entry_price * 100
             
             trades.append({
-                'entry_date': position['entry_date'],
+                'entry_date': df.index[entry_idx],
                 'exit_date': df.index[-1],
-                'entry_price': position['entry_price'],
+                'entry_price': entry_price,
                 'exit_price': final_price,
                 'pnl_pct': open_pnl_pct,
                 'pnl_amount': final_pnl,
-                'duration_days': (df.index[-1] - position['entry_date']).days,
+                'duration_days': (df.index[-1] - df.index[entry_idx]).days,
                 'exit_reason': "End of Data"
             })
             
@@ -870,39 +795,31 @@ class Ultimate21StrategiesBacktester:
             daily_return = ((final_equity / self.initial_capital) ** (1/total_days) - 1) * 100
             annual_return = daily_return * 365
             
-            # Trade analysis
-            trade_returns = [t['pnl_pct'] for t in trades]
-            winning_trades = [t for t in trades if t['pnl_pct'] > 0]
-            losing_trades = [t for t in trades if t['pnl_pct'] <= 0]
+            # Trade analysis and risk metrics in one vectorised pass
+            trade_returns = np.array([t['pnl_pct'] for t in trades], dtype=np.float64)
+            stats = performance(trade_returns, equity_curve if len(equity_curve) >= 2 else None)
             
-            win_rate = len(winning_trades) / len(trades) * 100
-            avg_win = np.mean([t['pnl_pct'] for t in winning_trades]) if winning_trades else 0
-            avg_loss = np.mean([t['pnl_pct'] for t in losing_trades]) if losing_trades else 0
-            largest_win = max([t['pnl_pct'] for t in winning_trades]) if winning_trades else 0
-            largest_loss = min([t['pnl_pct'] for t in losing_trades]) if losing_trades else 0
+            win_rate = stats['win_rate']
+            avg_win = stats['avg_win']
+            avg_loss = stats['avg_loss']
+            largest_win = stats['largest_win']
+            largest_loss = stats['largest_loss']
             
             # Risk metrics
-            returns_std = np.std(trade_returns) if len(trade_returns) > 1 else 1.0
+            returns_std = stats['std'] if len(trade_returns) > 1 else 1.0
             volatility = returns_std * np.sqrt(252)
+            max_drawdown = stats['max_drawdown']
+            current_drawdown = stats['current_drawdown']
+            ulcer_index = stats['ulcer_index']
             
-            # Proper drawdown calculation
-            max_drawdown, current_drawdown, ulcer_index = self.calculate_proper_drawdown(equity_curve)
-            
-            # Advanced ratios
-            sharpe_ratio = (np.mean(trade_returns) / returns_std) if returns_std > 0 else 0
-            
-            negative_returns = [r for r in trade_returns if r < 0]
-            downside_std = np.std(negative_returns) if negative_returns else returns_std
-            sortino_ratio = (np.mean(trade_returns) / downside_std) if downside_std > 0 else 0
-            
-            # Profit factor
-            total_wins = sum([t['pnl_pct'] for t in winning_trades])
-            total_losses = abs(sum([t['pnl_pct'] for t in losing_trades]))
-            profit_factor = total_wins / total_losses if total_losses > 0 else 10.0
+            # Advanced ratios (per trade, not annualised); no losing trade → Sortino falls back to Sharpe
+            sharpe_ratio = stats['sharpe']
+            sortino_ratio = stats['sortino'] if stats['negative'] else sharpe_ratio
+            profit_factor = stats['gross_profit'] / stats['gross_loss'] if stats['gross_loss'] > 0 else 10.0
             
             # Other metrics
             calmar_ratio = annual_return / max_drawdown if max_drawdown > 0 else 0
-            var_95 = np.percentile(trade_returns, 5) if len(trade_returns) > 8 else largest_loss
+            var_95 = stats['var'] if len(trade_returns) > 8 else largest_loss
             recovery_factor = abs(total_return / max_drawdown) if max_drawdown > 0 else 0
             exposure_time = (days_in_market / total_days * 100) if total_days > 0 else 0
             risk_adjusted_return = total_return / max(max_drawdown, 1)
@@ -942,8 +859,8 @@ class Ultimate21StrategiesBacktester:
                 current_drawdown_pct=current_drawdown,
                 win_rate=win_rate,
                 total_trades=len(trades),
-                winning_trades=len(winning_trades),
-                losing_trades=len(losing_trades),
+                winning_trades=stats['winning'],
+                losing_trades=stats['losing'],
                 avg_win_pct=avg_win,
                 avg_loss_pct=avg_loss,
                 largest_win_pct=largest_win,
@@ -974,64 +891,57 @@ class Ultimate21StrategiesBacktester:
             return None
     
     def optimize_all_21_strategies(self, symbol: str, timeframe: str, 
-                                  df: pd.DataFrame) -> List[Ultimate21Result]:
+                                  df: pd.DataFrame) -> ResultStore:
         """Optimize all 21 strategies with their parameter ranges"""
-        all_results = []
+        all_results = ResultStore(Ultimate21Result)
         
         # Get all strategies
         strategies = list(self.parameter_ranges.keys())
         
-        for strategy in strategies:
-            try:
-                if strategy not in self.parameter_ranges:
-                    continue
-                
-                param_ranges = self.parameter_ranges[strategy]
-                param_keys = list(param_ranges.keys())
-                param_values = [param_ranges[key] for key in param_keys]
+        # Combos of one DataFrame keep asking for the same indicators
+        cache = IndicatorCache(self.indicator_cache_bytes)
+        with cache.active():
+            for strategy in strategies:
+                try:
+                    if strategy not in self.parameter_ranges:
+                        continue
                 
-                # Smart parameter sampling
-                all_combinations = list(itertools.product(*param_values))
+                    # Lazy grid: combinations are decoded from indices, never materialised
+                    grid = ParameterGrid(self.parameter_ranges[strategy])
+                    combo_indices = grid.sample_indices(seed=self.grid_seed)
                 
-                if len(all_combinations) > 80:
-                    # Sample combinations intelligently
-                    step = len(all_combinations) // 60
-                    systematic = all_combinations[::step]
-                    remaining = set(all_combinations) - set(systematic)
-                    if remaining:
-                        random_sample = list(np.random.choice(list(remaining), 
-                                                            size=min(20, len(remaining)), 
-                                                            replace=False))
-                        combinations = systematic + random_sample
-                    else:
-                        combinations = systematic
-                else:
-                    combinations = all_combinations
+                    logger.info(f"      {strategy}: Testing {len(combo_indices)} of {grid.size:,} combinations")
                 
-                logger.info(f"      {strategy}: Testing {len(combinations)} combinations")
+                    if strategy in BATCHED_STRATEGIES:
+                        # One 2-D pass over every sampled combination
+                        param_matrix = np.array([grid.combo_at(idx) for idx in combo_indices], dtype=np.float64)
+                        batch = self.backtest_strategy_batch(df, symbol, timeframe, strategy, grid.keys, param_matrix)
+                        for idx, result in zip(combo_indices, batch):
+                            if result:
+                                all_results.append(result, strategy, grid, idx)
+                        continue
                 
-                for combo in combinations:
-                    params = dict(zip(param_keys, combo))
-                    
-                    try:
-                        result = self.backtest_strategy_comprehensive(df, symbol, timeframe, strategy, params)
-                        if result:
-                            all_results.append(result)
+                    for idx, params in zip(combo_indices, grid.iter_params(combo_indices)):
+                        try:
+                            result = self.backtest_strategy_comprehensive(df, symbol, timeframe, strategy, params)
+                            if result:
+                                all_results.append(result, strategy, grid, idx)
                             
-                    except Exception as e:
-                        logger.error(f"Error in {strategy} optimization: {e}")
+                        except Exception as e:
+                            logger.error(f"Error in {strategy} optimization: {e}")
                         
-            except Exception as e:
-                logger.error(f"Error optimizing {strategy}: {e}")
+                except Exception as e:
+                    logger.error(f"Error optimizing {strategy}: {e}")
         
+        logger.info(f"      {cache.summary()}")
         logger.info(f"      Total results for {symbol} {timeframe}: {len(all_results)}")
         return all_results
     
-    def analyze_symbol_all_21_strategies(self, symbol: str) -> List[Ultimate21Result]:
+    def analyze_symbol_all_21_strategies(self, symbol: str) -> ResultStore:
         """Comprehensive analysis with all 21 strategies across all timeframes"""
         try:
             logger.info(f"=== COMPREHENSIVE 21-STRATEGY ANALYSIS: {symbol} ===")
-            all_results = []
+            all_results = ResultStore(Ultimate21Result)
             
             for timeframe in self.timeframes:
                 logger.info(f"    Timeframe: {timeframe}")
@@ -1055,10 +965,10 @@ class Ultimate21StrategiesBacktester:
             
         except Exception as e:
             logger.error(f"Error analyzing {symbol}: {e}")
-            return []
+            return ResultStore(Ultimate21Result)
     
-    def run_ultimate_21_strategies_backtest(self):
-        """Run the ultimate backtest with all 21 strategies"""
+    def run_ultimate_21_strategies_backtest(self, workers: int = 1):
+        """Run the ultimate backtest with all 21 strategies (``workers`` > 1 = process pool)"""
         logger.info("="*120)
         logger.info("ULTIMATE 21 STRATEGIES BACKTESTER - WIDER RANGE")
         logger.info("="*120)
@@ -1067,41 +977,45 @@ class Ultimate21StrategiesBacktester:
         logger.info(f"Strategies: 21 total (7 original + 14 ultimate)")
         logger.info(f"Data Caching: Enabled for maximum speed")
         logger.info(f"Expected Total Combinations: ~80,000-120,000")
+        logger.info(f"Workers: {workers}")
         logger.info("="*120)
         
         start_time = time.time()
-        all_results = []
+        all_results = ResultStore(Ultimate21Result)
         
-        for i, symbol in enumerate(self.target_pairs):
-            try:
-                symbol_start = time.time()
-                logger.info(f"\n  Processing {symbol} ({i+1}/{len(self.target_pairs)})...")
+        self.data_cache.prefetch(self.target_pairs, self.timeframes)
+        
+        if workers > 1:
+            all_results = self._run_parallel(workers)
+        else:
+            for i, symbol in enumerate(self.target_pairs):
+                try:
+                    symbol_start = time.time()
+                    logger.info(f"\n  Processing {symbol} ({i+1}/{len(self.target_pairs)})...")
                 
-                results = self.analyze_symbol_all_21_strategies(symbol)
-                all_results.extend(results)
+                    results = self.analyze_symbol_all_21_strategies(symbol)
+                    all_results.extend(results)
                 
-                symbol_time = time.time() - symbol_start
-                logger.info(f"    {symbol} completed in {symbol_time:.1f}s: {len(results)} combinations")
+                    symbol_time = time.time() - symbol_start
+                    logger.info(f"    {symbol} completed in {symbol_time:.1f}s: {len(results)} combinations")
                 
-                # Progress summary every 5 symbols
-                if (i + 1) % 5 == 0:
-                    elapsed = time.time() - start_time
-                    remaining = (len(self.target_pairs) - i - 1)
-                    estimated_remaining = elapsed / (i + 1) * remaining
-                    logger.info(f"  Progress: {i+1}/{len(self.target_pairs)} symbols | "
-                              f"Total results: {len(all_results):,} | "
-                              f"Elapsed: {elapsed/60:.1f}min | "
-                              f"ETA: {estimated_remaining/60:.1f}min")
+                    # Progress summary every 5 symbols
+                    if (i + 1) % 5 == 0:
+                        elapsed = time.time() - start_time
+                        remaining = (len(self.target_pairs) - i - 1)
+                        estimated_remaining = elapsed / (i + 1) * remaining
+                        logger.info(f"  Progress: {i+1}/{len(self.target_pairs)} symbols | "
+                                  f"Total results: {len(all_results):,} | "
+                                  f"Elapsed: {elapsed/60:.1f}min | "
+                                  f"ETA: {estimated_remaining/60:.1f}min")
                 
-                time.sleep(0.05)  # Brief pause
+                    time.sleep(0.05)  # Brief pause
                 
-            except Exception as e:
-                logger.error(f"Error processing {symbol}: {e}")
+                except Exception as e:
+                    logger.error(f"Error processing {symbol}: {e}")
         
         # Assign ranks to all results
-        sorted_results = sorted(all_results, key=lambda x: x.daily_return_pct, reverse=True)
-        for i, result in enumerate(sorted_results):
-            result.rank = i + 1
+        sorted_results = all_results.rank_by('daily_return_pct')
         
         self.all_results = sorted_results
         total_time = time.time() - start_time
@@ -1111,6 +1025,7 @@ class Ultimate21StrategiesBacktester:
         logger.info(f"Total Time: {total_time/60:.1f} minutes")
         logger.info(f"Total Results: {len(sorted_results):,} parameter combinations tested")
         logger.info(f"Results per minute: {len(sorted_results)/(total_time/60):.0f}")
+        logger.info(f"Result store: {sorted_results.nbytes / 1024 / 1024:.1f} MB")
         logger.info("="*120)
         
         # Generate ultimate Excel report
@@ -1118,6 +1033,38 @@ class Ultimate21StrategiesBacktester:
         
         return sorted_results
     
+    def _iter_work_units(self):
+        """Lazily fetch (symbol, timeframe) frames for the process pool"""
+        for symbol in self.target_pairs:
+            for timeframe in self.timeframes:
+                try:
+                    df = self.data_cache.fetch_and_cache_data(symbol, timeframe)
+                except Exception as e:
+                    logger.error(f"Error fetching {symbol} {timeframe}: {e}")
+                    continue
+                if df.empty or len(df) < 250:
+                    logger.warning(f"      Insufficient data for {symbol} {timeframe}")
+                    continue
+                yield (symbol, timeframe), df[['open', 'high', 'low', 'close', 'volume']]
+    
+    def _run_parallel(self, workers: int) -> ResultStore:
+        """Optimise every (symbol, timeframe) unit across ``workers`` processes"""
+        runner = SharedFrameRunner(_optimize_work_unit, workers,
+                                   initializer=_init_worker, initargs=(self.initial_capital, self.grid_seed,
+                                             self.parameter_ranges, self.indicator_cache_bytes))
+        outputs = runner.run(self._iter_work_units())
+        
+        all_results = ResultStore(Ultimate21Result)
+        for (symbol, timeframe), results in outputs:
+            logger.info(f"    {symbol} {timeframe} completed in {runner.unit_times[(symbol, timeframe)]:.1f}s: "
+                        f"{len(results)} combinations")
+            all_results.extend(results)
+        
+        if runner.failures:
+            logger.error(f"{len(runner.failures)} work units failed: "
+                         f"{', '.join(f'{s} {tf}' for (s, tf), _ in runner.failures)}")
+        return all_results
+    
     def generate_ultimate_21_excel_report(self):
         """Generate ultimate Excel report for all 21 strategies"""
         if not self.all_results:
@@ -1155,43 +1102,36 @@ class Ultimate21StrategiesBacktester:
         ws['A1'].font = Font(size=18, bold=True)
         ws.merge_cells('A1:H1')
         
-        # Enhanced analysis
-        profitable = [r for r in self.all_results if r.total_return_pct > 0]
-        high_performers = [r for r in self.all_results if r.meets_high_criteria]
-        medium_performers = [r for r in self.all_results if r.meets_medium_criteria]
-        
-        # Original vs Ultimate strategies analysis
-        original_strategies = [r for r in self.all_results if r.strategy in 
-                             ['template_trailing', 'dca_bot_v2', 'dca_long_short', 
-                              'turtle_donchian', 'bollinger_original', 'cryptosniper_long', 'ma_crossover']]
-        ultimate_strategies = [r for r in self.all_results if r not in original_strategies]
+        # Enhanced analysis, original vs ultimate strategies
+        summary = summarize_results(self.all_results)
+        best = self.all_results.record(0) if self.all_results else None
         
         summary_data = [
             ["Analysis Date", datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
             ["", ""],
             ["COMPREHENSIVE STATISTICS", ""],
-            ["Total Parameter Combinations", f"{len(self.all_results):,}"],
-            ["Original Strategies (7)", f"{len(original_strategies):,}"],
-            ["Ultimate Strategies (14)", f"{len(ultimate_strategies):,}"],
-            ["Unique Symbols", len(set(r.symbol for r in self.all_results))],
-            ["Timeframes", len(set(r.timeframe for r in self.all_results))],
+            ["Total Parameter Combinations", f"{summary['total']:,}"],
+            ["Original Strategies (7)", f"{summary['original']:,}"],
+            ["Ultimate Strategies (14)", f"{summary['ultimate']:,}"],
+            ["Unique Symbols", summary['symbols']],
+            ["Timeframes", summary['timeframes']],
             ["", ""],
             ["PERFORMANCE BREAKDOWN", ""],
-            ["Profitable Combinations", f"{len(profitable):,} ({len(profitable)/len(self.all_results)*100:.1f}%)"],
-            ["High Criteria (0.08%+ daily)", f"{len(high_performers):,} ({len(high_performers)/len(self.all_results)*100:.1f}%)"],
-            ["Medium Criteria (0.02%+ daily)", f"{len(medium_performers):,} ({len(medium_performers)/len(self.all_results)*100:.1f}%)"],
+            ["Profitable Combinations", f"{summary['profitable']:,} ({summary['profitable']/summary['total']*100:.1f}%)"],
+            ["High Criteria (0.08%+ daily)", f"{summary['high']:,} ({summary['high']/summary['total']*100:.1f}%)"],
+            ["Medium Criteria (0.02%+ daily)", f"{summary['medium']:,} ({summary['medium']/summary['total']*100:.1f}%)"],
             ["", ""],
             ["STRATEGY COMPARISON", ""],
-            ["Original Strategies Avg Return", f"{np.mean([r.daily_return_pct for r in original_strategies]):.4f}%"],
-            ["Ultimate Strategies Avg Return", f"{np.mean([r.daily_return_pct for r in ultimate_strategies]):.4f}%"],
-            ["Original Strategies Avg DD", f"{np.mean([r.max_drawdown_pct for r in original_strategies]):.2f}%"],
-            ["Ultimate Strategies Avg DD", f"{np.mean([r.max_drawdown_pct for r in ultimate_strategies]):.2f}%"],
+            ["Original Strategies Avg Return", f"{summary['original_daily']:.4f}%"],
+            ["Ultimate Strategies Avg Return", f"{summary['ultimate_daily']:.4f}%"],
+            ["Original Strategies Avg DD", f"{summary['original_dd']:.2f}%"],
+            ["Ultimate Strategies Avg DD", f"{summary['ultimate_dd']:.2f}%"],
             ["", ""],
             ["BEST PERFORMANCE", ""],
-            ["Highest Daily Return", f"{max([r.daily_return_pct for r in self.all_results]):.4f}%"],
-            ["Best Strategy", self.all_results[0].strategy if self.all_results else "N/A"],
-            ["Best Symbol", self.all_results[0].symbol if self.all_results else "N/A"],
-            ["Best Timeframe", self.all_results[0].timeframe if self.all_results else "N/A"],
+            ["Highest Daily Return", f"{summary['best_daily']:.4f}%"],
+            ["Best Strategy", best.strategy if best else "N/A"],
+            ["Best Symbol", best.symbol if best else "N/A"],
+            ["Best Timeframe", best.timeframe if best else "N/A"],
             ["", ""],
             ["DATA CACHING", ""],
             ["Cache Directory", "ultimate_data_cache/"],
@@ -1240,7 +1180,7 @@ class Ultimate21StrategiesBacktester:
             cell.alignment = Alignment(horizontal="center")
         
         # Top 100 performers
-        top_100 = self.all_results[:100]
+        top_100 = self.all_results.head(100)
         
         for row, result in enumerate(top_100, 2):
             data = [
@@ -1267,32 +1207,48 @@ class Ultimate21StrategiesBacktester:
             ws.column_dimensions[chr(64 + col)].width = 12
         ws.column_dimensions[chr(64 + len(headers))].width = 50  # Parameters
 
+# Per-process backtester used by the process pool workers
+_worker_backtester: Optional[Ultimate21StrategiesBacktester] = None
+
+def _init_worker(initial_capital: float, grid_seed: Optional[int], parameter_ranges: Dict,
+                 indicator_cache_bytes: int):
+    global _worker_backtester
+    _worker_backtester = Ultimate21StrategiesBacktester()
+    _worker_backtester.initial_capital = initial_capital
+    _worker_backtester.grid_seed = grid_seed
+    _worker_backtester.parameter_ranges = parameter_ranges
+    _worker_backtester.indicator_cache_bytes = indicator_cache_bytes
+
+def _optimize_work_unit(key: Tuple[str, str], df: pd.DataFrame) -> ResultStore:
+    symbol, timeframe = key
+    return _worker_backtester.optimize_all_21_strategies(symbol, timeframe, df)
+
 def main():
     """Run the ultimate 21 strategies backtester"""
+    parser = argparse.ArgumentParser(description="Ultimate 21 strategies backtester")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for (symbol, timeframe) units; the default 1 runs sequentially")
+    parser.add_argument('--indicator-cache-mb', type=float, default=256,
+                        help="byte budget of the per-DataFrame indicator cache")
+    args = parser.parse_args()
+    
     backtester = Ultimate21StrategiesBacktester()
-    results = backtester.run_ultimate_21_strategies_backtest()
+    backtester.indicator_cache_bytes = int(args.indicator_cache_mb * 1024 * 1024)
+    results = backtester.run_ultimate_21_strategies_backtest(workers=args.workers)
     
     if results:
-        # Ultimate summary with enhanced ranking display
-        profitable = [r for r in results if r.total_return_pct > 0]
-        high_performers = [r for r in results if r.meets_high_criteria]
-        medium_performers = [r for r in results if r.meets_medium_criteria]
-        
-        # Strategy breakdown
-        original_strategies = [r for r in results if r.strategy in 
-                             ['template_trailing', 'dca_bot_v2', 'dca_long_short', 
-                              'turtle_donchian', 'bollinger_original', 'cryptosniper_long', 'ma_crossover']]
-        ultimate_strategies = [r for r in results if r not in original_strategies]
+        # Ultimate summary with enhanced ranking display, original vs ultimate strategies
+        summary = summarize_results(results)
         
         print(f"\n" + "="*120)
         print(f"ULTIMATE 21 STRATEGIES BACKTESTER - FINAL RANKING RESULTS")
         print(f"="*120)
-        print(f"Total Parameter Combinations: {len(results):,}")
-        print(f"Original Strategies (7): {len(original_strategies):,} combinations")
-        print(f"Ultimate Strategies (14): {len(ultimate_strategies):,} combinations")
-        print(f"Profitable Combinations: {len(profitable):,} ({len(profitable)/len(results)*100:.1f}%)")
-        print(f"High Performers: {len(high_performers):,} ({len(high_performers)/len(results)*100:.1f}%)")
-        print(f"Medium Performers: {len(medium_performers):,} ({len(medium_performers)/len(results)*100:.1f}%)")
+        print(f"Total Parameter Combinations: {summary['total']:,}")
+        print(f"Original Strategies (7): {summary['original']:,} combinations")
+        print(f"Ultimate Strategies (14): {summary['ultimate']:,} combinations")
+        print(f"Profitable Combinations: {summary['profitable']:,} ({summary['profitable']/summary['total']*100:.1f}%)")
+        print(f"High Performers: {summary['high']:,} ({summary['high']/summary['total']*100:.1f}%)")
+        print(f"Medium Performers: {summary['medium']:,} ({summary['medium']/summary['total']*100:.1f}%)")
         
         # Enhanced ranking display
         print(f"\n" + "="*120)
@@ -1301,7 +1257,7 @@ def main():
         print(f"{'Rank':<4} {'Symbol':<12} {'Strategy':<25} {'TF':<3} {'Daily%':<8} {'Annual%':<8} {'DD%':<6} {'WR%':<6} {'Trades':<6} {'Sharpe':<7}")
         print(f"-" * 120)
         
-        for i, result in enumerate(results[:50], 1):
+        for i, result in enumerate(results.head(50), 1):
             print(f"{i:<4} {result.symbol:<12} {result.strategy:<25} {result.timeframe:<3} "
                   f"{result.daily_return_pct:<8.4f} {result.annual_return_pct:<8.1f} "
                   f"{result.max_drawdown_pct:<6.1f} {result.win_rate:<6.1f} "
@@ -1312,19 +1268,19 @@ def main():
         print(f"STRATEGY CATEGORY COMPARISON")
         print(f"="*120)
         print(f"Original Strategies (7):")
-        print(f"  Average Daily Return: {np.mean([r.daily_return_pct for r in original_strategies]):.4f}%")
-        print(f"  Average Max Drawdown: {np.mean([r.max_drawdown_pct for r in original_strategies]):.2f}%")
-        print(f"  Success Rate: {len([r for r in original_strategies if r.total_return_pct > 0])/len(original_strategies)*100:.1f}%")
+        print(f"  Average Daily Return: {summary['original_daily']:.4f}%")
+        print(f"  Average Max Drawdown: {summary['original_dd']:.2f}%")
+        print(f"  Success Rate: {summary['original_success']:.1f}%")
         
         print(f"\nUltimate Strategies (14):")
-        print(f"  Average Daily Return: {np.mean([r.daily_return_pct for r in ultimate_strategies]):.4f}%")
-        print(f"  Average Max Drawdown: {np.mean([r.max_drawdown_pct for r in ultimate_strategies]):.2f}%")
-        print(f"  Success Rate: {len([r for r in ultimate_strategies if r.total_return_pct > 0])/len(ultimate_strategies)*100:.1f}%")
+        print(f"  Average Daily Return: {summary['ultimate_daily']:.4f}%")
+        print(f"  Average Max Drawdown: {summary['ultimate_dd']:.2f}%")
+        print(f"  Success Rate: {summary['ultimate_success']:.1f}%")
         
         # Best 70% win rate & <70% drawdown
-        criteria_70_70 = [r for r in results if r.win_rate >= 70 and r.max_drawdown_pct <= 70]
-        if criteria_70_70:
-            best_70_70 = criteria_70_70[0]  # Already sorted
+        criteria_70_70 = np.flatnonzero((results['win_rate'] >= 70) & (results['max_drawdown_pct'] <= 70))
+        if len(criteria_70_70):
+            best_70_70 = results.record(criteria_70_70[0])  # Already sorted
             print(f"\n" + "="*120)
             print(f"BEST 70% WIN RATE & <70% DRAWDOWN:")
             print(f"="*120)
@@ -4,14 +4,17 @@ ULTIMATE 29 STRATEGIES - 365 DAY BACKTESTER
 Tests all 29 strategies on top 400 pairs for 365 days
 """
 
-import ccxt
 import pandas as pd
 import numpy as np
 import json
 import sqlite3
 from datetime import datetime, timedelta
-import time
 import warnings
+from bulk_downloader import bulk_download
+from ohlcv_store import OHLCVStore
+from position_sim import simulate
+from replay_exchange import create_exchange
+from stage_timer import StageTimer
 warnings.filterwarnings('ignore')
 
 class Ultimate29StrategiesBacktester:
@@ -22,10 +25,12 @@ class Ultimate29StrategiesBacktester:
         self.top_400_pairs = []
         
         # Initialize exchange
-        self.exchange = getattr(ccxt, exchange)({
+        self.exchange = create_exchange(exchange, {
             'enableRateLimit': True,
             'rateLimit': 100
         })
+        self.store = OHLCVStore("ohlcv_store")
+        self.exchange_requests = 0
         
         # ALL 29 STRATEGIES
         self.STRATEGIES = {
@@ -134,7 +139,7 @@ class Ultimate29StrategiesBacktester:
         ] * 4  # Repeat to get ~400 pairs for testing
     
     def fetch_ohlcv_data(self, symbol, timeframe, days):
-        """Fetch OHLCV data for given symbol and timeframe"""
+        """Fetch OHLCV data for given symbol and timeframe (from the local store, topped up if stale)"""
         try:
             # Calculate limit based on timeframe
             timeframe_minutes = {
@@ -144,21 +149,45 @@ class Ultimate29StrategiesBacktester:
             
             minutes = timeframe_minutes.get(timeframe, 60)
             limit = min(1000, (days * 24 * 60) // minutes)
+            since = self.exchange.milliseconds() - limit * minutes * 60 * 1000
             
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            self.exchange_requests += self.store.sync(self.exchange, symbol, timeframe, since)['requests']
+            df = self.store.read_frame(self.exchange.id, symbol, timeframe, since_ms=since).iloc[-limit:]
             
-            if len(ohlcv) < 50:
+            if len(df) < 50:
                 return None
             
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            
             return df
             
         except Exception as e:
             return None
     
+    def prefetch_pairs(self, pairs):
+        """Download every pair on every strategy timeframe concurrently into the local store"""
+        jobs = []
+        for timeframe in dict.fromkeys(config['timeframe'] for config in self.STRATEGIES.values()):
+            minutes = self.exchange.parse_timeframe(timeframe) // 60
+            limit = min(1000, (self.days * 24 * 60) // minutes)
+            since = self.exchange.milliseconds() - limit * minutes * 60 * 1000
+            jobs.extend((pair, timeframe, since) for pair in pairs)
+        
+        print(f"⬇️  Bulk downloading {len(jobs)} pair/timeframe series...")
+        try:
+            results = bulk_download(self.exchange_name, jobs, self.store.root, config={'rateLimit': 100})
+            print(f"✅ Downloaded {len(results)}/{len(jobs)} series "
+                  f"with {sum(r['requests'] for r in results.values())} requests")
+        except Exception as e:
+            print(f"Bulk download failed, fetching pairs one by one: {e}")
+    
+    def plan_data(self, pairs):
+        """Per pair: timeframe -> strategies running on it, so each frame is fetched and enriched once"""
+        plan = {}
+        for pair in dict.fromkeys(pairs):
+            groups = plan[pair] = {}
+            for strategy_name, config in self.STRATEGIES.items():
+                groups.setdefault(config['timeframe'], []).append(strategy_name)
+        return plan
+    
     def calculate_indicators(self, df, strategy_name):
         """Calculate indicators for each strategy"""
         # Basic indicators needed by all strategies
@@ -411,42 +440,14 @@ class Ultimate29StrategiesBacktester:
         # Generate signals
         df['signal'] = self.generate_signals(df, strategy_name)
         
-        # Initialize variables
-        capital = initial_capital
-        position = 0
-        entry_price = 0
-        trades = []
-        
-        for i in range(len(df)):
-            if df['signal'].iloc[i] == 1 and position == 0:
-                # Buy signal
-                position = capital / df['close'].iloc[i]
-                entry_price = df['close'].iloc[i]
-                capital = 0
-                
-            elif df['signal'].iloc[i] == -1 and position > 0:
-                # Sell signal
-                exit_price = df['close'].iloc[i]
-                capital = position * exit_price
-                
-                # Record trade
-                trades.append({
-                    'entry': entry_price,
-                    'exit': exit_price,
-                    'return': (exit_price - entry_price) / entry_price
-                })
-                
-                position = 0
-                entry_price = 0
-        
-        # Close final position if exists
-        if position > 0:
-            capital = position * df['close'].iloc[-1]
-            trades.append({
-                'entry': entry_price,
-                'exit': df['close'].iloc[-1],
-                'return': (df['close'].iloc[-1] - entry_price) / entry_price
-            })
+        # All-in long position walk (the final position is sold at the last close)
+        sim = simulate(df['close'].to_numpy(), df['signal'].to_numpy(), 'all_in_long',
+                       initial_capital=initial_capital)
+        capital = sim.cash
+        trades = [
+            {'entry': entry, 'exit': exit_price, 'return': (exit_price - entry) / entry}
+            for entry, exit_price in zip(sim.entry_price.tolist(), sim.exit_price.tolist())
+        ]
         
         # Calculate metrics
         total_return = ((capital - initial_capital) / initial_capital) * 100
@@ -504,55 +505,74 @@ class Ultimate29StrategiesBacktester:
         print(f"\\n📊 Testing {len(self.STRATEGIES)} strategies on {len(test_pairs)} pairs")
         print(f"📅 Backtest period: {self.days} days")
         
-        all_results = []
-        strategy_count = 0
+        # Limit to 50 pairs per strategy for speed
+        self.prefetch_pairs(test_pairs[:50])
         
-        # Test each strategy
-        for strategy_name, config in self.STRATEGIES.items():
-            strategy_count += 1
-            print(f"\\n[{strategy_count}/{len(self.STRATEGIES)}] Testing {strategy_name} ({config['timeframe']})")
-            
-            strategy_results = []
-            pairs_tested = 0
-            
-            # Test on selected pairs
-            for pair_idx, pair in enumerate(test_pairs[:50], 1):  # Limit to 50 pairs per strategy for speed
+        # One frame per (pair, timeframe), shared by every strategy on that timeframe
+        plan = self.plan_data(test_pairs[:50])
+        results_by_strategy = {strategy_name: [] for strategy_name in self.STRATEGIES}
+        timer = StageTimer()
+        requests_before = self.exchange_requests
+        frames = runs = 0
+        bytes_saved = 0
+        
+        for pair_idx, pair in enumerate(test_pairs[:50], 1):
+            for timeframe, strategy_names in plan[pair].items():
                 try:
-                    # Fetch data
-                    df = self.fetch_ohlcv_data(pair, config['timeframe'], self.days)
+                    with timer.stage('fetch'):
+                        df = self.fetch_ohlcv_data(pair, timeframe, self.days)
+                    if df is None or len(df) <= 50:
+                        continue
+                    frames += 1
+                    timer.reused('fetch', len(strategy_names) - 1)
+                    bytes_saved += int(df.memory_usage(index=True).sum()) * (len(strategy_names) - 1)
                     
-                    if df is not None and len(df) > 50:
-                        # Calculate indicators
-                        df = self.calculate_indicators(df, strategy_name)
-                        
-                        # Run backtest
-                        result = self.backtest_strategy(df, strategy_name, self.initial_capital)
+                    # calculate_indicators builds the same columns for every strategy, so one pass covers the union
+                    with timer.stage('indicators'):
+                        df = self.calculate_indicators(df, strategy_names[0])
+                    timer.reused('indicators', len(strategy_names) - 1)
+                except Exception as e:
+                    continue
+                
+                for strategy_name in strategy_names:
+                    config = self.STRATEGIES[strategy_name]
+                    try:
+                        # backtest_strategy adds a signal column; a shallow copy keeps it off the shared frame
+                        with timer.stage('backtest'):
+                            result = self.backtest_strategy(df.copy(deep=False), strategy_name, self.initial_capital)
+                        runs += 1
                         
                         if result:
                             result['strategy'] = strategy_name
                             result['pair'] = pair
                             result['timeframe'] = config['timeframe']
                             result['type'] = config['type']
-                            all_results.append(result)
-                            strategy_results.append(result)
-                            pairs_tested += 1
-                            
-                            # Show progress
-                            if pair_idx % 10 == 0:
-                                print(f"  Tested {pair_idx} pairs...")
-                    
-                    # Rate limiting
-                    time.sleep(0.05)
-                    
-                except Exception as e:
-                    continue
+                            results_by_strategy[strategy_name].append(result)
+                    except Exception:
+                        continue
             
-            # Show strategy summary
+            # Show progress
+            if pair_idx % 10 == 0:
+                print(f"  Tested {pair_idx} pairs...")
+        
+        all_results = []
+        
+        # Strategy summaries in the usual order
+        for strategy_count, (strategy_name, config) in enumerate(self.STRATEGIES.items(), 1):
+            print(f"\n[{strategy_count}/{len(self.STRATEGIES)}] {strategy_name} ({config['timeframe']})")
+            strategy_results = results_by_strategy[strategy_name]
+            all_results.extend(strategy_results)
             if strategy_results:
                 avg_return = sum(r['total_return'] for r in strategy_results) / len(strategy_results)
                 best_pair = max(strategy_results, key=lambda x: x['total_return'])
                 print(f"  ✅ Completed: Avg ROI: {avg_return:.2f}%, Best: {best_pair['pair']} ({best_pair['total_return']:.2f}%)")
         
+        print(f"\n📦 Data plan: {frames} frames for {runs} strategy runs, "
+              f"{timer.skipped.get('fetch', 0)} fetches and {timer.skipped.get('indicators', 0)} indicator passes avoided, "
+              f"{self.exchange_requests - requests_before} exchange requests made, "
+              f"{bytes_saved / 1e6:.1f} MB of candle reads saved")
+        print(timer.summary())
+        
         # Sort all results by ROI
         all_results.sort(key=lambda x: x['total_return'], reverse=True)
         
@@ -5,7 +5,6 @@ Real-time paper trading with 8 advanced strategies on selected crypto pairs
 BTC, XRP, ETH, SOL, PAXG, PEPE, DOGE - CCXT API-less (public data only)
 """
 
-import ccxt
 import pandas as pd
 import numpy as np
 import time
@@ -18,6 +17,10 @@ import threading
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 import warnings
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backtests"))
+from indicators import IndicatorSet
+from replay_exchange import create_exchange
 
 warnings.filterwarnings("ignore")
 
@@ -55,6 +58,13 @@ class Trade:
     pnl: float
     pnl_pct: float
 
+class CometIndicators(IndicatorSet):
+    """pandas ewm(adjust=False) averages, rolling-mean ATR, SuperTrend following its own line"""
+    ema_seed = 'first'
+    smma_seed = 'first'
+    atr_method = 'sma'
+    supertrend_mode = 'line'
+
 class CometPaperTradingBot:
     """Paper Trading Bot with 8 Comet Strategies"""
     
@@ -80,7 +90,7 @@ class CometPaperTradingBot:
         self.last_signals = {}
         
         # CCXT exchange (API-less, public data only)
-        self.exchange = ccxt.binance({'enableRateLimit': True})
+        self.exchange = create_exchange('binance', {'enableRateLimit': True})
         self.exchange.load_markets()
         
         # Data storage
@@ -123,44 +133,25 @@ class CometPaperTradingBot:
             
             time.sleep(0.5)  # Rate limiting
 
-    # Technical Indicators (same as original)
+    # Technical Indicators (shared kernels, see CometIndicators)
     def sma(self, series, n):
-        return series.rolling(n, min_periods=n).mean()
+        return CometIndicators.sma(series, n)
     
     def ema(self, series, n):
-        return series.ewm(span=n, adjust=False).mean()
+        return CometIndicators.ema(series, n)
     
     def smma(self, series, n):
-        return series.ewm(alpha=1.0 / n, adjust=False).mean()
+        return CometIndicators.smma(series, n)
     
     def atr(self, df, n=14):
-        h, l, c = df['high'], df['low'], df['close']
-        prev_c = c.shift(1)
-        tr = pd.concat([(h - l), (h - prev_c).abs(), (l - prev_c).abs()], axis=1).max(axis=1)
-        return tr.rolling(n, min_periods=n).mean()
+        return CometIndicators.atr(df['high'], df['low'], df['close'], n)
     
     def vwap(self, df):
-        tp = (df['high'] + df['low'] + df['close']) / 3.0
-        cum_v = df['volume'].cumsum()
-        cum_pv = (tp * df['volume']).cumsum()
-        return (cum_pv / cum_v).ffill()
+        return CometIndicators.vwap(df['high'], df['low'], df['close'], df['volume']).ffill()
 
     def supertrend(self, df, period=10, multiplier=3.0):
         """SuperTrend indicator"""
-        _atr = self.atr(df, period)
-        hl2 = (df['high'] + df['low']) / 2
-        upperband = hl2 + multiplier * _atr
-        lowerband = hl2 - multiplier * _atr
-        
-        st = pd.Series(index=df.index, dtype=float)
-        st.iloc[0] = lowerband.iloc[0]
-        
-        for i in range(1, len(df)):
-            if df['close'].iloc[i] > st.iloc[i-1]:
-                st.iloc[i] = lowerband.iloc[i]
-            else:
-                st.iloc[i] = upperband.iloc[i]
-        
+        st, _ = CometIndicators.supertrend(df['high'], df['low'], df['close'], period, multiplier)
         return st
 
     # Strategy Implementations (adapted for real-time)
@@ -10,7 +10,6 @@ $1000 starting balance, $10 order size
 ===========================
 """
 
-import ccxt
 import pandas as pd
 import numpy as np
 import talib
@@ -27,6 +26,10 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backtests"))
+from replay_exchange import create_exchange
+from streaming import StreamRegistry, StreamingRSI
 
 # Setup
 warnings.filterwarnings('ignore')
@@ -76,10 +79,13 @@ class Trade:
 class StrategyExecutor:
     """Execute specific strategy with exact parameters"""
     
-    def __init__(self, strategy_name: str, parameters: Dict[str, Any], timeframe: Optional[str] = None):
+    def __init__(self, strategy_name: str, parameters: Dict[str, Any], timeframe: Optional[str] = None,
+                 pair: Optional[str] = None, streams: Optional[StreamRegistry] = None):
         self.name = strategy_name
         self.parameters = parameters or {}
         self.timeframe = timeframe or '5m'
+        self.pair = pair
+        self.streams = streams  # shared indicator state, kept between polls
     
     def generate_signals(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Generate trading signals based on exact strategy configuration"""
@@ -115,8 +121,14 @@ class StrategyExecutor:
         rsi_oversold = self.parameters.get('rsi_oversold', 30)
         rsi_overbought = self.parameters.get('rsi_overbought', 70)
         
-        rsi = talib.RSI(df['close'].values, rsi_period)
-        current_rsi = rsi[-1]
+        if self.streams is not None and self.pair is not None:
+            # Only candles closed since the last poll are fed in; the forming one is peeked
+            timestamps = ((df.index - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)).to_numpy()
+            current_rsi = self.streams.latest((self.pair, self.timeframe, 'rsi', rsi_period),
+                                              lambda: StreamingRSI(rsi_period),
+                                              timestamps, df['close'].to_numpy(dtype=np.float64))
+        else:
+            current_rsi = talib.RSI(df['close'].values, rsi_period)[-1]
         
         if current_rsi < rsi_oversold:
             return {'action': 'buy', 'confidence': 0.8, 'stop_loss': 0.03, 'take_profit': 0.06}
@@ -322,7 +334,7 @@ class ExactPaperTradingBot:
     """Paper trading bot using EXACT parameters from file"""
     
     def __init__(self):
-        self.exchange = ccxt.binance({
+        self.exchange = create_exchange('binance', {
             'enableRateLimit': True,
             'timeout': 15000,
             'sandbox': False
@@ -341,6 +353,7 @@ class ExactPaperTradingBot:
         # Data storage
         self.market_data: Dict[str, pd.DataFrame] = {}
         self.last_update: Dict[str, datetime] = {}
+        self.indicator_streams = StreamRegistry()
         
         # Performance tracking
         self.strategy_performance: Dict[str, Dict] = defaultdict(lambda: {
@@ -594,7 +607,9 @@ class ExactPaperTradingBot:
                 executor = StrategyExecutor(
                     combination['strategy'], 
                     combination['parameters'], 
-                    combination['timeframe']
+                    timeframe,
+                    pair=combination['pair'],
+                    streams=self.indicator_streams
                 )
                 
                 # Generate signals
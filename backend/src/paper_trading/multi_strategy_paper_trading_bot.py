@@ -61,10 +61,12 @@ from pathlib import Path
 from types import ModuleType
 from typing import Dict, List, Optional
 
-import ccxt
 import pandas as pd
 from rich.console import Console
 from rich.table import Table
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backtests"))
+from replay_exchange import create_exchange
 
 # ──────────────────────────────────────────────────────────────
 # CONFIGURATION
@@ -267,7 +269,7 @@ async def main():  # noqa: D401
     CONSOLE.log(f"Subscribing to live prices for {len(symbols)} symbols: {symbols}")
 
     # 3⃣  Create ccxt exchange instance (public only)
-    exchange = getattr(ccxt, EXCHANGE_ID)({"enableRateLimit": True})
+    exchange = create_exchange(EXCHANGE_ID, {"enableRateLimit": True})
 
     # 4⃣  Endless loop
     while True:
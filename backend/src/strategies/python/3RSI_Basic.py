@@ -1,16 +1,19 @@
-import ccxt
 import pandas as pd
 import numpy as np
 import os
 import time
 from datetime import datetime, timedelta
 import warnings
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from replay_exchange import create_exchange
 warnings.filterwarnings('ignore')
 
 class CryptoBacktester:
     def __init__(self, exchange_name='binance', timeframe='3m', days=90):
         """Initialize the backtester with exchange and parameters"""
-        self.exchange = getattr(ccxt, exchange_name)()
+        self.exchange = create_exchange(exchange_name)
         self.timeframe = timeframe
         self.days = days
         self.data_dir = 'crypto_data'
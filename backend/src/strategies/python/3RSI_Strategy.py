@@ -1,15 +1,19 @@
-import ccxt
 import pandas as pd
 import numpy as np
 import talib
 from datetime import datetime, timedelta
 import warnings
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from order_ladder import OrderLadder
+from replay_exchange import create_exchange
 warnings.filterwarnings('ignore')
 
 class CryptoBacktester:
     def __init__(self, exchange_name='binance'):
         """Initialize the backtester with exchange and parameters"""
-        self.exchange = getattr(ccxt, exchange_name)({
+        self.exchange = create_exchange(exchange_name, {
             'apiKey': '',  # Add your API keys if needed for more data
             'secret': '',
             'sandbox': False,
@@ -102,8 +106,14 @@ class CryptoBacktester:
             'show_signals': True
         }
         
+        # Full ledgers, in creation order
         self.positions = []
         self.orders = []
+        # Live state indexed by symbol; symbols drop out once nothing is left in them
+        self.open_positions = {}
+        self.closed_positions = {}
+        # Pending orders per symbol, one price-sorted ladder per order type
+        self.ladders = {}
         self.balance = 10000  # Starting balance in USDT
         self.results = []
 
@@ -354,20 +364,19 @@ class CryptoBacktester:
                 orders.append(order)
         
         self.orders.extend(orders)
+        if orders:
+            ladders = self.ladders.setdefault(symbol, {'buy_limit': OrderLadder('buy'),
+                                                       'sell_limit': OrderLadder('sell')})
+            ladders[orders[0]['type']].place([o['entry_price'] for o in orders],
+                                             [o['volume'] for o in orders], tags=orders)
         return orders
 
     def check_order_execution(self, current_price, timestamp):
         """Check if pending orders should be executed"""
-        for order in self.orders:
-            if order['status'] == 'pending':
-                should_execute = False
-                
-                if order['type'] == 'buy_limit' and current_price <= order['entry_price']:
-                    should_execute = True
-                elif order['type'] == 'sell_limit' and current_price >= order['entry_price']:
-                    should_execute = True
-                
-                if should_execute:
+        for symbol, ladders in list(self.ladders.items()):
+            for ladder in ladders.values():
+                # Buy limits at or above the price / sell limits at or below it, in price order
+                for order in ladder.tags[ladder.fill(current_price)]:
                     # Execute order
                     position = {
                         'symbol': order['symbol'],
@@ -378,12 +387,23 @@ class CryptoBacktester:
                         'status': 'open'
                     }
                     self.positions.append(position)
+                    self.open_positions.setdefault(symbol, []).append(position)
                     order['status'] = 'executed'
+            if not any(ladders.values()):
+                del self.ladders[symbol]
+
+    def cancel_pending_orders(self, symbol):
+        """Cancel every pending order of a symbol"""
+        for ladder in self.ladders.pop(symbol, {}).values():
+            for order in ladder:
+                order['status'] = 'cancelled'
+            ladder.cancel()
 
     def check_exit_conditions(self, current_price, timestamp):
         """Check if positions should be closed"""
-        for position in self.positions:
-            if position['status'] == 'open':
+        for symbol in list(self.open_positions):
+            still_open = []
+            for position in self.open_positions[symbol]:
                 should_close = False
                 exit_reason = ''
                 
@@ -415,27 +435,34 @@ class CryptoBacktester:
                             should_close = True
                             exit_reason = 'stop_loss'
                 
-                if should_close:
-                    # Calculate P&L
-                    if position['type'] == 'long':
-                        pnl = (current_price - position['entry_price']) * position['volume']
-                    else:
-                        pnl = (position['entry_price'] - current_price) * position['volume']
-                    
-                    # Close position
-                    position['status'] = 'closed'
-                    position['exit_price'] = current_price
-                    position['exit_time'] = timestamp
-                    position['pnl'] = pnl
-                    position['exit_reason'] = exit_reason
-                    
-                    # Update balance
-                    self.balance += pnl
-                    
-                    # Cancel remaining pending orders for this symbol
-                    for order in self.orders:
-                        if order['symbol'] == position['symbol'] and order['status'] == 'pending':
-                            order['status'] = 'cancelled'
+                if not should_close:
+                    still_open.append(position)
+                    continue
+                
+                # Calculate P&L
+                if position['type'] == 'long':
+                    pnl = (current_price - position['entry_price']) * position['volume']
+                else:
+                    pnl = (position['entry_price'] - current_price) * position['volume']
+                
+                # Close position
+                position['status'] = 'closed'
+                position['exit_price'] = current_price
+                position['exit_time'] = timestamp
+                position['pnl'] = pnl
+                position['exit_reason'] = exit_reason
+                self.closed_positions.setdefault(symbol, []).append(position)
+                
+                # Update balance
+                self.balance += pnl
+                
+                # Cancel remaining pending orders for this symbol
+                self.cancel_pending_orders(symbol)
+            
+            if still_open:
+                self.open_positions[symbol] = still_open
+            else:
+                del self.open_positions[symbol]
 
     def backtest_symbol(self, symbol):
         """Backtest strategy on a single symbol"""
@@ -461,7 +488,7 @@ class CryptoBacktester:
             self.check_exit_conditions(current_price, timestamp)
             
             # Check for new signals (only if no open positions)
-            if not any(pos['status'] == 'open' for pos in self.positions):
+            if not self.open_positions:
                 long_signal = False
                 short_signal = False
                 
@@ -508,7 +535,7 @@ class CryptoBacktester:
 
     def calculate_results(self):
         """Calculate and display backtest results"""
-        closed_positions = [pos for pos in self.positions if pos['status'] == 'closed']
+        closed_positions = [pos for positions in self.closed_positions.values() for pos in positions]
         
         if not closed_positions:
             print("No completed trades found.")
@@ -11,8 +11,13 @@ inputs:   Source RSI=close | Bot period=2 dakika | Source Bot=ohlc4
 Çıkış:  avg_price·1.005 limit
 """
 
-import ccxt, pandas as pd, numpy as np, talib, time, pickle, os, warnings
-from datetime import datetime, timedelta
+import pandas as pd, numpy as np, talib, sys, warnings
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from ohlcv_store import OHLCVStore
+from replay_exchange import create_exchange
+from mtf import MTFEngine
+from order_ladder import OrderLadder, blend
 warnings.filterwarnings("ignore")
 
 # ---------- PARAMETRELER ---------------------------------------------------- #
@@ -30,92 +35,78 @@ STEP_PERC        = 0.02                         # 2 %
 EQ_PERC_PER_ORDER= 0.05                         # %5
 MAX_ORDERS       = 20
 
-CACHE_FILE       = "bananas_2m_cache.pkl"
+CACHE_DIR        = "ohlcv_store"                # 1m mumlar (OHLCVStore)
+CACHE_MAX_AGE    = 1800                         # sn
 # --------------------------------------------------------------------------- #
 
 class RSIStrategy2M:
     def __init__(self):
-        self.ex = ccxt.binance({"apiKey":API_KEY,
-                                "secret":API_SECRET,
-                                "enableRateLimit":True})
+        self.ex = create_exchange("binance", {"apiKey":API_KEY,
+                                              "secret":API_SECRET,
+                                              "enableRateLimit":True})
+        self.store    = OHLCVStore(CACHE_DIR)
         self.balance  = 10_000.0
         self.pos_qty  = 0.0
         self.pos_avg  = 0.0
-        self.open_lims= []          # aktif limit emirleri
+        self.open_lims= OrderLadder("buy")   # aktif limit emirleri (fiyata göre sıralı)
         self.trades   = []
         self.equity   = []
 
     # ------------------ VERİ ------------------------------------------------ #
     def _load_cache(self):
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE,"rb") as f:
-                d=pickle.load(f)
-            if (datetime.utcnow()-d["ts"]).seconds<1800: return d["df"]
+        if self.store.age_seconds(self.ex.id,PAIR,"1m")<CACHE_MAX_AGE:
+            return self.store.read_frame(self.ex.id,PAIR,"1m",
+                                         since_ms=self.ex.milliseconds()-DAYS*86400*1000)
         return None
 
-    def _save_cache(self,df):
-        pickle.dump({"df":df,"ts":datetime.utcnow()},open(CACHE_FILE,"wb"))
-
-    def get_data(self):
-        df=self._load_cache()
-        if df is not None: return df
-        since = self.ex.milliseconds()-DAYS*86400*1000
-        all=[]
-        while True:
-            ohlcv=self.ex.fetch_ohlcv(PAIR,"1m",since=since,limit=1000)
-            if not ohlcv: break
-            all+=ohlcv
-            since=ohlcv[-1][0]+60_000
-            if len(all)%5000==0: print("⬇",len(all),"x 1m")
-            if since>self.ex.milliseconds()-60_000: break
-            time.sleep(0.05)
-        df=pd.DataFrame(all,columns=["ts","o","h","l","c","v"])
-        df["ts"]=pd.to_datetime(df.ts,unit="ms")
-        df=df.set_index("ts").sort_index()
+    def _resample(self,df1m):
+        df=df1m.rename(columns={"open":"o","high":"h","low":"l","close":"c","volume":"v"})
+        df.index.name="ts"
         df2=df.resample(BOT_RES,label="left",closed="left").agg(
             {"o":"first","h":"max","l":"min","c":"last","v":"sum"}).dropna()
         df2["ohlc4"]=(df2.o+df2.h+df2.l+df2.c)/4
-        self._save_cache(df2)
         return df2
 
+    def get_data(self):
+        df=self._load_cache()
+        if df is not None and len(df): return self._resample(df)
+        since = self.ex.milliseconds()-DAYS*86400*1000
+        # yalnızca kapanmış mumlar saklanır; eksik kuyruk indirilir
+        stats=self.store.sync(self.ex,PAIR,"1m",since)
+        print("⬇",stats["new_rows"],"x 1m")
+        return self._resample(self.store.read_frame(self.ex.id,PAIR,"1m",since_ms=since))
+
     # ------------------ RSI ------------------------------------------------- #
-    def rsi_series(self,base,res):
-        if res=="2T":  # ana timeframe
-            src=base["c"]
-        else:
-            tf=base.resample(res,label="left",closed="left").agg({"c":"last"}).dropna()
-            src=tf["c"]
-        r=talib.RSI(src.values,timeperiod=RSI_LEN)
-        out=pd.Series(r,index=src.index).reindex(base.index,method="ffill")
-        return out
+    def rsi_series(self,base,res,mtf=None):
+        # üst zaman dilimi RSI'ı ancak mum kapandıktan sonra görünür (lookahead yok)
+        mtf=mtf or MTFEngine(base,BOT_RES)
+        r=mtf.indicator(res,("rsi",RSI_LEN),
+                        lambda tf:talib.RSI(tf["c"].to_numpy(dtype=float),timeperiod=RSI_LEN))
+        return pd.Series(r,index=base.index)
 
     def calc_all_rsi(self,df):
-        return {f"r{i+1}":self.rsi_series(df,RSI_RES_LIST[i])
+        mtf=MTFEngine(df,BOT_RES)     # her zaman dilimi bir kez kurulur
+        return {f"r{i+1}":self.rsi_series(df,RSI_RES_LIST[i],mtf)
                 for i in range(7)}
 
     # ------------------ EMİR İŞLEYİŞİ -------------------------------------- #
     def _place_limit_set(self,price,ts):
         self.open_lims.clear()
-        for i in range(MAX_ORDERS):
-            lim_p=price*(1-STEP_PERC*i)
-            order_val=self.balance*EQ_PERC_PER_ORDER
-            qty   =order_val/lim_p
-            self.open_lims.append({"id":f"L{i}","p":lim_p,"qty":qty,"filled":False})
+        lim_p=price*(1-STEP_PERC*np.arange(MAX_ORDERS))
+        qty  =self.balance*EQ_PERC_PER_ORDER/lim_p
+        self.open_lims.place(lim_p,qty,lim_p*qty,tags=[f"L{i}" for i in range(MAX_ORDERS)])
         print(f"📌 20 limit emri yerleştirildi @{price:.5f}")
 
     def _check_fills(self,low,ts):
-        for o in self.open_lims:
-            if not o["filled"] and low<=o["p"]:
-                cost=o["p"]*o["qty"]
-                if self.balance<cost: continue
-                self.balance-=cost
-                self.pos_avg=(self.pos_avg*self.pos_qty+cost)/(self.pos_qty+o["qty"]) \
-                              if self.pos_qty>0 else o["p"]
-                self.pos_qty+=o["qty"]
-                o["filled"]=True
-                self.trades.append({"ts":ts,"type":"entry","price":o["p"],
-                                    "qty":o["qty"]})
-        # filled olmayanlar listede kalır
+        # low'un kestiği tüm basamaklar tek ikili aramayla, bakiye yettiği kadar
+        f=self.open_lims.fill(low,self.balance)
+        if f.stop==f.start: return
+        p,q=self.open_lims.price[f],self.open_lims.quantity[f]
+        self.balance-=float(self.open_lims.collateral[f].sum())
+        self.pos_qty,self.pos_avg=blend(self.pos_qty,self.pos_avg,p,q)
+        self.trades.extend({"ts":ts,"type":"entry","price":pi,"qty":qi}
+                           for pi,qi in zip(p.tolist(),q.tolist()))
+        # dolmayanlar merdivende kalır
 
     def _exit_if_tp(self,high,ts):
         if self.pos_qty==0: return
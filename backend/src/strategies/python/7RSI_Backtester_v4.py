@@ -11,8 +11,14 @@ inputs:   Source RSI=close | Bot period=2 dakika | Source Bot=ohlc4
 Çıkış:  avg_price·1.005 limit
 """
 
-import ccxt, pandas as pd, numpy as np, talib, time, pickle, os, warnings
+import pandas as pd, numpy as np, talib, time, pickle, os, warnings
 from datetime import datetime, timedelta
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from replay_exchange import create_exchange
+from mtf import MTFEngine
+from order_ladder import OrderLadder, blend
 warnings.filterwarnings("ignore")
 
 # ---------- PARAMETRELER ---------------------------------------------------- #
@@ -35,13 +41,13 @@ CACHE_FILE       = "bananas_2m_cache.pkl"
 
 class RSIStrategy2M:
     def __init__(self):
-        self.ex = ccxt.binance({"apiKey":API_KEY,
-                                "secret":API_SECRET,
-                                "enableRateLimit":True})
+        self.ex = create_exchange("binance", {"apiKey":API_KEY,
+                                              "secret":API_SECRET,
+                                              "enableRateLimit":True})
         self.balance  = 10_000.0
         self.pos_qty  = 0.0
         self.pos_avg  = 0.0
-        self.open_lims= []          # aktif limit emirleri
+        self.open_lims= OrderLadder("buy")   # aktif limit emirleri (fiyata göre sıralı)
         self.trades   = []
         self.equity   = []
 
@@ -79,43 +85,36 @@ class RSIStrategy2M:
         return df2
 
     # ------------------ RSI ------------------------------------------------- #
-    def rsi_series(self,base,res):
-        if res=="2T":  # ana timeframe
-            src=base["c"]
-        else:
-            tf=base.resample(res,label="left",closed="left").agg({"c":"last"}).dropna()
-            src=tf["c"]
-        r=talib.RSI(src.values,timeperiod=RSI_LEN)
-        out=pd.Series(r,index=src.index).reindex(base.index,method="ffill")
-        return out
+    def rsi_series(self,base,res,mtf=None):
+        # üst zaman dilimi RSI'ı ancak mum kapandıktan sonra görünür (lookahead yok)
+        mtf=mtf or MTFEngine(base,BOT_RES)
+        r=mtf.indicator(res,("rsi",RSI_LEN),
+                        lambda tf:talib.RSI(tf["c"].to_numpy(dtype=float),timeperiod=RSI_LEN))
+        return pd.Series(r,index=base.index)
 
     def calc_all_rsi(self,df):
-        return {f"r{i+1}":self.rsi_series(df,RSI_RES_LIST[i])
+        mtf=MTFEngine(df,BOT_RES)     # her zaman dilimi bir kez kurulur
+        return {f"r{i+1}":self.rsi_series(df,RSI_RES_LIST[i],mtf)
                 for i in range(7)}
 
     # ------------------ EMİR İŞLEYİŞİ -------------------------------------- #
     def _place_limit_set(self,price,ts):
         self.open_lims.clear()
-        for i in range(MAX_ORDERS):
-            lim_p=price*(1-STEP_PERC*i)
-            order_val=self.balance*EQ_PERC_PER_ORDER
-            qty   =order_val/lim_p
-            self.open_lims.append({"id":f"L{i}","p":lim_p,"qty":qty,"filled":False})
+        lim_p=price*(1-STEP_PERC*np.arange(MAX_ORDERS))
+        qty  =self.balance*EQ_PERC_PER_ORDER/lim_p
+        self.open_lims.place(lim_p,qty,lim_p*qty,tags=[f"L{i}" for i in range(MAX_ORDERS)])
         print(f"📌 20 limit emri yerleştirildi @{price:.5f}")
 
     def _check_fills(self,low,ts):
-        for o in self.open_lims:
-            if not o["filled"] and low<=o["p"]:
-                cost=o["p"]*o["qty"]
-                if self.balance<cost: continue
-                self.balance-=cost
-                self.pos_avg=(self.pos_avg*self.pos_qty+cost)/(self.pos_qty+o["qty"]) \
-                              if self.pos_qty>0 else o["p"]
-                self.pos_qty+=o["qty"]
-                o["filled"]=True
-                self.trades.append({"ts":ts,"type":"entry","price":o["p"],
-                                    "qty":o["qty"]})
-        # filled olmayanlar listede kalır
+        # low'un kestiği tüm basamaklar tek ikili aramayla, bakiye yettiği kadar
+        f=self.open_lims.fill(low,self.balance)
+        if f.stop==f.start: return
+        p,q=self.open_lims.price[f],self.open_lims.quantity[f]
+        self.balance-=float(self.open_lims.collateral[f].sum())
+        self.pos_qty,self.pos_avg=blend(self.pos_qty,self.pos_avg,p,q)
+        self.trades.extend({"ts":ts,"type":"entry","price":pi,"qty":qi}
+                           for pi,qi in zip(p.tolist(),q.tolist()))
+        # dolmayanlar merdivende kalır
 
     def _exit_if_tp(self,high,ts):
         if self.pos_qty==0: return
@@ -12,7 +12,6 @@ import asyncio
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-import ccxt.async_support as ccxt
 import pandas as pd
 import numpy as np
 import talib
@@ -25,6 +24,12 @@ import threading
 from typing import Dict, List, Optional
 from collections import defaultdict
 import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from replay_exchange import create_exchange
+from order_ladder import OrderLadder, blend
+from streaming import ResampledStream, StreamingRSI
 
 warnings.filterwarnings("ignore")
 
@@ -87,14 +92,14 @@ MIN_RSI_TIMEFRAMES = 4  # FIXED: Require at least 4 timeframes instead of 7
 class PaperTradingBot:
     def __init__(self):
         # Initialize exchange for data only
-        self.exchange = ccxt.bitget({
+        self.exchange = create_exchange('bitget', {
             'apiKey': API_KEY,
             'secret': API_SECRET,
             'sandbox': False,
             'enableRateLimit': True,
             'options': {'defaultType': 'future'},
             'timeout': 30000
-        })
+        }, async_support=True)
         
         # Paper Trading State
         self.balance = STARTING_BALANCE
@@ -113,6 +118,10 @@ class PaperTradingBot:
         self.order_id_counter = 1000
         self.trade_history = []
         
+        # Per-pair RSI state for every timeframe, fed with new 1m candles only
+        self.rsi_streams = {}
+        self.rsi_last_ts = {}
+        
         # Initialize state for each pair
         for pair in PAIRS:
             self.positions[pair] = {
@@ -121,7 +130,7 @@ class PaperTradingBot:
                 'unrealized_pnl': 0.0,
                 'collateral_used': 0.0
             }
-            self.open_orders[pair] = []
+            self.open_orders[pair] = OrderLadder('buy')
             self.last_signals[pair] = 0
 
     async def initialize(self):
@@ -222,41 +231,50 @@ class PaperTradingBot:
             return pd.Series(index=prices.index)
 
     async def calculate_multi_timeframe_rsi(self, pair: str) -> Dict[str, float]:
-        """Calculate RSI for all timeframes - FLEXIBLE VERSION"""
+        """Calculate RSI for all timeframes - FLEXIBLE VERSION (streamed from 1m candles)"""
         rsi_values = {}
         
         try:
-            base_df = await self.fetch_ohlcv_data(pair, '1m', limit=500)
+            # Only the 1m candles since the last poll are fetched and fed in
+            last_ts = self.rsi_last_ts.get(pair)
+            limit = 500
+            if last_ts is not None:
+                limit = int((time.time() * 1000 - last_ts) // 60000) + 2
+                if limit > 500:
+                    # Too long since the last poll: rebuild from a fresh 500-candle window
+                    last_ts, limit = None, 500
+                    self.rsi_streams.pop(pair, None)
+            base_df = await self.fetch_ohlcv_data(pair, '1m', limit=limit)
             if base_df.empty:
                 logger.error(f"❌ No base data for RSI calculation: {pair}")
                 return {}
             
-            for timeframe in RSI_RES_LIST:
-                try:
-                    if timeframe == '1m':
-                        df = base_df
-                    else:
-                        resample_rule = timeframe.replace('m', 'T').replace('h', 'H').replace('d', 'D')
-                        df = base_df.resample(resample_rule).agg({
-                            'open': 'first',
-                            'high': 'max', 
-                            'low': 'min',
-                            'close': 'last',
-                            'volume': 'sum'
-                        }).dropna()
-                    
-                    if len(df) >= RSI_LEN:
-                        rsi = self.calculate_rsi(df['close'])
-                        if not rsi.empty and not pd.isna(rsi.iloc[-1]):
-                            rsi_values[timeframe] = rsi.iloc[-1]
-                            logger.debug(f"✅ RSI for {pair} {timeframe}: {rsi.iloc[-1]:.2f}")
-                        else:
-                            logger.debug(f"⚠️ Invalid RSI for {pair} {timeframe}")
-                    else:
-                        logger.debug(f"⚠️ Insufficient data for RSI calculation: {pair} {timeframe} (got {len(df)}, need {RSI_LEN})")
-                        
-                except Exception as e:
-                    logger.error(f"❌ Error calculating RSI for {pair} {timeframe}: {e}")
+            streams = self.rsi_streams.get(pair)
+            if streams is None:
+                streams = {
+                    timeframe: ResampledStream(StreamingRSI(RSI_LEN), self.exchange.parse_timeframe(timeframe) * 1000)
+                    for timeframe in RSI_RES_LIST
+                }
+                self.rsi_streams[pair] = streams
+            
+            timestamps = (base_df.index - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+            closes = base_df['close'].tolist()
+            for ts, close in zip(timestamps.tolist(), closes):
+                if last_ts is not None and ts < last_ts:
+                    continue
+                for stream in streams.values():
+                    stream.add(ts, close)
+            self.rsi_last_ts[pair] = int(timestamps[-1])
+            
+            for timeframe, stream in streams.items():
+                # The forming candle counts, as the last resampled row always did
+                rsi = stream.peek()
+                if not np.isnan(rsi):
+                    rsi_values[timeframe] = rsi
+                    logger.debug(f"✅ RSI for {pair} {timeframe}: {rsi:.2f}")
+                else:
+                    logger.debug(f"⚠️ Insufficient data for RSI calculation: {pair} {timeframe} "
+                                 f"(got {stream.indicator.bars + 1}, need {RSI_LEN + 1})")
                     
         except Exception as e:
             logger.error(f"❌ Error in multi-timeframe RSI for {pair}: {e}")
@@ -300,7 +318,7 @@ class PaperTradingBot:
                     logger.warning(f"❌ No buying power available for {pair}")
                     return
             
-            orders_placed = 0
+            orders = []
             for i in range(orders_to_place):
                 limit_price = current_price * (1 - STEP_PERC * i)
                 quantity = ORDER_SIZE_USD / limit_price
@@ -318,9 +336,11 @@ class PaperTradingBot:
                     'filled': False
                 }
                 
-                self.open_orders[pair].append(order)
-                orders_placed += 1
+                orders.append(order)
                 
+            self.open_orders[pair].place([o['price'] for o in orders], [o['quantity'] for o in orders],
+                                         [o['collateral'] for o in orders], tags=orders)
+            orders_placed = len(orders)
             logger.info(f"✅ Placed {orders_placed} limit orders for {pair}")
             logger.info(f"💰 Collateral reserved: ${ORDER_SIZE_USD * orders_placed:.2f}")
             logger.info(f"⚡ Position value ({LEVERAGE}x): ${ORDER_SIZE_USD * LEVERAGE * orders_placed:.2f}")
@@ -336,46 +356,37 @@ class PaperTradingBot:
                 logger.error(f"❌ Invalid price for checking fills: {pair}")
                 return
                 
-            filled_orders = []
+            # All rungs at or above the price, as far as free collateral (balance - used) reaches
+            ladder = self.open_orders[pair]
+            filled = ladder.fill(current_price, self.balance, self.total_collateral_used)
+            if filled.stop == filled.start:
+                return
             
-            for order in self.open_orders[pair]:
-                if not order['filled'] and current_price <= order['price']:
-                    # Order gets filled
-                    available_collateral = self.calculate_available_collateral()
-                    
-                    if available_collateral >= order['collateral']:
-                        # Reserve collateral
-                        self.total_collateral_used += order['collateral']
-                        
-                        # Update position
-                        pos = self.positions[pair]
-                        total_cost = pos['entry_price'] * pos['size'] + order['price'] * order['quantity']
-                        total_size = pos['size'] + order['quantity']
-                        
-                        pos['entry_price'] = total_cost / total_size if total_size > 0 else order['price']
-                        pos['size'] = total_size
-                        pos['collateral_used'] += order['collateral']
-                        
-                        order['filled'] = True
-                        filled_orders.append(order)
-                        
-                        # Record trade
-                        trade = {
-                            'timestamp': datetime.now(),
-                            'pair': pair,
-                            'side': 'buy',
-                            'quantity': order['quantity'],
-                            'price': order['price'],
-                            'collateral': order['collateral'],
-                            'leverage': LEVERAGE,
-                            'type': 'entry'
-                        }
-                        self.trade_history.append(trade)
-                        
-                        logger.info(f"✅ Order filled: {pair} {order['quantity']:.6f} @ ${order['price']:.6f}")
-            
-            # Remove filled orders
-            self.open_orders[pair] = [o for o in self.open_orders[pair] if not o['filled']]
+            # Reserve collateral and update the position once for the whole run
+            collateral = float(ladder.collateral[filled].sum())
+            self.total_collateral_used += collateral
+            pos = self.positions[pair]
+            pos['size'], pos['entry_price'] = blend(pos['size'], pos['entry_price'],
+                                                    ladder.price[filled], ladder.quantity[filled])
+            pos['collateral_used'] += collateral
+            
+            for order in ladder.tags[filled]:
+                order['filled'] = True
+                
+                # Record trade
+                trade = {
+                    'timestamp': datetime.now(),
+                    'pair': pair,
+                    'side': 'buy',
+                    'quantity': order['quantity'],
+                    'price': order['price'],
+                    'collateral': order['collateral'],
+                    'leverage': LEVERAGE,
+                    'type': 'entry'
+                }
+                self.trade_history.append(trade)
+                
+                logger.info(f"✅ Order filled: {pair} {order['quantity']:.6f} @ ${order['price']:.6f}")
             
         except Exception as e:
             logger.error(f"❌ Error checking order fills for {pair}: {e}")
@@ -451,7 +462,7 @@ class PaperTradingBot:
             }
             
             # Cancel remaining orders
-            self.open_orders[pair] = []
+            self.open_orders[pair].cancel()
             
         except Exception as e:
             logger.error(f"❌ Error closing position for {pair}: {e}")
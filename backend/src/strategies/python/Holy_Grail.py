@@ -1,12 +1,16 @@
 # This Python code is subject to the terms of the Mozilla Public License 2.0 at https://mozilla.org/MPL/2.0/
 # © Intetics - Converted from Pine Script to Python
 
-import ccxt
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import time
+import sys
 import warnings
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from bulk_downloader import bulk_download
+from ohlcv_store import OHLCVStore
+from replay_exchange import create_exchange
 warnings.filterwarnings('ignore')
 
 class HolyGrailBacktester:
@@ -26,11 +30,12 @@ class HolyGrailBacktester:
         self.show_stats_table = True
         
         # Exchange setup
-        self.exchange = ccxt.bybit({
+        self.exchange = create_exchange('bybit', {
             'sandbox': False,
             'enableRateLimit': True,
             'timeout': 30000,
         })
+        self.store = OHLCVStore("ohlcv_store")
         
         # Initial capital
         self.initial_capital = 10000
@@ -69,45 +74,14 @@ class HolyGrailBacktester:
             return []
     
     def fetch_ohlcv_data(self, symbol, days=365):
-        """Fetch OHLCV data for specified days"""
+        """Fetch OHLCV data for specified days (only candles missing from the local store are downloaded)"""
         try:
             print(f"Fetching data for {symbol}...")
             
-            # Calculate timeframe
-            end_time = datetime.now()
-            start_time = end_time - timedelta(days=days)
-            since = int(start_time.timestamp() * 1000)
+            since = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
+            self.store.sync(self.exchange, symbol, '1h', since, pause=0.5)
             
-            # Fetch data in chunks due to API limits
-            all_data = []
-            current_since = since
-            
-            while current_since < int(end_time.timestamp() * 1000):
-                try:
-                    ohlcv = self.exchange.fetch_ohlcv(
-                        symbol, 
-                        timeframe='1h', 
-                        since=current_since, 
-                        limit=1000
-                    )
-                    
-                    if not ohlcv:
-                        break
-                        
-                    all_data.extend(ohlcv)
-                    current_since = ohlcv[-1][0] + 3600000  # Add 1 hour in ms
-                    
-                    # Rate limiting
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"Error fetching chunk: {e}")
-                    break
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(all_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df.drop_duplicates(subset=['timestamp']).sort_values('timestamp').reset_index(drop=True)
+            df = self.store.read_frame(self.exchange.id, symbol, '1h', since_ms=since).reset_index()
             
             print(f"Fetched {len(df)} candles for {symbol}")
             return df
@@ -293,6 +267,14 @@ class HolyGrailBacktester:
             print("No pairs found!")
             return
         
+        # Download all pairs concurrently up front; the loop below then reads from the store
+        since = int((datetime.now() - timedelta(days=365)).timestamp() * 1000)
+        try:
+            bulk_download(self.exchange.id, [(symbol, '1h', since) for symbol in top_pairs],
+                          self.store.root, config={'timeout': 30000})
+        except Exception as e:
+            print(f"Bulk download failed, fetching pairs one by one: {e}")
+        
         results = []
         
         for i, symbol in enumerate(top_pairs):
@@ -311,9 +293,6 @@ class HolyGrailBacktester:
             if result:
                 results.append(result)
                 print(f"Completed {symbol}: {result['total_return']:.2f}% return")
-            
-            # Rate limiting
-            time.sleep(1)
         
         # Display results
         self.display_results(results)
@@ -14,10 +14,13 @@ IMPORTANT: This strategy is optimized for MEXC zero-fee pairs
 Generated: 2025-08-31 20:13
 """
 
-import ccxt
 import pandas as pd
 import talib
 import vectorbt as vbt
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from replay_exchange import create_exchange
 
 # MEXC Zero-Fee Pairs
 ZEROFEE_PAIRS = ['XRP/USDT', 'USDC/USDT', 'EUR/USDT', 'IP/USDT', 'USDE/USDT', 'USD1/USDT', 'CAMP/USDT', 'BTR/USDT']
@@ -35,14 +38,14 @@ def fetch_data(symbol='XRP/USDT', days=365):
     """Fetch data from MEXC or Binance"""
     try:
         # Try MEXC first
-        exchange = ccxt.mexc({
+        exchange = create_exchange('mexc', {
             'apiKey': 'YOUR_API_KEY',
             'secret': 'YOUR_SECRET',
             'enableRateLimit': True
         })
     except:
         # Fallback to Binance
-        exchange = ccxt.binance({'enableRateLimit': True})
+        exchange = create_exchange('binance', {'enableRateLimit': True})
     
     since = exchange.milliseconds() - (days * 24 * 60 * 60 * 1000)
     all_ohlcv = []
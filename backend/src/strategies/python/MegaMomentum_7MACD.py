@@ -38,16 +38,21 @@ EXIT RULES:
 - Trailing stop at 2 ATR
 """
 
-import ccxt
 import pandas as pd
 import numpy as np
 import talib
 from datetime import datetime
 import time
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from replay_exchange import create_exchange
+from streaming import (StreamRegistry, StreamingADX, StreamingEMA, StreamingMACD,
+                       StreamingRSI, StreamingSMA)
 
 class MegaMomentum_7MACD_Enhanced:
     def __init__(self):
-        self.exchange = ccxt.binance({
+        self.exchange = create_exchange('binance', {
             'enableRateLimit': True,
             'options': {'defaultType': 'spot'}
         })
@@ -78,6 +83,9 @@ class MegaMomentum_7MACD_Enhanced:
         "volume_multiplier": 1.5
 }
         
+        # Indicator state kept between polls: only newly closed candles are fed in
+        self.streams = StreamRegistry()
+        
     def fetch_data(self):
         """Fetch latest market data"""
         try:
@@ -115,13 +123,42 @@ class MegaMomentum_7MACD_Enhanced:
         
         return df
     
+    def latest_indicators(self, df):
+        """Indicators for the last (forming) candle, updated incrementally between polls"""
+        timestamps = ((df['timestamp'] - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)).to_numpy()
+        close = df['close'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        
+        def latest(name, factory, *columns):
+            return self.streams.latest((self.symbol, self.timeframe, name), factory, timestamps, *columns)
+        
+        hist1 = latest('macd_fast', lambda: StreamingMACD(8, 17, 9), close)[2]
+        hist2 = latest('macd_standard', lambda: StreamingMACD(12, 26, 9), close)[2]
+        hist3 = latest('macd_slow', lambda: StreamingMACD(5, 35, 5), close)[2]
+        volume_sma = latest('volume_sma', lambda: StreamingSMA(20), volume)
+        
+        return {
+            'close': close[-1],
+            'macd_hist_fast': hist1,
+            'macd_hist_standard': hist2,
+            'macd_hist_slow': hist3,
+            'macd_alignment': int(hist1 > 0 and hist2 > 0 and hist3 > 0),
+            'adx': latest('adx', lambda: StreamingADX(14), high, low, close),
+            'rsi': latest('rsi', lambda: StreamingRSI(14), close),
+            'ema_fast': latest('ema_fast', lambda: StreamingEMA(9), close),
+            'ema_slow': latest('ema_slow', lambda: StreamingEMA(21), close),
+            'volume_sma': volume_sma,
+            'volume_ratio': volume[-1] / volume_sma,
+        }
+    
     def generate_signal(self, df):
         """Generate trading signal"""
         if len(df) < 100:
             return 'HOLD'
         
-        df = self.calculate_indicators(df)
-        current = df.iloc[-1]
+        current = self.latest_indicators(df)
         
         # Entry conditions
         if not self.position:
@@ -1,15 +1,19 @@
-import ccxt
 import pandas as pd
 import numpy as np
 import os
 import time
 from datetime import datetime, timedelta
 import warnings
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backtests"))
+from indicators import divergence, pivot_mask
+from replay_exchange import create_exchange
 warnings.filterwarnings('ignore')
 
 class ExactRSIDivergenceBacktester:
     def __init__(self):
-        self.exchange = ccxt.binance()
+        self.exchange = create_exchange('binance')
         self.timeframe = '5m'
         self.days_back = 90
         self.csv_folder = 'ohlcv_data'
@@ -136,47 +140,13 @@ class ExactRSIDivergenceBacktester:
     
     def find_pivot_lows(self, rsi_values):
         """Find pivot lows exactly like Pine Script"""
-        pivot_lows = np.full(len(rsi_values), False)
-        
-        for i in range(self.lookback_left, len(rsi_values) - self.lookback_right):
-            left_values = rsi_values[i-self.lookback_left:i]
-            right_values = rsi_values[i+1:i+self.lookback_right+1]
-            current_value = rsi_values[i]
-            
-            # Check if current value is lowest in the window
-            if (np.all(current_value <= left_values) and 
-                np.all(current_value <= right_values) and
-                not np.isnan(current_value)):
-                pivot_lows[i] = True
-        
-        return pivot_lows
+        # <= every bar of the left / right windows (ties count); a NaN in the window vetoes
+        return pivot_mask(rsi_values, self.lookback_left, self.lookback_right, high=False, skip_nan=False)
     
     def find_pivot_highs(self, rsi_values):
         """Find pivot highs exactly like Pine Script"""
-        pivot_highs = np.full(len(rsi_values), False)
-        
-        for i in range(self.lookback_left, len(rsi_values) - self.lookback_right):
-            left_values = rsi_values[i-self.lookback_left:i]
-            right_values = rsi_values[i+1:i+self.lookback_right+1]
-            current_value = rsi_values[i]
-            
-            # Check if current value is highest in the window
-            if (np.all(current_value >= left_values) and 
-                np.all(current_value >= right_values) and
-                not np.isnan(current_value)):
-                pivot_highs[i] = True
-        
-        return pivot_highs
-    
-    def in_range(self, condition_array, current_index):
-        """Replicate Pine Script's _inRange function exactly"""
-        # Find the most recent True value before current index
-        recent_indices = np.where(condition_array[:current_index])[0]
-        if len(recent_indices) == 0:
-            return False
-        
-        bars_since = current_index - recent_indices[-1]
-        return self.range_lower <= bars_since <= self.range_upper
+        # >= every bar of the left / right windows (ties count); a NaN in the window vetoes
+        return pivot_mask(rsi_values, self.lookback_left, self.lookback_right, high=True, skip_nan=False)
     
     def detect_divergence_exact(self, df):
         """Detect RSI divergence exactly like Pine Script"""
@@ -189,43 +159,11 @@ class ExactRSIDivergenceBacktester:
         df['rsi_pivot_low'] = self.find_pivot_lows(df['rsi'].values)
         df['rsi_pivot_high'] = self.find_pivot_highs(df['rsi'].values)
         
-        # Initialize divergence signals
-        df['bull_divergence'] = False
-        df['bear_divergence'] = False
-        
-        # Detect divergences using exact Pine Script logic
-        for i in range(self.lookback_right, len(df)):
-            rsi_lookback = df['rsi'].iloc[i - self.lookback_right]
-            
-            # Bullish divergence detection
-            if df['rsi_pivot_low'].iloc[i - self.lookback_right]:
-                if self.in_range(df['rsi_pivot_low'].values, i):
-                    # Find previous pivot low
-                    prev_pivot_indices = np.where(df['rsi_pivot_low'].iloc[:i-self.lookback_right])[0]
-                    if len(prev_pivot_indices) > 0:
-                        prev_idx = prev_pivot_indices[-1]
-                        prev_rsi = df['rsi'].iloc[prev_idx]
-                        prev_low = df['low'].iloc[prev_idx]
-                        current_low = df['low'].iloc[i - self.lookback_right]
-                        
-                        # RSI higher low + Price lower low = Bullish divergence
-                        if rsi_lookback > prev_rsi and current_low < prev_low:
-                            df.iloc[i, df.columns.get_loc('bull_divergence')] = True
-            
-            # Bearish divergence detection
-            if df['rsi_pivot_high'].iloc[i - self.lookback_right]:
-                if self.in_range(df['rsi_pivot_high'].values, i):
-                    # Find previous pivot high
-                    prev_pivot_indices = np.where(df['rsi_pivot_high'].iloc[:i-self.lookback_right])[0]
-                    if len(prev_pivot_indices) > 0:
-                        prev_idx = prev_pivot_indices[-1]
-                        prev_rsi = df['rsi'].iloc[prev_idx]
-                        prev_high = df['high'].iloc[prev_idx]
-                        current_high = df['high'].iloc[i - self.lookback_right]
-                        
-                        # RSI lower high + Price higher high = Bearish divergence
-                        if rsi_lookback < prev_rsi and current_high > prev_high:
-                            df.iloc[i, df.columns.get_loc('bear_divergence')] = True
+        # Pivot confirmed lookback_right bars ago vs the previous pivot of its kind
+        df['bull_divergence'], df['bear_divergence'] = divergence(
+            df['rsi'].values, df['low'].values, df['high'].values,
+            df['rsi_pivot_low'].values, df['rsi_pivot_high'].values,
+            self.lookback_right, self.range_lower, self.range_upper)
         
         return df
     
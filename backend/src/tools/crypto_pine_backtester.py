@@ -17,7 +17,7 @@ Converts all Pine Script strategies to Python:
 Features:
 - Top 100 cryptocurrency pairs via CCXT
 - 365-day backtesting period
-- CSV caching system
+- Incremental candle cache (only missing candles are downloaded)
 - Performance metrics (ROI, Max Drawdown, Sharpe Ratio)
 - Parallel processing for multiple pairs
 - Sorted results by performance
@@ -25,17 +25,22 @@ Features:
 
 import numpy as np
 import pandas as pd
-import ccxt
 import os
+import sys
 import json
 from datetime import datetime, timedelta
-import time
 from typing import Dict, List, Tuple, Optional
 import warnings
 from concurrent.futures import ThreadPoolExecutor
 import pandas_ta as ta
 from pathlib import Path
 
+# Shared backtest modules live next door in backend/src/backtests
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backtests"))
+from ohlcv_store import OHLCVStore
+from replay_exchange import create_exchange
+from stage_timer import StageTimer
+
 warnings.filterwarnings('ignore')
 
 class CryptoPineBacktester:
@@ -51,12 +56,14 @@ class CryptoPineBacktester:
         self.max_workers = max_workers
         self.data_dir = Path("crypto_data")
         self.data_dir.mkdir(exist_ok=True)
+        self.store = OHLCVStore(self.data_dir)
 
         # Initialize exchange (using Binance for data)
-        self.exchange = ccxt.binance()
+        self.exchange = create_exchange('binance')
 
         # Performance tracking
         self.results = []
+        self.timer = StageTimer()
 
         print("🚀 CryptoPineBacktester Initialized!")
         print(f"💰 Initial Capital: ${initial_capital:,.2f}")
@@ -105,49 +112,20 @@ class CryptoPineBacktester:
             ]
 
     def fetch_historical_data(self, symbol: str, timeframe: str = '1h', days: int = 365) -> pd.DataFrame:
-        """Fetch historical OHLCV data with CSV caching"""
-
-        # Create filename for caching
-        filename = f"{symbol.replace('/', '_')}_{timeframe}_{days}d.csv"
-        filepath = self.data_dir / filename
+        """Fetch historical OHLCV data, topping up the local candle store with missing candles only"""
 
-        # Check if cached data exists and is recent (less than 1 day old)
-        if filepath.exists():
-            file_age = time.time() - filepath.stat().st_mtime
-            if file_age < 86400:  # Less than 24 hours
-                print(f"📁 Loading cached data for {symbol}")
-                try:
-                    df = pd.read_csv(filepath, index_col=0, parse_dates=True)
-                    return df
-                except:
-                    print(f"⚠️  Cached data corrupted for {symbol}, refetching...")
+        since = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
 
-        # Fetch fresh data
-        print(f"🌐 Fetching fresh data for {symbol}...")
         try:
-            # Calculate since timestamp
-            since = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
-
-            # Fetch OHLCV data
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since)
-
-            if not ohlcv:
-                raise Exception(f"No data returned for {symbol}")
-
-            # Convert to DataFrame
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-
-            # Save to CSV
-            df.to_csv(filepath)
-            print(f"💾 Cached data for {symbol}")
-
-            return df
-
+            stats = self.store.sync(self.exchange, symbol, timeframe, since)
+            if stats['requests']:
+                print(f"🌐 {symbol}: +{stats['new_rows']} candles in {stats['requests']} requests")
+            else:
+                print(f"📁 Loading cached data for {symbol}")
         except Exception as e:
             print(f"❌ Error fetching {symbol}: {e}")
-            return pd.DataFrame()
+
+        return self.store.read_frame(self.exchange.id, symbol, timeframe, since_ms=since)
 
     def calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate all technical indicators needed for strategies"""
@@ -602,24 +580,36 @@ class CryptoPineBacktester:
             'sharpe_ratio': round(sharpe_ratio, 2)
         }
 
-    def run_strategy_on_pair(self, symbol: str, strategy_func, strategy_name: str) -> Dict:
-        """Run a single strategy on a trading pair"""
+    def prepare_pair(self, symbol: str) -> pd.DataFrame:
+        """Fetch and enrich a pair once, for every strategy run on it"""
+
+        with self.timer.stage('load'):
+            df = self.fetch_historical_data(symbol)
+        if df.empty:
+            return df
+
+        with self.timer.stage('indicators'):
+            return self.calculate_technical_indicators(df)
+
+    def run_strategy_on_pair(self, symbol: str, strategy_func, strategy_name: str,
+                             df: Optional[pd.DataFrame] = None) -> Dict:
+        """Run a single strategy on a trading pair (on the prepared frame if given)"""
 
         print(f"🔄 Running {strategy_name} on {symbol}")
 
-        # Fetch data
-        df = self.fetch_historical_data(symbol)
+        # Fetch data and calculate indicators unless the pair is already prepared
+        if df is None:
+            df = self.prepare_pair(symbol)
         if df.empty:
             return {'symbol': symbol, 'strategy': strategy_name, 'error': 'No data'}
 
-        # Calculate indicators
-        df = self.calculate_technical_indicators(df)
-
-        # Run strategy
-        signals = strategy_func(df)
+        # Run strategy on a shallow copy, so the columns it adds stay out of the shared frame
+        with self.timer.stage('signals'):
+            signals = strategy_func(df.copy(deep=False))
 
         # Backtest
-        results = self.backtest_strategy(df, signals, strategy_name)
+        with self.timer.stage('backtest'):
+            results = self.backtest_strategy(df, signals, strategy_name)
         results['symbol'] = symbol
 
         return results
@@ -640,10 +630,16 @@ class CryptoPineBacktester:
             '🎯 Candle Channel': self.strategy_candle_channel
         }
 
+        # Load and enrich once, then run every strategy on the shared frame
+        df = self.prepare_pair(symbol)
+        self.timer.reused('load', len(strategies) - 1)
+        if not df.empty:
+            self.timer.reused('indicators', len(strategies) - 1)
+
         pair_results = []
 
         for strategy_name, strategy_func in strategies.items():
-            result = self.run_strategy_on_pair(symbol, strategy_func, strategy_name)
+            result = self.run_strategy_on_pair(symbol, strategy_func, strategy_name, df)
             pair_results.append(result)
 
         return pair_results
@@ -702,6 +698,8 @@ class CryptoPineBacktester:
             # Add ranking
             results_df['rank'] = range(1, len(results_df) + 1)
 
+        print("\n⏱️  Stage timings:\n" + self.timer.summary())
+
         return results_df
 
     def save_results(self, results_df: pd.DataFrame, filename: str = None) -> str:
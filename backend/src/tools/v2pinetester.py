@@ -20,138 +20,41 @@ from typing import Dict, List, Literal, Optional
 import concurrent.futures as _fut
 import json
 import os
-import time
+import sys
 import warnings
 
 # ─────────────────── THIRD-PARTY LIBS  ───────────────────
-import ccxt
 import numpy as np
 import pandas as pd
 
-# Attempt to import TA-Lib, provide installation instructions if missing
-try:
-    import talib
-except ImportError:
-    print("⚠️ TA-Lib not found. Please install it for the indicators to work.")
-    print("Installation instructions can be found at: https://github.com/mrjbq7/ta-lib")
-    # As TA-Lib is a hard dependency for indicators, we exit if it's not found.
-    exit()
+# Shared backtest modules live next door in backend/src/backtests
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backtests"))
+from indicators import IndicatorSet
+from ohlcv_store import OHLCVStore
+from perf_metrics import performance, period_returns
+from position_sim import simulate
+from replay_exchange import create_exchange
+from stage_timer import StageTimer
 
 warnings.filterwarnings('ignore')
 
 # ────────────────────  INDICATORS  ───────────────────────
-class TechnicalIndicators:
-    """Professional technical indicators library using TA-Lib and custom implementations."""
+class TechnicalIndicators(IndicatorSet):
+    """Technical indicators in the TA-Lib flavour, from the shared kernels in backtests/indicators.py."""
 
-    @staticmethod
-    def sma(series, period):
-        """Simple Moving Average"""
-        return pd.Series(talib.SMA(series.values, timeperiod=period), index=series.index)
-
-    @staticmethod
-    def ema(series, period):
-        """Exponential Moving Average"""
-        return pd.Series(talib.EMA(series.values, timeperiod=period), index=series.index)
-
-    @staticmethod
-    def smma(series, period):
-        """Smoothed Moving Average (Williams Alligator)"""
-        smma = pd.Series(index=series.index, dtype=float)
-        # First value is just the first price
-        smma.iloc[0] = series.iloc[0]
-        for i in range(1, len(series)):
-            # If previous SMMA is NaN, use the current price to start the calculation
-            if pd.isna(smma.iloc[i-1]):
-                smma.iloc[i] = series.iloc[i]
-            else:
-                smma.iloc[i] = (smma.iloc[i-1] * (period - 1) + series.iloc[i]) / period
-        return smma
-
-    @staticmethod
-    def rsi(series, period=14):
-        """Relative Strength Index"""
-        return pd.Series(talib.RSI(series.values, timeperiod=period), index=series.index)
-
-    @staticmethod
-    def atr(high, low, close, period=14):
-        """Average True Range"""
-        return pd.Series(talib.ATR(high.values, low.values, close.values, timeperiod=period), index=close.index)
+    smma_seed = 'first'
 
-    @staticmethod
-    def vwap(high, low, close, volume):
-        """Volume Weighted Average Price - Custom implementation"""
-        typical_price = (high + low + close) / 3
-        # Use cumsum for cumulative calculation
-        vwap_num = (typical_price * volume).cumsum()
-        vwap_den = volume.cumsum()
-        # Avoid division by zero
-        return vwap_num / vwap_den.replace(0, np.nan)
-
-    @staticmethod
-    def bbands(series, period=20, std_dev=2):
+    @classmethod
+    def bbands(cls, series, period=20, std_dev=2):
         """Bollinger Bands"""
-        upper, middle, lower = talib.BBANDS(series.values, timeperiod=period, nbdevup=std_dev, nbdevdn=std_dev)
-        return pd.DataFrame({
-            'upper': pd.Series(upper, index=series.index),
-            'middle': pd.Series(middle, index=series.index),
-            'lower': pd.Series(lower, index=series.index)
-        })
-
-    @staticmethod
-    def supertrend(high, low, close, period=14, multiplier=3.0):
-        """SuperTrend Indicator - Custom implementation"""
-        atr = TechnicalIndicators.atr(high, low, close, period)
-        hl2 = (high + low) / 2
-        upper_band = hl2 + (multiplier * atr)
-        lower_band = hl2 - (multiplier * atr)
-        supertrend = pd.Series(index=close.index, dtype=float)
-        direction = pd.Series(index=close.index, dtype=int)
-
-        # Initialize the first values to start the trend
-        direction.iloc[0] = 1
-        supertrend.iloc[0] = lower_band.iloc[0]
-
-        for i in range(1, len(close)):
-            # If the current close breaks above the previous upper band, start an uptrend
-            if close.iloc[i] > upper_band.shift(1).iloc[i]:
-                direction.iloc[i] = 1
-            # If the current close breaks below the previous lower band, start a downtrend
-            elif close.iloc[i] < lower_band.shift(1).iloc[i]:
-                direction.iloc[i] = -1
-            # Otherwise, continue the current trend
-            else:
-                direction.iloc[i] = direction.iloc[i-1]
-
-            # Set the SuperTrend line based on the current direction
-            if direction.iloc[i] == 1:
-                supertrend.iloc[i] = lower_band.iloc[i]
-            else:
-                supertrend.iloc[i] = upper_band.iloc[i]
-        
-        return pd.DataFrame({'supertrend': supertrend, 'direction': direction})
-
-
-    @staticmethod
-    def pivot_high(high, left_bars=12, right_bars=12):
-        """Pivot High Detection for ZigZag-like patterns"""
-        pivots = pd.Series(index=high.index, dtype=float)
-        for i in range(left_bars, len(high) - right_bars):
-            # Check if the current bar is the highest in the window
-            window = high.iloc[i-left_bars:i+right_bars+1]
-            if high.iloc[i] == window.max():
-                pivots.iloc[i] = high.iloc[i]
-        return pivots
-
-    @staticmethod
-    def pivot_low(low, left_bars=12, right_bars=12):
-        """Pivot Low Detection for ZigZag-like patterns"""
-        pivots = pd.Series(index=low.index, dtype=float)
-        for i in range(left_bars, len(low) - right_bars):
-            # Check if the current bar is the lowest in the window
-            window = low.iloc[i-left_bars:i+right_bars+1]
-            if low.iloc[i] == window.min():
-                pivots.iloc[i] = low.iloc[i]
-        return pivots
+        upper, middle, lower = cls.bollinger_bands(series, period, std_dev)
+        return pd.DataFrame({'upper': upper, 'middle': middle, 'lower': lower})
+
+    @classmethod
+    def supertrend(cls, high, low, close, period=14, multiplier=3.0):
+        """SuperTrend Indicator"""
+        line, direction = super().supertrend(high, low, close, period, multiplier)
+        return pd.DataFrame({'supertrend': line, 'direction': direction})
     
     @staticmethod
     def hann_filter(series, length):
@@ -190,8 +93,10 @@ class CryptoPineBacktester:
         self.fee_rate = commission
         self._data_dir = Path("crypto_data")
         self._data_dir.mkdir(exist_ok=True)
-        self.exchange = ccxt.binance()
+        self._store = OHLCVStore(self._data_dir)
+        self.exchange = create_exchange('binance')
         self.max_workers = max_workers
+        self.timer = StageTimer()
         print("🚀 CryptoPineBacktester Initialized!")
         print(f"💰 Initial Capital: ${initial_capital:,.2f}")
         print(f"📏 Order Size (USD): ${order_size_usd:,.2f}")
@@ -231,26 +136,18 @@ class CryptoPineBacktester:
             ]
             
     def fetch_historical_data(self, symbol: str, timeframe: str = '1h', days: int = 365) -> pd.DataFrame:
-        """Fetches historical OHLCV data for a given symbol, with local CSV caching."""
-        filename = f"{symbol.replace('/', '_')}_{timeframe}_{days}d.csv"
-        filepath = self._data_dir / filename
-        
-        if filepath.exists() and (time.time() - filepath.stat().st_mtime) < 86400: # 24 hours
-            print(f"📁 Loading cached data for {symbol}...")
-            return pd.read_csv(filepath, index_col='timestamp', parse_dates=True)
+        """Fetches historical OHLCV data for a given symbol, topping up a local memory-mapped cache."""
+        since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
 
-        print(f"🌐 Fetching fresh data for {symbol}...")
         try:
-            since = self.exchange.parse8601((datetime.now() - timedelta(days=days)).isoformat())
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            df.to_csv(filepath)
-            return df
+            stats = self._store.sync(self.exchange, symbol, timeframe, since)
+            if stats['requests']:
+                print(f"🌐 {symbol}: +{stats['new_rows']} candles in {stats['requests']} requests")
+            else:
+                print(f"📁 Loading cached data for {symbol}...")
         except Exception as e:
             print(f"❌ Error fetching {symbol}: {e}")
-            return pd.DataFrame()
+        return self._store.read_frame(self.exchange.id, symbol, timeframe, since_ms=since)
 
     def calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculates all necessary technical indicators for the strategies."""
@@ -381,81 +278,29 @@ class CryptoPineBacktester:
         df: pd.DataFrame,
         signals: pd.Series,
     ) -> tuple[list[Trade], list[float]]:
-        """Executes one pass through the price series, converting signals into trades."""
-        trades: list[Trade] = []
-        equity_curve: list[float] = []
-        cash: float = self.cash0
-        position_qty: float = 0.0
-        entry_px: float = 0.0
-
-        for i, (ts, row_sig) in enumerate(signals.items()):
-            px = df.at[ts, "close"]
-
-            # Update unrealised equity at each bar
-            if position_qty != 0:
-                # For longs, profit is current_px - entry_px. For shorts, it's entry_px - current_px.
-                # This is equivalent to (px - entry_px) * position_qty (since qty is negative for shorts)
-                unrealised_pnl = (px - entry_px) * position_qty
-                equity = cash + unrealised_pnl
-            else:
-                equity = cash
-            equity_curve.append(equity)
-            
-            # --- Evaluate Signal and Execute Trades ---
-            # Signal to go LONG (and not already long)
-            if row_sig == 1 and position_qty >= 0:
-                # If currently short, close the position first
-                if position_qty < 0:
-                    pnl = (entry_px - px) * abs(position_qty) - (self.order_size_usd + abs(position_qty) * px) * self.fee_rate
-                    cash += pnl
-                    trades[-1].exit_idx = i
-                    trades[-1].exit_px = px
-                    trades[-1].pnl = pnl
-                    trades[-1].bars_held = i - trades[-1].entry_idx
-
-                # Open new long position
-                qty = self.order_size_usd / px
-                fee = qty * px * self.fee_rate
-                cash -= fee
-                position_qty = qty
-                entry_px = px
-                trades.append(Trade(i, None, "long", qty, px))
-            
-            # Signal to go SHORT (and not already short)
-            elif row_sig == -1 and position_qty <= 0:
-                # If currently long, close the position first
-                if position_qty > 0:
-                    pnl = (px - entry_px) * position_qty - (self.order_size_usd + position_qty * px) * self.fee_rate
-                    cash += pnl
-                    trades[-1].exit_idx = i
-                    trades[-1].exit_px = px
-                    trades[-1].pnl = pnl
-                    trades[-1].bars_held = i - trades[-1].entry_idx
-
-                # Open new short position
-                qty = self.order_size_usd / px
-                fee = qty * px * self.fee_rate
-                cash -= fee
-                position_qty = -qty # Quantity is negative for shorts
-                entry_px = px
-                trades.append(Trade(i, None, "short", -qty, px))
-
-        # At the end of the data, force-close any open position
-        if position_qty != 0:
-            px = df["close"].iloc[-1]
-            pnl = 0
-            if position_qty > 0: # Close long
-                pnl = (px - entry_px) * position_qty - (self.order_size_usd + position_qty * px) * self.fee_rate
-            else: # Close short
-                pnl = (entry_px - px) * abs(position_qty) - (self.order_size_usd + abs(position_qty) * px) * self.fee_rate
-            cash += pnl
-            trades[-1].exit_idx = len(df) - 1
-            trades[-1].exit_px = px
-            trades[-1].pnl = pnl
-            trades[-1].bars_held = (len(df) - 1) - trades[-1].entry_idx
-            equity_curve.append(cash)
-
-        return trades, equity_curve
+        """Converts signals into trades with the position simulator's 'pine' mode."""
+        close = df["close"].reindex(signals.index).to_numpy(dtype=np.float64)
+        sim = simulate(
+            close, signals.to_numpy(), "pine",
+            initial_capital=self.cash0, order_size=self.order_size_usd, fee_rate=self.fee_rate,
+        )
+        trades = [
+            Trade(
+                entry_idx=entry,
+                exit_idx=exit_ if exit_ >= 0 else None,
+                side="long" if side > 0 else "short",
+                qty=qty * side,
+                entry_px=entry_px,
+                exit_px=exit_px if exit_ >= 0 else None,
+                pnl=pnl,
+                bars_held=exit_ - entry if exit_ >= 0 else 0,
+            )
+            for entry, exit_, side, qty, entry_px, exit_px, pnl in zip(
+                sim.entry_idx.tolist(), sim.exit_idx.tolist(), sim.side.tolist(), sim.quantity.tolist(),
+                sim.entry_price.tolist(), sim.exit_price.tolist(), sim.pnl.tolist(),
+            )
+        ]
+        return trades, sim.equity.tolist()
 
     # ──────────────────  METRIC SUITE  ──────────────────
     def _stats(self, trades: list[Trade], equity: list[float]) -> Dict:
@@ -463,29 +308,18 @@ class CryptoPineBacktester:
         if not equity:
             return dict(total_return=0, max_drawdown=0, sharpe_ratio=0, win_rate=0, total_trades=0, avg_trade_pnl=0)
 
-        equity_series = pd.Series(equity)
-        total_return = (equity_series.iloc[-1] / self.cash0 - 1) * 100
-        
-        # Max Drawdown
-        roll_max = equity_series.cummax()
-        drawdown = (equity_series - roll_max) / roll_max * 100
-        max_dd = drawdown.min() if not drawdown.empty else 0
-
-        # Sharpe Ratio (annualized, assuming hourly data)
-        daily_returns = equity_series.pct_change().dropna()
-        if daily_returns.std() > 0:
-            sharpe_ratio = (daily_returns.mean() / daily_returns.std()) * np.sqrt(24 * 365)
-        else:
-            sharpe_ratio = 0
-        
+        equity_arr = np.asarray(equity, dtype=np.float64)
+        # Hourly bars: returns annualised over 24 * 365 periods, pandas-style sample std
+        curve = performance(period_returns(equity_arr), equity_arr, periods_per_year=24 * 365, ddof=1)
+        total_return = curve["total_return"]
+        max_dd = 0.0 - curve["max_drawdown"]  # reported as a negative percentage
+        sharpe_ratio = curve["sharpe"]
+
         # Trade-based stats
-        if trades:
-            trade_pnls = np.array([t.pnl for t in trades if t.pnl is not None])
-            total_trades = len(trade_pnls)
-            win_rate = np.sum(trade_pnls > 0) / total_trades * 100 if total_trades > 0 else 0
-            avg_trade_pnl = trade_pnls.mean() if total_trades > 0 else 0
-        else:
-            total_trades, win_rate, avg_trade_pnl = 0, 0, 0
+        trade_stats = performance([t.pnl for t in trades if t.pnl is not None])
+        total_trades = trade_stats["trades"]
+        win_rate = trade_stats["win_rate"]
+        avg_trade_pnl = trade_stats["mean"]
 
         return dict(
             total_return=round(total_return, 2),
@@ -494,23 +328,37 @@ class CryptoPineBacktester:
             win_rate=round(win_rate, 2),
             total_trades=total_trades,
             avg_trade_pnl=round(avg_trade_pnl, 2),
-            final_equity=round(equity_series.iloc[-1], 2),
+            final_equity=round(equity[-1], 2),
         )
 
+    # ──────────────────  PAIR PIPELINE  ──────────────────
+    def prepare_pair(self, symbol: str) -> pd.DataFrame:
+        """Loads and enriches one pair's frame, to be shared by every strategy on that pair."""
+        with self.timer.stage("load"):
+            df = self.fetch_historical_data(symbol, days=365)
+        if df.empty:
+            return df
+        with self.timer.stage("indicators"):
+            return self.calculate_technical_indicators(df)
+
     # ──────────────────  RUN ONE STRAT  ──────────────────
-    def _run_one(self, symbol: str, strategy_name: str, strategy_func) -> Dict:
-        """Runs a single strategy on a single symbol."""
+    def _run_one(self, symbol: str, strategy_name: str, strategy_func, df: Optional[pd.DataFrame] = None) -> Dict:
+        """Runs a single strategy on a single symbol, on the prepared frame if one is given."""
         print(f"🔄 Running {strategy_name} on {symbol}...")
-        df = self.fetch_historical_data(symbol, days=365)
+        if df is None:
+            df = self.prepare_pair(symbol)
         if df.empty:
             return {"symbol": symbol, "strategy": strategy_name, "error": "No data"}
 
-        df = self.calculate_technical_indicators(df)
-        sig_df = strategy_func(df)
-        sig = sig_df["signal"].fillna(0).astype(int)
+        with self.timer.stage("signals"):
+            # Shallow copy: a strategy adding columns must not leak them into the shared frame
+            sig_df = strategy_func(df.copy(deep=False))
+            sig = sig_df["signal"].fillna(0).astype(int)
 
-        trades, equity = self._run_signal_engine(df, sig)
-        stats = self._stats(trades, equity)
+        with self.timer.stage("engine"):
+            trades, equity = self._run_signal_engine(df, sig)
+        with self.timer.stage("stats"):
+            stats = self._stats(trades, equity)
         stats.update(symbol=symbol, strategy=strategy_name)
         return stats
 
@@ -528,10 +376,12 @@ class CryptoPineBacktester:
             "⚡ ZigZag Ultra": self.strategy_zigzag_ultra,
             "🎯 Candle Channel": self.strategy_candle_channel,
         }
-        results = []
-        for name, func in strat_map.items():
-            results.append(self._run_one(symbol, name, func))
-        return results
+        # One load and one indicator pass per pair, whatever the number of strategies
+        df = self.prepare_pair(symbol)
+        self.timer.reused("load", len(strat_map) - 1)
+        if not df.empty:
+            self.timer.reused("indicators", len(strat_map) - 1)
+        return [self._run_one(symbol, name, func, df) for name, func in strat_map.items()]
 
     def run_full_backtest(self, max_pairs: int = 50) -> pd.DataFrame:
         """Runs all strategies across multiple pairs in parallel."""
@@ -556,6 +406,7 @@ class CryptoPineBacktester:
                 .sort_values("sharpe_ratio", ascending=False) # Sort by Sharpe for risk-adjusted return
                 .reset_index(drop=True))
         df["rank"] = np.arange(1, len(df) + 1)
+        print("\n⏱️ Stage timings:\n" + self.timer.summary())
         return df
 
 # ─────────────────────  DEMO HOOK  ──────────────────────